@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Скрипт для переноса старых сессий в годовые архивы (archive/mtimer-<год>.db)
+
+Приложение продолжает показывать архивные сессии в списках и статистике.
+"""
+
+import argparse
+
+from database import ARCHIVE_AFTER_MONTHS, Database
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Перенос старых сессий в архив")
+    parser.add_argument(
+        "--months",
+        type=int,
+        default=ARCHIVE_AFTER_MONTHS,
+        help=f"архивировать сессии старше N месяцев (по умолчанию {ARCHIVE_AFTER_MONTHS})",
+    )
+    args = parser.parse_args()
+
+    db = Database()
+    moved = db.archive_sessions(args.months)
+    if moved is None:
+        print("✗ Архивирование не удалось, данные не изменены")
+    elif moved:
+        for year, count in sorted(moved.items()):
+            print(f"✓ {year}: перенесено сессий: {count}")
+    else:
+        print("ℹ Нет сессий для архивирования.")
+
+    for year, archive in db.get_archives().items():
+        print(f"  {year}: {archive['sessions']} сессий, {archive['path']}")
+
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
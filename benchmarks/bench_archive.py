@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк архивирования: задержка «горячих» запросов (сегодня, неделя,
+месяц, сводка за месяц), время резервной копии (shutil.copy2, как перед
+миграцией) и размер файла базы до и после переноса старых сессий в
+годовые архивы. Отдельно - запрос за всё время через подключённые архивы.
+
+Запуск: python3 benchmarks/bench_archive.py [--sessions 300000 --years 6]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import ARCHIVE_AFTER_MONTHS, Database  # noqa: E402
+from generate_test_data import generate_dataset  # noqa: E402
+from session_query import SessionQuery  # noqa: E402
+
+
+def best_ms(func, repeats):
+    best = None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+
+def measure(db, path, repeats):
+    def period(name):
+        return lambda: db.query_sessions(SessionQuery.coerce(db.get_period_filters(name)))
+
+    def month_rollup():
+        db._clear_rollup_cache()
+        db.get_company_rollup(db.get_period_filters("month")["start_date"])
+
+    def backup():
+        shutil.copy2(path, path + ".backup")
+
+    # Сбрасываем страничный кэш соединения, как при первом открытии окна
+    db.close()
+    results = {"size": os.path.getsize(path) / 1024 / 1024}
+    results["first"] = best_ms(period("month"), 1)
+    for name in ("today", "week", "month"):
+        results[name] = best_ms(period(name), repeats)
+    results["rollup"] = best_ms(month_rollup, repeats)
+    results["backup"] = best_ms(backup, repeats)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=300_000)
+    parser.add_argument("--years", type=int, default=6)
+    parser.add_argument("--projects", type=int, default=30)
+    parser.add_argument("--months", type=int, default=ARCHIVE_AFTER_MONTHS)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        # Всё, что старше нескольких недель, оплачено и уходит в архив
+        generate_dataset(
+            path,
+            sessions=args.sessions,
+            years=args.years,
+            projects=args.projects,
+            paid_ratio=1.0,
+        )
+        db = Database(path)
+        before = measure(db, path, args.repeats)
+
+        started = time.perf_counter()
+        moved = db.archive_sessions(args.months)
+        archive_s = time.perf_counter() - started
+        # Место освобождается только после VACUUM
+        db.detach_archives()
+        db.get_connection().execute("VACUUM")
+        after = measure(db, path, args.repeats)
+
+        all_time_ms = best_ms(
+            lambda: db.query_sessions(SessionQuery().page(200)), args.repeats
+        )
+        archive_mb = sum(
+            os.path.getsize(os.path.join(db.get_archive_dir(), name))
+            for name in os.listdir(db.get_archive_dir())
+        ) / 1024 / 1024
+
+        print(
+            f"{args.sessions} sessions over {args.years} years; archived "
+            f"{sum(moved.values())} sessions into {len(moved)} files "
+            f"({archive_mb:.1f} MB) in {archive_s:.1f} s"
+        )
+        print(f"  {'':<18} {'before':>10} {'after':>10}")
+        rows = (
+            ("db size, MB", "size", "{:10.1f}"),
+            ("first month, ms", "first", "{:10.2f}"),
+            ("today, ms", "today", "{:10.2f}"),
+            ("week, ms", "week", "{:10.2f}"),
+            ("month, ms", "month", "{:10.2f}"),
+            ("month rollup, ms", "rollup", "{:10.2f}"),
+            ("backup copy, ms", "backup", "{:10.2f}"),
+        )
+        for label, key, fmt in rows:
+            print(f"  {label:<18} {fmt.format(before[key])} {fmt.format(after[key])}")
+        print(f"  all time, first 200 rows through archives: {all_time_ms:.2f} ms")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
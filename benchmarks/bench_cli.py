@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Время запуска консольного клиента mtimer.py: каждая команда чтения
+(status, today, week, month, export) запускается отдельным процессом на
+синтетической базе, как из приглашения оболочки; для сравнения - пустой
+интерпретатор и импорт database.py. Записи (start/switch/stop) идут через
+Database и меряются отдельно.
+
+Скрипт проверяет бюджет: медиана status и итогов на Linux должна быть
+меньше --max-ms (по умолчанию 50 мс, 0 - без проверки), иначе код выхода 1.
+Заодно сверяются константы, которые mtimer.py дублирует из database.py.
+
+Запуск: python3 benchmarks/bench_cli.py [--size 100k] [--runs 20] [--max-ms 50]
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import database  # noqa: E402
+import mtimer  # noqa: E402
+from bench_suite import fixture_path, parse_size  # noqa: E402
+
+CLI = os.path.join(ROOT, "mtimer.py")
+READ_COMMANDS = (
+    ("status", ["status"]),
+    ("status --json", ["status", "--json"]),
+    ("today", ["today"]),
+    ("week", ["week"]),
+    ("month", ["month"]),
+    ("export (month, csv)", ["export"]),
+)
+# Команды, на которые рассчитаны приглашение оболочки и редакторы
+BUDGET_COMMANDS = ("status", "status --json", "today", "week", "month")
+BUDGET_MS = 50.0
+
+
+def timed_ms(argv, environ):
+    started = time.perf_counter()
+    subprocess.run(argv, check=True, stdout=subprocess.DEVNULL, env=environ)
+    return (time.perf_counter() - started) * 1000
+
+
+def summary(samples):
+    """Медиана и максимум, мс"""
+    return statistics.median(samples), max(samples)
+
+
+def run_ms(argv, runs, environ):
+    return summary([timed_ms(argv, environ) for _ in range(runs)])
+
+
+def check_constants():
+    problems = []
+    if mtimer.SCHEMA_VERSION != database.SCHEMA_VERSION_CURRENT:
+        problems.append(
+            f"mtimer.SCHEMA_VERSION={mtimer.SCHEMA_VERSION}, "
+            f"database.SCHEMA_VERSION_CURRENT={database.SCHEMA_VERSION_CURRENT}"
+        )
+    if mtimer.HEARTBEAT_INTERVAL != database.HEARTBEAT_INTERVAL:
+        problems.append(
+            f"mtimer.HEARTBEAT_INTERVAL={mtimer.HEARTBEAT_INTERVAL}, "
+            f"database.HEARTBEAT_INTERVAL={database.HEARTBEAT_INTERVAL}"
+        )
+    if mtimer.STALE_HEARTBEAT_SECONDS != database.STALE_HEARTBEAT_SECONDS:
+        problems.append(
+            f"mtimer.STALE_HEARTBEAT_SECONDS={mtimer.STALE_HEARTBEAT_SECONDS}, "
+            f"database.STALE_HEARTBEAT_SECONDS={database.STALE_HEARTBEAT_SECONDS}"
+        )
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=parse_size, default=parse_size("100k"))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument(
+        "--max-ms",
+        type=float,
+        default=BUDGET_MS,
+        help="fail if a status/totals median is slower on Linux (0 - off)",
+    )
+    parser.add_argument(
+        "--fixtures",
+        default=os.path.join(tempfile.gettempdir(), "mtimer-bench-fixtures"),
+    )
+    args = parser.parse_args()
+
+    problems = check_constants()
+    fixture = fixture_path(args.fixtures, args.size, args.seed, date.today())
+    environ = dict(os.environ, MTIMER_LOG_FILE="0")
+    python = [sys.executable]
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "cli.db")
+        shutil.copyfile(fixture, db_path)
+        # Открытие через Database проставляет user_version, как в приложении
+        db = database.Database(db_path)
+        project = db.get_all_projects()[0]["name"]
+        db.close()
+        cli = python + [CLI, "--db", db_path]
+
+        results.append(
+            ("python -c pass", run_ms(python + ["-c", "pass"], args.runs, environ))
+        )
+        import_database = python + ["-c", "import database"]
+        results.append(
+            (
+                "python -c 'import database'",
+                run_ms(import_database, args.runs, dict(environ, PYTHONPATH=ROOT)),
+            )
+        )
+        for label, command in READ_COMMANDS:
+            results.append((label, run_ms(cli + command, args.runs, environ)))
+
+        writes = {"start": [], "switch": [], "stop": []}
+        for _ in range(max(1, args.runs // 4)):
+            for label, command in (
+                ("start", ["start", project, "bench"]),
+                ("switch", ["switch", project, "bench 2"]),
+                ("stop", ["stop"]),
+            ):
+                writes[label].append(timed_ms(cli + command, environ))
+        results.extend((label, summary(samples)) for label, samples in writes.items())
+
+    print(f"{args.size} sessions, {args.runs} runs, {sys.platform}")
+    print(f"  {'command':<28} {'median ms':>10} {'max ms':>10}")
+    for label, (median, worst) in results:
+        print(f"  {label:<28} {median:10.1f} {worst:10.1f}")
+
+    if args.max_ms and sys.platform.startswith("linux"):
+        for label, (median, _) in results:
+            if label in BUDGET_COMMANDS and median >= args.max_ms:
+                problems.append(
+                    f"{label}: median {median:.1f} ms >= {args.max_ms:g} ms"
+                )
+    for problem in problems:
+        print(f"FAIL {problem}")
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
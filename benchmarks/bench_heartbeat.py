@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк heartbeat идущей сессии: стоимость часа трекинга (CPU, wall-time,
+записанные байты) при тике UI раз в секунду, плюс цена live-итогов.
+
+Запуск: python3 benchmarks/bench_heartbeat.py [--intervals 5 60 300]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database  # noqa: E402
+from heartbeat import Heartbeat  # noqa: E402
+
+TICKS_PER_HOUR = 3600
+
+
+class FakeClock:
+    """Монотонные часы, которые двигает сам бенчмарк"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def io_write_bytes():
+    """Байты, записанные процессом на диск (Linux /proc), или None"""
+    try:
+        with open("/proc/self/io") as f:
+            for line in f:
+                if line.startswith("write_bytes:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def simulate_hour(db, interval):
+    """Час тиков раз в секунду; возвращает (записей, cpu с, wall с, байт)"""
+    clock = FakeClock()
+    heartbeat = Heartbeat(db, interval, clock=clock)
+    heartbeat.interval = interval  # бенчмарк меряет и значения вне границ настроек
+    start = datetime.now()
+    bytes_before = io_write_bytes()
+    cpu_before = time.process_time()
+    wall_before = time.perf_counter()
+    for tick in range(TICKS_PER_HOUR):
+        clock.now = float(tick)
+        heartbeat.beat(start + timedelta(seconds=tick))
+    wall = time.perf_counter() - wall_before
+    cpu = time.process_time() - cpu_before
+    bytes_after = io_write_bytes()
+    written = None if bytes_before is None else bytes_after - bytes_before
+    return heartbeat.writes, cpu, wall, written
+
+
+def time_call(func, repeat):
+    started = time.perf_counter_ns()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter_ns() - started) / repeat / 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--intervals", type=int, nargs="+", default=[1, 5, 60, 300])
+    parser.add_argument("--sessions", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "bench.db"))
+        conn = db.get_connection()
+        conn.execute("INSERT INTO projects (name) VALUES ('Bench')")
+        now = datetime.now()
+        conn.executemany(
+            """
+            INSERT INTO time_sessions (project_id, start_time, end_time, duration)
+            VALUES (1, ?, ?, 1800)
+            """,
+            [
+                (
+                    (now - timedelta(minutes=30 * (i + 2))).isoformat(),
+                    (now - timedelta(minutes=30 * (i + 1))).isoformat(),
+                )
+                for i in range(args.sessions)
+            ],
+        )
+        conn.commit()
+        db.start_session(1, "bench", start_time=now - timedelta(minutes=20))
+
+        print("Heartbeat cost per hour of tracking (UI tick = 1 s):")
+        for interval in args.intervals:
+            writes, cpu, wall, written = simulate_hour(db, interval)
+            io = f"{written / 1024:8.1f} KiB" if written is not None else "     n/a"
+            print(
+                f"  interval {interval:>4}s: {writes:>5} writes  "
+                f"cpu={cpu * 1000:8.1f} ms  wall={wall * 1000:8.1f} ms  io={io}  "
+                f"({wall / max(writes, 1) * 1e6:7.1f} µs/write)"
+            )
+
+        print("Totals query latency:")
+        for label, func in [
+            ("week total", lambda: db.get_week_total()),
+            ("week total + live", lambda: db.get_week_total(include_live=True)),
+            ("live session only", db.get_live_session),
+        ]:
+            print(f"  {label:<20} {time_call(func, args.repeat):8.1f} µs")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
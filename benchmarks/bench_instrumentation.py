@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк накладных расходов инструментирования Database: стоимость
+вызова дешёвого метода (get_change_seq) и страницы сессий (query_sessions)
+без инструментирования, с ним и после выключения.
+
+Запуск: python3 benchmarks/bench_instrumentation.py [--calls 20000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database  # noqa: E402
+from session_query import SessionQuery  # noqa: E402
+
+
+def per_call_us(func, calls, repeats=3):
+    best = None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        for _ in range(calls):
+            func()
+        elapsed = (time.perf_counter() - started) / calls * 1e6
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=20_000)
+    parser.add_argument("--sessions", type=int, default=5_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "bench.db"))
+        conn = db.get_connection()
+        conn.execute("INSERT INTO projects (name) VALUES ('Project')")
+        start = datetime(2025, 1, 1)
+        conn.executemany(
+            """
+            INSERT INTO time_sessions (project_id, start_time, end_time, duration)
+            VALUES (1, ?, ?, 600)
+            """,
+            [
+                (
+                    (start + timedelta(hours=i)).isoformat(),
+                    (start + timedelta(hours=i, minutes=10)).isoformat(),
+                )
+                for i in range(args.sessions)
+            ],
+        )
+        conn.commit()
+        page = SessionQuery().page(50)
+        workloads = (
+            ("get_change_seq", db.get_change_seq, args.calls),
+            ("query_sessions(50)", lambda: db.query_sessions(page), args.calls // 10),
+        )
+
+        def measure():
+            return [per_call_us(func, calls) for _, func, calls in workloads]
+
+        measure()  # прогрев кэша страниц и подготовленных запросов
+        off = measure()
+        db.enable_instrumentation(slow_ms=1000)
+        on = measure()
+        db.disable_instrumentation()
+        after = measure()
+
+        print(f"  {'µs per call':<20} {'off':>9} {'on':>9} {'disabled':>9}")
+        for (name, _, _), a, b, c in zip(workloads, off, on, after):
+            print(f"  {name:<20} {a:9.2f} {b:9.2f} {c:9.2f}")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
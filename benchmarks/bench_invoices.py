@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк счетов: отметка года сессий оплаченными - по одной
+(mark_session_as_paid, как кнопка ✓) против одного create_invoice;
+неоплаченный остаток по компаниям - сканированием сессий против
+unpaid_balances; потоковое чтение строк счёта.
+
+Проверяется, что правка времени или проекта сессии из счёта отклоняется
+и итоги счёта совпадают с его сессиями; иначе код выхода 1.
+
+Запуск: python3 benchmarks/bench_invoices.py [--sessions 100000 --years 5]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database  # noqa: E402
+from generate_test_data import generate_dataset  # noqa: E402
+
+
+def scan_company_balances(db):
+    """Прежний путь: остаток считается по всем неоплаченным сессиям"""
+    cursor = db.get_connection().cursor()
+    cursor.execute(
+        """
+        SELECT p.company_id, COUNT(*), SUM(ts.duration),
+               SUM(ts.duration * COALESCE(p.hourly_rate, 0)) / 3600.0
+        FROM time_sessions ts
+        LEFT JOIN projects p ON ts.project_id = p.id
+        WHERE ts.paid = 0 AND ts.end_time IS NOT NULL
+        GROUP BY p.company_id
+        """
+    )
+    return cursor.fetchall()
+
+
+def check_invoiced_edits(db, invoice_id):
+    """Сессия из счёта не меняет duration/cost - итоги счёта остаются верными"""
+    problems = []
+    cursor = db.get_connection().cursor()
+    cursor.execute(
+        """
+        SELECT id, project_id, start_time, end_time, duration, cost
+        FROM time_sessions WHERE invoice_id = ? LIMIT 1
+        """,
+        (invoice_id,),
+    )
+    session = cursor.fetchone()
+    other_project = session["project_id"] % len(db.get_all_projects()) + 1
+    start = datetime.fromisoformat(session["start_time"])
+    if db.update_session_times(session["id"], start, start + timedelta(days=1)):
+        problems.append("update_session_times changed an invoiced session")
+    if db.update_session_details(session["id"], "", other_project):
+        problems.append("update_session_details moved an invoiced session")
+    cursor.execute(
+        "SELECT project_id, duration, cost FROM time_sessions WHERE id = ?",
+        (session["id"],),
+    )
+    if tuple(cursor.fetchone()) != (
+        session["project_id"],
+        session["duration"],
+        session["cost"],
+    ):
+        problems.append(f"invoiced session {session['id']} changed")
+    cursor.execute(
+        """
+        SELECT COUNT(*), SUM(duration), ROUND(SUM(cost), 6)
+        FROM time_sessions WHERE invoice_id = ?
+        """,
+        (invoice_id,),
+    )
+    invoice = db.get_invoice(invoice_id)
+    expected = (
+        invoice["session_count"],
+        invoice["total_duration"],
+        round(invoice["total_amount"], 6),
+    )
+    actual = tuple(cursor.fetchone())
+    if actual != expected:
+        problems.append(f"invoice totals {expected}, sessions {actual}")
+    return problems
+
+
+def timed(func):
+    started = time.perf_counter()
+    result = func()
+    return (time.perf_counter() - started) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=100_000)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--projects", type=int, default=40)
+    parser.add_argument("--companies", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        # Все сессии не оплачены, у каждого проекта есть ставка
+        generate_dataset(
+            path,
+            sessions=args.sessions,
+            years=args.years,
+            projects=args.projects,
+            companies=args.companies,
+            paid_ratio=0.0,
+            hourly_rates=(20, 35, 50),
+        )
+        legacy_path = os.path.join(tmp, "legacy.db")
+        shutil.copy2(path, legacy_path)
+
+        year_ago = (datetime.now() - timedelta(days=365)).isoformat()
+        print(f"{args.sessions} sessions over {args.years} years")
+
+        legacy = Database(legacy_path)
+        cursor = legacy.get_connection().cursor()
+        cursor.execute(
+            "SELECT id FROM time_sessions WHERE paid = 0 AND start_time >= ?",
+            (year_ago,),
+        )
+        year_ids = [row[0] for row in cursor.fetchall()]
+        legacy_ms, _ = timed(
+            lambda: [legacy.mark_session_as_paid(sid) for sid in year_ids]
+        )
+        legacy.get_connection().close()
+
+        db = Database(path)
+        invoice_ms, invoice_id = timed(lambda: db.create_invoice(start_date=year_ago))
+        invoice = db.get_invoice(invoice_id)
+        print(
+            f"  mark a year paid ({len(year_ids)} sessions): "
+            f"one by one {legacy_ms:9.1f} ms, create_invoice {invoice_ms:7.1f} ms "
+            f"(${invoice['total_amount']:.2f})"
+        )
+
+        scan_ms, _ = timed(lambda: scan_company_balances(db))
+        balance_ms, _ = timed(db.get_company_unpaid_balances)
+        print(
+            f"  company balances: scan {scan_ms:7.2f} ms, "
+            f"unpaid_balances {balance_ms:7.3f} ms"
+        )
+        before = [tuple(row) for row in db.get_unpaid_balances()]
+        db.rebuild_unpaid_balances()
+        after = [tuple(row) for row in db.get_unpaid_balances()]
+        drift = max(
+            (abs(a[5] - b[5]) for a, b in zip(before, after)), default=0.0
+        )
+        print(f"  incremental vs rebuilt balances: max drift ${drift:.6f}")
+
+        lines_ms, lines = timed(lambda: sum(1 for _ in db.iter_invoice_lines(invoice_id)))
+        print(f"  stream {lines} invoice lines: {lines_ms:7.1f} ms")
+
+        problems = check_invoiced_edits(db, invoice_id)
+        result = "ok" if not problems else "FAIL " + "; ".join(problems)
+        print(f"  edits of invoiced sessions rejected: {result}")
+        db.get_connection().close()
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
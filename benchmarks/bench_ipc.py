@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Пропускная способность локального IPC-сервера (ipc_server.py): N клиентов
+одновременно шлют status/today/recent (и смесь со start/stop) серверу в
+отдельном процессе, как запущенному приложению. Команды записи идут через
+очередь «главного потока», как AppHelper.callAfter в mac_app.py; туда же
+уходит пересборка снимка (refresh), когда после записи его спросил клиент.
+
+Для сравнения - прежний путь внешних инструментов: на каждый запрос
+открыть базу только для чтения и посчитать status и итог дня (mtimer.py).
+
+Запуск: python3 benchmarks/bench_ipc.py [--size 100k] [--clients 1,8,64]
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import queue
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import log  # noqa: E402
+import mtimer  # noqa: E402
+from bench_suite import fixture_path, parse_size  # noqa: E402
+from database import Database  # noqa: E402
+from ipc_server import RECENT_LIMIT, IpcError, IpcServer, IpcState  # noqa: E402
+
+READ_MIX = ("status", "today", "recent")
+# Каждый десятый запрос смеси - start или stop
+WRITE_EVERY = 10
+
+
+def serve(db_path, socket_path, ready):
+    """Процесс «приложения»: Database и команды только в главном потоке"""
+    log.configure(console_level="ERROR", log_file=False)
+    db = Database(db_path)
+    bench_project = db.get_all_projects()[0]
+    state = IpcState()
+    main_thread = queue.Queue()
+
+    def publish():
+        day = date.today()
+        active = db.get_active_session()
+        state.publish(
+            running=active is not None,
+            session_id=active["id"] if active else None,
+            project_id=active["project_id"] if active else None,
+            project=bench_project["name"] if active else None,
+            task=active["task_name"] if active else None,
+            start=datetime.fromisoformat(active["start_time"]) if active else None,
+            today_completed=db.get_today_total(),
+            day=day,
+            recent=[
+                {
+                    "project_id": row["project_id"],
+                    "project": row["project_name"],
+                    "task": row["task_name"],
+                    "last_start": row["last_start"],
+                }
+                for row in db.get_recent_tasks(RECENT_LIMIT)
+            ],
+        )
+
+    def status():
+        # Как _ipcStatus в mac_app.py
+        if state.stale():
+            publish()
+        return state.status()
+
+    def start(project=None, task=None):
+        if db.get_active_session() is not None:
+            raise IpcError("timer is already running, use switch")
+        db.start_session(bench_project["id"], task or "bench")
+        state.invalidate()
+        return status()
+
+    def stop():
+        active = db.get_active_session()
+        if active is None:
+            raise IpcError("timer is not running")
+        stopped = status()
+        db.stop_session(active["id"])
+        state.invalidate()
+        return {"stopped": stopped}
+
+    server = IpcServer(
+        socket_path,
+        state,
+        {"start": start, "stop": stop},
+        call_soon=main_thread.put,
+        refresh=publish,
+    )
+    if not server.start():
+        ready.set()
+        return
+    ready.set()
+    while True:
+        func = main_thread.get()
+        if func is None:
+            break
+        func()
+
+
+async def client(path, commands, latencies):
+    reader, writer = await asyncio.open_unix_connection(path)
+    try:
+        for cmd in commands:
+            started = time.perf_counter()
+            writer.write(json.dumps({"cmd": cmd}).encode() + b"\n")
+            await writer.drain()
+            response = json.loads(await reader.readline())
+            latencies.append(time.perf_counter() - started)
+            if not response["ok"] and cmd in READ_MIX:
+                raise RuntimeError(response["error"])
+    finally:
+        writer.close()
+
+
+def commands_for(index, requests, writes):
+    cmds = []
+    for i in range(requests):
+        if writes and (index * requests + i) % WRITE_EVERY == 0:
+            cmds.append("start" if (index + i) % 2 == 0 else "stop")
+        else:
+            cmds.append(READ_MIX[i % len(READ_MIX)])
+    return cmds
+
+
+async def ipc_round(path, clients, requests, writes):
+    latencies = []
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(
+            client(path, commands_for(i, requests, writes), latencies)
+            for i in range(clients)
+        )
+    )
+    return latencies, time.perf_counter() - started
+
+
+def sqlite_query(db_path):
+    """Прежний путь: своё соединение только для чтения на каждый запрос"""
+    started = time.perf_counter()
+    conn = mtimer.connect_readonly(db_path)
+    try:
+        mtimer.status(conn)
+        mtimer.totals(conn, "today")
+    finally:
+        conn.close()
+    return time.perf_counter() - started
+
+
+def sqlite_round(db_path, clients, requests):
+    started = time.perf_counter()
+    with ThreadPoolExecutor(clients) as pool:
+        latencies = list(
+            pool.map(lambda _: sqlite_query(db_path), range(clients * requests))
+        )
+    return latencies, time.perf_counter() - started
+
+
+def percentiles(latencies):
+    """p50, p95, p99 в мс"""
+    cuts = statistics.quantiles(latencies, n=100)
+    return cuts[49] * 1000, cuts[94] * 1000, cuts[98] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=parse_size, default=parse_size("100k"))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--clients", default="1,8,64")
+    parser.add_argument("--requests", type=int, default=200, help="per client")
+    parser.add_argument(
+        "--fixtures",
+        default=os.path.join(tempfile.gettempdir(), "mtimer-bench-fixtures"),
+    )
+    args = parser.parse_args()
+    client_counts = [int(n) for n in args.clients.split(",")]
+
+    fixture = fixture_path(args.fixtures, args.size, args.seed, date.today())
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "ipc.db")
+        socket_path = os.path.join(tmp, "mtimer.sock")
+        shutil.copyfile(fixture, db_path)
+        ready = multiprocessing.Event()
+        app = multiprocessing.Process(
+            target=serve, args=(db_path, socket_path, ready), daemon=True
+        )
+        app.start()
+        ready.wait()
+        if not os.path.exists(socket_path):
+            sys.exit("IPC server did not start")
+        try:
+            for clients in client_counts:
+                for label, writes in (("ipc reads", False), ("ipc mix", True)):
+                    latencies, wall = asyncio.run(
+                        ipc_round(socket_path, clients, args.requests, writes)
+                    )
+                    rows.append((label, clients, latencies, wall))
+                latencies, wall = sqlite_round(db_path, clients, args.requests)
+                rows.append(("sqlite per query", clients, latencies, wall))
+        finally:
+            app.terminate()
+            app.join()
+
+    print(f"{args.size} sessions, {args.requests} requests per client")
+    print(
+        f"  {'path':<18} {'clients':>7} {'req/s':>10} "
+        f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+    )
+    for label, clients, latencies, wall in rows:
+        p50, p95, p99 = percentiles(latencies)
+        print(
+            f"  {label:<18} {clients:7d} {len(latencies) / wall:10.0f} "
+            f"{p50:8.3f} {p95:8.3f} {p99:8.3f}"
+        )
+    print("  (ipc mix: every 10th request is start/stop on the main-thread queue)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк журналирования горячих путей: обновление списка сессий с прежними
+f-строками на каждую строку (print в /dev/null вместо NSLog), с
+отфильтрованными по уровню logger.debug и с включённым debug (кольцевой
+буфер и файл), плюс get_window_position при уровне INFO и DEBUG.
+
+Запуск: python3 benchmarks/bench_logging.py [--sessions 500] [--refreshes 50]
+"""
+
+import argparse
+import contextlib
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import log  # noqa: E402
+from database import Database  # noqa: E402
+
+# Шаги createSessionView, которые прежде писали строку в журнал
+VIEW_STEPS = (
+    "Container created",
+    "Creating label",
+    "Description label added",
+    "Creating time label",
+    "Time label added",
+    "Creating duration label",
+    "Duration label added",
+    "Paid button added",
+    "Edit button added",
+    "Delete button added",
+    "Select button added",
+)
+
+
+def make_sessions(count):
+    return [
+        {"id": i, "description": f"Task {i % 40}", "duration": 600 + i}
+        for i in range(count)
+    ]
+
+
+def eager_refresh(sessions, width=480.0):
+    """Как прежний updateSessionsList: f-строки форматируются всегда"""
+    print(f"[UI] updateSessionsList: {len(sessions)} sessions")
+    views = []
+    for i, session in enumerate(sessions):
+        print(
+            f"[UI] Creating view {i + 1}/{len(sessions)} for session: "
+            f"{session.get('description', 'no desc')}"
+        )
+        print("[UI] createSessionView START")
+        print(f"[UI] width: {width}")
+        for step in VIEW_STEPS:
+            print(f"[UI] {step}")
+        print("[UI] createSessionView END - returning container")
+        views.append((session["id"], session["duration"]))
+    print(f"[UI] Container updated with {len(sessions)} items")
+    return views
+
+
+def lazy_refresh(sessions, logger):
+    """Как сейчас: одна отложенная debug-запись на строку"""
+    logger.debug("updateSessionsList: %s sessions", len(sessions))
+    views = []
+    for session in sessions:
+        logger.debug("createSessionView: session %s", session.get("id"))
+        views.append((session["id"], session["duration"]))
+    logger.debug("Container updated with %s items", len(sessions))
+    return views
+
+
+def per_call_us(func, calls):
+    started = time.perf_counter()
+    for _ in range(calls):
+        func()
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=500)
+    parser.add_argument("--refreshes", type=int, default=50)
+    parser.add_argument("--calls", type=int, default=5000)
+    args = parser.parse_args()
+    sessions = make_sessions(args.sessions)
+
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as devnull:
+        with contextlib.redirect_stdout(devnull):
+            log.configure("INFO", log_file=False)
+            ui = log.get_logger("ui")
+            eager = per_call_us(lambda: eager_refresh(sessions), args.refreshes)
+            lazy = per_call_us(lambda: lazy_refresh(sessions, ui), args.refreshes)
+            log.configure("INFO,ui=DEBUG", log_dir=tmp)
+            enabled = per_call_us(lambda: lazy_refresh(sessions, ui), args.refreshes)
+
+            log.configure("INFO", log_file=False)
+            db = Database(os.path.join(tmp, "bench.db"))
+            db.save_window_position("main_window", 100, 100, 800, 600, 0)
+            gated = per_call_us(lambda: db.get_window_position("main_window"), args.calls)
+            log.configure("INFO,db=DEBUG", log_dir=tmp)
+            logged = per_call_us(lambda: db.get_window_position("main_window"), args.calls)
+            db.close()
+            log.configure("INFO", log_file=False)
+        logging.getLogger(log.ROOT_LOGGER).handlers.clear()
+
+    lines = (len(VIEW_STEPS) + 3) * args.sessions + 2
+    print(f"{args.sessions} sessions, {args.refreshes} refreshes")
+    print(f"  {'ms per refresh':<34} {'':>9}")
+    print(f"  {'eager f-strings (~%d lines)' % lines:<34} {eager / 1000:9.3f}")
+    print(f"  {'lazy debug, level INFO':<34} {lazy / 1000:9.3f}")
+    print(f"  {'lazy debug, ui=DEBUG (ring+file)':<34} {enabled / 1000:9.3f}")
+    print(f"  saved per refresh: {(eager - lazy) / 1000:.3f} ms ({eager / lazy:.0f}x)")
+    print(f"get_window_position, {args.calls} calls")
+    print(f"  {'us per call, level INFO':<34} {gated:9.2f}")
+    print(f"  {'us per call, db=DEBUG':<34} {logged:9.2f}")
+    print("  (print to /dev/null is cheaper than NSLog, so the app saves more)")
+
+
+if __name__ == "__main__":
+    main()
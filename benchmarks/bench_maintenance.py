@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк обслуживания базы на «взбитой» базе: много сессий, затем
+удаления, вставки и правки вперемешку, статистики планировщика нет.
+Печатает размер файла, свободные страницы и задержку типичных запросов
+до и после заходов Database.run_maintenance, а также самый долгий шаг
+(удержание блокировки записи) и число пробуждений.
+
+Запуск: python3 benchmarks/bench_maintenance.py [--sessions 200000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database  # noqa: E402
+from generate_test_data import generate_dataset  # noqa: E402
+from session_query import SessionQuery  # noqa: E402
+
+
+def churn(db, projects):
+    """Взбиваем: +20% сессий, правка 10%, удаление 60% и четверти проектов"""
+    conn = db.get_connection()
+    conn.execute(
+        """
+        INSERT INTO time_sessions
+            (project_id, task_name_id, work_type_id, paid, start_time, end_time, duration)
+        SELECT project_id, task_name_id, work_type_id, paid,
+               start_time, end_time, duration
+        FROM time_sessions WHERE abs(random()) % 5 = 0
+        """
+    )
+    conn.execute(
+        "UPDATE time_sessions SET duration = duration + 60 WHERE abs(random()) % 10 = 0"
+    )
+    conn.execute("DELETE FROM time_sessions WHERE abs(random()) % 10 < 6")
+    conn.execute("DELETE FROM projects WHERE id > ?", (projects - projects // 4,))
+    conn.commit()
+    db.recompute_session_costs()
+    conn.execute("DROP TABLE IF EXISTS sqlite_stat1")
+    conn.commit()
+
+
+def query_latency(db, repeats):
+    month = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%dT00:00:00")
+    queries = {
+        "month": lambda: db.query_sessions(SessionQuery().period(month, None)),
+        "project+unpaid": lambda: db.query_sessions(
+            SessionQuery().project(3).paid(False).page(200)
+        ),
+        "work type/dur": lambda: db.query_sessions(
+            SessionQuery().work_type(2).order_by("-duration").page(200)
+        ),
+        "rollup": lambda: (db._clear_rollup_cache(), db.get_company_rollup(month)),
+    }
+    result = {}
+    for name, query in queries.items():
+        best = None
+        for _ in range(repeats):
+            started = time.perf_counter()
+            query()
+            elapsed = (time.perf_counter() - started) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        result[name] = best
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=200_000)
+    parser.add_argument("--projects", type=int, default=40)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        generate_dataset(
+            path,
+            sessions=args.sessions,
+            years=4,
+            projects=args.projects,
+            task_names=2000,
+            paid_ratio=0.5,
+        )
+        db = Database(path)
+        churn(db, args.projects)
+        before_stats = db.get_maintenance_stats()
+        before = query_latency(db, args.repeats)
+
+        wakeups = 0
+        started = time.perf_counter()
+        while db.run_maintenance(force=True):
+            wakeups += 1
+        total = time.perf_counter() - started
+        after_stats = db.get_maintenance_stats()
+        after = query_latency(db, args.repeats)
+
+        print(f"{args.sessions} sessions, churned; auto_vacuum={after_stats['auto_vacuum']}")
+        print(f"  {'':<20} {'before':>10} {'after':>10}")
+        print(
+            f"  {'file size, MB':<20} {before_stats['file_size'] / 1048576:10.1f} "
+            f"{after_stats['file_size'] / 1048576:10.1f}"
+        )
+        print(
+            f"  {'free pages':<20} {before_stats['freelist_count']:10d} "
+            f"{after_stats['freelist_count']:10d}"
+        )
+        for name in before:
+            print(f"  {name + ', ms':<20} {before[name]:10.2f} {after[name]:10.2f}")
+        print(
+            f"  maintenance: {wakeups + 1} wakeups, {total * 1000:.0f} ms total, "
+            f"{after_stats['vacuum_steps']} vacuum steps "
+            f"({after_stats['vacuum_pages_per_step']} pages/step at the end), "
+            f"longest step {after_stats['max_step_ms']:.2f} ms"
+        )
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
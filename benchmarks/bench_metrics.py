@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Экспорт метрик (metrics.py): на копии синтетической базы включается
+METRICS, как при MTIMER_METRICS, выполняется небольшая нагрузка (запросы,
+сессия, сводки через кэш, обновление UI под профайлером), затем снимок
+пишется в обоих форматах - metrics.prom и metrics.json - и читается
+обратно read_snapshot().
+
+Проверяется, что каждый формат возвращает ровно набор METRIC_SET, у
+гистограмм есть корзины, sum и count (+Inf = count), счётчики совпадают с
+живым реестром, а нагрузка действительно дошла до счётчиков. Печатается
+время записи и чтения снимка; при расхождении - код выхода 1.
+
+Запуск: python3 benchmarks/bench_metrics.py [--size 10k] [--repeat 100]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import log  # noqa: E402
+import metrics  # noqa: E402
+from bench_suite import fixture_path, parse_size  # noqa: E402
+from database import Database  # noqa: E402
+from profiling import Profiler  # noqa: E402
+
+FORMATS = (("prometheus", "metrics.prom"), ("json", "metrics.json"))
+# Метрики, которые нагрузка обязана сдвинуть с нуля
+MOVED_BY_WORKLOAD = (
+    "mtimer_db_queries_total",
+    "mtimer_db_changes_total",
+    "mtimer_db_size_bytes",
+    "mtimer_rollup_cache_hits_total",
+    "mtimer_rollup_cache_misses_total",
+    "mtimer_ui_refreshes_total",
+    "mtimer_ui_session_views",
+    "mtimer_ui_views_rebuilt_total",
+)
+
+
+def workload(db):
+    """Тот же путь, которым метрики пополняются в приложении"""
+    profiler = Profiler()
+    profiler.bind_database(db)
+    project_id = db.get_all_projects()[0]["id"]
+    today = date.today().isoformat()
+    with profiler.refresh("bench_metrics"):
+        session_id = db.start_session(project_id, "metrics check")
+        db.stop_session(session_id)
+        for _ in range(2):  # промах, затем попадание в кэш сводок
+            db.get_rollup("project", today, today)
+        sessions = db.get_today_sessions()
+    # Как _reloadSessions во фронтендах
+    metrics.UI_VIEWS_REBUILT.value += len(sessions)
+    metrics.UI_SESSION_VIEWS.set(len(sessions))
+    profiler.unbind_database(db)
+
+
+def check_values(values, registry):
+    problems = []
+    missing = sorted(set(metrics.METRIC_SET) - set(values))
+    extra = sorted(set(values) - set(metrics.METRIC_SET))
+    if missing:
+        problems.append(f"missing {', '.join(missing)}")
+    if extra:
+        problems.append(f"undocumented {', '.join(extra)}")
+    for name, (kind, _help) in metrics.METRIC_SET.items():
+        if name not in values:
+            continue
+        value = values[name]
+        metric = registry.get(name)
+        if metric.kind != kind:
+            problems.append(f"{name} registered as {metric.kind}, documented {kind}")
+        if kind == "histogram":
+            fields = set(value) if isinstance(value, dict) else set()
+            if not {"buckets", "sum", "count"} <= fields:
+                problems.append(f"{name}: not a histogram: {value!r}")
+                continue
+            if value["buckets"].get("+Inf") != value["count"]:
+                problems.append(f"{name}: +Inf bucket != count")
+            if value["count"] != metric.count:
+                problems.append(f"{name}: count {value['count']}, live {metric.count}")
+        elif not isinstance(value, (int, float)):
+            problems.append(f"{name}: not a number: {value!r}")
+        elif kind == "counter" and value != metric.value:
+            problems.append(f"{name}: {value}, live {metric.value}")
+    for name in MOVED_BY_WORKLOAD:
+        value = values.get(name)
+        if isinstance(value, (int, float)) and value <= 0:
+            problems.append(f"{name} not updated by the workload")
+    histogram = values.get("mtimer_ui_refresh_duration_seconds")
+    if isinstance(histogram, dict) and not histogram.get("count"):
+        problems.append(
+            "mtimer_ui_refresh_duration_seconds not updated by the workload"
+        )
+    return problems
+
+
+def timed(function, repeat):
+    """Медиана одного вызова, мс"""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return samples[len(samples) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=parse_size, default=parse_size("10k"))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=100)
+    parser.add_argument(
+        "--fixtures",
+        default=os.path.join(tempfile.gettempdir(), "mtimer-bench-fixtures"),
+    )
+    args = parser.parse_args()
+    log.configure(console_level="ERROR", log_file=False)
+    fixture = fixture_path(args.fixtures, args.size, args.seed, date.today())
+
+    failures = []
+    print(f"{args.size} sessions, {len(metrics.METRIC_SET)} documented metrics")
+    print(f"  {'format':<12} {'write ms':>9} {'read ms':>9}  result")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "metrics.db")
+        shutil.copyfile(fixture, db_path)
+        db = Database(db_path)
+        exporter = metrics.METRICS
+        exporter.bind_database(db)
+        exporter.enable(
+            metrics.METRICS_INTERVAL, path=os.path.join(tmp, "metrics.prom")
+        )
+        if not exporter.enabled:
+            sys.exit("metrics exporter did not enable")
+        workload(db)
+
+        for label, filename in FORMATS:
+            path = os.path.join(tmp, filename)
+            if exporter.write(path) != path:
+                problems = [f"cannot write {path}"]
+                write_ms = read_ms = None
+            else:
+                problems = check_values(metrics.read_snapshot(path), exporter.registry)
+                write_ms = timed(lambda: exporter.write(path), args.repeat)
+                read_ms = timed(lambda: metrics.read_snapshot(path), args.repeat)
+            result = "ok" if not problems else "FAIL " + "; ".join(problems)
+            timings = (
+                f"{write_ms:9.3f} {read_ms:9.3f}"
+                if write_ms is not None
+                else f"{'-':>9} {'-':>9}"
+            )
+            print(f"  {label:<12} {timings}  {result}")
+            failures.extend(f"{label}: {problem}" for problem in problems)
+
+        exporter.close()
+        db.close()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк накладных расходов профилирования обновлений UI: обновление
+списка (загрузка SessionListModel и «вид» на каждую строку) без
+профилировщика, с подсчётом времени и SQL-операторов и с захватом cProfile.
+
+Запуск: python3 benchmarks/bench_profiling.py [--refreshes 200]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database  # noqa: E402
+from generate_test_data import generate_dataset  # noqa: E402
+from profiling import Profiler  # noqa: E402
+from session_model import SessionListModel  # noqa: E402
+
+
+def make_refresh(db, profiler):
+    """Обновление как reloadSessions: запрос периода и вид на каждую строку"""
+    filters = db.get_period_filters("week", None)
+
+    def create_view(session):
+        return f"{session.start:%H:%M} {session.duration}"
+
+    def refresh():
+        model = SessionListModel(db)
+        model.load(filters)
+        model.total_duration()
+        return [create_view(session) for session in model.rows]
+
+    if profiler is None:
+        return refresh
+
+    def create_view_profiled(session):
+        with profiler.refresh("createSessionView"):
+            return f"{session.start:%H:%M} {session.duration}"
+
+    def refresh_profiled():
+        with profiler.refresh("reloadSessions"):
+            model = SessionListModel(db)
+            model.load(filters)
+            model.total_duration()
+            return [create_view_profiled(session) for session in model.rows]
+
+    return refresh_profiled
+
+
+def per_refresh_ms(func, refreshes):
+    started = time.perf_counter()
+    for _ in range(refreshes):
+        func()
+    return (time.perf_counter() - started) / refreshes * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--refreshes", type=int, default=200)
+    parser.add_argument("--sessions", type=int, default=500)
+    parser.add_argument("--captures", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        # Одна неделя одного проекта - ровно то, что показывает список
+        generate_dataset(
+            path,
+            sessions=args.sessions,
+            years=7 / 365,
+            projects=1,
+            companies=0,
+            task_names=50,
+        )
+        db = Database(path)
+        make_refresh(db, None)()  # прогрев
+
+        plain = per_refresh_ms(make_refresh(db, None), args.refreshes)
+        profiler = Profiler(output_dir=os.path.join(tmp, "profiles"))
+        profiler.bind_database(db)
+        counted = per_refresh_ms(make_refresh(db, profiler), args.refreshes)
+        stats = profiler.snapshot()["refreshes"]["reloadSessions"]
+        profiler.capture_next(args.captures)
+        captured = per_refresh_ms(make_refresh(db, profiler), args.captures)
+
+        print(f"{args.sessions} sessions, {args.refreshes} refreshes")
+        print(f"  {'ms per refresh':<26} {plain:9.3f}")
+        print(f"  {'timing + query count':<26} {counted:9.3f}  ({stats['mean_queries']:.1f} queries)")
+        print(f"  {'cProfile capture':<26} {captured:9.3f}")
+        print(f"  {len(os.listdir(profiler.get_output_dir()))} profiles written")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
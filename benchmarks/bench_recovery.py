@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Восстановление после краша (recover_active_session): дочерний процесс
+ведёт сессию на копии синтетической базы и падает посреди неё (os._exit,
+без release_active_session и без закрытия соединения), затем база
+открывается заново, как при следующем запуске фронтенда.
+
+Сценарии:
+- stale heartbeat - сессия закрывается на последнем heartbeat;
+- stale heartbeat через полночь - закрытие разбивается по суткам;
+- fresh heartbeat - второй фронтенд ещё жив, сессия не трогается;
+- slow writer - фронтенд сессии бьёт heartbeat раз в 15 минут: порог
+  берётся из его интервала в active_session, а не из своего;
+- released - штатный выход с идущим таймером, сессия продолжает идти;
+- orphaned row - открытая строка без active_session (старые
+  версии) закрывается с нулевой длительностью;
+- dangling active_session - строка active_session без открытой сессии
+  удаляется.
+
+Для каждого сценария печатается время открытия базы и восстановления;
+если результат не совпал с ожидаемым, скрипт завершается с кодом 1.
+
+Запуск: python3 benchmarks/bench_recovery.py [--size 100k]
+"""
+
+import argparse
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import log  # noqa: E402
+from bench_suite import fixture_path, parse_size  # noqa: E402
+from database import STALE_HEARTBEAT_SECONDS, Database  # noqa: E402
+from heartbeat import MAX_HEARTBEAT_INTERVAL  # noqa: E402
+
+# Момент "следующего запуска" и время сессий относительно него
+NOW = datetime.combine(date.today(), datetime.min.time()) + timedelta(hours=12)
+CRASH_EXIT = 137
+
+
+def crash(db_path, scenario, start, heartbeat, interval):
+    """Дочерний процесс: сессия, heartbeat и падение без штатного выхода"""
+    log.configure(console_level="ERROR", log_file=False)
+    db = Database(db_path)
+    project_id = db.get_all_projects()[0]["id"]
+    session_id = db.start_session(project_id, "crash test", start_time=start)
+    db.heartbeat_active_session(now=heartbeat, interval=interval)
+    conn = db.get_connection()
+    if scenario == "released":
+        db.release_active_session()
+    elif scenario == "orphaned":
+        # Открытая строка, о которой active_session не знает
+        conn.execute("DELETE FROM active_session")
+        conn.commit()
+    elif scenario == "dangling":
+        # Сессию закрыли мимо stop_session - строка active_session осталась
+        duration = int((heartbeat - start).total_seconds())
+        conn.execute(
+            "UPDATE time_sessions SET end_time = ?, duration = ? WHERE id = ?",
+            (heartbeat.isoformat(), duration, session_id),
+        )
+        conn.commit()
+    os._exit(CRASH_EXIT)
+
+
+def session_rows(db, start):
+    """Строки сессии crash test, начиная с первой (после разбиения - несколько)"""
+    cursor = db.get_connection().cursor()
+    cursor.execute(
+        """
+        SELECT ts.id, ts.start_time, ts.end_time, ts.duration
+        FROM time_sessions ts JOIN task_names tn ON tn.id = ts.task_name_id
+        WHERE tn.name = 'crash test' AND ts.start_time >= ?
+        ORDER BY ts.start_time
+        """,
+        (start.isoformat(),),
+    )
+    return [dict(row) for row in cursor.fetchall()]
+
+
+def expect_closed_at(heartbeat, pieces=1):
+    def check(db, rows, recovered, start):
+        problems = []
+        if recovered is None:
+            problems.append("recover_active_session returned None")
+        if len(rows) != pieces:
+            problems.append(f"{len(rows)} rows, expected {pieces}")
+        if rows and rows[-1]["end_time"] != heartbeat.isoformat():
+            problems.append(f"ends at {rows[-1]['end_time']}, expected {heartbeat}")
+        total = sum(row["duration"] for row in rows)
+        expected = int((heartbeat - start).total_seconds())
+        if total != expected:
+            problems.append(f"duration {total}, expected {expected}")
+        if db.get_active_session() is not None:
+            problems.append("active session left after recovery")
+        return problems
+
+    return check
+
+
+def expect_running(db, rows, recovered, start):
+    problems = []
+    if recovered is not None:
+        problems.append(f"closed session {recovered}")
+    active = db.get_active_session()
+    if active is None or active["end_time"] is not None:
+        problems.append("session is not running after recovery")
+    if len(rows) != 1 or rows[0]["end_time"] is not None:
+        problems.append(f"rows changed: {rows}")
+    return problems
+
+
+def expect_zero_length(db, rows, recovered, start):
+    problems = []
+    if len(rows) != 1:
+        problems.append(f"{len(rows)} rows, expected 1")
+    elif rows[0]["end_time"] != rows[0]["start_time"] or rows[0]["duration"] != 0:
+        problems.append(f"orphan not closed with zero length: {rows[0]}")
+    if db.get_active_session() is not None:
+        problems.append("active session left after recovery")
+    return problems
+
+
+def expect_dangling_dropped(heartbeat):
+    def check(db, rows, recovered, start):
+        problems = []
+        if recovered is not None:
+            problems.append(f"closed session {recovered}")
+        count = db.get_connection().execute("SELECT COUNT(*) FROM active_session")
+        if count.fetchone()[0]:
+            problems.append("dangling active_session row kept")
+        if len(rows) != 1 or rows[0]["end_time"] != heartbeat.isoformat():
+            problems.append(f"closed session changed: {rows}")
+        return problems
+
+    return check
+
+
+def scenarios():
+    """(имя, сценарий дочернего процесса, начало, heartbeat, интервал, проверка)"""
+    stale = NOW - timedelta(hours=1)
+    fresh = NOW - timedelta(seconds=STALE_HEARTBEAT_SECONDS // 2)
+    # Пропущен один удар фронтенда с интервалом MAX_HEARTBEAT_INTERVAL -
+    # дольше STALE_HEARTBEAT_SECONDS, но ещё не краш
+    slow_fresh = NOW - timedelta(seconds=MAX_HEARTBEAT_INTERVAL + 60)
+    slow_stale = NOW - timedelta(seconds=3 * MAX_HEARTBEAT_INTERVAL + 60)
+    before_midnight = NOW.replace(hour=0) - timedelta(hours=1)
+    after_midnight = NOW.replace(hour=0) + timedelta(minutes=30)
+    three_hours_ago = NOW - timedelta(hours=3)
+    slow = MAX_HEARTBEAT_INTERVAL
+    return (
+        (
+            "stale heartbeat",
+            "crash",
+            three_hours_ago,
+            stale,
+            None,
+            expect_closed_at(stale),
+        ),
+        (
+            "stale across midnight",
+            "crash",
+            before_midnight,
+            after_midnight,
+            None,
+            expect_closed_at(after_midnight, pieces=2),
+        ),
+        (
+            "fresh heartbeat",
+            "crash",
+            NOW - timedelta(hours=1),
+            fresh,
+            None,
+            expect_running,
+        ),
+        (
+            "slow writer alive",
+            "crash",
+            three_hours_ago,
+            slow_fresh,
+            slow,
+            expect_running,
+        ),
+        (
+            "slow writer crashed",
+            "crash",
+            three_hours_ago,
+            slow_stale,
+            slow,
+            expect_closed_at(slow_stale),
+        ),
+        ("released", "released", three_hours_ago, stale, None, expect_running),
+        ("orphaned row", "orphaned", three_hours_ago, stale, None, expect_zero_length),
+        (
+            "dangling active_session",
+            "dangling",
+            three_hours_ago,
+            stale,
+            None,
+            expect_dangling_dropped(stale),
+        ),
+    )
+
+
+def run_scenario(fixture, tmp, scenario, start, heartbeat, interval, check):
+    db_path = os.path.join(tmp, "recovery.db")
+    shutil.copyfile(fixture, db_path)
+    child = multiprocessing.Process(
+        target=crash, args=(db_path, scenario, start, heartbeat, interval)
+    )
+    child.start()
+    child.join()
+    if child.exitcode != CRASH_EXIT:
+        return None, None, [f"child exited with {child.exitcode}"]
+
+    started = time.perf_counter()
+    db = Database(db_path)
+    opened = time.perf_counter()
+    recovered = db.recover_active_session(now=NOW)
+    finished = time.perf_counter()
+    problems = check(db, session_rows(db, start), recovered, start)
+    db.close()
+    os.remove(db_path)
+    return (opened - started) * 1000, (finished - opened) * 1000, problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=parse_size, default=parse_size("100k"))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--fixtures",
+        default=os.path.join(tempfile.gettempdir(), "mtimer-bench-fixtures"),
+    )
+    args = parser.parse_args()
+    log.configure(console_level="ERROR", log_file=False)
+    # Сессии фикстуры заканчиваются вчера: в сегодняшнем дне сценариев
+    # нет чужих сессий
+    fixture = fixture_path(
+        args.fixtures, args.size, args.seed, date.today() - timedelta(days=1)
+    )
+
+    failures = []
+    print(f"{args.size} sessions, recovery at {NOW.isoformat()}")
+    print(f"  {'scenario':<26} {'open ms':>9} {'recover ms':>11}  result")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, scenario, start, heartbeat, interval, check in scenarios():
+            open_ms, recover_ms, problems = run_scenario(
+                fixture, tmp, scenario, start, heartbeat, interval, check
+            )
+            result = "ok" if not problems else "FAIL " + "; ".join(problems)
+            timings = (
+                f"{open_ms:9.1f} {recover_ms:11.2f}"
+                if open_ms is not None
+                else f"{'-':>9} {'-':>11}"
+            )
+            print(f"  {name:<26} {timings}  {result}")
+            failures.extend(f"{name}: {problem}" for problem in problems)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
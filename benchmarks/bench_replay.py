@@ -0,0 +1,683 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Воспроизведение рабочего дня на ускоренных часах: задержки операций
+end-to-end (p50/p95/p99) и как часто операции упираются в блокировки.
+
+Главный поток играет платформонезависимую часть фронтенда: Scheduler с
+задачами tick, heartbeat, auto_refresh и db_maintenance, SessionListModel
+текущей недели, TaskTableModel окна All Tasks и действия пользователя
+(старт, стоп, правки, импорт, счёт). Второй поток со своим соединением -
+«другой процесс»: окно статистики, бэкап через sqlite3 backup API и
+правки из второго фронтенда. Часы виртуальные: --speed 600 проигрывает
+десятичасовой день за минуту.
+
+    python3 benchmarks/bench_replay.py script -o day.jsonl --seed 7
+    python3 benchmarks/bench_replay.py script --from-db timetracker.db --day 2026-03-02 -o day.jsonl
+    python3 benchmarks/bench_replay.py run --events day.jsonl --size 100k
+    python3 benchmarks/bench_replay.py run --size 100k --pragma journal_mode=WAL -o wal.json
+
+Сценарий - JSONL, одно событие на строку, по возрастанию at:
+
+    {"at": 30600, "op": "start", "project": 0, "task": "Code review"}
+
+at - секунды от полуночи дня воспроизведения; project - ранг проекта по
+числу сессий в базе прогона (0 - самый частый). Операции: start, stop,
+edit, edit_times, import, all_tasks, invoice (главный поток) и stats,
+backup, external_edit (второе соединение). Записанный день превращается
+в сценарий через --from-db.
+
+Операция считается заблокированной, если она пересеклась по времени с
+конфликтующей транзакцией другого соединения: хотя бы одна из двух
+пишет (бэкап - читатель, он задерживает коммит записи). Ошибки
+«database is locked» считаются отдельно - по исключениям и по выводу
+[DB] ... Database.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import queue
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from datetime import date, datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_suite import environment, fixture_path, parse_size  # noqa: E402
+from change_bus import SESSION_EVENTS  # noqa: E402
+from database import MAINTENANCE_INTERVAL, Database  # noqa: E402
+from generate_test_data import TASK_NAMES  # noqa: E402
+from heartbeat import Heartbeat  # noqa: E402
+from instrumentation import LatencyHistogram  # noqa: E402
+from scheduler import Scheduler  # noqa: E402
+from session_model import SessionListModel  # noqa: E402
+from session_query import SessionQuery  # noqa: E402
+from task_table_model import TaskTableModel  # noqa: E402
+
+DEFAULT_SPEED = 600.0
+DEFAULT_SIZE = "100k"
+DEFAULT_SEED = 42
+# Рабочий день сценария: начало и длительность, секунды от полуночи
+DAY_START = 8 * 3600 + 30 * 60
+DAY_HOURS = 10
+# Запас виртуального времени до первого и после последнего события
+LEAD_SECONDS = 60
+
+MAIN_OPS = frozenset(
+    {"start", "stop", "edit", "edit_times", "import", "all_tasks", "invoice"}
+)
+ACTOR_OPS = frozenset({"stats", "backup", "external_edit"})
+# Операции, берущие блокировку записи (для читателей - и бэкап)
+WRITE_OPS = frozenset(
+    {
+        "start",
+        "stop",
+        "edit",
+        "edit_times",
+        "import",
+        "invoice",
+        "external_edit",
+        "heartbeat",
+        "db_maintenance",
+    }
+)
+# Операции без обращения к базе: в пересечениях не участвуют
+NO_DB_OPS = frozenset({"tick"})
+LOCK_MARKERS = ("locked", "busy")
+
+
+# ============================================
+# Сценарий
+# ============================================
+
+
+def scripted_day(seed=DEFAULT_SEED, hours=DAY_HOURS, start=DAY_START):
+    """
+    Типичный день: сессии 20-90 минут с перерывами, правки после части
+    остановок, ручной импорт, окна All Tasks и статистики, бэкап раз в
+    час и правки из второго фронтенда.
+    """
+    rng = random.Random(seed)
+    end = start + hours * 3600
+    events = []
+    at = start + rng.randint(0, 600)
+    while at < end - 20 * 60:
+        project = min(int(rng.paretovariate(1.2)) - 1, 9)
+        events.append({"at": at, "op": "start", "project": project, "task": rng.choice(TASK_NAMES)})
+        at += rng.randint(20, 90) * 60
+        events.append({"at": at, "op": "stop"})
+        if rng.random() < 0.2:
+            events.append({"at": at + rng.randint(10, 120), "op": "edit", "task": rng.choice(TASK_NAMES)})
+        if rng.random() < 0.1:
+            events.append({"at": at + rng.randint(10, 120), "op": "edit_times", "trim": rng.randint(1, 10) * 60})
+        at += rng.randint(2, 15) * 60
+
+    def spread(op, count, **extra):
+        for _ in range(count):
+            events.append({"at": rng.randint(start, end), "op": op, **extra})
+
+    spread("import", rng.randint(1, 2), project=0, minutes=rng.randint(15, 60))
+    spread("all_tasks", rng.randint(3, 5), search=rng.choice(TASK_NAMES)[:4])
+    spread("stats", rng.randint(2, 3))
+    spread("external_edit", 3, project=1, minutes=30)
+    for hour in range(hours):
+        events.append({"at": start + hour * 3600 + 1800, "op": "backup"})
+    if rng.random() < 0.5:
+        events.append({"at": end - 600, "op": "invoice", "project": 0})
+    events.sort(key=lambda event: event["at"])
+    return events
+
+
+def recorded_day(path, day):
+    """
+    Сценарий из сессий дня в существующей базе: старт и стоп каждой
+    сессии, проекты - по рангу в этой базе; бэкап раз в час рабочего времени.
+    """
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    ranks = {
+        row[0]: rank
+        for rank, row in enumerate(
+            conn.execute(
+                "SELECT project_id FROM time_sessions GROUP BY project_id ORDER BY COUNT(*) DESC"
+            )
+        )
+    }
+    rows = conn.execute(
+        """
+        SELECT ts.project_id, ts.start_time, ts.end_time, tn.name AS task
+        FROM time_sessions ts LEFT JOIN task_names tn ON ts.task_name_id = tn.id
+        WHERE ts.start_time >= ? AND ts.start_time < ? AND ts.end_time IS NOT NULL
+        ORDER BY ts.start_time
+        """,
+        (day.isoformat(), (day + timedelta(days=1)).isoformat()),
+    ).fetchall()
+    conn.close()
+    midnight = datetime.combine(day, datetime.min.time())
+    events = []
+    for row in rows:
+        started = (datetime.fromisoformat(row["start_time"]) - midnight).total_seconds()
+        stopped = (datetime.fromisoformat(row["end_time"]) - midnight).total_seconds()
+        events.append(
+            {"at": int(started), "op": "start", "project": ranks.get(row["project_id"], 0), "task": row["task"] or ""}
+        )
+        events.append({"at": int(stopped), "op": "stop"})
+    if events:
+        for at in range(events[0]["at"] + 1800, events[-1]["at"], 3600):
+            events.append({"at": at, "op": "backup"})
+    events.sort(key=lambda event: event["at"])
+    return events
+
+
+def load_events(path):
+    events = []
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            event = json.loads(line)
+            if event.get("op") not in MAIN_OPS | ACTOR_OPS:
+                raise ValueError(f"{path}:{number}: unknown op {event.get('op')!r}")
+            events.append(event)
+    events.sort(key=lambda event: event["at"])
+    return events
+
+
+# ============================================
+# Часы, вывод и блокировки
+# ============================================
+
+
+class VirtualClock:
+    """Секунды от полуночи дня воспроизведения, идущие в speed раз быстрее"""
+
+    def __init__(self, day, start_at, speed):
+        self.midnight = datetime.combine(day, datetime.min.time())
+        self.start_at = start_at
+        self.speed = speed
+        self.origin = time.perf_counter()
+
+    def seconds(self):
+        return self.start_at + (time.perf_counter() - self.origin) * self.speed
+
+    def now(self):
+        return self.midnight + timedelta(seconds=self.seconds())
+
+    def sleep_until(self, at):
+        delay = (at - self.seconds()) / self.speed
+        if delay > 0:
+            time.sleep(delay)
+
+
+class ThreadOutput(io.TextIOBase):
+    """sys.stdout на время прогона: вывод каждого потока копится отдельно"""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def write(self, text):
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None:
+            buffer = self._local.buffer = []
+        buffer.append(text)
+        return len(text)
+
+    def take(self):
+        buffer = getattr(self._local, "buffer", None)
+        if not buffer:
+            return ""
+        text = "".join(buffer)
+        buffer.clear()
+        return text
+
+
+class LockTracker:
+    """Интервалы операций обоих соединений для поиска пересечений"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._active = {}  # сторона -> (начало, пишет ли)
+        self._recent = {"main": deque(maxlen=256), "actor": deque(maxlen=256)}
+
+    @contextlib.contextmanager
+    def holding(self, side, writes):
+        started = time.perf_counter()
+        if side is None:
+            yield started
+            return
+        with self._lock:
+            self._active[side] = (started, writes)
+        try:
+            yield started
+        finally:
+            with self._lock:
+                del self._active[side]
+                self._recent[side].append((started, time.perf_counter(), writes))
+
+    def conflicted(self, side, writes, started, finished):
+        """Пересекалась ли операция с конфликтующей операцией другой стороны"""
+        other = "actor" if side == "main" else "main"
+        with self._lock:
+            active = self._active.get(other)
+            if active is not None and active[0] < finished and (writes or active[1]):
+                return True
+            return any(
+                begin < finished and end > started and (writes or other_writes)
+                for begin, end, other_writes in self._recent[other]
+            )
+
+
+class OpStats:
+    """Задержки одной операции: все вызовы, заблокированные и опоздание старта"""
+
+    __slots__ = ("latency", "blocked_latency", "late", "blocked", "lock_errors", "errors")
+
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.blocked_latency = LatencyHistogram()
+        self.late = LatencyHistogram()
+        self.blocked = 0
+        self.lock_errors = 0
+        self.errors = 0
+
+    def as_dict(self):
+        count = self.latency.count
+        return {
+            "count": count,
+            "mean_ms": self.latency.total / count if count else 0.0,
+            "p50_ms": self.latency.percentile(0.50),
+            "p95_ms": self.latency.percentile(0.95),
+            "p99_ms": self.latency.percentile(0.99),
+            "max_ms": self.latency.max,
+            "blocked": self.blocked,
+            "blocked_ratio": self.blocked / count if count else 0.0,
+            "blocked_p95_ms": self.blocked_latency.percentile(0.95),
+            "lock_errors": self.lock_errors,
+            "errors": self.errors,
+            "late_p95_ms": self.late.percentile(0.95),
+        }
+
+
+class Recorder:
+    """Замер операций обеих сторон"""
+
+    def __init__(self, output):
+        self.output = output
+        self.tracker = LockTracker()
+        self.ops = {}
+        self._lock = threading.Lock()
+
+    def run(self, side, name, func, late_ms=None):
+        writes = name in WRITE_OPS
+        self.output.take()
+        error = None
+        tracked = name not in NO_DB_OPS
+        with self.tracker.holding(side if tracked else None, writes) as started:
+            try:
+                func()
+            except Exception as e:
+                error = e
+        finished = time.perf_counter()
+        text = self.output.take()
+        blocked = tracked and self.tracker.conflicted(side, writes, started, finished)
+        message = f"{error or ''} {text}".lower()
+        with self._lock:
+            stats = self.ops.get(name)
+            if stats is None:
+                stats = self.ops[name] = OpStats()
+            elapsed = (finished - started) * 1000
+            stats.latency.add(elapsed)
+            if blocked:
+                stats.blocked += 1
+                stats.blocked_latency.add(elapsed)
+            if any(marker in message for marker in LOCK_MARKERS):
+                stats.lock_errors += 1
+            elif error is not None:
+                stats.errors += 1
+            if late_ms is not None:
+                stats.late.add(max(0.0, late_ms))
+
+
+def apply_pragmas(db, pragmas):
+    conn = db.get_connection()
+    for pragma in pragmas:
+        conn.execute(f"PRAGMA {pragma}").fetchall()
+
+
+# ============================================
+# Стороны
+# ============================================
+
+
+class Frontend:
+    """Платформонезависимая часть контроллера: планировщик, модели, действия"""
+
+    def __init__(self, db, clock, recorder, projects):
+        self.db = db
+        self.clock = clock
+        self.recorder = recorder
+        self.projects = projects
+        self.scheduler = Scheduler(
+            clock=clock.seconds, wall_clock=clock.now, rng=random.Random(0)
+        )
+        self.heartbeat = Heartbeat(db, clock=clock.seconds)
+        self.sessions = SessionListModel(db)
+        self.tasks = TaskTableModel()
+        self.sessions_dirty = True
+        self.active_id = None
+        self.last_id = None
+        db.changes.subscribe(self.on_sessions_changed, SESSION_EVENTS)
+        self.every("auto_refresh", 5.0, self.auto_refresh, tolerance=1.0, jitter=0.5)
+        self.every(
+            "db_maintenance", MAINTENANCE_INTERVAL,
+            lambda now: db.run_maintenance(), tolerance=30.0, jitter=30.0,
+        )
+
+    def every(self, name, interval, callback, **kwargs):
+        def job(now):
+            self.recorder.run("main", name, lambda: callback(now))
+
+        self.scheduler.every(name, interval, job, **kwargs)
+
+    def on_sessions_changed(self, event):
+        self.sessions_dirty = True
+
+    def auto_refresh(self, now):
+        self.db.poll_external_changes()
+        if self.sessions_dirty:
+            self.sessions_dirty = False
+            self.sessions.load(self.db.get_period_filters("week"))
+            self.sessions.total_duration()
+
+    def tick(self, now):
+        elapsed = int((now - self.started_at).total_seconds())
+        return f"{elapsed // 3600:02d}:{elapsed % 3600 // 60:02d}:{elapsed % 60:02d}"
+
+    def project(self, event):
+        return self.projects[min(event.get("project", 0), len(self.projects) - 1)]
+
+    def dispatch(self, event):
+        now = self.clock.now()
+        op = event["op"]
+        if op == "start":
+            if self.active_id is not None:
+                self.stop(now)
+            self.active_id = self.db.start_session(self.project(event), event.get("task", ""), now)
+            self.started_at = now
+            self.heartbeat.force(now)
+            self.every("tick", 1.0, self.tick, tolerance=0.05)
+            self.every("heartbeat", self.heartbeat.interval, lambda now: self.heartbeat.beat(now), tolerance=1.0)
+        elif op == "stop":
+            if self.active_id is not None:
+                self.stop(now)
+        elif op == "edit":
+            if self.last_id is not None:
+                self.db.update_session_details(self.last_id, event.get("task", ""), self.last_project)
+        elif op == "edit_times":
+            if self.last_id is not None:
+                end = self.last_end - timedelta(seconds=event.get("trim", 60))
+                if end > self.last_start:
+                    self.db.update_session_times(self.last_id, self.last_start, end)
+        elif op == "import":
+            minutes = event.get("minutes", 30)
+            self.db.import_session(
+                self.project(event), event.get("task", "Manual entry"),
+                now - timedelta(minutes=minutes), now,
+            )
+        elif op == "all_tasks":
+            query = SessionQuery().period((now - timedelta(days=30)).strftime("%Y-%m-%dT00:00:00"))
+            self.tasks.set_projects(self.db.get_all_projects())
+            self.tasks.set_sessions(self.db.query_sessions(query))
+            self.tasks.totals()
+            if event.get("search"):
+                self.tasks.set_sessions(self.db.query_sessions(query.task(event["search"])))
+        elif op == "invoice":
+            self.db.create_invoice(
+                project_id=self.project(event),
+                start_date=(now - timedelta(days=30)).strftime("%Y-%m-%dT00:00:00"),
+                end_date=now.isoformat(),
+            )
+
+    def stop(self, now):
+        self.db.stop_session(self.active_id, now)
+        self.last_id = self.active_id
+        self.last_project = self.db.get_connection().execute(
+            "SELECT project_id FROM time_sessions WHERE id = ?", (self.last_id,)
+        ).fetchone()[0]
+        self.last_start, self.last_end = self.started_at, now
+        self.active_id = None
+        for name in ("tick", "heartbeat"):
+            self.scheduler.cancel(name)
+
+
+class Actor(threading.Thread):
+    """Другой процесс: статистика, бэкап и второй фронтенд на своём соединении"""
+
+    def __init__(self, path, pragmas, clock, recorder, projects, backup_dir):
+        super().__init__(name="replay-actor", daemon=True)
+        self.path = path
+        self.pragmas = pragmas
+        self.clock = clock
+        self.recorder = recorder
+        self.projects = projects
+        self.backup_dir = backup_dir
+        self.queue = queue.Queue()
+        self.ready = threading.Event()
+
+    def run(self):
+        db = Database(self.path)
+        apply_pragmas(db, self.pragmas)
+        self.ready.set()
+        while True:
+            event = self.queue.get()
+            if event is None:
+                break
+            late_ms = (self.clock.seconds() - event["at"]) / self.clock.speed * 1000
+            self.recorder.run(
+                "actor", event["op"], lambda: self.dispatch(db, event), late_ms
+            )
+        db.close()
+
+    def dispatch(self, db, event):
+        now = self.clock.now()
+        op = event["op"]
+        if op == "stats":
+            # Те же выборки, что делает окно статистики (show_stats.py)
+            month = (now - timedelta(days=30)).isoformat()
+            year = (now - timedelta(days=365)).isoformat()
+            db.get_sessions_in_range(month, now.isoformat())
+            db.get_sessions_in_range(year, now.isoformat())
+            db.get_company_rollup(month, now.isoformat(), include_live=True)
+            db.get_work_type_rollup(month, now.isoformat(), include_live=True)
+            db.get_live_session()
+        elif op == "backup":
+            target = sqlite3.connect(os.path.join(self.backup_dir, "backup.db"))
+            try:
+                db.get_connection().backup(target, pages=event.get("pages", -1))
+            finally:
+                target.close()
+        elif op == "external_edit":
+            project_id = self.projects[min(event.get("project", 1), len(self.projects) - 1)]
+            minutes = event.get("minutes", 30)
+            db.import_session(
+                project_id, event.get("task", "External edit"),
+                now - timedelta(minutes=minutes), now,
+            )
+
+
+# ============================================
+# Прогон
+# ============================================
+
+
+def replay(path, events, speed, pragmas, out):
+    """Проиграть events на базе path; возвращает {операция: OpStats.as_dict()}"""
+    output = ThreadOutput()
+    recorder = Recorder(output)
+    start_at = max(0, events[0]["at"] - LEAD_SECONDS)
+    end_at = events[-1]["at"] + LEAD_SECONDS
+    clock = VirtualClock(date.today(), start_at, speed)
+
+    stdout = sys.stdout
+    sys.stdout = output
+    backup_dir = tempfile.mkdtemp(prefix="mtimer-replay-")
+    try:
+        db = Database(path)
+        apply_pragmas(db, pragmas)
+        projects = [
+            row[0]
+            for row in db.get_connection().execute(
+                "SELECT project_id FROM time_sessions GROUP BY project_id ORDER BY COUNT(*) DESC"
+            )
+        ]
+        actor = Actor(path, pragmas, clock, recorder, projects, backup_dir)
+        actor.start()
+        actor.ready.wait()
+        frontend = Frontend(db, clock, recorder, projects)
+        clock.origin = time.perf_counter()
+
+        index = 0
+        while True:
+            now = clock.seconds()
+            if now >= end_at:
+                break
+            wakeup = frontend.scheduler.next_wakeup()
+            target = min(
+                events[index]["at"] if index < len(events) else end_at,
+                end_at if wakeup is None else now + wakeup,
+            )
+            clock.sleep_until(target)
+            frontend.scheduler.run_due()
+            while index < len(events) and events[index]["at"] <= clock.seconds():
+                event = events[index]
+                index += 1
+                if event["op"] in ACTOR_OPS:
+                    actor.queue.put(event)
+                else:
+                    late_ms = (clock.seconds() - event["at"]) / speed * 1000
+                    recorder.run("main", event["op"], lambda: frontend.dispatch(event), late_ms)
+
+        if frontend.active_id is not None:
+            frontend.stop(clock.now())
+        actor.queue.put(None)
+        actor.join()
+        db.close()
+    finally:
+        sys.stdout = stdout
+        shutil.rmtree(backup_dir, ignore_errors=True)
+    elapsed = time.perf_counter() - clock.origin
+    print(
+        f"[Replay] {len(events)} events, {(end_at - start_at) / 3600:.1f} virtual hours "
+        f"in {elapsed:.1f} s",
+        file=out,
+    )
+    return {name: stats.as_dict() for name, stats in sorted(recorder.ops.items())}
+
+
+def print_report(results, out):
+    print(
+        f"  {'op':<16} {'count':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8} "
+        f"{'blocked':>8} {'locked':>6} {'late p95':>9}",
+        file=out,
+    )
+    for name, stats in results.items():
+        print(
+            f"  {name:<16} {stats['count']:>6} {stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} "
+            f"{stats['p99_ms']:>8.2f} {stats['max_ms']:>8.2f} "
+            f"{stats['blocked_ratio']:>7.1%} {stats['lock_errors']:>6} {stats['late_p95_ms']:>9.2f}",
+            file=out,
+        )
+
+
+def run_replay(args):
+    out = sys.stdout
+    events = load_events(args.events) if args.events else scripted_day(args.seed, args.hours)
+    if not events:
+        print("[Replay] No events to replay")
+        return 1
+    sessions = parse_size(args.size)
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        fixture = fixture_path(args.fixtures, sessions, args.seed, date.today())
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "replay.db")
+        shutil.copyfile(fixture, path)
+        results = replay(path, events, args.speed, args.pragma, out)
+    print_report(results, out)
+
+    if args.output:
+        report = {
+            "environment": environment(),
+            "size": args.size,
+            "sessions": sessions,
+            "speed": args.speed,
+            "pragmas": args.pragma,
+            "events": args.events,
+            "seed": args.seed,
+            "ops": results,
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=1)
+        print(f"[Replay] Results saved to {args.output}")
+    return 0
+
+
+def write_script(args):
+    if args.from_db:
+        day = args.day or date.today() - timedelta(days=1)
+        events = recorded_day(args.from_db, day)
+    else:
+        events = scripted_day(args.seed, args.hours)
+    with open(args.output, "w", encoding="utf-8") as f:
+        for event in events:
+            f.write(json.dumps(event, ensure_ascii=False) + "\n")
+    print(f"[Replay] {len(events)} events written to {args.output}")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    script = commands.add_parser("script", help="записать сценарий дня в JSONL")
+    script.add_argument("-o", "--output", required=True)
+    script.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    script.add_argument("--hours", type=int, default=DAY_HOURS)
+    script.add_argument("--from-db", help="взять сессии дня из существующей базы")
+    script.add_argument("--day", type=date.fromisoformat, help="день для --from-db (по умолчанию вчера)")
+
+    run = commands.add_parser("run", help="проиграть сценарий и измерить задержки")
+    run.add_argument("--events", help="JSONL-сценарий (по умолчанию - сгенерированный день)")
+    run.add_argument("--size", default=DEFAULT_SIZE, help="размер базы: 1k, 100k, 1m или число")
+    run.add_argument("--speed", type=float, default=DEFAULT_SPEED, help="ускорение часов")
+    run.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    run.add_argument("--hours", type=int, default=DAY_HOURS)
+    run.add_argument(
+        "--pragma", action="append", default=[],
+        help="PRAGMA для обоих соединений, напр. journal_mode=WAL (можно несколько)",
+    )
+    run.add_argument(
+        "--fixtures", default=os.path.join(tempfile.gettempdir(), "mtimer-bench-fixtures"),
+        help="каталог кэша баз",
+    )
+    run.add_argument("-o", "--output", help="сохранить результаты в JSON")
+
+    args = parser.parse_args(argv)
+    if args.command == "script":
+        return write_script(args)
+    return run_replay(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
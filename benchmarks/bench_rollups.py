@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк сводок по компаниям и видам работ на многолетних синтетических
+данных: группировка в Python по выгруженным строкам против GROUP BY в
+SQLite (Database.get_rollup) - холодный запрос и повтор из кэша.
+
+Запуск: python3 benchmarks/bench_rollups.py [--sessions 300000 --years 5]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import ROLLUP_DIMENSIONS, Database  # noqa: E402
+from generate_test_data import generate_dataset  # noqa: E402
+
+PERIODS = (("week", 7), ("month", 30), ("year", 365), ("all", None))
+
+
+def python_rollup(db, dimension, start_date):
+    """Прежний путь: выгрузить строки периода и сгруппировать в Python"""
+    cursor = db.get_connection().cursor()
+    cursor.execute(
+        """
+        SELECT ts.duration, p.hourly_rate, p.company_id, ts.work_type_id, ts.project_id
+        FROM time_sessions ts
+        LEFT JOIN projects p ON ts.project_id = p.id
+        WHERE ts.start_time >= ?
+        """,
+        (start_date or "",),
+    )
+    column = {"company": 2, "work_type": 3, "project": 4}[dimension]
+    groups = defaultdict(lambda: [0, 0, 0.0])
+    for row in cursor.fetchall():
+        group = groups[row[column]]
+        group[0] += 1
+        group[1] += row[0] or 0
+        group[2] += (row[0] or 0) * (row[1] or 0) / 3600.0
+    return sorted(groups.items(), key=lambda item: item[1][1], reverse=True)
+
+
+def timed(func, repeats):
+    best = None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=300_000)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--projects", type=int, default=80)
+    parser.add_argument("--companies", type=int, default=15)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        # Без истории ставок: python_rollup считает по текущей ставке проекта
+        generate_dataset(
+            path,
+            sessions=args.sessions,
+            years=args.years,
+            projects=args.projects,
+            companies=args.companies,
+            rate_change_ratio=0,
+        )
+        db = Database(path)
+        print(f"{args.sessions} sessions over {args.years} years")
+        print(f"  {'dimension':<10} {'period':<6} {'python':>10} {'sql':>10} {'cached':>10}")
+        for dimension in ROLLUP_DIMENSIONS:
+            for label, days in PERIODS:
+                start = None
+                if days is not None:
+                    start = (datetime.now() - timedelta(days=days)).strftime(
+                        "%Y-%m-%dT00:00:00"
+                    )
+                python_ms = timed(lambda: python_rollup(db, dimension, start), args.repeats)
+
+                def cold():
+                    db._clear_rollup_cache()
+                    db.get_rollup(dimension, start)
+
+                sql_ms = timed(cold, args.repeats)
+                db.get_rollup(dimension, start)
+                cached_ms = timed(lambda: db.get_rollup(dimension, start), args.repeats)
+                print(
+                    f"  {dimension:<10} {label:<6} {python_ms:8.1f}ms "
+                    f"{sql_ms:8.1f}ms {cached_ms:8.3f}ms"
+                )
+        db.get_connection().close()
+
+
+if __name__ == "__main__":
+    main()
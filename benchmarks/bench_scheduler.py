@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк пробуждений: прежние независимые таймеры против общего Scheduler.
+
+Моделируется день с часами трекинга и часами простоя в виртуальном
+времени (без sleep). Считаются пробуждения, вызовы задач и CPU,
+потраченный на сам цикл таймеров на стороне Python. Цена самого
+пробуждения (итерация run loop, переход ObjC -> Python, событие Tk)
+не моделируется - она пропорциональна числу пробуждений.
+
+Запуск: python3 benchmarks/bench_scheduler.py [--tracking-hours 8 --idle-hours 16]
+"""
+
+import argparse
+import heapq
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scheduler import Scheduler  # noqa: E402
+
+HEARTBEAT_INTERVAL = 60
+REMINDER_INTERVAL = 60 * 60
+REFRESH_INTERVAL = 5
+
+
+class VirtualClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class Counter:
+    def __init__(self):
+        self.calls = 0
+
+    def job(self, now=None):
+        self.calls += 1
+        if now is None:
+            # Прежние колбэки сами брали текущее время
+            now = datetime.now()
+        return now
+
+
+def run_legacy(tracking_seconds, idle_seconds):
+    """
+    Прежняя схема: тик раз в секунду всегда (в простое - только проверка
+    timer_running), автообновление раз в 5 с, heartbeat проверяется на
+    каждом тике, напоминание - свой таймер на время трекинга.
+    Каждое срабатывание - отдельное пробуждение.
+    """
+    counter = Counter()
+    timers = [
+        (1.0, "tick", 1.0),
+        (REFRESH_INTERVAL, "refresh", REFRESH_INTERVAL),
+        (REMINDER_INTERVAL, "reminder", REMINDER_INTERVAL),
+    ]
+    heapq.heapify(timers)
+    end = tracking_seconds + idle_seconds
+    wakeups = 0
+    last_heartbeat = None
+    while timers[0][0] <= end:
+        at, name, interval = heapq.heappop(timers)
+        heapq.heappush(timers, (at + interval, name, interval))
+        tracking = at <= tracking_seconds
+        if name == "reminder" and not tracking:
+            continue
+        wakeups += 1
+        if name == "tick":
+            if tracking:
+                counter.job()  # метка таймера
+                now = counter.job()  # heartbeat: своя проверка времени
+                if (
+                    last_heartbeat is None
+                    or (now - last_heartbeat).total_seconds() >= HEARTBEAT_INTERVAL
+                ):
+                    last_heartbeat = now
+        else:
+            counter.job()
+    return wakeups, counter.calls
+
+
+def run_scheduler(tracking_seconds, idle_seconds):
+    """Новая схема: задачи тика/heartbeat/напоминаний есть только во время трекинга"""
+    clock = VirtualClock()
+    scheduler = Scheduler(clock=clock)
+    counter = Counter()
+    scheduler.every("auto_refresh", REFRESH_INTERVAL, counter.job, tolerance=1.0, jitter=0.5)
+    scheduler.every("tick", 1.0, counter.job, tolerance=0.05)
+    scheduler.every("heartbeat", HEARTBEAT_INTERVAL, counter.job, tolerance=1.0)
+    scheduler.every("reminder", REMINDER_INTERVAL, counter.job, tolerance=1.0)
+    end = tracking_seconds + idle_seconds
+    stopped = False
+    while True:
+        delay = scheduler.next_wakeup()
+        if delay is None or clock.now + delay > end:
+            break
+        clock.now += delay
+        if not stopped and clock.now > tracking_seconds:
+            for name in ("tick", "heartbeat", "reminder"):
+                scheduler.cancel(name)
+            stopped = True
+            continue
+        scheduler.run_due()
+    return scheduler.wakeups, counter.calls
+
+
+def measure(label, func, tracking_seconds, idle_seconds):
+    cpu_before = time.process_time()
+    wakeups, calls = func(tracking_seconds, idle_seconds)
+    cpu = time.process_time() - cpu_before
+    hours = (tracking_seconds + idle_seconds) / 3600
+    print(
+        f"  {label:<10} wakeups={wakeups:>7} ({wakeups / hours:7.0f}/h)  "
+        f"job calls={calls:>7}  cpu={cpu * 1000:8.1f} ms ({cpu * 1000 / hours:6.2f} ms/h)"
+    )
+    return wakeups, cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tracking-hours", type=float, default=8)
+    parser.add_argument("--idle-hours", type=float, default=16)
+    args = parser.parse_args()
+    tracking = args.tracking_hours * 3600
+    idle = args.idle_hours * 3600
+
+    for title, t, i in [
+        ("Tracking only", tracking, 0),
+        ("Idle only", 0, idle),
+        ("Full day", tracking, idle),
+    ]:
+        print(f"{title} ({(t + i) / 3600:.0f} h):")
+        legacy_wakeups, legacy_cpu = measure("legacy", run_legacy, t, i)
+        new_wakeups, new_cpu = measure("scheduler", run_scheduler, t, i)
+        print(
+            f"  -> wakeups x{legacy_wakeups / max(new_wakeups, 1):.1f} fewer, "
+            f"cpu x{legacy_cpu / max(new_cpu, 1e-9):.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
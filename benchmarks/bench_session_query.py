@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк SessionQuery: все сочетания фильтров и колонок сортировки на
+синтетической базе. Для каждого запроса печатается время и план SQLite;
+запрос, который читает time_sessions полным сканированием без индекса,
+помечается FULL SCAN, и скрипт завершается с кодом 1.
+
+Запуск: python3 benchmarks/bench_session_query.py [--sessions 200000]
+"""
+
+import argparse
+import itertools
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database  # noqa: E402
+from generate_test_data import generate_dataset  # noqa: E402
+from session_query import SORT_COLUMNS, SessionQuery  # noqa: E402
+
+
+def filter_variants(projects, companies):
+    """Каждый фильтр отдельно и попарные сочетания"""
+    month_ago = (datetime.now() - timedelta(days=30)).replace(microsecond=0)
+    single = {
+        "project": lambda q: q.project(projects // 2),
+        "company": lambda q: q.company(companies // 2),
+        "task": lambda q: q.task(name="ревью"),
+        "work_type": lambda q: q.work_type(3),
+        "paid": lambda q: q.paid(True),
+        "unpaid": lambda q: q.paid(False),
+        "duration": lambda q: q.duration(3 * 3600, None),
+        "period": lambda q: q.period(month_ago.isoformat(), None),
+    }
+    variants = [("none", lambda q: q)] + list(single.items())
+    for (a, fa), (b, fb) in itertools.combinations(single.items(), 2):
+        if {a, b} == {"paid", "unpaid"}:
+            continue
+        variants.append((f"{a}+{b}", lambda q, fa=fa, fb=fb: fb(fa(q))))
+    return variants
+
+
+def is_full_scan(plan):
+    return any(
+        detail.startswith("SCAN ts") and "USING" not in detail for detail in plan
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=200_000)
+    parser.add_argument("--projects", type=int, default=60)
+    parser.add_argument("--companies", type=int, default=12)
+    parser.add_argument("--page", type=int, default=200, help="LIMIT for each query")
+    parser.add_argument("--verbose", action="store_true", help="print every plan")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        generate_dataset(
+            path,
+            sessions=args.sessions,
+            years=4,
+            projects=args.projects,
+            companies=args.companies,
+            task_names=800,
+        )
+        db = Database(path)
+        sorts = [None] + sorted(set(SORT_COLUMNS) - {"date", "time"})
+        full_scans = []
+        timings = []
+        for (label, apply), sort in itertools.product(
+            filter_variants(args.projects, args.companies), sorts
+        ):
+            query = apply(SessionQuery()).page(args.page)
+            if sort:
+                query = query.order_by((sort, True))
+            plan = db.explain_session_query(query)
+            started = time.perf_counter()
+            db.query_sessions(query)
+            elapsed = (time.perf_counter() - started) * 1000
+            timings.append((elapsed, label, sort or "default"))
+            if is_full_scan(plan):
+                full_scans.append((label, sort or "default", plan))
+            if args.verbose:
+                print(f"{label:<22} {sort or 'default':<12} {elapsed:8.2f} ms  {plan}")
+
+        timings.sort(reverse=True)
+        print(
+            f"{len(timings)} queries on {args.sessions} sessions, "
+            f"median {timings[len(timings) // 2][0]:.2f} ms"
+        )
+        print("Slowest:")
+        for elapsed, label, sort in timings[:5]:
+            print(f"  {label:<22} order={sort:<12} {elapsed:8.2f} ms")
+        for label, sort, plan in full_scans:
+            print(f"FULL SCAN: {label} order={sort}: {plan}")
+        db.get_connection().close()
+        if full_scans:
+            sys.exit(1)
+        print("No full scans of time_sessions")
+
+
+if __name__ == "__main__":
+    main()
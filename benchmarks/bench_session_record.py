@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк загрузки сессий: dict(sqlite3.Row) против Session из
+session_row_factory - время построения и память на одну сессию.
+
+Запуск: python3 benchmarks/bench_session_record.py [--sessions 100000]
+"""
+
+import argparse
+import gc
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generate_test_data import generate_dataset  # noqa: E402
+from session_record import session_row_factory  # noqa: E402
+
+QUERY = """
+    SELECT ts.*, tn.name as task_name, tn.name as description
+    FROM time_sessions ts
+    LEFT JOIN task_names tn ON ts.task_name_id = tn.id
+    ORDER BY ts.start_time DESC
+"""
+
+
+def load_dicts(conn):
+    conn.row_factory = sqlite3.Row
+    return [dict(row) for row in conn.execute(QUERY)]
+
+
+def load_dicts_parsed(conn):
+    # Честное сравнение: dict + разбор времени, как делает UI при отрисовке
+    rows = load_dicts(conn)
+    for row in rows:
+        row["start"] = datetime.fromisoformat(row["start_time"])
+        row["end"] = datetime.fromisoformat(row["end_time"])
+    return rows
+
+
+def load_records(conn):
+    cursor = conn.cursor()
+    cursor.row_factory = session_row_factory
+    cursor.execute(QUERY)
+    return cursor.fetchall()
+
+
+def measure(label, loader, conn, sessions, repeats):
+    times = []
+    for _ in range(repeats):
+        gc.collect()
+        started = time.perf_counter()
+        rows = loader(conn)
+        times.append(time.perf_counter() - started)
+        del rows
+
+    gc.collect()
+    tracemalloc.start()
+    rows = loader(conn)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del rows
+
+    best = min(times)
+    print(
+        f"  {label:<28} load={best * 1000:8.1f} ms "
+        f"({best / sessions * 1e6:5.2f} µs/row)  "
+        f"memory={current / 1024 / 1024:7.1f} MiB ({current / sessions:6.0f} B/row)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=100_000)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        rows = generate_dataset(path, sessions=args.sessions)["rows"]
+        conn = sqlite3.connect(path)
+        print(f"Loading {rows} sessions (best of {args.repeats}):")
+        measure("dict(sqlite3.Row)", load_dicts, conn, rows, args.repeats)
+        measure(
+            "dict + parsed timestamps",
+            load_dicts_parsed,
+            conn,
+            rows,
+            args.repeats,
+        )
+        measure("Session (row factory)", load_records, conn, rows, args.repeats)
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,765 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Набор бенчмарков публичного API: все методы чтения и записи Database и
+агрегаты StatisticsGenerator.get_* (плюс create_dashboard на backend Agg)
+на синтетических базах 1k, 100k и 1M сессий (generate_test_data.py).
+
+Результаты пишутся в JSON вместе с окружением (Python, SQLite, ОС,
+процессор, коммит). Сравнение с сохранённым базовым прогоном помечает
+случаи, медиана которых выросла больше порога, и завершает скрипт с
+кодом 1.
+
+    python3 benchmarks/bench_suite.py run --sizes 1k,100k,1m -o results.json
+    python3 benchmarks/bench_suite.py run --sizes 1k --baseline base.json
+    python3 benchmarks/bench_suite.py compare base.json results.json --threshold 0.25
+
+Базы кэшируются в --fixtures (по размеру, seed и последнему дню истории);
+каждый прогон работает с копией, поэтому методы записи не портят кэш.
+Публичный метод Database без бенчмарка и без причины в SKIPPED попадает
+в отчёт как непокрытый (--strict - ошибка).
+"""
+
+import argparse
+import contextlib
+import inspect
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# Дашборд строится без окна; statistics.py уважает MPLBACKEND
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+from database import Database  # noqa: E402
+from generate_test_data import generate_dataset  # noqa: E402
+from session_query import SessionQuery  # noqa: E402
+
+SIZES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+DEFAULT_SIZES = "1k,100k,1m"
+DEFAULT_REPEAT = 5
+# Минимальная длительность одного замера: быстрые методы вызываются в цикле
+MIN_SAMPLE_MS = 20.0
+MAX_CALLS_PER_SAMPLE = 1000
+# Сравнение: рост медианы больше порога и больше шума по абсолютной величине
+DEFAULT_THRESHOLD = 0.20
+MIN_DELTA_MS = 0.05
+
+# Публичные методы без бенчмарка и почему
+SKIPPED = {
+    "get_connection": "соединение, вызывается всеми методами",
+    "add_statement_listener": "служебная подписка на SQL",
+    "remove_statement_listener": "служебная подписка на SQL",
+    "add_change_reader": "служебная регистрация SessionListModel",
+    "enable_instrumentation": "инструментирование",
+    "disable_instrumentation": "инструментирование",
+    "close": "закрывает соединение прогона",
+    "create_automatic_backup": "пишет в ~/Library/Application Support",
+    "set_schema_version": "часть миграций",
+    "create_window_positions_table": "часть миграций",
+    "create_unpaid_balance_triggers": "часть миграций",
+    "create_query_indexes": "часть миграций",
+    "create_change_tracking_tables": "часть миграций",
+    "create_change_tracking_triggers": "часть миграций",
+    "create_active_session_table": "часть миграций",
+    "create_compat_views": "часть миграций",
+}
+SKIPPED_PREFIXES = ("migrate_to_v",)
+
+
+class Case:
+    """Один бенчмарк: func() замеряется, prepare() перед каждым вызовом - нет"""
+
+    __slots__ = ("name", "method", "kind", "func", "prepare", "once")
+
+    def __init__(self, name, func, kind="read", method=None, prepare=None, once=False):
+        self.name = name
+        self.method = method or name.split()[0]
+        self.kind = kind
+        self.func = func
+        self.prepare = prepare
+        self.once = once
+
+
+# ============================================
+# Фикстуры
+# ============================================
+
+
+def parse_size(label):
+    """'1k' -> 1000, '1m' -> 1000000, '2500' -> 2500"""
+    label = label.strip().lower()
+    if label in SIZES:
+        return SIZES[label]
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(label[-1:], 1)
+    number = label[:-1] if multiplier > 1 else label
+    return int(float(number) * multiplier)
+
+
+def fixture_path(directory, sessions, seed, end):
+    """Закэшированная база (создаётся при первом обращении)"""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"sessions-{sessions}-seed{seed}-{end.isoformat()}.db")
+    if not os.path.exists(path):
+        partial = path + ".partial"
+        generate_dataset(partial, sessions=sessions, seed=seed, end=end, overwrite=True)
+        os.replace(partial, path)
+    return path
+
+
+class Context:
+    """База прогона и идентификаторы, с которыми работают случаи"""
+
+    def __init__(self, db):
+        self.db = db
+        cursor = db.get_connection().cursor()
+        now = datetime.now()
+        self.today = now.strftime("%Y-%m-%dT00:00:00")
+        self.today_end = now.strftime("%Y-%m-%dT23:59:59")
+        self.month_start = (now - timedelta(days=30)).strftime("%Y-%m-%dT00:00:00")
+        self.year_start = (now - timedelta(days=365)).strftime("%Y-%m-%dT00:00:00")
+        # Самый частый проект (ранг 1 по Ципфу) и компания с наибольшим числом проектов
+        self.project_id = cursor.execute(
+            "SELECT project_id FROM time_sessions GROUP BY project_id "
+            "ORDER BY COUNT(*) DESC LIMIT 1"
+        ).fetchone()[0]
+        self.company_id = cursor.execute(
+            "SELECT company_id FROM projects WHERE company_id IS NOT NULL "
+            "GROUP BY company_id ORDER BY COUNT(*) DESC LIMIT 1"
+        ).fetchone()[0]
+        self.work_type_id = cursor.execute("SELECT MIN(id) FROM work_types").fetchone()[0]
+        # Частые задачи: описание новых сессий, переименование, слияние
+        self.task_name, self.renamed_task, self.merged_task = [
+            row[0] for row in cursor.execute("SELECT name FROM task_names ORDER BY id LIMIT 3")
+        ]
+        # Сессия из середины истории для правки
+        count = cursor.execute("SELECT COUNT(*) FROM time_sessions").fetchone()[0]
+        row = cursor.execute(
+            "SELECT id, start_time, end_time FROM time_sessions "
+            "WHERE end_time IS NOT NULL ORDER BY id LIMIT 1 OFFSET ?",
+            (count // 2,),
+        ).fetchone()
+        self.session_id = row["id"]
+        self.session_start = datetime.fromisoformat(row["start_time"])
+        self.session_end = datetime.fromisoformat(row["end_time"])
+        # Счёт за последний месяц самого частого проекта - для чтения счетов
+        self.invoice_id = db.create_invoice(
+            project_id=self.project_id,
+            start_date=self.month_start,
+            end_date=self.today_end,
+        )
+        self.counter = 0
+
+    def unique(self, prefix):
+        self.counter += 1
+        return f"{prefix} {self.counter}"
+
+
+# ============================================
+# Случаи
+# ============================================
+
+
+def database_cases(ctx):
+    db = ctx.db
+    page = SessionQuery().page(200)
+    filtered = (
+        SessionQuery()
+        .company(ctx.company_id)
+        .paid(False)
+        .order_by(("duration", False))
+        .page(200)
+    )
+    seq = db.get_change_seq()
+    return [
+        Case("get_active_session", db.get_active_session),
+        Case("get_live_session", db.get_live_session),
+        Case("get_live_seconds", lambda: db.get_live_seconds(ctx.project_id)),
+        Case("get_live_cost", lambda: db.get_live_cost(ctx.project_id)),
+        Case("get_today_sessions", db.get_today_sessions),
+        Case("get_week_sessions", db.get_week_sessions),
+        Case("get_month_sessions", db.get_month_sessions),
+        Case("get_recent_tasks", db.get_recent_tasks),
+        Case("get_today_total", db.get_today_total),
+        Case("get_week_total", db.get_week_total),
+        Case("get_month_total", lambda: db.get_month_total(include_live=True)),
+        Case(
+            "get_project_total",
+            lambda: db.get_project_total(ctx.project_id, ctx.year_start, ctx.today_end),
+        ),
+        Case(
+            "get_last_description_for_project",
+            lambda: db.get_last_description_for_project(ctx.project_id),
+        ),
+        Case(
+            "task_index (build)",
+            lambda: db.task_index,
+            prepare=lambda: setattr(db, "_task_index", None),
+        ),
+        Case("suggest_task_names", lambda: db.suggest_task_names("Ра", ctx.project_id)),
+        Case("get_task_name_ids", db.get_task_name_ids),
+        Case("get_task_usage_by_day", db.get_task_usage_by_day),
+        Case("get_all_task_names", db.get_all_task_names),
+        Case("get_all_projects", db.get_all_projects),
+        Case("get_all_companies", db.get_all_companies),
+        Case("get_all_work_types", db.get_all_work_types),
+        Case("get_work_type", lambda: db.get_work_type(ctx.work_type_id)),
+        Case("get_all_sessions", db.get_all_sessions),
+        Case(
+            "get_all_sessions_by_project",
+            lambda: db.get_all_sessions_by_project(ctx.project_id),
+        ),
+        Case(
+            "get_sessions_by_project",
+            lambda: db.get_sessions_by_project(ctx.project_id, ctx.month_start, ctx.today_end),
+        ),
+        Case(
+            "get_sessions_in_range",
+            lambda: db.get_sessions_in_range(ctx.month_start, ctx.today_end),
+        ),
+        Case("get_sessions_by_filter", lambda: db.get_sessions_by_filter("week")),
+        Case("get_unique_descriptions", db.get_unique_descriptions),
+        Case("get_period_filters", lambda: db.get_period_filters("month", ctx.project_id)),
+        Case("query_sessions (page)", lambda: db.query_sessions(page)),
+        Case("query_sessions (filtered)", lambda: db.query_sessions(filtered)),
+        Case("explain_session_query", lambda: db.explain_session_query(filtered)),
+        Case(
+            "get_filtered_sessions",
+            lambda: db.get_filtered_sessions(
+                {"project_id": ctx.project_id, "start_date": ctx.month_start}
+            ),
+        ),
+        Case("get_change_seq", db.get_change_seq),
+        Case("get_session_changes", lambda: db.get_session_changes(seq - 100)),
+        Case("poll_external_changes", db.poll_external_changes),
+        Case("get_project_rate_at", lambda: db.get_project_rate_at(ctx.project_id)),
+        Case("get_project_rates", lambda: db.get_project_rates(ctx.project_id)),
+        Case("get_invoice", lambda: db.get_invoice(ctx.invoice_id)),
+        Case("get_invoices", db.get_invoices),
+        Case("iter_invoice_lines", lambda: list(db.iter_invoice_lines(ctx.invoice_id))),
+        Case("get_unpaid_balances", db.get_unpaid_balances),
+        Case("get_company_unpaid_balances", db.get_company_unpaid_balances),
+        Case("get_unpaid_balance", lambda: db.get_unpaid_balance(company_id=ctx.company_id)),
+        # Сводки без кэша (сбрасывается перед каждым вызовом) и из кэша
+        Case(
+            "get_rollup (cold)",
+            lambda: db.get_rollup("project", ctx.year_start),
+            prepare=db._clear_rollup_cache,
+        ),
+        Case("get_rollup (cached)", lambda: db.get_rollup("project", ctx.year_start)),
+        Case(
+            "get_company_rollup (cold)",
+            lambda: db.get_company_rollup(ctx.year_start),
+            prepare=db._clear_rollup_cache,
+        ),
+        Case(
+            "get_work_type_rollup (cold)",
+            lambda: db.get_work_type_rollup(ctx.year_start),
+            prepare=db._clear_rollup_cache,
+        ),
+        Case("get_archive_dir", db.get_archive_dir),
+        Case("get_archives", db.get_archives),
+        Case("is_archived_session", lambda: db.is_archived_session(ctx.session_id)),
+        Case("detach_archives", db.detach_archives),
+        Case("get_maintenance_stats", db.get_maintenance_stats),
+        Case("get_schema_version", db.get_schema_version),
+        Case("get_window_position", lambda: db.get_window_position("main_window")),
+        Case("init_database (up to date)", db.init_database, kind="startup"),
+    ]
+
+
+def write_cases(ctx):
+    db = ctx.db
+    state = {}
+
+    def new_project():
+        state["project"] = db.create_project(ctx.unique("Бенчмарк"), hourly_rate=30)
+
+    def stop_active():
+        active = db.get_active_session()
+        if active is not None:
+            db.stop_session(active["id"])
+
+    def start_active():
+        stop_active()
+        state["session"] = db.start_session(ctx.project_id, ctx.task_name)
+
+    def unpay():
+        db.get_connection().execute(
+            "UPDATE time_sessions SET paid = 0 WHERE id = ?", (ctx.session_id,)
+        )
+        db.get_connection().commit()
+
+    def void_last():
+        if state.get("invoice"):
+            db.void_invoice(state.pop("invoice"))
+
+    def create_invoice():
+        state["invoice"] = db.create_invoice(
+            project_id=ctx.project_id, start_date=ctx.year_start, end_date=ctx.today_end
+        )
+
+    def insert_task_name():
+        state["task_name_id"] = db.get_or_create_task_name(ctx.unique("Удаляемая задача"))
+
+    def insert_work_type():
+        cursor = db.get_connection().cursor()
+        cursor.execute("INSERT INTO work_types (name) VALUES (?)", (ctx.unique("Вид"),))
+        db.get_connection().commit()
+        state["work_type_id"] = cursor.lastrowid
+
+    def toggle(key, first, second):
+        """(first, second) и (second, first) по очереди: правка туда и обратно"""
+        state[key] = not state.get(key)
+        return (first, second) if state[key] else (second, first)
+
+    def shifted_times():
+        # Сдвиг сессии на минуту туда и обратно в пределах её суток
+        delta = timedelta(minutes=1) if toggle("shift", True, False)[0] else timedelta(0)
+        return ctx.session_start + delta, ctx.session_end + delta
+
+    new_project()
+    task_name_id = db.get_or_create_task_name(ctx.renamed_task)
+    return [
+        Case("create_project", new_project, kind="write"),
+        Case(
+            "update_project",
+            lambda: db.update_project(state["project"], ctx.unique("Проект"), 35),
+            kind="write",
+        ),
+        Case(
+            "update_project_rate",
+            lambda: db.update_project_rate(state["project"], 40),
+            kind="write",
+        ),
+        Case(
+            "recompute_session_costs",
+            lambda: db.recompute_session_costs(ctx.project_id),
+            kind="write",
+        ),
+        Case("rebuild_unpaid_balances", db.rebuild_unpaid_balances, kind="write"),
+        Case(
+            "start_session",
+            lambda: state.update(session=db.start_session(ctx.project_id, ctx.task_name)),
+            kind="write",
+            prepare=stop_active,
+        ),
+        Case("heartbeat_active_session", db.heartbeat_active_session, kind="write"),
+        Case(
+            "stop_session",
+            lambda: db.stop_session(state["session"]),
+            kind="write",
+            prepare=start_active,
+        ),
+        Case(
+            "release_active_session",
+            db.release_active_session,
+            kind="write",
+            prepare=start_active,
+        ),
+        Case(
+            "recover_active_session",
+            lambda: db.recover_active_session(now=datetime.now() + timedelta(hours=1)),
+            kind="write",
+            prepare=start_active,
+        ),
+        Case(
+            "update_session_times",
+            lambda: db.update_session_times(ctx.session_id, *shifted_times()),
+            kind="write",
+        ),
+        Case(
+            "update_session_details",
+            lambda: db.update_session_details(
+                ctx.session_id, toggle("details", ctx.task_name, "Правка")[0], ctx.project_id
+            ),
+            kind="write",
+        ),
+        Case(
+            "import_session",
+            lambda: db.import_session(
+                ctx.project_id,
+                ctx.task_name,
+                ctx.session_start - timedelta(hours=2),
+                ctx.session_start - timedelta(hours=1),
+            ),
+            kind="write",
+        ),
+        Case(
+            "mark_session_as_paid",
+            lambda: db.mark_session_as_paid(ctx.session_id),
+            kind="write",
+            prepare=unpay,
+        ),
+        Case("create_invoice", create_invoice, kind="write", prepare=void_last),
+        Case(
+            "void_invoice",
+            lambda: db.void_invoice(state.pop("invoice")),
+            kind="write",
+            prepare=lambda: (void_last(), create_invoice()),
+        ),
+        Case(
+            "get_or_create_task_name (new)",
+            lambda: db.get_or_create_task_name(ctx.unique("Новая задача")),
+            kind="write",
+        ),
+        Case(
+            "update_task_name",
+            lambda: db.update_task_name(
+                task_name_id, toggle("task", ctx.renamed_task, "Переименована")[1]
+            ),
+            kind="write",
+        ),
+        Case(
+            "delete_task_name",
+            lambda: db.delete_task_name(state["task_name_id"]),
+            kind="write",
+            prepare=insert_task_name,
+        ),
+        Case(
+            "rename_all_sessions_with_description",
+            lambda: db.rename_all_sessions_with_description(
+                *toggle("rename", ctx.merged_task, f"{ctx.merged_task} (2)")
+            ),
+            kind="write",
+        ),
+        Case(
+            "update_work_type",
+            lambda: db.update_work_type(
+                ctx.work_type_id, toggle("work_type", "Разработка", "Разработка*")[1]
+            ),
+            kind="write",
+        ),
+        Case(
+            "delete_work_type",
+            lambda: db.delete_work_type(state["work_type_id"]),
+            kind="write",
+            prepare=insert_work_type,
+        ),
+        Case(
+            "save_window_position",
+            lambda: db.save_window_position("bench_window", 10, 20, 800, 600),
+            kind="write",
+        ),
+        Case("run_maintenance", lambda: db.run_maintenance(force=True), kind="write"),
+        Case("prune_tombstones", db.prune_tombstones, kind="write"),
+        # Последним: переносит старые сессии в архивы (повтор ничего не делает)
+        Case("archive_sessions", db.archive_sessions, kind="write", once=True, prepare=stop_active),
+    ]
+
+
+def statistics_cases(db):
+    """Агрегаты StatisticsGenerator; (случаи, методы get_*) или ([], причина)"""
+    try:
+        from statistics import StatisticsGenerator
+        import matplotlib.pyplot as plt
+    except ImportError as e:
+        return [], f"StatisticsGenerator unavailable: {e}"
+    generator = StatisticsGenerator(db)
+
+    def dashboard():
+        plt.close(generator.create_dashboard(period_days=30))
+
+    cases = []
+    for name, method in inspect.getmembers(generator, inspect.ismethod):
+        if not name.startswith("get_"):
+            continue
+        if "days" in inspect.signature(method).parameters:
+            cases.append(Case(f"{name} (30d)", lambda m=method: m(days=30), method=name))
+            cases.append(Case(f"{name} (365d)", lambda m=method: m(days=365), method=name))
+        else:
+            cases.append(Case(name, method))
+    cases.append(Case("create_dashboard (Agg)", dashboard, kind="render"))
+    for case in cases:
+        case.method = f"StatisticsGenerator.{case.method}"
+    return cases, None
+
+
+def uncovered_methods(cases):
+    """Публичные методы Database без случая и без причины в SKIPPED"""
+    covered = {case.method for case in cases}
+    public = {
+        name
+        for name, member in inspect.getmembers(Database)
+        if not name.startswith("_")
+        and (inspect.isfunction(member) or isinstance(member, property))
+    }
+    return sorted(
+        name
+        for name in public - covered - set(SKIPPED)
+        if not name.startswith(SKIPPED_PREFIXES)
+    )
+
+
+# ============================================
+# Замеры
+# ============================================
+
+
+def measure(case, repeat):
+    """
+    Времена одного вызова (мс) по замерам. Первый вызов - прогрев (кэш
+    страниц, подготовленные запросы), второй задаёт число вызовов в замере.
+    """
+    timings = []
+    for _ in range(1 if case.once else 2):
+        if case.prepare:
+            case.prepare()
+        started = time.perf_counter()
+        case.func()
+        timings.append((time.perf_counter() - started) * 1000)
+    if case.once:
+        return timings, 1
+    if case.prepare:
+        calls = 1
+    else:
+        calls = max(1, min(MAX_CALLS_PER_SAMPLE, int(MIN_SAMPLE_MS / max(timings[-1], 0.001))))
+    samples = []
+    for _ in range(repeat):
+        elapsed = 0.0
+        for _ in range(calls):
+            if case.prepare:
+                case.prepare()
+            started = time.perf_counter()
+            case.func()
+            elapsed += time.perf_counter() - started
+        samples.append(elapsed / calls * 1000)
+    return samples, calls
+
+
+def median(values):
+    # Без модуля statistics stdlib: его имя занимает statistics.py проекта
+    ordered = sorted(values)
+    middle = len(ordered) // 2
+    if len(ordered) % 2:
+        return ordered[middle]
+    return (ordered[middle - 1] + ordered[middle]) / 2
+
+
+def run_cases(cases, repeat, out, label):
+    results = {}
+    for case in cases:
+        try:
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                samples, calls = measure(case, repeat)
+        except Exception as e:
+            results[case.name] = {
+                "method": case.method,
+                "kind": case.kind,
+                "error": f"{type(e).__name__}: {e}",
+            }
+            print(f"  {label:<6} {case.name:<44} ERROR {e}", file=out)
+            continue
+        result = {
+            "method": case.method,
+            "kind": case.kind,
+            "median_ms": median(samples),
+            "min_ms": min(samples),
+            "mean_ms": sum(samples) / len(samples),
+            "samples": len(samples),
+            "calls_per_sample": calls,
+        }
+        results[case.name] = result
+        print(
+            f"  {label:<6} {case.name:<44} {result['median_ms']:10.3f} ms "
+            f"(min {result['min_ms']:.3f}, x{calls})",
+            file=out,
+        )
+    return results
+
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            timeout=10,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    try:
+        import matplotlib
+
+        matplotlib_version = matplotlib.__version__
+    except ImportError:
+        matplotlib_version = None
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor() or None,
+        "cpu_count": os.cpu_count(),
+        "hostname": platform.node(),
+        "git_commit": commit,
+        "matplotlib": matplotlib_version,
+    }
+
+
+def run_suite(args):
+    out = sys.stdout
+    end = args.end or date.today()
+    report = {"environment": environment(), "seed": args.seed, "end": end.isoformat(), "sizes": {}}
+    uncovered = set()
+    for label in args.sizes.split(","):
+        sessions = parse_size(label)
+        print(f"[Suite] {label}: {sessions} sessions", file=out)
+        with contextlib.redirect_stdout(open(os.devnull, "w")):
+            fixture = fixture_path(args.fixtures, sessions, args.seed, end)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "suite.db")
+            shutil.copyfile(fixture, path)
+            with contextlib.redirect_stdout(open(os.devnull, "w")):
+                db = Database(path)
+                ctx = Context(db)
+                writes = write_cases(ctx)
+            reads = database_cases(ctx)
+            stats, reason = statistics_cases(db)
+            if reason:
+                print(f"  {label:<6} {reason}", file=out)
+            cases = [
+                case
+                for case in reads + stats + writes
+                if not args.filter or args.filter in case.name
+            ]
+            uncovered.update(uncovered_methods(reads + writes))
+            results = run_cases(cases, args.repeat, out, label)
+            with contextlib.redirect_stdout(open(os.devnull, "w")):
+                db.close()
+        report["sizes"][label] = {
+            "sessions": sessions,
+            "fixture": os.path.basename(fixture),
+            "statistics_skipped": reason,
+            "cases": results,
+        }
+    report["uncovered"] = sorted(uncovered)
+    if uncovered:
+        print(f"[Suite] Database methods without a benchmark: {', '.join(sorted(uncovered))}")
+
+    output = args.output or os.path.join(
+        ROOT, "benchmarks", "results", f"suite-{datetime.now():%Y%m%d-%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=1)
+    print(f"[Suite] Results saved to {output}")
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        status = print_comparison(baseline, report, args.threshold)
+    if args.strict and uncovered:
+        status = status or 2
+    return status
+
+
+# ============================================
+# Сравнение с базовым прогоном
+# ============================================
+
+
+def compare_reports(baseline, current, threshold=DEFAULT_THRESHOLD, min_delta_ms=MIN_DELTA_MS):
+    """
+    Список (размер, случай, было мс, стало мс, отношение, статус), статус -
+    regression / improvement / ok / new / missing / error.
+    """
+    rows = []
+    for label, size in current["sizes"].items():
+        before_cases = baseline["sizes"].get(label, {}).get("cases", {})
+        for name, result in size["cases"].items():
+            before = before_cases.get(name)
+            if "error" in result:
+                rows.append((label, name, None, None, None, "error"))
+                continue
+            if before is None or "median_ms" not in before:
+                rows.append((label, name, None, result["median_ms"], None, "new"))
+                continue
+            old, new = before["median_ms"], result["median_ms"]
+            ratio = new / old if old else float("inf")
+            if new - old > min_delta_ms and ratio > 1 + threshold:
+                status = "regression"
+            elif old - new > min_delta_ms and ratio < 1 / (1 + threshold):
+                status = "improvement"
+            else:
+                status = "ok"
+            rows.append((label, name, old, new, ratio, status))
+        for name in sorted(set(before_cases) - set(size["cases"])):
+            rows.append((label, name, None, None, None, "missing"))
+    return rows
+
+
+def print_comparison(baseline, current, threshold):
+    """Печать различий; 1, если есть регрессии"""
+    keys = ("python", "sqlite", "machine", "processor", "cpu_count", "hostname")
+    before_env, after_env = baseline.get("environment", {}), current.get("environment", {})
+    differs = [key for key in keys if before_env.get(key) != after_env.get(key)]
+    if differs:
+        print(f"[Compare] Environment differs ({', '.join(differs)}) - timings may not be comparable")
+    rows = compare_reports(baseline, current, threshold)
+    regressions = [row for row in rows if row[5] == "regression"]
+    print(
+        f"[Compare] baseline {before_env.get('git_commit')} ({before_env.get('timestamp')}) "
+        f"vs {after_env.get('git_commit')} ({after_env.get('timestamp')}), "
+        f"threshold {threshold:.0%}"
+    )
+    for label, name, old, new, ratio, status in rows:
+        if status == "ok":
+            continue
+        if old is not None and new is not None:
+            print(f"  {status:<11} {label:<6} {name:<44} {old:10.3f} -> {new:10.3f} ms (x{ratio:.2f})")
+        else:
+            print(f"  {status:<11} {label:<6} {name}")
+    print(f"[Compare] {len(regressions)} regressions in {len(rows)} cases")
+    return 1 if regressions else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="прогнать набор и сохранить JSON")
+    run.add_argument("--sizes", default=DEFAULT_SIZES, help="размеры баз: 1k,100k,1m или числа")
+    run.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    run.add_argument("--seed", type=int, default=42)
+    run.add_argument("--end", type=date.fromisoformat, help="последний день истории баз")
+    run.add_argument(
+        "--fixtures",
+        default=os.path.join(tempfile.gettempdir(), "mtimer-bench-fixtures"),
+        help="каталог кэша баз",
+    )
+    run.add_argument("--filter", help="только случаи, в имени которых есть строка")
+    run.add_argument("-o", "--output", help="файл результатов JSON")
+    run.add_argument("--baseline", help="сравнить с этим JSON после прогона")
+    run.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    run.add_argument("--strict", action="store_true", help="ошибка, если есть непокрытые методы")
+
+    compare = commands.add_parser("compare", help="сравнить два сохранённых прогона")
+    compare.add_argument("baseline")
+    compare.add_argument("current")
+    compare.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        return run_suite(args)
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.current, encoding="utf-8") as f:
+        current = json.load(f)
+    return print_comparison(baseline, current, args.threshold)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
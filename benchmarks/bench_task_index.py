@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк frecency-индекса задач: построение индекса и задержка подсказок
+при наборе описания по одной букве, в сравнении с SQL-запросом
+"последнее описание проекта".
+
+Запуск: python3 benchmarks/bench_task_index.py [--sessions 100000]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database  # noqa: E402
+from generate_test_data import generate_dataset  # noqa: E402
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def report(label, samples_ns):
+    us = [s / 1000 for s in samples_ns]
+    print(
+        f"  {label:<34} n={len(us):<6} p50={percentile(us, 50):8.1f}µs "
+        f"p95={percentile(us, 95):8.1f}µs max={max(us):9.1f}µs "
+        f"mean={statistics.fmean(us):8.1f}µs"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=100_000)
+    parser.add_argument("--projects", type=int, default=40)
+    parser.add_argument("--tasks", type=int, default=2_000)
+    parser.add_argument("--queries", type=int, default=300)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        # Задачи и проекты по Ципфу: немногие частые, длинный хвост
+        generate_dataset(
+            path,
+            sessions=args.sessions,
+            projects=args.projects,
+            companies=0,
+            task_names=args.tasks,
+        )
+        db = Database(path)
+        names = [
+            row[0]
+            for row in db.get_connection().execute(
+                "SELECT name FROM task_names ORDER BY name"
+            )
+        ]
+        rng = random.Random(7)
+
+        started = time.perf_counter()
+        index = db.task_index
+        build_ms = (time.perf_counter() - started) * 1000
+        print(
+            f"Index build: {build_ms:.1f} ms for {args.sessions} sessions, "
+            f"{len(index)} task names"
+        )
+
+        # Набор по одной букве: каждый префикс целевого названия
+        keystrokes = []
+        for target in rng.sample(names, min(args.queries, len(names))):
+            project_id = rng.randint(1, args.projects)
+            for i in range(1, len(target) + 1):
+                started = time.perf_counter_ns()
+                db.suggest_task_names(target[:i], project_id)
+                keystrokes.append(time.perf_counter_ns() - started)
+
+        empty = []
+        for _ in range(args.queries):
+            started = time.perf_counter_ns()
+            db.suggest_task_names("", rng.randint(1, args.projects))
+            empty.append(time.perf_counter_ns() - started)
+
+        last_index = []
+        for _ in range(args.queries):
+            started = time.perf_counter_ns()
+            db.get_last_description_for_project(rng.randint(1, args.projects))
+            last_index.append(time.perf_counter_ns() - started)
+
+        # Прежний путь: ORDER BY start_time DESC LIMIT 1 по сессиям проекта
+        cursor = db.get_connection().cursor()
+        last_sql = []
+        for _ in range(args.queries):
+            started = time.perf_counter_ns()
+            cursor.execute(
+                """
+                SELECT tn.name FROM time_sessions ts
+                JOIN task_names tn ON ts.task_name_id = tn.id
+                WHERE ts.project_id = ? AND tn.name != ''
+                ORDER BY ts.start_time DESC LIMIT 1
+                """,
+                (rng.randint(1, args.projects),),
+            )
+            cursor.fetchone()
+            last_sql.append(time.perf_counter_ns() - started)
+
+        print("Latency:")
+        report("suggest (per keystroke)", keystrokes)
+        report("suggest (empty prefix)", empty)
+        report("last task for project (index)", last_index)
+        report("last task for project (SQL)", last_sql)
+        db.get_connection().close()
+
+
+if __name__ == "__main__":
+    main()
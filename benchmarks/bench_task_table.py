@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк таблицы «Все задачи»: прокрутка по всем строкам с запросом
+каждой ячейки, как это делает NSTableView. Прежний колбэк (поиск проекта
+перебором, strptime, форматирование на каждую ячейку) против TaskTableModel.
+
+Запуск: python3 benchmarks/bench_task_table.py [--sessions 100000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from session_record import Session  # noqa: E402
+from task_table_model import COLUMNS, TaskTableModel  # noqa: E402
+
+VISIBLE_ROWS = 30  # строк на экране
+
+
+def build_data(sessions, projects, seed=42):
+    rng = random.Random(seed)
+    project_rows = [
+        {"id": i + 1, "name": f"Project {i + 1}", "hourly_rate": rng.choice((0, 25, 40))}
+        for i in range(projects)
+    ]
+    now = datetime.now().replace(microsecond=0)
+    records = []
+    for i in range(sessions):
+        start = now - timedelta(seconds=rng.randint(0, 3 * 365 * 86400))
+        duration = rng.randint(300, 7200)
+        records.append(
+            Session(
+                id=i + 1,
+                project_id=rng.randint(1, projects),
+                start_time=start.isoformat(sep=" "),
+                end_time=(start + timedelta(seconds=duration)).isoformat(sep=" "),
+                duration=duration,
+                paid=int(rng.random() < 0.3),
+                description=f"task {rng.randint(1, 500)}",
+            )
+        )
+    records.sort(key=lambda s: s.start_time, reverse=True)
+    return project_rows, records
+
+
+def legacy_value(session, identifier, projects_cache):
+    """Прежний tableView_objectValueForTableColumn_row_ без AppKit"""
+    if identifier == "description":
+        return session.get("description", "")
+    elif identifier == "project":
+        project_id = session.get("project_id")
+        if project_id:
+            project = next((p for p in projects_cache if p["id"] == project_id), None)
+            return project["name"] if project else ""
+        return ""
+    elif identifier == "date":
+        start_time = session.get("start_time", "")
+        if start_time:
+            try:
+                dt = datetime.strptime(start_time, "%Y-%m-%d %H:%M:%S")
+                return dt.strftime("%d.%m.%Y")
+            except Exception:
+                return start_time.split()[0] if " " in start_time else start_time
+        return ""
+    elif identifier == "time":
+        start_time = session.get("start_time", "")
+        end_time = session.get("end_time", "")
+        if start_time and end_time:
+            try:
+                dt_start = datetime.strptime(start_time, "%Y-%m-%d %H:%M:%S")
+                dt_end = datetime.strptime(end_time, "%Y-%m-%d %H:%M:%S")
+                return f"{dt_start.strftime('%H:%M')} - {dt_end.strftime('%H:%M')}"
+            except Exception:
+                return start_time
+        return ""
+    elif identifier == "duration":
+        duration = session.get("duration", 0)
+        return f"{duration // 3600:02d}:{(duration % 3600) // 60:02d}:{duration % 60:02d}"
+    elif identifier == "cost":
+        duration = session.get("duration", 0)
+        hourly_rate = session.get("hourly_rate", 0) or 0
+        if hourly_rate > 0:
+            return f"${duration / 3600.0 * hourly_rate:.2f}"
+        return "$0.00"
+    return ""
+
+
+def scroll_positions(total, passes, rng):
+    """Верхние строки экрана: проход сверху вниз, затем прыжки назад"""
+    positions = list(range(0, max(1, total - VISIBLE_ROWS), VISIBLE_ROWS // 2))
+    for _ in range(passes - 1):
+        positions.extend(rng.randrange(0, max(1, total - VISIBLE_ROWS)) for _ in range(500))
+    return positions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=100_000)
+    parser.add_argument("--projects", type=int, default=40)
+    parser.add_argument("--passes", type=int, default=2)
+    args = parser.parse_args()
+
+    projects, records = build_data(args.sessions, args.projects)
+    positions = scroll_positions(len(records), args.passes, random.Random(7))
+    cells = len(positions) * VISIBLE_ROWS * len(COLUMNS)
+    print(f"{args.sessions} rows, {len(positions)} screens, {cells} cell requests")
+
+    started = time.perf_counter()
+    for top in positions:
+        for row in range(top, top + VISIBLE_ROWS):
+            session = records[row]
+            for column in COLUMNS:
+                legacy_value(session, column, projects)
+    legacy = time.perf_counter() - started
+
+    started = time.perf_counter()
+    model = TaskTableModel()
+    model.set_projects(projects)
+    model.set_sessions(records)
+    load = time.perf_counter() - started
+    started = time.perf_counter()
+    for top in positions:
+        for row in range(top, top + VISIBLE_ROWS):
+            for column in COLUMNS:
+                model.value(row, column)
+    scrolled = time.perf_counter() - started
+
+    started = time.perf_counter()
+    model.totals()
+    totals = time.perf_counter() - started
+
+    print(
+        f"  legacy callbacks   {legacy * 1000:9.1f} ms  "
+        f"({legacy / cells * 1e6:6.2f} µs/cell)"
+    )
+    print(
+        f"  TaskTableModel     {scrolled * 1000:9.1f} ms  "
+        f"({scrolled / cells * 1e6:6.2f} µs/cell, load {load * 1000:.1f} ms, "
+        f"totals {totals * 1000:.1f} ms)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+Шина изменений данных.
+
+Database публикует типизированные события после каждой успешной записи,
+а UI подписывается и перезагружает только затронутую часть вместо
+безусловного обновления каждые несколько секунд. Изменения, сделанные
+другими процессами (второй фронтенд, окно статистики, скрипты), Database
+замечает по PRAGMA data_version и публикует как EXTERNAL_CHANGE.
+"""
+
+from log import get_logger
+
+logger = get_logger(__name__)
+
+# Типы событий
+SESSION_STARTED = "session_started"
+SESSION_STOPPED = "session_stopped"
+SESSION_EDITED = "session_edited"
+SESSION_HEARTBEAT = "session_heartbeat"
+SESSIONS_IMPORTED = "sessions_imported"
+PROJECT_CHANGED = "project_changed"
+TASK_NAMES_CHANGED = "task_names_changed"
+WORK_TYPES_CHANGED = "work_types_changed"
+# Что-то изменил другой процесс - что именно, неизвестно
+EXTERNAL_CHANGE = "external_change"
+
+# События, после которых меняется список сессий и итоги
+SESSION_EVENTS = frozenset(
+    {
+        SESSION_STARTED,
+        SESSION_STOPPED,
+        SESSION_EDITED,
+        SESSION_HEARTBEAT,
+        SESSIONS_IMPORTED,
+        TASK_NAMES_CHANGED,
+        EXTERNAL_CHANGE,
+    }
+)
+# События, после которых меняется список проектов
+PROJECT_EVENTS = frozenset({PROJECT_CHANGED, EXTERNAL_CHANGE})
+
+
+class ChangeEvent:
+    """Событие изменения: тип и ID затронутых записей"""
+
+    __slots__ = ("kind", "session_ids", "project_id")
+
+    def __init__(self, kind, session_ids=(), project_id=None):
+        self.kind = kind
+        self.session_ids = tuple(session_ids)
+        self.project_id = project_id
+
+    def __repr__(self):
+        return (
+            f"<ChangeEvent {self.kind} sessions={list(self.session_ids)} "
+            f"project={self.project_id}>"
+        )
+
+
+class ChangeBus:
+    """Синхронная шина: подписчики вызываются сразу в publish()"""
+
+    def __init__(self):
+        self._subscribers = {}  # token -> (callback, kinds или None)
+        self._next_token = 1
+
+    def subscribe(self, callback, kinds=None):
+        """
+        Подписаться на события. kinds - набор типов (None - все).
+        Возвращает токен для unsubscribe().
+        """
+        token = self._next_token
+        self._next_token += 1
+        self._subscribers[token] = (callback, frozenset(kinds) if kinds else None)
+        return token
+
+    def unsubscribe(self, token):
+        return self._subscribers.pop(token, None) is not None
+
+    def publish(self, event):
+        for callback, kinds in list(self._subscribers.values()):
+            if kinds is not None and event.kind not in kinds:
+                continue
+            try:
+                callback(event)
+            except Exception as e:
+                logger.exception("Subscriber failed on %s: %s", event.kind, e)
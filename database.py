@@ -2,13 +2,137 @@ import sqlite3
 from datetime import datetime, timedelta
 import os
 import shutil
-from localization import t
+import time
+import weakref
+from log import get_logger
+from change_bus import (
+    ChangeBus,
+    ChangeEvent,
+    EXTERNAL_CHANGE,
+    PROJECT_CHANGED,
+    SESSION_EDITED,
+    SESSION_HEARTBEAT,
+    SESSION_STARTED,
+    SESSION_STOPPED,
+    SESSIONS_IMPORTED,
+    TASK_NAMES_CHANGED,
+    WORK_TYPES_CHANGED,
+)
+from instrumentation import (
+    SLOW_LOG_FILE,
+    SLOW_QUERY_MS,
+    SNAPSHOT_FILE,
+    Instrumentation,
+)
+from metrics import ROLLUP_CACHE_HITS, ROLLUP_CACHE_MISSES
+from session_query import SessionQuery
+from session_record import session_row_factory
+
+logger = get_logger("db")
+
+# Измерения сводок: имя -> (ключ группы, название группы) в SQL
+ROLLUP_DIMENSIONS = {
+    "company": ("c.id", "c.name"),
+    "work_type": ("wt.id", "wt.name"),
+    "project": ("p.id", "p.name"),
+}
+ROLLUP_CACHE_SIZE = 32
+
+# Сессии старше стольких месяцев переносятся в годовые архивы
+ARCHIVE_AFTER_MONTHS = 12
+# Папка архивов рядом с файлом базы: archive/mtimer-<год>.db
+ARCHIVE_DIR_NAME = "archive"
+
+# Обслуживание базы в простое (см. run_maintenance)
+MAINTENANCE_INTERVAL = 300  # секунд между проверками
+MAINTENANCE_IDLE_SECONDS = 30  # столько секунд без записей = простой
+MAINTENANCE_STEP_BUDGET_MS = 5.0  # максимум удержания блокировки записи одним шагом
+MAINTENANCE_RUN_BUDGET_MS = 50.0  # всего работы за одно пробуждение
+MAINTENANCE_OPTIMIZE_INTERVAL = 3600  # секунд между PRAGMA optimize
+# Надгробия моложе этого срока не удаляются: списки других процессов
+# (второй фронтенд) успевают их забрать; отставший список перечитывается
+TOMBSTONE_RETENTION_SECONDS = 24 * 3600
+ANALYZE_CHANGE_THRESHOLD = 1000  # изменений сессий до повторного ANALYZE
+ANALYSIS_LIMIT = 400  # строк индекса на ANALYZE (PRAGMA analysis_limit)
+
+# Начало действия первой ставки проекта (ставка "с самого начала")
+RATE_EPOCH = "1970-01-01T00:00:00"
+
+# Ставка, действовавшая на момент начала сессии; {table} - таблица
+# сессий или её алиас в запросе
+RATE_AT_START_TEMPLATE = """
+    COALESCE((
+        SELECT pr.hourly_rate FROM project_rates pr
+        WHERE pr.project_id = {table}.project_id
+          AND pr.effective_from <= {table}.start_time
+        ORDER BY pr.effective_from DESC
+        LIMIT 1
+    ), 0)
+"""
+# Для UPDATE time_sessions
+RATE_AT_START_SQL = RATE_AT_START_TEMPLATE.format(table="time_sessions")
 
 # Константы версий схемы базы данных
-SCHEMA_VERSION_CURRENT = 3  # Текущая версия с таблицей window_positions
+SCHEMA_VERSION_CURRENT = 14  # Текущая версия с интервалом heartbeat в active_session
+SCHEMA_VERSION_V14 = 14  # Версия с active_session.heartbeat_interval
+SCHEMA_VERSION_V13 = 13  # Версия с task_names.change_seq и очисткой надгробий
+SCHEMA_VERSION_V12 = 12  # Версия с инкрементальным auto_vacuum
+SCHEMA_VERSION_V11 = 11  # Версия с каталогом archives и archive_rollups
+SCHEMA_VERSION_V10 = 10  # Версия с invoices и unpaid_balances
+SCHEMA_VERSION_V9 = 9  # Версия с project_rates и time_sessions.cost
+SCHEMA_VERSION_V8 = 8  # Версия с индексами фильтров/сортировки time_sessions
+SCHEMA_VERSION_V7 = 7  # Версия с change_seq/modified_at и session_tombstones
+SCHEMA_VERSION_V6 = 6  # Версия, где ни одна сессия не пересекает полночь
+SCHEMA_VERSION_V5 = 5  # Версия с singleton-строкой active_session и heartbeat
+SCHEMA_VERSION_V4 = 4  # Версия без денормализованного time_sessions.description
+SCHEMA_VERSION_V3 = 3  # Версия с таблицей window_positions
 SCHEMA_VERSION_V2 = 2  # Версия с таблицей task_names
 SCHEMA_VERSION_LEGACY = 1  # Старая версия с description напрямую в time_sessions
 
+# Как часто фронтенды сохраняют heartbeat активной сессии (секунды)
+HEARTBEAT_INTERVAL = 60
+# Сессия без heartbeat дольше этого срока считается осиротевшей после краша
+# (не меньше трёх интервалов фронтенда, который её ведёт)
+STALE_HEARTBEAT_SECONDS = 3 * HEARTBEAT_INTERVAL
+
+
+def stale_after_seconds(heartbeat_interval=None):
+    """
+    Через сколько секунд без heartbeat сессия осиротела: по интервалу,
+    записанному в active_session её фронтендом, а не по своему - у другого
+    экземпляра интервал в настройках может быть другим.
+    """
+    return max(STALE_HEARTBEAT_SECONDS, 3 * (heartbeat_interval or HEARTBEAT_INTERVAL))
+
+
+def elapsed_seconds(start, end):
+    """
+    Секунды между двумя моментами локального времени.
+    Считается через timestamp(), поэтому час перехода на летнее/зимнее
+    время учитывается (наивное end - start его не видит).
+    """
+    return max(0, int(end.timestamp() - start.timestamp()))
+
+
+def split_by_local_days(start, end):
+    """
+    Разбить интервал [start, end) на куски по локальным суткам.
+    Возвращает список (start, end, duration); каждый кусок, кроме
+    последнего, заканчивается ровно в полночь.
+    """
+    if end <= start:
+        return [(start, start, 0)]
+    pieces = []
+    while True:
+        midnight = datetime.combine(
+            start.date() + timedelta(days=1), datetime.min.time(), start.tzinfo
+        )
+        if end <= midnight:
+            pieces.append((start, end, elapsed_seconds(start, end)))
+            return pieces
+        pieces.append((start, midnight, elapsed_seconds(start, midnight)))
+        start = midnight
+
 
 class Database:
     def __init__(self, db_name="timetracker.db"):
@@ -32,29 +156,173 @@ class Database:
         try:
             os.makedirs(base_dir, exist_ok=True)
         except (OSError, PermissionError) as e:
-            print(f"[DB] Cannot create directory {base_dir}: {e}")
+            logger.error("Cannot create directory %s: %s", base_dir, e)
             # Fallback на App Support если основная директория недоступна
             app_support = os.path.expanduser("~/Library/Application Support/MacikTimer")
             os.makedirs(app_support, exist_ok=True)
             base_dir = app_support
         self.db_path = os.path.join(base_dir, db_name)
-        print(f"[DB] Initializing database at: {self.db_path}")
-        print(
-            f"[DB] frozen={getattr(sys, 'frozen', False)}, use_app_support={use_app_support}"
+        logger.info("Initializing database at: %s", self.db_path)
+        logger.info(
+            "frozen=%s, use_app_support=%s",
+            getattr(sys, "frozen", False),
+            use_app_support,
         )
         self.connection = None
+        self._task_index = None  # Строится лениво, см. task_index
+        # Шина изменений: write-методы публикуют события после commit
+        self.changes = ChangeBus()
+        self._data_version = None  # PRAGMA data_version при последней проверке
+        # Кэш сводок: ключ -> (change_seq, строки); сессии сверяются по
+        # change_seq, правки проектов/видов работ сбрасывают кэш целиком
+        self._rollup_cache = {}
+        self.changes.subscribe(
+            self._clear_rollup_cache,
+            {PROJECT_CHANGED, WORK_TYPES_CHANGED, EXTERNAL_CHANGE},
+        )
+        # Годовые архивы: каталог читается лениво, файлы подключаются
+        # (ATTACH) только когда запрос затрагивает их период
+        self._archives = None  # год -> строка каталога archives
+        self._attached = {}  # год -> имя схемы ATTACH
+        # Читатели дельт (SessionListModel) с атрибутом seq: надгробия,
+        # которые ещё может запросить живой читатель, не удаляются
+        self._change_readers = weakref.WeakSet()
+        # Обслуживание: момент последней записи и статистика шагов
+        self._last_write = time.monotonic()
+        self._vacuum_pages = 64  # страниц за шаг incremental_vacuum (подстраивается)
+        self._maintenance = {
+            "runs": 0,
+            "skipped_busy": 0,
+            "optimize_runs": 0,
+            "analyze_runs": 0,
+            "vacuum_steps": 0,
+            "pages_freed": 0,
+            "max_step_ms": 0.0,
+            "last_run": None,
+            "last_optimize": None,
+            "last_analyze": None,
+            "last_optimize_at": None,  # time.monotonic()
+            "analyze_seq": None,  # change_seq при последнем ANALYZE
+            "analyze_pending": [],  # таблицы, ждущие ANALYZE
+            "tombstones_pruned": 0,
+        }
+        # Подписчики на текст SQL-операторов (instrumentation, profiling);
+        # trace callback ставится на соединение, только пока они есть
+        self._statement_listeners = []
+        # Измерение вызовов (instrumentation.py); выключено - обёрток нет
+        self.instrumentation = None
         self.init_database()
+        if os.environ.get("MTIMER_INSTRUMENT") == "1":
+            self.enable_instrumentation(
+                float(os.environ.get("MTIMER_SLOW_MS", SLOW_QUERY_MS))
+            )
 
     def get_connection(self):
         if self.connection is None:
             self.connection = sqlite3.connect(self.db_path)
             self.connection.row_factory = sqlite3.Row
+            self._update_trace()
         return self.connection
 
+    def add_statement_listener(self, callback):
+        """Вызывать callback(sql) для каждого оператора, выполненного соединением"""
+        if callback not in self._statement_listeners:
+            self._statement_listeners.append(callback)
+            self._update_trace()
+
+    def remove_statement_listener(self, callback):
+        if callback in self._statement_listeners:
+            self._statement_listeners.remove(callback)
+            self._update_trace()
+
+    def _update_trace(self):
+        if self.connection is not None:
+            self.connection.set_trace_callback(
+                self._on_statement if self._statement_listeners else None
+            )
+
+    def _on_statement(self, sql):
+        for callback in tuple(self._statement_listeners):
+            callback(sql)
+
+    def poll_external_changes(self):
+        """
+        Проверить, меняли ли базу другие процессы (второй фронтенд, статистика).
+        Одна PRAGMA data_version без чтения таблиц; собственные записи
+        этого соединения её не меняют - о них сообщают события шины.
+        Публикует EXTERNAL_CHANGE и возвращает True, если изменения были.
+        """
+        cursor = self.get_connection().cursor()
+        cursor.execute("PRAGMA data_version")
+        version = cursor.fetchone()[0]
+        changed = self._data_version is not None and version != self._data_version
+        self._data_version = version
+        if changed:
+            # Задачи могли добавить в другом процессе - индекс перестроится лениво
+            self._task_index = None
+            self._archives = None
+            self._publish(EXTERNAL_CHANGE)
+        return changed
+
+    def _publish(self, kind, session_ids=(), project_id=None):
+        """Опубликовать событие изменения данных"""
+        self._last_write = time.monotonic()
+        self.changes.publish(ChangeEvent(kind, session_ids, project_id))
+
+    def enable_instrumentation(self, slow_ms=SLOW_QUERY_MS, slow_log_path=None):
+        """
+        Включить измерение вызовов методов: счётчики, гистограммы задержек,
+        журнал медленных вызовов (по умолчанию slow_queries.log рядом с базой).
+        """
+        if self.instrumentation is not None:
+            self.instrumentation.detach()
+        base_dir = os.path.dirname(self.db_path)
+        self.instrumentation = Instrumentation(
+            slow_ms, slow_log_path or os.path.join(base_dir, SLOW_LOG_FILE)
+        )
+        self.instrumentation.attach(self)
+        logger.info("Instrumentation enabled, slow calls >= %s ms", slow_ms)
+        return self.instrumentation
+
+    def disable_instrumentation(self):
+        """Снять обёртки; накопленный снимок возвращается"""
+        if self.instrumentation is None:
+            return None
+        snapshot = self.instrumentation.snapshot()
+        self.instrumentation.detach()
+        self.instrumentation = None
+        return snapshot
+
+    def close(self):
+        """Закрыть соединение с базой"""
+        if self.instrumentation is not None:
+            path = os.path.join(os.path.dirname(self.db_path), SNAPSHOT_FILE)
+            try:
+                self.instrumentation.save(path)
+                logger.info("Instrumentation snapshot saved to %s", path)
+            except OSError as e:
+                logger.error("Cannot save instrumentation snapshot: %s", e)
+        if self.connection is not None:
+            try:
+                # Рекомендуемый SQLite шаг при закрытии: дешёвый ANALYZE по надобности
+                self.connection.execute(f"PRAGMA analysis_limit = {ANALYSIS_LIMIT}")
+                self.connection.execute("PRAGMA optimize")
+            except sqlite3.Error as e:
+                logger.error("PRAGMA optimize failed: %s", e)
+            self.connection.close()
+            self.connection = None
+            self._attached = {}
+
     def init_database(self):
         conn = self.get_connection()
         cursor = conn.cursor()
 
+        # База уже на текущей версии: PRAGMA user_version читается из
+        # заголовка файла, DDL и проверки миграций не нужны (см. mtimer.py)
+        cursor.execute("PRAGMA user_version")
+        if cursor.fetchone()[0] == SCHEMA_VERSION_CURRENT:
+            return
+
         # Таблица компаний
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS companies (
@@ -118,7 +386,6 @@ class Database:
             CREATE TABLE IF NOT EXISTS time_sessions (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 project_id INTEGER,
-                description TEXT,
                 work_type_id INTEGER,
                 start_time TIMESTAMP NOT NULL,
                 end_time TIMESTAMP,
@@ -163,41 +430,156 @@ class Database:
         current_version = self.get_schema_version()
 
         if current_version < SCHEMA_VERSION_CURRENT:
-            print(
-                f"[DB] Database schema is outdated (v{current_version}), migration needed to v{SCHEMA_VERSION_CURRENT}"
+            logger.info(
+                "Database schema is outdated (v%s), migration needed to v%s",
+                current_version,
+                SCHEMA_VERSION_CURRENT,
             )
-            print("[DB] Creating automatic backup before migration...")
+            logger.info("Creating automatic backup before migration...")
 
             # Создаём автоматический бэкап
             backup_path = self.create_automatic_backup()
 
             if backup_path:
-                print(f"[DB] Backup created: {backup_path}")
-                print("[DB] Starting migration...")
+                logger.info("Backup created: %s", backup_path)
+                logger.info("Starting migration...")
 
                 # Запускаем миграции последовательно
                 if current_version < SCHEMA_VERSION_V2:
                     if self.migrate_to_v2():
-                        print("[DB] Migration to v2 completed successfully!")
+                        logger.info("Migration to v2 completed successfully!")
                         current_version = SCHEMA_VERSION_V2
                     else:
-                        print(
-                            "[DB] ERROR: Migration to v2 failed! Database remains in old format."
+                        logger.error(
+                            "Migration to v2 failed! Database remains in old format."
                         )
-                        print(f"[DB] You can restore from backup: {backup_path}")
+                        logger.error("You can restore from backup: %s", backup_path)
                         return
 
-                if current_version < SCHEMA_VERSION_CURRENT:
+                if current_version < SCHEMA_VERSION_V3:
                     if self.migrate_to_v3():
-                        print("[DB] Migration to v3 completed successfully!")
+                        logger.info("Migration to v3 completed successfully!")
+                        current_version = SCHEMA_VERSION_V3
+                    else:
+                        logger.error("Migration to v3 failed!")
+                        logger.error("You can restore from backup: %s", backup_path)
+                        return
+
+                if current_version < SCHEMA_VERSION_V4:
+                    if self.migrate_to_v4():
+                        logger.info("Migration to v4 completed successfully!")
+                        current_version = SCHEMA_VERSION_V4
+                    else:
+                        logger.error("Migration to v4 failed!")
+                        logger.error("You can restore from backup: %s", backup_path)
+                        return
+
+                if current_version < SCHEMA_VERSION_V5:
+                    if self.migrate_to_v5():
+                        logger.info("Migration to v5 completed successfully!")
+                        current_version = SCHEMA_VERSION_V5
+                    else:
+                        logger.error("Migration to v5 failed!")
+                        logger.error("You can restore from backup: %s", backup_path)
+                        return
+
+                if current_version < SCHEMA_VERSION_V6:
+                    if self.migrate_to_v6():
+                        logger.info("Migration to v6 completed successfully!")
+                        current_version = SCHEMA_VERSION_V6
+                    else:
+                        logger.error("Migration to v6 failed!")
+                        logger.error("You can restore from backup: %s", backup_path)
+                        return
+
+                if current_version < SCHEMA_VERSION_V7:
+                    if self.migrate_to_v7():
+                        logger.info("Migration to v7 completed successfully!")
+                        current_version = SCHEMA_VERSION_V7
+                    else:
+                        logger.error("Migration to v7 failed!")
+                        logger.error("You can restore from backup: %s", backup_path)
+                        return
+
+                if current_version < SCHEMA_VERSION_V8:
+                    if self.migrate_to_v8():
+                        logger.info("Migration to v8 completed successfully!")
+                        current_version = SCHEMA_VERSION_V8
+                    else:
+                        logger.error("Migration to v8 failed!")
+                        logger.error("You can restore from backup: %s", backup_path)
+                        return
+
+                if current_version < SCHEMA_VERSION_V9:
+                    if self.migrate_to_v9():
+                        logger.info("Migration to v9 completed successfully!")
+                        current_version = SCHEMA_VERSION_V9
+                    else:
+                        logger.error("Migration to v9 failed!")
+                        logger.error("You can restore from backup: %s", backup_path)
+                        return
+
+                if current_version < SCHEMA_VERSION_V10:
+                    if self.migrate_to_v10():
+                        logger.info("Migration to v10 completed successfully!")
+                        current_version = SCHEMA_VERSION_V10
+                    else:
+                        logger.error("Migration to v10 failed!")
+                        logger.error("You can restore from backup: %s", backup_path)
+                        return
+
+                if current_version < SCHEMA_VERSION_V11:
+                    if self.migrate_to_v11():
+                        logger.info("Migration to v11 completed successfully!")
+                        current_version = SCHEMA_VERSION_V11
+                    else:
+                        logger.error("Migration to v11 failed!")
+                        logger.error("You can restore from backup: %s", backup_path)
+                        return
+
+                if current_version < SCHEMA_VERSION_V12:
+                    if self.migrate_to_v12():
+                        logger.info("Migration to v12 completed successfully!")
+                        current_version = SCHEMA_VERSION_V12
+                    else:
+                        logger.error("Migration to v12 failed!")
+                        logger.error("You can restore from backup: %s", backup_path)
+                        return
+
+                if current_version < SCHEMA_VERSION_V13:
+                    if self.migrate_to_v13():
+                        logger.info("Migration to v13 completed successfully!")
+                        current_version = SCHEMA_VERSION_V13
+                    else:
+                        logger.error("Migration to v13 failed!")
+                        logger.error("You can restore from backup: %s", backup_path)
+                        return
+
+                if current_version < SCHEMA_VERSION_V14:
+                    if self.migrate_to_v14():
+                        logger.info("Migration to v14 completed successfully!")
+                        current_version = SCHEMA_VERSION_V14
                     else:
-                        print("[DB] ERROR: Migration to v3 failed!")
-                        print(f"[DB] You can restore from backup: {backup_path}")
+                        logger.error("Migration to v14 failed!")
+                        logger.error("You can restore from backup: %s", backup_path)
+                        return
+                self._mark_schema_current()
             else:
-                print("[DB] ERROR: Could not create backup, migration aborted!")
-                print("[DB] Database will continue to work in legacy mode.")
+                logger.error("Could not create backup, migration aborted!")
+                logger.warning("Database will continue to work in legacy mode.")
         else:
-            print(f"[DB] Database schema is up to date (v{current_version})")
+            logger.debug("Database schema is up to date (v%s)", current_version)
+            self._mark_schema_current()
+
+    def _mark_schema_current(self):
+        """
+        Отметить в PRAGMA user_version, что схема текущая: следующие
+        открытия базы (приложение, mtimer.py) пропускают init_database.
+        Таблица schema_version остаётся историей миграций.
+        """
+        conn = self.get_connection()
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION_CURRENT}")
+        conn.commit()
 
     def create_window_positions_table(self):
         """
@@ -219,32 +601,42 @@ class Database:
             )
         """)
         conn.commit()
-        print("[DB] window_positions table created")
+        logger.info("window_positions table created")
 
     def create_project(self, name, color="#0000FF", hourly_rate=0, company_id=None):
         conn = self.get_connection()
         cursor = conn.cursor()
         try:
-            print(
-                f"[DB] Creating project: name={name}, color={color}, hourly_rate={hourly_rate}, company_id={company_id}"
+            logger.info(
+                "Creating project: name=%s, color=%s, hourly_rate=%s, company_id=%s",
+                name,
+                color,
+                hourly_rate,
+                company_id,
             )
-            print(f"[DB] Database path: {self.db_path}")
+            logger.info("Database path: %s", self.db_path)
             cursor.execute(
                 "INSERT INTO projects (name, color, hourly_rate, company_id) VALUES (?, ?, ?, ?)",
                 (name, color, hourly_rate, company_id),
             )
-            conn.commit()
             project_id = cursor.lastrowid
-            print(f"[DB] Project created successfully with ID: {project_id}")
+            # Первая ставка действует "с самого начала" - и для импорта задним числом
+            cursor.execute(
+                """
+                INSERT INTO project_rates (project_id, hourly_rate, effective_from)
+                VALUES (?, ?, ?)
+                """,
+                (project_id, hourly_rate or 0, RATE_EPOCH),
+            )
+            conn.commit()
+            logger.info("Project created successfully with ID: %s", project_id)
+            self._publish(PROJECT_CHANGED, project_id=project_id)
             return project_id
         except sqlite3.IntegrityError as e:
-            print(f"[DB] Failed to create project - IntegrityError: {e}")
+            logger.error("Failed to create project - IntegrityError: %s", e)
             return None
         except Exception as e:
-            print(f"[DB] Unexpected error creating project: {e}")
-            import traceback
-
-            traceback.print_exc()
+            logger.exception("Unexpected error creating project: %s", e)
             return None
 
     # ============================================
@@ -275,7 +667,7 @@ class Database:
             cursor.execute("INSERT INTO task_names (name) VALUES (?)", (task_name,))
             conn.commit()
             new_id = cursor.lastrowid
-            print(f"[DB] Created new task name: '{task_name}' (ID: {new_id})")
+            logger.debug("Created new task name: '%s' (ID: %s)", task_name, new_id)
             return new_id
 
         except sqlite3.IntegrityError:
@@ -287,7 +679,9 @@ class Database:
     def update_task_name(self, task_name_id, new_name):
         """
         Переименовать задачу.
-        Обновляет название в таблице task_names и description во всех связанных сессиях.
+        Начиная с v4 текст задачи хранится только в task_names, поэтому
+        переименование - это обновление одной строки, сколько бы сессий
+        ни ссылалось на задачу.
         """
         if not new_name or new_name.strip() == "":
             return False
@@ -297,49 +691,51 @@ class Database:
         cursor = conn.cursor()
 
         try:
-            # Обновляем название в task_names
             cursor.execute(
                 "UPDATE task_names SET name = ? WHERE id = ?", (new_name, task_name_id)
             )
+            conn.commit()
 
             if cursor.rowcount > 0:
-                # Также обновляем description во всех сессиях с этим task_name_id
-                cursor.execute(
-                    "UPDATE time_sessions SET description = ? WHERE task_name_id = ?",
-                    (new_name, task_name_id),
-                )
-                sessions_updated = cursor.rowcount
-                conn.commit()
-
-                print(f"[DB] Updated task name ID {task_name_id} to '{new_name}'")
-                print(f"[DB] Updated {sessions_updated} sessions with new description")
+                if self._task_index is not None:
+                    self._task_index.rename(task_name_id, new_name)
+                logger.info("Updated task name ID %s to '%s'", task_name_id, new_name)
+                self._publish(TASK_NAMES_CHANGED)
                 return True
             else:
-                print(f"[DB] Task name ID {task_name_id} not found")
+                logger.warning("Task name ID %s not found", task_name_id)
                 return False
 
         except sqlite3.IntegrityError:
             # Название уже существует
-            print(f"[DB] Task name '{new_name}' already exists")
+            conn.rollback()
+            logger.warning("Task name '%s' already exists", new_name)
             return False
 
     def get_all_task_names(self):
         """
-        Получить все названия задач с количеством использований.
+        Получить все названия задач с количеством использований (включая архивы).
         Возвращает список словарей с полями: id, name, session_count, total_duration
         """
+        source = self._session_source()
         conn = self.get_connection()
         cursor = conn.cursor()
 
-        cursor.execute("""
+        # Сначала агрегат по задачам, затем JOIN: с архивами source - UNION ALL
+        cursor.execute(f"""
             SELECT 
                 tn.id,
                 tn.name,
-                COUNT(ts.id) as session_count,
-                COALESCE(SUM(ts.duration), 0) as total_duration
+                COALESCE(usage.session_count, 0) as session_count,
+                COALESCE(usage.total_duration, 0) as total_duration
             FROM task_names tn
-            LEFT JOIN time_sessions ts ON ts.task_name_id = tn.id
-            GROUP BY tn.id, tn.name
+            LEFT JOIN (
+                SELECT task_name_id,
+                       COUNT(*) as session_count,
+                       SUM(duration) as total_duration
+                FROM {source}
+                GROUP BY task_name_id
+            ) usage ON usage.task_name_id = tn.id
             ORDER BY session_count DESC, tn.name
         """)
 
@@ -347,22 +743,44 @@ class Database:
 
     def delete_task_name(self, task_name_id):
         """
-        Удалить название задачи, если оно не используется в сессиях.
+        Удалить название задачи, если оно не используется в сессиях (и в архивах).
         Возвращает True в случае успеха, False если название используется или не найдено.
         """
         conn = self.get_connection()
         cursor = conn.cursor()
 
-        # Проверяем используется ли название
+        # Проверяем используется ли название, в том числе архивными сессиями:
+        # без строки task_names их описание стало бы NULL
         cursor.execute(
             "SELECT COUNT(*) as count FROM time_sessions WHERE task_name_id = ?",
             (task_name_id,),
         )
-        result = cursor.fetchone()
+        count = cursor.fetchone()["count"]
+        for year in self._archive_years():
+            try:
+                schema = self._attach_archive(year)
+            except (OSError, sqlite3.Error) as e:
+                logger.warning(
+                    "Cannot delete task name ID %s: archive %s unavailable: %s",
+                    task_name_id,
+                    year,
+                    e,
+                )
+                return False
+            cursor.execute(
+                f"""
+                SELECT COUNT(*) as count FROM {schema}.time_sessions
+                WHERE task_name_id = ?
+                """,
+                (task_name_id,),
+            )
+            count += cursor.fetchone()["count"]
 
-        if result and result["count"] > 0:
-            print(
-                f"[DB] Cannot delete task name ID {task_name_id}: used in {result['count']} sessions"
+        if count > 0:
+            logger.warning(
+                "Cannot delete task name ID %s: used in %s sessions",
+                task_name_id,
+                count,
             )
             return False
 
@@ -371,20 +789,24 @@ class Database:
         conn.commit()
 
         if cursor.rowcount > 0:
-            print(f"[DB] Deleted task name ID {task_name_id}")
+            if self._task_index is not None:
+                self._task_index.forget(task_name_id)
+            logger.info("Deleted task name ID %s", task_name_id)
+            self._publish(TASK_NAMES_CHANGED)
             return True
         else:
-            print(f"[DB] Task name ID {task_name_id} not found")
+            logger.warning("Task name ID %s not found", task_name_id)
             return False
 
     # ============================================
     # CRUD операции для time_sessions
     # ============================================
 
-    def start_session(self, project_id, description):
+    def start_session(self, project_id, description, start_time=None):
         """
         Начать новую сессию работы.
         Создаёт запись в time_sessions и связывает её с task_name.
+        start_time - datetime начала (по умолчанию - сейчас).
         Возвращает ID созданной сессии.
         """
         conn = self.get_connection()
@@ -395,27 +817,59 @@ class Database:
         if description and description.strip():
             task_name_id = self.get_or_create_task_name(description.strip())
 
+        # Одновременно может идти только одна сессия: предыдущую закрываем
+        active = self._get_active_row()
+        if active is not None:
+            logger.debug(
+                "Session %s is still running, stopping it", active["session_id"]
+            )
+            self.stop_session(active["session_id"])
+
         # Создаём сессию
-        start_time = datetime.now().isoformat()
+        started_at = start_time or datetime.now()
+        start_time = started_at.isoformat()
 
-        cursor.execute(
-            """
-            INSERT INTO time_sessions (project_id, description, start_time, task_name_id)
-            VALUES (?, ?, ?, ?)
-            """,
-            (project_id, description, start_time, task_name_id),
-        )
-        conn.commit()
-        session_id = cursor.lastrowid
-        print(
-            f"[DB] Started session {session_id} for project {project_id}, task_name_id={task_name_id}"
+        try:
+            cursor.execute(
+                """
+                INSERT INTO time_sessions (project_id, start_time, task_name_id)
+                VALUES (?, ?, ?)
+                """,
+                (project_id, start_time, task_name_id),
+            )
+            session_id = cursor.lastrowid
+            cursor.execute(
+                """
+                INSERT INTO active_session (id, session_id, started_at, heartbeat_at)
+                VALUES (1, ?, ?, ?)
+                """,
+                (session_id, start_time, start_time),
+            )
+            conn.commit()
+        except sqlite3.IntegrityError as e:
+            # Другой процесс успел запустить свою сессию
+            conn.rollback()
+            logger.error("Cannot start session, another one is running: %s", e)
+            return None
+        if self._task_index is not None:
+            self._task_index.record_use(
+                project_id, task_name_id, description.strip(), started_at
+            )
+        logger.debug(
+            "Started session %s for project %s, task_name_id=%s",
+            session_id,
+            project_id,
+            task_name_id,
         )
+        self._publish(SESSION_STARTED, [session_id], project_id)
         return session_id
 
-    def stop_session(self, session_id):
+    def stop_session(self, session_id, end_time=None):
         """
         Остановить сессию работы.
-        Устанавливает end_time и вычисляет duration.
+        Устанавливает end_time (по умолчанию - сейчас), вычисляет duration
+        и освобождает строку active_session. Сессия, прошедшая через полночь,
+        разбивается на сессии по суткам.
         """
         conn = self.get_connection()
         cursor = conn.cursor()
@@ -427,42 +881,382 @@ class Database:
         result = cursor.fetchone()
 
         if not result:
-            print(f"[DB] Session {session_id} not found")
+            logger.warning("Session %s not found", session_id)
             return False
 
         start_time = datetime.fromisoformat(result["start_time"])
-        end_time = datetime.now()
-        duration = int((end_time - start_time).total_seconds())
+        end_time = end_time or datetime.now()
+
+        # Обновляем сессию (с разбиением по суткам)
+        session_ids = self._write_session_interval(
+            cursor, session_id, start_time, end_time
+        )
+        cursor.execute("DELETE FROM active_session WHERE session_id = ?", (session_id,))
+        conn.commit()
+        logger.info(
+            "Stopped session %s, duration=%ss%s",
+            session_id,
+            elapsed_seconds(start_time, end_time),
+            f", split into {len(session_ids)} days" if len(session_ids) > 1 else "",
+        )
+        self._publish(SESSION_STOPPED, session_ids)
+        return True
+
+    def update_session_times(self, session_id, start_time, end_time):
+        """
+        Изменить время начала и конца завершённой сессии.
+        Интервал, пересекающий полночь, разбивается на сессии по суткам.
+        Сессии в счёте не меняются: их duration и cost вошли в итоги счёта.
+        Возвращает список ID сессий или None при ошибке.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute(
+            "SELECT end_time, invoice_id FROM time_sessions WHERE id = ?",
+            (session_id,),
+        )
+        result = cursor.fetchone()
+        if not result:
+            self._log_missing_session(session_id)
+            return None
+        if result["end_time"] is None:
+            logger.warning("Session %s is still running, stop it first", session_id)
+            return None
+        if result["invoice_id"] is not None:
+            logger.warning(
+                "Session %s is on invoice %s, void it first",
+                session_id,
+                result["invoice_id"],
+            )
+            return None
+        if end_time < start_time:
+            logger.warning("Session %s: end_time is before start_time", session_id)
+            return None
+
+        session_ids = self._write_session_interval(
+            cursor, session_id, start_time, end_time
+        )
+        conn.commit()
+        logger.info("Updated times of session %s -> %s", session_id, session_ids)
+        self._publish(SESSION_EDITED, session_ids)
+        return session_ids
+
+    def import_session(
+        self, project_id, description, start_time, end_time, work_type_id=None, paid=0
+    ):
+        """
+        Добавить завершённую сессию задним числом (импорт, ручной ввод).
+        Интервал, пересекающий полночь, разбивается на сессии по суткам.
+        Возвращает список ID созданных сессий или None при ошибке.
+        """
+        if end_time < start_time:
+            logger.warning("Cannot import session: end_time is before start_time")
+            return None
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        task_name_id = None
+        if description and description.strip():
+            task_name_id = self.get_or_create_task_name(description.strip())
+
+        session_ids = []
+        for piece_start, piece_end, duration in split_by_local_days(start_time, end_time):
+            cursor.execute(
+                """
+                INSERT INTO time_sessions
+                (project_id, work_type_id, task_name_id, paid, start_time, end_time, duration)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    project_id,
+                    work_type_id,
+                    task_name_id,
+                    paid,
+                    piece_start.isoformat(),
+                    piece_end.isoformat(),
+                    duration,
+                ),
+            )
+            session_ids.append(cursor.lastrowid)
+        self._materialize_costs(cursor, session_ids)
+        conn.commit()
+        if self._task_index is not None:
+            self._task_index.record_use(
+                project_id, task_name_id, description.strip(), start_time
+            )
+        logger.info("Imported session for project %s -> %s", project_id, session_ids)
+        self._publish(SESSIONS_IMPORTED, session_ids, project_id)
+        return session_ids
 
-        # Обновляем сессию
+    def _write_session_interval(
+        self, cursor, session_id, start_time, end_time, materialize=True
+    ):
+        """
+        Записать интервал завершённой сессии с разбиением по суткам.
+        Первый кусок остаётся в строке session_id, остальные вставляются
+        новыми строками с теми же проектом, видом работ, задачей и оплатой.
+        materialize=False - без расчёта cost: миграции до v9 ещё не имеют
+        project_rates, стоимость всех сессий считает migrate_to_v9.
+        Без commit - вызывающий метод завершает транзакцию.
+        Возвращает список ID строк.
+        """
+        pieces = split_by_local_days(start_time, end_time)
+        first_start, first_end, first_duration = pieces[0]
         cursor.execute(
             """
             UPDATE time_sessions
-            SET end_time = ?, duration = ?
+            SET start_time = ?, end_time = ?, duration = ?
             WHERE id = ?
             """,
-            (end_time.isoformat(), duration, session_id),
+            (first_start.isoformat(), first_end.isoformat(), first_duration, session_id),
+        )
+        session_ids = [session_id]
+        if len(pieces) == 1:
+            if materialize:
+                self._materialize_costs(cursor, session_ids)
+            return session_ids
+
+        cursor.execute(
+            """
+            SELECT project_id, work_type_id, task_name_id, paid
+            FROM time_sessions WHERE id = ?
+            """,
+            (session_id,),
+        )
+        row = cursor.fetchone()
+        for piece_start, piece_end, duration in pieces[1:]:
+            cursor.execute(
+                """
+                INSERT INTO time_sessions
+                (project_id, work_type_id, task_name_id, paid, start_time, end_time, duration)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    row["project_id"],
+                    row["work_type_id"],
+                    row["task_name_id"],
+                    row["paid"],
+                    piece_start.isoformat(),
+                    piece_end.isoformat(),
+                    duration,
+                ),
+            )
+            session_ids.append(cursor.lastrowid)
+        if materialize:
+            self._materialize_costs(cursor, session_ids)
+        return session_ids
+
+    def _materialize_costs(self, cursor, session_ids):
+        """
+        Записать cost завершённых сессий по ставке, действовавшей на момент
+        начала каждой. Без commit - часть транзакции вызывающего метода.
+        """
+        if not session_ids:
+            return
+        placeholders = ",".join("?" * len(session_ids))
+        cursor.execute(
+            f"""
+            UPDATE time_sessions
+            SET cost = duration * {RATE_AT_START_SQL} / 3600.0
+            WHERE id IN ({placeholders}) AND end_time IS NOT NULL
+            """,
+            list(session_ids),
         )
-        conn.commit()
-        print(f"[DB] Stopped session {session_id}, duration={duration}s")
-        return True
 
     def get_active_session(self):
         """
         Получить активную (незавершённую) сессию.
-        Возвращает запись сессии или None.
+        Возвращает запись сессии (с heartbeat_at) или None.
+        Поиск идёт по singleton-строке active_session, без сканирования сессий.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute(
+            """
+            SELECT ts.*, tn.name as task_name, tn.name as description,
+                   a.heartbeat_at
+            FROM active_session a
+            JOIN time_sessions ts ON ts.id = a.session_id
+            LEFT JOIN task_names tn ON ts.task_name_id = tn.id
+            WHERE a.id = 1
+            """
+        )
+        return cursor.fetchone()
+
+    def heartbeat_active_session(self, now=None, interval=None):
+        """
+        Сохранить отметку "приложение живо" для активной сессии.
+        Одна маленькая UPDATE по первичному ключу singleton-строки.
+        Также снимает пометку released_at - сессию снова держит фронтенд.
+        interval - интервал heartbeat фронтенда (секунды): по нему любой
+        экземпляр решает, осиротела ли сессия (stale_after_seconds).
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            """
+            UPDATE active_session
+            SET heartbeat_at = ?, heartbeat_interval = COALESCE(?, heartbeat_interval),
+                released_at = NULL
+            WHERE id = 1
+            """,
+            ((now or datetime.now()).isoformat(), interval),
+        )
+        conn.commit()
+        if cursor.rowcount == 0:
+            return False
+        # Итоги с include_live=True выросли на интервал heartbeat
+        self._publish(SESSION_HEARTBEAT)
+        return True
+
+    def release_active_session(self):
+        """
+        Штатное завершение фронтенда с идущим таймером.
+        Сессия продолжает идти, пока приложение закрыто, и при следующем
+        запуске не считается осиротевшей.
         """
         conn = self.get_connection()
         cursor = conn.cursor()
+        now = datetime.now().isoformat()
+        cursor.execute(
+            "UPDATE active_session SET heartbeat_at = ?, released_at = ? WHERE id = 1",
+            (now, now),
+        )
+        conn.commit()
+        return cursor.rowcount > 0
+
+    def recover_active_session(self, stale_after=None, now=None):
+        """
+        Восстановление после краша, вызывается фронтендами при запуске.
+
+        - Незавершённые сессии, не записанные в active_session (остались от
+          старых версий), закрываются с нулевой длительностью.
+        - Строка active_session без сессии удаляется.
+        - Если приложение упало (heartbeat старше stale_after секунд и сессия
+          не была отпущена через release_active_session), сессия закрывается
+          на момент последнего heartbeat: время после краша не учитывается.
+          По умолчанию stale_after - по интервалу heartbeat, записанному
+          фронтендом сессии (stale_after_seconds).
+
+        Возвращает ID закрытой осиротевшей сессии или None.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        now = now or datetime.now()
 
         cursor.execute(
             """
-            SELECT * FROM time_sessions
+            UPDATE time_sessions
+            SET end_time = start_time, duration = 0, cost = 0
             WHERE end_time IS NULL
-            ORDER BY start_time DESC
-            LIMIT 1
+              AND id NOT IN (SELECT session_id FROM active_session)
+            """
+        )
+        orphans_closed = cursor.rowcount
+        if orphans_closed:
+            logger.info("Closed %s orphaned sessions without heartbeat", orphans_closed)
+        cursor.execute(
+            """
+            DELETE FROM active_session
+            WHERE session_id NOT IN (
+                SELECT id FROM time_sessions WHERE end_time IS NULL
+            )
+            """
+        )
+        conn.commit()
+        if orphans_closed:
+            self._publish(SESSION_STOPPED)
+
+        active = self._get_active_row()
+        if active is None or active["released_at"]:
+            return None
+        heartbeat_at = datetime.fromisoformat(active["heartbeat_at"])
+        if stale_after is None:
+            stale_after = stale_after_seconds(active["heartbeat_interval"])
+        if (now - heartbeat_at).total_seconds() <= stale_after:
+            return None
+
+        logger.info(
+            "Session %s lost its heartbeat at %s, closing it there",
+            active["session_id"],
+            heartbeat_at,
+        )
+        self.stop_session(active["session_id"], end_time=heartbeat_at)
+        return active["session_id"]
+
+    def get_live_session(self):
+        """
+        Идущая сессия и её "живое" время до последнего heartbeat.
+        Возвращает dict (session_id, project_id, start_time, heartbeat_at,
+        live_duration) или None. Читается одна строка по первичному ключу.
+        """
+        cursor = self.get_connection().cursor()
+        cursor.execute(
+            """
+            SELECT a.session_id, ts.project_id, ts.start_time, a.heartbeat_at
+            FROM active_session a
+            JOIN time_sessions ts ON ts.id = a.session_id
+            WHERE a.id = 1 AND ts.end_time IS NULL
+            """
+        )
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        try:
+            start = datetime.fromisoformat(row["start_time"])
+            heartbeat_at = datetime.fromisoformat(row["heartbeat_at"])
+        except (TypeError, ValueError):
+            return None
+        live = dict(row)
+        live["live_duration"] = elapsed_seconds(start, heartbeat_at)
+        return live
+
+    def get_live_seconds(self, project_id=None, since=None, until=None):
+        """
+        Время идущей сессии до последнего heartbeat в пределах [since, until].
+        Сессия, идущая с прошлых суток, даёт периоду только свою часть -
+        так же, как после остановки её разобьёт stop_session().
+        """
+        live = self.get_live_session()
+        if live is None:
+            return 0
+        if project_id and live["project_id"] != project_id:
+            return 0
+        start = datetime.fromisoformat(live["start_time"])
+        end = datetime.fromisoformat(live["heartbeat_at"])
+        if since:
+            start = max(start, datetime.fromisoformat(since))
+        if until:
+            end = min(end, datetime.fromisoformat(until))
+        return elapsed_seconds(start, end)
+
+    def get_live_cost(self, project_id=None, since=None, until=None):
+        """
+        Стоимость идущей сессии в пределах [since, until] (как
+        get_live_seconds) по ставке на момент её начала - той же, по которой
+        stop_session() запишет cost.
+        """
+        live_seconds = self.get_live_seconds(project_id, since, until)
+        if not live_seconds:
+            return 0.0
+        cursor = self.get_connection().cursor()
+        cursor.execute(
+            f"""
+            SELECT {RATE_AT_START_TEMPLATE.format(table="ts")}
+            FROM active_session a
+            JOIN time_sessions ts ON ts.id = a.session_id
+            WHERE a.id = 1
             """
         )
+        row = cursor.fetchone()
+        return live_seconds * row[0] / 3600.0 if row else 0.0
+
+    def _get_active_row(self):
+        """Строка active_session или None"""
+        cursor = self.get_connection().cursor()
+        cursor.execute("SELECT * FROM active_session WHERE id = 1")
         return cursor.fetchone()
 
     def get_today_sessions(self, project_id=None):
@@ -479,7 +1273,7 @@ class Database:
         if project_id:
             cursor.execute(
                 """
-                SELECT ts.*, tn.name as task_name
+                SELECT ts.*, tn.name as task_name, tn.name as description
                 FROM time_sessions ts
                 LEFT JOIN task_names tn ON ts.task_name_id = tn.id
                 WHERE ts.start_time >= ? AND ts.project_id = ?
@@ -490,7 +1284,7 @@ class Database:
         else:
             cursor.execute(
                 """
-                SELECT ts.*, tn.name as task_name
+                SELECT ts.*, tn.name as task_name, tn.name as description
                 FROM time_sessions ts
                 LEFT JOIN task_names tn ON ts.task_name_id = tn.id
                 WHERE ts.start_time >= ?
@@ -519,7 +1313,7 @@ class Database:
         if project_id:
             cursor.execute(
                 """
-                SELECT ts.*, tn.name as task_name
+                SELECT ts.*, tn.name as task_name, tn.name as description
                 FROM time_sessions ts
                 LEFT JOIN task_names tn ON ts.task_name_id = tn.id
                 WHERE ts.start_time >= ? AND ts.project_id = ?
@@ -530,7 +1324,7 @@ class Database:
         else:
             cursor.execute(
                 """
-                SELECT ts.*, tn.name as task_name
+                SELECT ts.*, tn.name as task_name, tn.name as description
                 FROM time_sessions ts
                 LEFT JOIN task_names tn ON ts.task_name_id = tn.id
                 WHERE ts.start_time >= ?
@@ -541,10 +1335,11 @@ class Database:
 
         return cursor.fetchall()
 
-    def get_today_total(self, project_id=None):
+    def get_today_total(self, project_id=None, include_live=False):
         """
         Получить общее время работы за сегодня (в секундах).
         Если указан project_id, фильтрует по проекту.
+        include_live=True добавляет время идущей сессии до последнего heartbeat.
         """
         conn = self.get_connection()
         cursor = conn.cursor()
@@ -572,12 +1367,16 @@ class Database:
             )
 
         result = cursor.fetchone()
-        return result["total"] if result else 0
+        total = result["total"] if result else 0
+        if include_live:
+            total += self.get_live_seconds(project_id, since=start_of_day)
+        return total
 
-    def get_week_total(self, project_id=None):
+    def get_week_total(self, project_id=None, include_live=False):
         """
         Получить общее время работы за текущую неделю (в секундах).
         Если указан project_id, фильтрует по проекту.
+        include_live=True добавляет время идущей сессии до последнего heartbeat.
         """
         conn = self.get_connection()
         cursor = conn.cursor()
@@ -609,35 +1408,55 @@ class Database:
             )
 
         result = cursor.fetchone()
-        return result["total"] if result else 0
+        total = result["total"] if result else 0
+        if include_live:
+            total += self.get_live_seconds(project_id, since=start_of_week_iso)
+        return total
 
     def update_session_details(self, session_id, new_description, new_project_id):
         """
         Обновить описание и проект сессии.
         При изменении описания обновляет название задачи для ВСЕХ сессий с тем же task_name_id.
+        Проект сессии в счёте не меняется (её cost вошёл в итог счёта).
         """
         conn = self.get_connection()
         cursor = conn.cursor()
 
         # Получаем текущий task_name_id сессии
         cursor.execute(
-            "SELECT task_name_id, description FROM time_sessions WHERE id = ?",
+            """
+            SELECT ts.task_name_id, ts.project_id, ts.invoice_id,
+                   tn.name as description
+            FROM time_sessions ts
+            LEFT JOIN task_names tn ON ts.task_name_id = tn.id
+            WHERE ts.id = ?
+            """,
             (session_id,),
         )
         session_data = cursor.fetchone()
 
         if not session_data:
-            print(f"[DB] Session {session_id} not found")
+            self._log_missing_session(session_id)
             return False
 
         current_task_name_id = session_data["task_name_id"]
         old_description = session_data["description"]
 
-        # Обновляем проект сессии
-        cursor.execute(
-            "UPDATE time_sessions SET project_id = ? WHERE id = ?",
-            (new_project_id, session_id),
-        )
+        if session_data["invoice_id"] is not None:
+            if new_project_id != session_data["project_id"]:
+                logger.warning(
+                    "Session %s is on invoice %s, void it before changing the project",
+                    session_id,
+                    session_data["invoice_id"],
+                )
+                return False
+        else:
+            # Обновляем проект сессии (и стоимость - по ставке нового проекта)
+            cursor.execute(
+                "UPDATE time_sessions SET project_id = ? WHERE id = ?",
+                (new_project_id, session_id),
+            )
+            self._materialize_costs(cursor, [session_id])
 
         # Если описание изменилось, обновляем название задачи
         if (
@@ -648,51 +1467,114 @@ class Database:
             new_name = new_description.strip()
 
             if current_task_name_id:
-                # Обновляем существующее название задачи (это обновит ВСЕ сессии с этим task_name_id)
+                # Переименовываем задачу (одна строка в task_names, все сессии видят новое имя)
                 if self.update_task_name(current_task_name_id, new_name):
-                    print(
-                        f"[DB] Updated task name {current_task_name_id} from '{old_description}' to '{new_name}'"
+                    logger.info(
+                        "Updated task name %s from '%s' to '%s'",
+                        current_task_name_id,
+                        old_description,
+                        new_name,
                     )
                 else:
-                    print(f"[DB] Failed to update task name {current_task_name_id}")
+                    logger.error("Failed to update task name %s", current_task_name_id)
             else:
                 # Если task_name_id не был установлен, создаём новый или используем существующий
                 task_name_id = self.get_or_create_task_name(new_name)
                 cursor.execute(
-                    "UPDATE time_sessions SET description = ?, task_name_id = ? WHERE id = ?",
-                    (new_name, task_name_id, session_id),
+                    "UPDATE time_sessions SET task_name_id = ? WHERE id = ?",
+                    (task_name_id, session_id),
+                )
+                logger.info(
+                    "Set task_name_id=%s for session %s", task_name_id, session_id
                 )
-                print(f"[DB] Set task_name_id={task_name_id} for session {session_id}")
 
         conn.commit()
-        print(
-            f"[DB] Updated session {session_id}: description='{new_description}', project_id={new_project_id}"
+        logger.info(
+            "Updated session %s: description='%s', project_id=%s",
+            session_id,
+            new_description,
+            new_project_id,
         )
+        self._publish(SESSION_EDITED, [session_id], new_project_id)
         return True
 
-    def get_last_description_for_project(self, project_id):
+    def get_recent_tasks(self, limit=5, days=30):
         """
-        Получить последнее описание задачи для проекта.
-        Возвращает строку или "Программирование" по умолчанию.
+        Последние задачи (проект + название) за days дней, от свежей к старой,
+        без повторов: project_id, project_name, task_name, last_start.
         """
-        conn = self.get_connection()
-        cursor = conn.cursor()
-
+        since = (datetime.now() - timedelta(days=days)).isoformat()
+        cursor = self.get_connection().cursor()
         cursor.execute(
             """
-            SELECT description
-            FROM time_sessions
-            WHERE project_id = ? AND description IS NOT NULL AND description != ''
-            ORDER BY start_time DESC
-            LIMIT 1
+            SELECT ts.project_id, p.name AS project_name, tn.name AS task_name,
+                   MAX(ts.start_time) AS last_start
+            FROM time_sessions ts
+            LEFT JOIN projects p ON p.id = ts.project_id
+            LEFT JOIN task_names tn ON tn.id = ts.task_name_id
+            WHERE ts.start_time >= ?
+            GROUP BY ts.project_id, ts.task_name_id
+            ORDER BY last_start DESC
+            LIMIT ?
             """,
-            (project_id,),
+            (since, limit),
         )
-        result = cursor.fetchone()
+        return cursor.fetchall()
 
-        if result and result["description"]:
-            return result["description"]
-        return "Программирование"
+    def get_last_description_for_project(self, project_id):
+        """
+        Получить последнее описание задачи для проекта.
+        Возвращает строку или "Программирование" по умолчанию.
+        Ответ берётся из индекса задач в памяти, без запроса к БД.
+        """
+        description = self.task_index.last_task_for_project(project_id)
+        if description:
+            return description
+        return "Программирование"
+
+    # ============================================
+    # Индекс автодополнения задач
+    # ============================================
+
+    @property
+    def task_index(self):
+        """Frecency-индекс задач; строится при первом обращении"""
+        if self._task_index is None:
+            from task_index import TaskFrecencyIndex
+
+            self._task_index = TaskFrecencyIndex.from_database(self)
+        return self._task_index
+
+    def suggest_task_names(self, prefix, project_id=None, limit=8):
+        """Подсказки названий задач по префиксу, ранжированные по frecency"""
+        return self.task_index.suggest(prefix, project_id, limit)
+
+    def get_task_name_ids(self):
+        """Все названия задач (id, name) без агрегатов"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, name FROM task_names")
+        return cursor.fetchall()
+
+    def get_task_usage_by_day(self):
+        """
+        Использование задач, сгруппированное по (проект, задача, день).
+        Источник для построения frecency-индекса.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT
+                project_id,
+                task_name_id,
+                substr(start_time, 1, 10) as day,
+                COUNT(*) as uses,
+                MAX(start_time) as last_start
+            FROM time_sessions
+            WHERE task_name_id IS NOT NULL
+            GROUP BY project_id, task_name_id, day
+        """)
+        return cursor.fetchall()
 
     def get_all_projects(self):
         """Получить все проекты"""
@@ -709,25 +1591,27 @@ class Database:
         return cursor.fetchall()
 
     def get_all_sessions(self):
-        """Получить все сессии"""
+        """Получить все сессии (включая архивы)"""
+        source = self._session_source()
         conn = self.get_connection()
         cursor = conn.cursor()
-        cursor.execute("""
-            SELECT ts.*, tn.name as task_name
-            FROM time_sessions ts
+        cursor.execute(f"""
+            SELECT ts.*, tn.name as task_name, tn.name as description
+            FROM {source} ts
             LEFT JOIN task_names tn ON ts.task_name_id = tn.id
             ORDER BY ts.start_time DESC
         """)
         return cursor.fetchall()
 
     def get_all_sessions_by_project(self, project_id):
-        """Получить все сессии для конкретного проекта"""
+        """Получить все сессии для конкретного проекта (включая архивы)"""
+        source = self._session_source()
         conn = self.get_connection()
         cursor = conn.cursor()
         cursor.execute(
-            """
-            SELECT ts.*, tn.name as task_name
-            FROM time_sessions ts
+            f"""
+            SELECT ts.*, tn.name as task_name, tn.name as description
+            FROM {source} ts
             LEFT JOIN task_names tn ON ts.task_name_id = tn.id
             WHERE ts.project_id = ?
             ORDER BY ts.start_time DESC
@@ -737,15 +1621,16 @@ class Database:
         return cursor.fetchall()
 
     def get_sessions_by_project(self, project_id, start_date=None, end_date=None):
-        """Получить сессии для проекта в указанном диапазоне дат"""
+        """Получить сессии для проекта в указанном диапазоне дат (включая архивы)"""
         conn = self.get_connection()
         cursor = conn.cursor()
 
         if start_date and end_date:
+            source = self._session_source(start_date, end_date)
             cursor.execute(
-                """
-                SELECT ts.*, tn.name as task_name
-                FROM time_sessions ts
+                f"""
+                SELECT ts.*, tn.name as task_name, tn.name as description
+                FROM {source} ts
                 LEFT JOIN task_names tn ON ts.task_name_id = tn.id
                 WHERE ts.project_id = ? 
                   AND ts.start_time >= ? 
@@ -755,10 +1640,11 @@ class Database:
                 (project_id, start_date, end_date),
             )
         else:
+            source = self._session_source()
             cursor.execute(
-                """
-                SELECT ts.*, tn.name as task_name
-                FROM time_sessions ts
+                f"""
+                SELECT ts.*, tn.name as task_name, tn.name as description
+                FROM {source} ts
                 LEFT JOIN task_names tn ON ts.task_name_id = tn.id
                 WHERE ts.project_id = ?
                 ORDER BY ts.start_time DESC
@@ -769,16 +1655,19 @@ class Database:
         return cursor.fetchall()
 
     def get_sessions_in_range(self, start_date, end_date, project_id=None):
-        """Получить сессии в указанном диапазоне дат"""
+        """Получить сессии в указанном диапазоне дат (включая архивы) с project_name"""
+        source = self._session_source(start_date, end_date)
         conn = self.get_connection()
         cursor = conn.cursor()
 
         if project_id:
             cursor.execute(
-                """
-                SELECT ts.*, tn.name as task_name
-                FROM time_sessions ts
+                f"""
+                SELECT ts.*, tn.name as task_name, tn.name as description,
+                       p.name as project_name
+                FROM {source} ts
                 LEFT JOIN task_names tn ON ts.task_name_id = tn.id
+                LEFT JOIN projects p ON ts.project_id = p.id
                 WHERE ts.start_time >= ? 
                   AND ts.start_time <= ?
                   AND ts.project_id = ?
@@ -788,10 +1677,12 @@ class Database:
             )
         else:
             cursor.execute(
-                """
-                SELECT ts.*, tn.name as task_name
-                FROM time_sessions ts
+                f"""
+                SELECT ts.*, tn.name as task_name, tn.name as description,
+                       p.name as project_name
+                FROM {source} ts
                 LEFT JOIN task_names tn ON ts.task_name_id = tn.id
+                LEFT JOIN projects p ON ts.project_id = p.id
                 WHERE ts.start_time >= ? 
                   AND ts.start_time <= ?
                 ORDER BY ts.start_time DESC
@@ -827,7 +1718,7 @@ class Database:
         if project_id:
             cursor.execute(
                 """
-                SELECT ts.*, tn.name as task_name
+                SELECT ts.*, tn.name as task_name, tn.name as description
                 FROM time_sessions ts
                 LEFT JOIN task_names tn ON ts.task_name_id = tn.id
                 WHERE ts.start_time >= ? AND ts.project_id = ?
@@ -838,7 +1729,7 @@ class Database:
         else:
             cursor.execute(
                 """
-                SELECT ts.*, tn.name as task_name
+                SELECT ts.*, tn.name as task_name, tn.name as description
                 FROM time_sessions ts
                 LEFT JOIN task_names tn ON ts.task_name_id = tn.id
                 WHERE ts.start_time >= ?
@@ -849,10 +1740,11 @@ class Database:
 
         return cursor.fetchall()
 
-    def get_month_total(self, project_id=None):
+    def get_month_total(self, project_id=None, include_live=False):
         """
         Получить общее время работы за текущий месяц (в секундах).
         Если указан project_id, фильтрует по проекту.
+        include_live=True добавляет время идущей сессии до последнего heartbeat.
         """
         conn = self.get_connection()
         cursor = conn.cursor()
@@ -884,10 +1776,19 @@ class Database:
             )
 
         result = cursor.fetchone()
-        return result["total"] if result else 0
-
-    def get_project_total(self, project_id, start_date=None, end_date=None):
-        """Получить общее время работы по проекту (в секундах)"""
+        total = result["total"] if result else 0
+        if include_live:
+            total += self.get_live_seconds(project_id, since=start_of_month_iso)
+        return total
+
+    def get_project_total(
+        self, project_id, start_date=None, end_date=None, include_live=False
+    ):
+        """
+        Получить общее время работы по проекту (в секундах), включая архивы:
+        архивная часть берётся из дневных сводок archive_rollups.
+        include_live=True добавляет время идущей сессии до последнего heartbeat.
+        """
         conn = self.get_connection()
         cursor = conn.cursor()
 
@@ -913,404 +1814,2315 @@ class Database:
             )
 
         result = cursor.fetchone()
-        return result["total"] if result else 0
+        total = result["total"] if result else 0
+        if not (start_date and end_date):
+            start_date = end_date = None
+        if self._archive_years(start_date, end_date):
+            archive_sql, archive_params = self._archive_rollup_source(
+                start_date, end_date, project_id
+            )
+            cursor.execute(
+                f"SELECT COALESCE(SUM(duration), 0) as total FROM ({archive_sql})",
+                archive_params,
+            )
+            total += cursor.fetchone()["total"]
+        if include_live:
+            if start_date and end_date:
+                total += self.get_live_seconds(project_id, since=start_date, until=end_date)
+            else:
+                total += self.get_live_seconds(project_id)
+        return total
 
     def get_unique_descriptions(self):
         """
         DEPRECATED: Use get_all_task_names() instead.
         Получить уникальные описания с количеством использований (старый метод).
-        Оставлен для обратной совместимости.
+        Оставлен для обратной совместимости. Учитывает архивы.
         """
+        source = self._session_source()
         conn = self.get_connection()
         cursor = conn.cursor()
 
-        cursor.execute("""
+        cursor.execute(f"""
             SELECT 
-                description,
+                tn.name as description,
                 COUNT(*) as count,
-                SUM(duration) as total_duration
-            FROM time_sessions
-            WHERE description IS NOT NULL AND description != ''
-            GROUP BY description
-            ORDER BY count DESC, description
+                SUM(ts.duration) as total_duration
+            FROM {source} ts
+            JOIN task_names tn ON ts.task_name_id = tn.id
+            WHERE tn.name != ''
+            GROUP BY tn.id
+            ORDER BY count DESC, tn.name
         """)
 
         return cursor.fetchall()
 
     # ============================================
-    # CRUD операции для work_types
+    # Выборка сессий: фильтры, сортировка, дельты (schema v7/v8)
     # ============================================
 
-    def get_all_work_types(self):
-        """Получить все виды работ"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM work_types ORDER BY name")
+    def get_period_filters(self, filter_type, project_id=None):
+        """
+        Фильтры периода для get_filtered_sessions / get_session_changes.
+        filter_type: today, week, month или all. Границы те же, что у
+        get_today_sessions / get_week_sessions / get_month_sessions.
+        """
+        today = datetime.now().date()
+        if filter_type == "today":
+            start = today
+        elif filter_type == "week":
+            start = today - timedelta(days=today.weekday())
+        elif filter_type == "month":
+            start = today.replace(day=1)
+        else:
+            start = None
+        filters = {"project_id": project_id}
+        if start is not None:
+            filters["start_date"] = datetime.combine(start, datetime.min.time()).isoformat()
+        return filters
+
+    def query_sessions(self, query=None):
+        """
+        Сессии по SessionQuery (session_query.py) - фильтры и сортировка
+        выполняются в SQLite. Возвращает список Session.
+        """
+        query = SessionQuery.coerce(query)
+        sql, params = query.compile(self._query_source(query))
+        cursor = self.get_connection().cursor()
+        cursor.row_factory = session_row_factory
+        cursor.execute(sql, params)
         return cursor.fetchall()
 
-    def get_work_type(self, work_type_id):
-        """Получить вид работы по ID"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM work_types WHERE id = ?", (work_type_id,))
-        return cursor.fetchone()
+    def explain_session_query(self, query=None):
+        """План SQLite для SessionQuery: список строк detail из EXPLAIN QUERY PLAN"""
+        query = SessionQuery.coerce(query)
+        sql, params = query.compile(self._query_source(query))
+        cursor = self.get_connection().cursor()
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        return [row["detail"] for row in cursor.fetchall()]
 
-    def update_work_type(self, work_type_id, name, description=""):
-        """Обновить вид работы"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        try:
-            cursor.execute(
-                "UPDATE work_types SET name = ?, description = ? WHERE id = ?",
-                (name, description, work_type_id),
-            )
-            conn.commit()
-            return True
-        except sqlite3.IntegrityError:
-            return False
+    def get_filtered_sessions(self, filters=None):
+        """
+        Сессии по фильтрам: dict (start_date / end_date по start_time, project_id
+        и остальные имена из session_query.FILTERS) или SessionQuery.
+        Пустые фильтры - все сессии. Возвращает список Session.
+        """
+        return self.query_sessions(SessionQuery.coerce(filters))
 
-    def delete_work_type(self, work_type_id):
-        """Удалить вид работы"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        # Проверяем, есть ли сессии с этим видом работы
+    def get_change_seq(self):
+        """Текущий номер изменения сессий (растёт при каждой вставке/правке/удалении)"""
+        cursor = self.get_connection().cursor()
+        cursor.execute("SELECT seq FROM session_change_seq WHERE id = 1")
+        row = cursor.fetchone()
+        return row["seq"] if row else 0
+
+    def add_change_reader(self, reader):
+        """
+        Зарегистрировать читателя дельт (объект с атрибутом seq - номером,
+        с которым он вызовет get_session_changes). Хранится слабая ссылка.
+        """
+        self._change_readers.add(reader)
+
+    def get_session_changes(self, since_seq, filters=None):
+        """
+        Изменения сессий после since_seq.
+
+        Возвращает dict:
+        - seq: номер, с которым вызывать метод в следующий раз;
+        - upserted: новые и изменённые сессии (Session), подходящие под filters
+          (dict или SessionQuery), в порядке сортировки запроса;
+        - removed: ID удалённых сессий и сессий, которые после правки
+          перестали подходить под filters;
+        - renamed: {task_name_id: новое название} переименованных задач;
+        - reset: True, если надгробия после since_seq уже удалены
+          (prune_tombstones) - дельте верить нельзя, нужна полная загрузка.
+
+        Номер нужно брать через get_change_seq() ДО полной загрузки:
+        изменение, попавшее между ними, просто придёт повторно.
+        Если ничего не менялось, выполняется один запрос по первичному ключу.
+        """
+        cursor = self.get_connection().cursor()
+        cursor.execute("SELECT seq, pruned_seq FROM session_change_seq WHERE id = 1")
+        row = cursor.fetchone()
+        seq, pruned_seq = (row["seq"], row["pruned_seq"]) if row else (0, 0)
+        changes = {"seq": seq, "upserted": [], "removed": [], "renamed": {}}
+        if seq == since_seq:
+            return changes
+        if since_seq < pruned_seq:
+            changes["reset"] = True
+            return changes
+
+        query = SessionQuery.coerce(filters).page(None).changed_since(since_seq)
+        upserted = self.query_sessions(query)
+
+        # Изменённые, но уже не подходящие под фильтры - убрать из списка
+        matched = {session.id for session in upserted}
         cursor.execute(
-            "SELECT COUNT(*) as cnt FROM time_sessions WHERE work_type_id = ?",
-            (work_type_id,),
+            "SELECT id FROM time_sessions WHERE change_seq > ?", (since_seq,)
         )
-        if cursor.fetchone()["cnt"] > 0:
-            return False  # Нельзя удалить, есть связанные сессии
-        cursor.execute("DELETE FROM work_types WHERE id = ?", (work_type_id,))
-        conn.commit()
-        return True
+        removed = [row["id"] for row in cursor.fetchall() if row["id"] not in matched]
 
-    def rename_all_sessions_with_description(self, old_description, new_description):
-        """Переименовать все сессии с определенным описанием"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
         cursor.execute(
-            "UPDATE time_sessions SET description = ? WHERE description = ?",
-            (new_description, old_description),
+            "SELECT session_id FROM session_tombstones WHERE change_seq > ?",
+            (since_seq,),
         )
-        conn.commit()
-        return cursor.rowcount > 0
+        removed.extend(row["session_id"] for row in cursor.fetchall())
 
-    # ============================================
-    # Методы для работы с версионированием схемы БД
-    # ============================================
+        cursor.execute(
+            "SELECT id, name FROM task_names WHERE change_seq > ?", (since_seq,)
+        )
+        renamed = {row["id"]: row["name"] for row in cursor.fetchall()}
+        changes.update(upserted=upserted, removed=removed, renamed=renamed)
+        return changes
 
-    def get_schema_version(self):
+    def prune_tombstones(self, now=None):
         """
-        Получить текущую версию схемы базы данных.
-        Возвращает 1 если таблица schema_version не существует (старая БД).
+        Удалить надгробия, которые уже не запросит ни один живой читатель
+        этого процесса (change_seq не больше наименьшего seq читателей) и
+        которые старше TOMBSTONE_RETENTION_SECONDS. Наибольший удалённый
+        change_seq запоминается в pruned_seq: читатель, отставший от него
+        (например, в другом процессе), получит reset и перечитает список.
+        Возвращает число удалённых надгробий.
         """
+        now = now or datetime.now()
+        floor = min(
+            (reader.seq for reader in self._change_readers if reader.seq is not None),
+            default=self.get_change_seq(),
+        )
+        cutoff = (now - timedelta(seconds=TOMBSTONE_RETENTION_SECONDS)).isoformat()
         conn = self.get_connection()
         cursor = conn.cursor()
-
-        try:
-            # Проверяем существование таблицы schema_version
-            cursor.execute("""
-                SELECT name FROM sqlite_master 
-                WHERE type='table' AND name='schema_version'
-            """)
-
-            if cursor.fetchone() is None:
-                # Таблицы нет - это старая версия БД (v1)
-                print("[DB] schema_version table not found - legacy database (v1)")
-                return SCHEMA_VERSION_LEGACY
-
-            # Таблица есть - читаем версию
-            cursor.execute("SELECT MAX(version) as version FROM schema_version")
-            result = cursor.fetchone()
-
-            if result and result["version"]:
-                version = result["version"]
-                print(f"[DB] Current schema version: {version}")
-                return version
-            else:
-                # Таблица есть, но пустая - возвращаем v1
-                print("[DB] schema_version table is empty - assuming v1")
-                return SCHEMA_VERSION_LEGACY
-
-        except sqlite3.Error as e:
-            print(f"[DB] Error checking schema version: {e}")
-            # В случае ошибки считаем что это старая БД
-            return SCHEMA_VERSION_LEGACY
+        condition = "WHERE change_seq <= ? AND deleted_at < ?"
+        cursor.execute(
+            f"SELECT MAX(change_seq) as max_seq FROM session_tombstones {condition}",
+            (floor, cutoff),
+        )
+        max_seq = cursor.fetchone()["max_seq"]
+        if max_seq is None:
+            return 0
+        cursor.execute(f"DELETE FROM session_tombstones {condition}", (floor, cutoff))
+        count = cursor.rowcount
+        cursor.execute(
+            """
+            UPDATE session_change_seq SET pruned_seq = MAX(pruned_seq, ?)
+            WHERE id = 1
+            """,
+            (max_seq,),
+        )
+        conn.commit()
+        logger.debug("Pruned %s tombstones up to seq %s", count, max_seq)
+        return count
 
     # ============================================
-    # Window Positions Management
+    # Ставки проектов и стоимость сессий (schema v9)
     # ============================================
 
-    def save_window_position(self, window_name, x, y, width, height, screen_index=0):
+    def update_project(self, project_id, name, hourly_rate, company_id=None):
         """
-        Save window position to database.
-        Called when window is closed (windowWillClose_).
-
-        Args:
-            window_name: Unique identifier for the window (e.g., 'main_window', 'settings_window')
-            x, y: Window position coordinates
-            width, height: Window dimensions
-            screen_index: Index of the screen (0 = primary)
+        Обновить проект. Новая ставка действует с текущего момента:
+        стоимость уже завершённых сессий не меняется.
         """
         conn = self.get_connection()
         cursor = conn.cursor()
-
         try:
             cursor.execute(
-                """
-                INSERT OR REPLACE INTO window_positions 
-                (window_name, x, y, width, height, screen_index, updated_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """,
-                (
-                    window_name,
-                    x,
-                    y,
-                    width,
-                    height,
-                    screen_index,
-                    datetime.now().isoformat(),
-                ),
+                "UPDATE projects SET name = ?, company_id = ? WHERE id = ?",
+                (name, company_id, project_id),
             )
-
+            if cursor.rowcount == 0:
+                logger.warning("Project %s not found", project_id)
+                return False
             conn.commit()
-            print(
-                f"[DB] Saved position for {window_name}: x={x:.0f}, y={y:.0f}, size={width:.0f}x{height:.0f}, screen={screen_index}"
+        except sqlite3.IntegrityError as e:
+            logger.error(
+                "Failed to update project %s - IntegrityError: %s", project_id, e
             )
-            return True
-        except Exception as e:
-            print(f"[DB] Error saving window position for {window_name}: {e}")
             return False
+        if float(hourly_rate or 0) != self.get_project_rate_at(project_id):
+            return self.update_project_rate(project_id, hourly_rate)
+        self._publish(PROJECT_CHANGED, project_id=project_id)
+        return True
 
-    def get_window_position(self, window_name):
+    def update_project_rate(self, project_id, hourly_rate, effective_from=None):
         """
-        Get saved window position from database.
-
-        Args:
-            window_name: Unique identifier for the window
+        Установить ставку проекта начиная с effective_from (по умолчанию - сейчас).
 
-        Returns:
-            Dictionary with keys: x, y, width, height, screen_index
-            or None if no saved position exists
+        Ставка записывается в историю project_rates; projects.hourly_rate
+        хранит самую свежую. Стоимость сессий, начатых после effective_from,
+        пересчитывается (исправление ставки задним числом); более ранние
+        сессии сохраняют стоимость по ставке, действовавшей тогда.
         """
+        effective_from = effective_from or datetime.now()
+        if isinstance(effective_from, datetime):
+            effective_from = effective_from.isoformat()
+        hourly_rate = float(hourly_rate or 0)
         conn = self.get_connection()
         cursor = conn.cursor()
-
         try:
             cursor.execute(
                 """
-                SELECT x, y, width, height, screen_index 
-                FROM window_positions 
-                WHERE window_name = ?
-            """,
-                (window_name,),
+                INSERT OR REPLACE INTO project_rates (project_id, hourly_rate, effective_from)
+                VALUES (?, ?, ?)
+                """,
+                (project_id, hourly_rate, effective_from),
+            )
+            cursor.execute(
+                """
+                UPDATE projects
+                SET hourly_rate = (
+                    SELECT hourly_rate FROM project_rates
+                    WHERE project_id = ?
+                    ORDER BY effective_from DESC LIMIT 1
+                )
+                WHERE id = ?
+                """,
+                (project_id, project_id),
             )
+            recomputed = self._recompute_costs(cursor, project_id, effective_from)
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            logger.error("Failed to update rate of project %s: %s", project_id, e)
+            return False
+        logger.info(
+            "Project %s: rate %s from %s, recomputed %s sessions",
+            project_id,
+            hourly_rate,
+            effective_from,
+            recomputed,
+        )
+        self._publish(PROJECT_CHANGED, project_id=project_id)
+        return True
 
-            result = cursor.fetchone()
+    def get_project_rate_at(self, project_id, when=None):
+        """Ставка проекта, действовавшая в момент when (по умолчанию - сейчас)"""
+        when = when or datetime.now()
+        if isinstance(when, datetime):
+            when = when.isoformat()
+        cursor = self.get_connection().cursor()
+        cursor.execute(
+            """
+            SELECT hourly_rate FROM project_rates
+            WHERE project_id = ? AND effective_from <= ?
+            ORDER BY effective_from DESC LIMIT 1
+            """,
+            (project_id, when),
+        )
+        row = cursor.fetchone()
+        return row["hourly_rate"] if row else 0.0
 
-            if result:
-                pos = {
-                    "x": result["x"],
-                    "y": result["y"],
-                    "width": result["width"],
-                    "height": result["height"],
-                    "screen_index": result["screen_index"],
-                }
-                print(
-                    f"[DB] Loaded position for {window_name}: x={pos['x']:.0f}, y={pos['y']:.0f}, size={pos['width']:.0f}x{pos['height']:.0f}, screen={pos['screen_index']}"
-                )
-                return pos
-            else:
-                print(f"[DB] No saved position found for {window_name}")
-                return None
+    def get_project_rates(self, project_id):
+        """История ставок проекта, от ранней к поздней"""
+        cursor = self.get_connection().cursor()
+        cursor.execute(
+            """
+            SELECT hourly_rate, effective_from FROM project_rates
+            WHERE project_id = ?
+            ORDER BY effective_from
+            """,
+            (project_id,),
+        )
+        return cursor.fetchall()
 
+    def recompute_session_costs(self, project_id=None, since=None):
+        """
+        Пересчитать сохранённую стоимость завершённых сессий по истории ставок
+        (после ручной правки project_rates, импорта, восстановления из бэкапа).
+        Один UPDATE на все подходящие сессии. Возвращает число сессий.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            count = self._recompute_costs(cursor, project_id, since)
+            conn.commit()
         except Exception as e:
-            print(f"[DB] Error loading window position for {window_name}: {e}")
-            return None
+            conn.rollback()
+            logger.error("Failed to recompute session costs: %s", e)
+            return 0
+        logger.info("Recomputed cost of %s sessions", count)
+        if count:
+            self._publish(SESSION_EDITED, project_id=project_id)
+        return count
+
+    def _recompute_costs(self, cursor, project_id=None, since=None, skip_invoiced=True):
+        # Сессии, вошедшие в счёт, сохраняют выставленную стоимость
+        conditions = ["end_time IS NOT NULL"]
+        if skip_invoiced:
+            conditions.append("invoice_id IS NULL")
+        params = []
+        if project_id:
+            conditions.append("project_id = ?")
+            params.append(project_id)
+        if since:
+            conditions.append("start_time >= ?")
+            params.append(since)
+        cursor.execute(
+            f"""
+            UPDATE time_sessions
+            SET cost = duration * {RATE_AT_START_SQL} / 3600.0
+            WHERE {' AND '.join(conditions)}
+            """,
+            params,
+        )
+        return cursor.rowcount
 
     # ============================================
-    # Database Migration Methods
+    # Счета и неоплаченные остатки (schema v10)
     # ============================================
 
-    def set_schema_version(self, version):
+    def mark_session_as_paid(self, session_id):
+        """Отметить одну сессию оплаченной (без счёта); архивные не меняются"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            "UPDATE time_sessions SET paid = 1 WHERE id = ? AND paid = 0",
+            (session_id,),
+        )
+        conn.commit()
+        if cursor.rowcount == 0:
+            if self.is_archived_session(session_id):
+                logger.warning("Session %s is archived and read-only", session_id)
+            return False
+        logger.info("Session %s marked as paid", session_id)
+        self._publish(SESSION_EDITED, [session_id])
+        return True
+
+    def create_invoice(
+        self,
+        project_id=None,
+        company_id=None,
+        start_date=None,
+        end_date=None,
+        number=None,
+        notes=None,
+    ):
         """
-        Установить версию схемы базы данных.
-        Создаёт таблицу schema_version если её нет.
+        Выставить счёт: все неоплаченные завершённые сессии проекта/компании
+        за период (по start_time, включительно) отмечаются оплаченными и
+        привязываются к счёту одним UPDATE. Итоги счёта считаются в SQL.
+
+        Возвращает ID счёта или None, если выставлять нечего.
         """
+        query = (
+            SessionQuery()
+            .project(project_id)
+            .company(company_id)
+            .period(start_date, end_date)
+            .paid(False)
+            .completed()
+        )
+        ids_sql, params = query.compile_ids()
         conn = self.get_connection()
         cursor = conn.cursor()
+        try:
+            cursor.execute(
+                """
+                INSERT INTO invoices
+                    (number, project_id, company_id, period_start, period_end, notes, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    number,
+                    project_id,
+                    company_id,
+                    start_date,
+                    end_date,
+                    notes,
+                    datetime.now().isoformat(),
+                ),
+            )
+            invoice_id = cursor.lastrowid
+            cursor.execute(
+                f"""
+                UPDATE time_sessions SET paid = 1, invoice_id = ?
+                WHERE id IN ({ids_sql})
+                """,
+                [invoice_id] + params,
+            )
+            if cursor.rowcount == 0:
+                conn.rollback()
+                logger.info("Nothing to invoice")
+                return None
+            cursor.execute(
+                """
+                SELECT COUNT(*), COALESCE(SUM(duration), 0), COALESCE(SUM(cost), 0)
+                FROM time_sessions WHERE invoice_id = ?
+                """,
+                (invoice_id,),
+            )
+            sessions, duration, amount = cursor.fetchone()
+            cursor.execute(
+                """
+                UPDATE invoices
+                SET number = COALESCE(number, ?), session_count = ?,
+                    total_duration = ?, total_amount = ?
+                WHERE id = ?
+                """,
+                (
+                    f"INV-{datetime.now().year}-{invoice_id:04d}",
+                    sessions,
+                    duration,
+                    amount,
+                    invoice_id,
+                ),
+            )
+            conn.commit()
+        except sqlite3.IntegrityError as e:
+            conn.rollback()
+            logger.error("Failed to create invoice - IntegrityError: %s", e)
+            return None
+        except Exception as e:
+            conn.rollback()
+            logger.error("Failed to create invoice: %s", e)
+            return None
+        logger.info("Created invoice %s", invoice_id)
+        self._publish(SESSION_EDITED, project_id=project_id)
+        return invoice_id
 
-        # Создаём таблицу если её нет
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS schema_version (
-                version INTEGER PRIMARY KEY,
-                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    def void_invoice(self, invoice_id):
+        """Аннулировать счёт: его сессии снова становятся неоплаченными"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(
+                "SELECT id FROM time_sessions WHERE invoice_id = ?", (invoice_id,)
             )
-        """)
+            session_ids = [row[0] for row in cursor.fetchall()]
+            cursor.execute(
+                "UPDATE time_sessions SET paid = 0, invoice_id = NULL WHERE invoice_id = ?",
+                (invoice_id,),
+            )
+            # Снова по текущей истории ставок
+            self._materialize_costs(cursor, session_ids)
+            cursor.execute("DELETE FROM invoices WHERE id = ?", (invoice_id,))
+            deleted = cursor.rowcount
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            logger.error("Failed to void invoice %s: %s", invoice_id, e)
+            return False
+        if not deleted:
+            return False
+        logger.info("Voided invoice %s", invoice_id)
+        self._publish(SESSION_EDITED)
+        return True
 
-        # Добавляем запись о новой версии
+    def get_invoice(self, invoice_id):
+        cursor = self.get_connection().cursor()
+        cursor.execute("SELECT * FROM invoices WHERE id = ?", (invoice_id,))
+        return cursor.fetchone()
+
+    def get_invoices(self, project_id=None, company_id=None):
+        """Счета, новые сверху"""
+        conditions = []
+        params = []
+        if project_id:
+            conditions.append("project_id = ?")
+            params.append(project_id)
+        if company_id:
+            conditions.append("company_id = ?")
+            params.append(company_id)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        cursor = self.get_connection().cursor()
         cursor.execute(
-            "INSERT OR REPLACE INTO schema_version (version, applied_at) VALUES (?, ?)",
-            (version, datetime.now().isoformat()),
+            f"SELECT * FROM invoices {where} ORDER BY created_at DESC, id DESC", params
+        )
+        return cursor.fetchall()
+
+    def iter_invoice_lines(self, invoice_id):
+        """
+        Строки счёта: сводка по проекту, задаче и виду работ (число сессий,
+        секунды, сумма, первая/последняя дата). Генератор - строки читаются
+        из курсора по мере обхода, весь счёт в память не загружается.
+        """
+        source = self._session_source()
+        cursor = self.get_connection().cursor()
+        cursor.execute(
+            f"""
+            SELECT p.name as project_name,
+                   tn.name as task_name,
+                   wt.name as work_type_name,
+                   COUNT(*) as sessions,
+                   SUM(ts.duration) as duration,
+                   COALESCE(SUM(ts.cost), 0) as amount,
+                   MIN(ts.start_time) as first_start,
+                   MAX(ts.start_time) as last_start
+            FROM {source} ts
+            LEFT JOIN projects p ON ts.project_id = p.id
+            LEFT JOIN task_names tn ON ts.task_name_id = tn.id
+            LEFT JOIN work_types wt ON ts.work_type_id = wt.id
+            WHERE ts.invoice_id = ?
+            GROUP BY ts.project_id, ts.task_name_id, ts.work_type_id
+            ORDER BY project_name, first_start
+            """,
+            (invoice_id,),
+        )
+        for row in cursor:
+            yield row
+
+    def get_unpaid_balances(self):
+        """
+        Неоплаченные остатки по проектам из unpaid_balances (ведётся
+        триггерами, без сканирования сессий). project_id = 0 - без проекта.
+        """
+        cursor = self.get_connection().cursor()
+        cursor.execute(
+            """
+            SELECT ub.project_id, p.name as project_name, p.company_id,
+                   ub.sessions, ub.duration, ub.amount
+            FROM unpaid_balances ub
+            LEFT JOIN projects p ON ub.project_id = p.id
+            WHERE ub.sessions > 0
+            ORDER BY ub.amount DESC
+            """
+        )
+        return cursor.fetchall()
+
+    def get_company_unpaid_balances(self):
+        """Неоплаченные остатки по компаниям (company_id = None - без компании)"""
+        cursor = self.get_connection().cursor()
+        cursor.execute(
+            """
+            SELECT p.company_id, c.name as company_name,
+                   SUM(ub.sessions) as sessions,
+                   SUM(ub.duration) as duration,
+                   SUM(ub.amount) as amount
+            FROM unpaid_balances ub
+            LEFT JOIN projects p ON ub.project_id = p.id
+            LEFT JOIN companies c ON p.company_id = c.id
+            WHERE ub.sessions > 0
+            GROUP BY p.company_id
+            ORDER BY amount DESC
+            """
+        )
+        return cursor.fetchall()
+
+    def get_unpaid_balance(self, project_id=None, company_id=None):
+        """(сессии, секунды, сумма) к оплате по проекту, компании или всего"""
+        conditions = []
+        params = []
+        if project_id:
+            conditions.append("ub.project_id = ?")
+            params.append(project_id)
+        if company_id:
+            conditions.append("p.company_id = ?")
+            params.append(company_id)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        cursor = self.get_connection().cursor()
+        cursor.execute(
+            f"""
+            SELECT COALESCE(SUM(ub.sessions), 0), COALESCE(SUM(ub.duration), 0),
+                   COALESCE(SUM(ub.amount), 0)
+            FROM unpaid_balances ub
+            LEFT JOIN projects p ON ub.project_id = p.id
+            {where}
+            """,
+            params,
+        )
+        return tuple(cursor.fetchone())
+
+    def rebuild_unpaid_balances(self, commit=True):
+        """Пересчитать unpaid_balances с нуля по time_sessions"""
+        cursor = self.get_connection().cursor()
+        cursor.execute("DELETE FROM unpaid_balances")
+        cursor.execute(
+            """
+            INSERT INTO unpaid_balances (project_id, sessions, duration, amount)
+            SELECT COALESCE(project_id, 0), COUNT(*), COALESCE(SUM(duration), 0),
+                   COALESCE(SUM(cost), 0)
+            FROM time_sessions
+            WHERE paid = 0 AND end_time IS NOT NULL
+            GROUP BY COALESCE(project_id, 0)
+            """
+        )
+        if commit:
+            self.get_connection().commit()
+
+    # ============================================
+    # Сводки по компаниям, видам работ и проектам
+    # ============================================
+
+    def get_rollup(
+        self,
+        dimension,
+        start_date=None,
+        end_date=None,
+        project_id=None,
+        include_live=False,
+    ):
+        """
+        Время и стоимость за период, сгруппированные по dimension
+        (company, work_type, project). Период - по start_time, ISO-строки.
+
+        Возвращает список dict (key, name, sessions, duration, cost),
+        больше времени - выше. Группа без компании/вида работ/проекта имеет
+        key = None. Стоимость - сумма сохранённых time_sessions.cost.
+        Результат кэшируется до следующего изменения сессий или справочников;
+        include_live=True добавляет идущую сессию поверх кэша.
+        """
+        if dimension not in ROLLUP_DIMENSIONS:
+            raise ValueError(f"Unknown rollup dimension: {dimension}")
+        cache_key = (dimension, start_date, end_date, project_id)
+        seq = self.get_change_seq()
+        cached = self._rollup_cache.get(cache_key)
+        if cached is not None and cached[0] == seq:
+            ROLLUP_CACHE_HITS.value += 1
+            rows = cached[1]
+        else:
+            ROLLUP_CACHE_MISSES.value += 1
+            rows = self._query_rollup(dimension, start_date, end_date, project_id)
+            if len(self._rollup_cache) >= ROLLUP_CACHE_SIZE:
+                self._rollup_cache.clear()
+            self._rollup_cache[cache_key] = (seq, rows)
+
+        rows = [dict(row) for row in rows]
+        if include_live:
+            self._add_live_to_rollup(rows, dimension, start_date, end_date, project_id)
+        return rows
+
+    def get_company_rollup(
+        self, start_date=None, end_date=None, project_id=None, include_live=False
+    ):
+        """Сводка по компаниям (через projects.company_id)"""
+        return self.get_rollup(
+            "company", start_date, end_date, project_id, include_live
+        )
+
+    def get_work_type_rollup(
+        self, start_date=None, end_date=None, project_id=None, include_live=False
+    ):
+        """Сводка по видам работ"""
+        return self.get_rollup(
+            "work_type", start_date, end_date, project_id, include_live
+        )
+
+    def _query_rollup(self, dimension, start_date, end_date, project_id):
+        key_sql, name_sql = ROLLUP_DIMENSIONS[dimension]
+        conditions = []
+        params = []
+        if start_date:
+            conditions.append("ts.start_time >= ?")
+            params.append(start_date)
+        if end_date:
+            conditions.append("ts.start_time <= ?")
+            params.append(end_date)
+        if project_id:
+            conditions.append("ts.project_id = ?")
+            params.append(project_id)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        source = f"""(
+            SELECT ts.project_id, ts.work_type_id, 1 as sessions, ts.duration, ts.cost
+            FROM time_sessions ts {where}
+        )"""
+        if self._archive_years(start_date, end_date):
+            # Архивная часть - из готовых дневных сводок, без ATTACH
+            archive_sql, archive_params = self._archive_rollup_source(
+                start_date, end_date, project_id
+            )
+            source = f"({source[1:-1]} UNION ALL {archive_sql})"
+            params = params + archive_params
+
+        cursor = self.get_connection().cursor()
+        cursor.execute(
+            f"""
+            SELECT {key_sql} as key, {name_sql} as name,
+                   SUM(ts.sessions) as sessions,
+                   COALESCE(SUM(ts.duration), 0) as duration,
+                   COALESCE(SUM(ts.cost), 0) as cost
+            FROM {source} ts
+            LEFT JOIN projects p ON ts.project_id = p.id
+            LEFT JOIN companies c ON p.company_id = c.id
+            LEFT JOIN work_types wt ON ts.work_type_id = wt.id
+            GROUP BY {key_sql}
+            ORDER BY duration DESC
+            """,
+            params,
+        )
+        return [dict(row) for row in cursor.fetchall()]
+
+    def _add_live_to_rollup(self, rows, dimension, start_date, end_date, project_id):
+        """Добавить время идущей сессии в её группу (как get_*_total(include_live=True))"""
+        live_seconds = self.get_live_seconds(project_id, start_date, end_date)
+        if not live_seconds:
+            return
+        key_sql, name_sql = ROLLUP_DIMENSIONS[dimension]
+        cursor = self.get_connection().cursor()
+        cursor.execute(
+            f"""
+            SELECT {key_sql} as key, {name_sql} as name,
+                   {RATE_AT_START_TEMPLATE.format(table="ts")} as hourly_rate
+            FROM active_session a
+            JOIN time_sessions ts ON ts.id = a.session_id
+            LEFT JOIN projects p ON ts.project_id = p.id
+            LEFT JOIN companies c ON p.company_id = c.id
+            LEFT JOIN work_types wt ON ts.work_type_id = wt.id
+            WHERE a.id = 1
+            """
+        )
+        live = cursor.fetchone()
+        if live is None:
+            return
+        group = next((row for row in rows if row["key"] == live["key"]), None)
+        if group is None:
+            group = {
+                "key": live["key"],
+                "name": live["name"],
+                "sessions": 1,
+                "duration": 0,
+                "cost": 0.0,
+            }
+            rows.append(group)
+        group["duration"] += live_seconds
+        group["cost"] += live_seconds * live["hourly_rate"] / 3600.0
+        rows.sort(key=lambda row: row["duration"], reverse=True)
+
+    def _clear_rollup_cache(self, event=None):
+        self._rollup_cache.clear()
+
+    # ============================================
+    # Архив старых сессий (schema v11)
+    # ============================================
+
+    def archive_sessions(self, months=ARCHIVE_AFTER_MONTHS, now=None):
+        """
+        Перенести завершённые сессии, начатые раньше чем months месяцев назад
+        (с начала месяца), в годовые файлы archive/mtimer-<год>.db.
+
+        Неоплаченные сессии с ненулевой стоимостью остаются в основной базе,
+        пока по ним не выставлен счёт (суммы unpaid_balances не меняются;
+        неоплаченные сессии без стоимости уходят из их счётчиков). Для архивной части сразу считаются
+        дневные сводки (archive_rollups), чтобы статистика не открывала
+        архивы. Архивные сессии доступны только для чтения.
+
+        Возвращает {год: число перенесённых сессий} или None при ошибке.
+        """
+        if months < 1:
+            raise ValueError("months must be >= 1: the current month stays hot")
+        now = now or datetime.now()
+        month_index = now.year * 12 + now.month - 1 - months
+        cutoff = datetime(month_index // 12, month_index % 12 + 1, 1).isoformat()
+        archivable = (
+            "end_time IS NOT NULL AND start_time < ? "
+            "AND (paid = 1 OR COALESCE(cost, 0) = 0) "
+            "AND id NOT IN (SELECT session_id FROM active_session)"
+        )
+
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            f"""
+            SELECT DISTINCT substr(start_time, 1, 4) as year
+            FROM time_sessions WHERE {archivable}
+            """,
+            (cutoff,),
+        )
+        years = [int(row["year"]) for row in cursor.fetchall()]
+        if not years:
+            logger.info("Nothing to archive before %s", cutoff)
+            return {}
+
+        os.makedirs(self.get_archive_dir(), exist_ok=True)
+        columns = ", ".join(self._table_columns("time_sessions"))
+        moved = {}
+        for year in years:
+            try:
+                schema = self._attach_archive(year, create=True)
+                year_condition = f"{archivable} AND start_time >= ? AND start_time < ?"
+                year_params = (cutoff, f"{year}-01-01T00:00:00", f"{year + 1}-01-01T00:00:00")
+                cursor.execute(
+                    f"""
+                    INSERT OR REPLACE INTO {schema}.time_sessions ({columns})
+                    SELECT {columns} FROM main.time_sessions WHERE {year_condition}
+                    """,
+                    year_params,
+                )
+                seq_before = self.get_change_seq()
+                cursor.execute(
+                    f"DELETE FROM main.time_sessions WHERE {year_condition}",
+                    year_params,
+                )
+                count = cursor.rowcount
+                # Перенос в архив - не удаление сессии: надгробия не нужны,
+                # списки продолжают видеть её через архив
+                cursor.execute(
+                    """
+                    DELETE FROM main.session_tombstones WHERE change_seq > ?
+                    """,
+                    (seq_before,),
+                )
+                self._rebuild_archive_catalog(cursor, year, schema)
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                logger.error("Failed to archive %s: %s", year, e)
+                return None
+            moved[year] = count
+            logger.info("Archived %s sessions of %s", count, year)
+
+        self._archives = None
+        self._publish(EXTERNAL_CHANGE)
+        return moved
+
+    def get_archive_dir(self):
+        return os.path.join(os.path.dirname(self.db_path), ARCHIVE_DIR_NAME)
+
+    def get_archives(self):
+        """Каталог архивов: год -> строка (path, sessions, duration, cost, first/last_start)"""
+        if self._archives is None:
+            cursor = self.get_connection().cursor()
+            cursor.execute("SELECT * FROM archives ORDER BY year")
+            self._archives = {row["year"]: row for row in cursor.fetchall()}
+        return self._archives
+
+    def detach_archives(self):
+        """Отключить все подключённые архивы"""
+        conn = self.get_connection()
+        for schema in self._attached.values():
+            conn.execute(f"DETACH DATABASE {schema}")
+        self._attached = {}
+
+    def _archive_years(self, start_date=None, end_date=None):
+        """Годы архивов, пересекающиеся с периодом (по start_time)"""
+        return [
+            year
+            for year, row in self.get_archives().items()
+            if (not start_date or row["last_start"] >= start_date)
+            and (not end_date or row["first_start"] <= end_date)
+        ]
+
+    def is_archived_session(self, session_id):
+        """
+        Сессия лежит в годовом архиве (не в основной базе). Архивные сессии
+        только для чтения: правки и отметки оплаты к ним не применяются.
+        """
+        cursor = self.get_connection().cursor()
+        cursor.execute("SELECT 1 FROM main.time_sessions WHERE id = ?", (session_id,))
+        if cursor.fetchone():
+            return False
+        for year in self.get_archives():
+            try:
+                schema = self._attach_archive(year)
+            except (OSError, sqlite3.Error) as e:
+                logger.warning("Archive %s unavailable: %s", year, e)
+                continue
+            cursor.execute(
+                f"SELECT 1 FROM {schema}.time_sessions WHERE id = ?", (session_id,)
+            )
+            if cursor.fetchone():
+                return True
+        return False
+
+    def _log_missing_session(self, session_id):
+        """Почему сессии нет в основной базе: архив или удалена"""
+        if self.is_archived_session(session_id):
+            logger.warning("Session %s is archived and read-only", session_id)
+        else:
+            logger.warning("Session %s not found", session_id)
+
+    def _attach_archive(self, year, create=False):
+        """ATTACH архива года (один раз на соединение); имя схемы arch_<год>"""
+        schema = self._attached.get(year)
+        if schema is not None:
+            return schema
+        path = os.path.join(self.get_archive_dir(), f"mtimer-{year}.db")
+        if not create and not os.path.exists(path):
+            raise FileNotFoundError(path)
+        schema = f"arch_{year}"
+        conn = self.get_connection()
+        # ATTACH невозможен внутри транзакции
+        conn.commit()
+        conn.execute("ATTACH DATABASE ? AS " + schema, (path,))
+        self._attached[year] = schema
+        self._sync_archive_schema(schema)
+        return schema
+
+    def _sync_archive_schema(self, schema):
+        """Таблица сессий архива с теми же колонками, что в основной базе"""
+        cursor = self.get_connection().cursor()
+        cursor.execute("PRAGMA main.table_info(time_sessions)")
+        hot = [(row["name"], row["type"]) for row in cursor.fetchall()]
+        cursor.execute(f"PRAGMA {schema}.table_info(time_sessions)")
+        existing = {row["name"] for row in cursor.fetchall()}
+        if not existing:
+            definitions = ", ".join(
+                "id INTEGER PRIMARY KEY" if name == "id" else f"{name} {kind}"
+                for name, kind in hot
+            )
+            cursor.execute(f"CREATE TABLE {schema}.time_sessions ({definitions})")
+            cursor.execute(
+                f"""
+                CREATE INDEX {schema}.idx_archive_start_time
+                ON time_sessions (start_time)
+                """
+            )
+            cursor.execute(
+                f"""
+                CREATE INDEX {schema}.idx_archive_project_start
+                ON time_sessions (project_id, start_time)
+                """
+            )
+        else:
+            for name, kind in hot:
+                if name not in existing:
+                    cursor.execute(
+                        f"ALTER TABLE {schema}.time_sessions ADD COLUMN {name} {kind}"
+                    )
+        self.get_connection().commit()
+
+    def _session_source(self, start_date=None, end_date=None):
+        """
+        Источник сессий для FROM: time_sessions или UNION ALL с архивами,
+        пересекающими период. Нужные архивы подключаются по требованию.
+        """
+        years = self._archive_years(start_date, end_date)
+        if not years:
+            return "time_sessions"
+        columns = ", ".join(self._table_columns("time_sessions"))
+        parts = [f"SELECT {columns} FROM main.time_sessions"]
+        for year in years:
+            try:
+                schema = self._attach_archive(year)
+            except (OSError, sqlite3.Error) as e:
+                logger.warning("Archive %s unavailable: %s", year, e)
+                continue
+            parts.append(f"SELECT {columns} FROM {schema}.time_sessions")
+        if len(parts) == 1:
+            return "time_sessions"
+        return "(" + " UNION ALL ".join(parts) + ")"
+
+    def _query_source(self, query):
+        return self._session_source(
+            query.filters.get("start_date"), query.filters.get("end_date")
+        )
+
+    def _archive_rollup_source(self, start_date, end_date, project_id):
+        """
+        Подзапрос архивной части сводки по archive_rollups. Сводки дневные:
+        границы периода округляются до дня, что точно для периодов с
+        началом в полночь и концом в конце дня (как у всех вызывающих).
+        """
+        conditions = []
+        params = []
+        if start_date:
+            conditions.append("day >= ?")
+            params.append(start_date[:10])
+        if end_date:
+            conditions.append("day <= ?")
+            params.append(end_date[:10])
+        if project_id:
+            conditions.append("project_id = ?")
+            params.append(project_id)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return (
+            f"""
+            SELECT project_id, work_type_id, sessions, duration, cost
+            FROM archive_rollups {where}
+            """,
+            params,
+        )
+
+    def _rebuild_archive_catalog(self, cursor, year, schema):
+        """Пересчитать строку каталога и дневные сводки архива года"""
+        cursor.execute(
+            "DELETE FROM archive_rollups WHERE day >= ? AND day < ?",
+            (f"{year}-01-01", f"{year + 1}-01-01"),
+        )
+        cursor.execute(
+            f"""
+            INSERT INTO archive_rollups
+                (day, project_id, work_type_id, sessions, duration, cost)
+            SELECT substr(start_time, 1, 10), project_id, work_type_id,
+                   COUNT(*), COALESCE(SUM(duration), 0), COALESCE(SUM(cost), 0)
+            FROM {schema}.time_sessions
+            GROUP BY substr(start_time, 1, 10), project_id, work_type_id
+            """
+        )
+        cursor.execute(
+            f"""
+            INSERT OR REPLACE INTO archives
+                (year, path, sessions, duration, cost, first_start, last_start, archived_at)
+            SELECT ?, ?, COUNT(*), COALESCE(SUM(duration), 0), COALESCE(SUM(cost), 0),
+                   MIN(start_time), MAX(start_time), ?
+            FROM {schema}.time_sessions
+            """,
+            (year, f"mtimer-{year}.db", datetime.now().isoformat()),
+        )
+
+    # ============================================
+    # Обслуживание базы (schema v12)
+    # ============================================
+
+    def run_maintenance(self, budget_ms=MAINTENANCE_RUN_BUDGET_MS, force=False):
+        """
+        Один заход обслуживания в простое; вызывается планировщиком.
+
+        По порядку, пока не исчерпан budget_ms:
+        - PRAGMA optimize раз в MAINTENANCE_OPTIMIZE_INTERVAL;
+        - ANALYZE по одной таблице за шаг, если статистики нет или после
+          ANALYZE_CHANGE_THRESHOLD изменений сессий (analysis_limit
+          ограничивает чтение);
+        - удаление надгробий, которые уже никто не запросит (prune_tombstones),
+          вместе с PRAGMA optimize;
+        - PRAGMA incremental_vacuum порциями страниц, размер порции
+          подстраивается так, чтобы шаг держал блокировку записи не дольше
+          MAINTENANCE_STEP_BUDGET_MS.
+
+        Каждый шаг - отдельная короткая транзакция. Пропускается, если
+        база меняется (запись была меньше MAINTENANCE_IDLE_SECONDS назад)
+        или открыта транзакция. Возвращает True, если работа осталась.
+        """
+        stats = self._maintenance
+        conn = self.get_connection()
+        idle = time.monotonic() - self._last_write >= MAINTENANCE_IDLE_SECONDS
+        if not force and (not idle or conn.in_transaction):
+            stats["skipped_busy"] += 1
+            return True
+
+        stats["runs"] += 1
+        stats["last_run"] = datetime.now().isoformat()
+        deadline = time.perf_counter() + budget_ms / 1000.0
+        try:
+            conn.execute(f"PRAGMA analysis_limit = {ANALYSIS_LIMIT}")
+            last_optimize = stats["last_optimize_at"]
+            if (
+                last_optimize is None
+                or time.monotonic() - last_optimize >= MAINTENANCE_OPTIMIZE_INTERVAL
+            ):
+                self._timed_step(lambda: conn.execute("PRAGMA optimize"))
+                stats["tombstones_pruned"] += self.prune_tombstones()
+                stats["optimize_runs"] += 1
+                stats["last_optimize_at"] = time.monotonic()
+                stats["last_optimize"] = datetime.now().isoformat()
+                if not stats["analyze_pending"] and self._analyze_needed():
+                    stats["analyze_pending"] = self._user_tables()
+
+            while stats["analyze_pending"] and time.perf_counter() < deadline:
+                table = stats["analyze_pending"].pop(0)
+                self._timed_step(lambda: conn.execute(f'ANALYZE "{table}"'))
+                if not stats["analyze_pending"]:
+                    stats["analyze_runs"] += 1
+                    stats["analyze_seq"] = self.get_change_seq()
+                    stats["last_analyze"] = datetime.now().isoformat()
+
+            while time.perf_counter() < deadline:
+                freelist = conn.execute("PRAGMA freelist_count").fetchone()[0]
+                if not freelist:
+                    break
+                self._incremental_vacuum_step(min(freelist, self._vacuum_pages))
+        except sqlite3.Error as e:
+            # Другой процесс держит блокировку - повторим при следующем простое
+            logger.info("Maintenance step skipped: %s", e)
+            return True
+
+        return bool(stats["analyze_pending"]) or bool(
+            conn.execute("PRAGMA freelist_count").fetchone()[0]
+        )
+
+    def get_maintenance_stats(self):
+        """Размер файла, свободные страницы и счётчики обслуживания"""
+        cursor = self.get_connection().cursor()
+        page_size = cursor.execute("PRAGMA page_size").fetchone()[0]
+        page_count = cursor.execute("PRAGMA page_count").fetchone()[0]
+        freelist = cursor.execute("PRAGMA freelist_count").fetchone()[0]
+        auto_vacuum = cursor.execute("PRAGMA auto_vacuum").fetchone()[0]
+        stats = {
+            key: value
+            for key, value in self._maintenance.items()
+            if key not in ("last_optimize_at", "analyze_pending")
+        }
+        stats.update(
+            {
+                "file_size": os.path.getsize(self.db_path),
+                "page_size": page_size,
+                "page_count": page_count,
+                "freelist_count": freelist,
+                "free_bytes": freelist * page_size,
+                "auto_vacuum": {0: "none", 1: "full", 2: "incremental"}.get(
+                    auto_vacuum, auto_vacuum
+                ),
+                "vacuum_pages_per_step": self._vacuum_pages,
+                "analyze_pending": len(self._maintenance["analyze_pending"]),
+            }
+        )
+        return stats
+
+    def _timed_step(self, step):
+        started = time.perf_counter()
+        result = step()
+        if isinstance(result, sqlite3.Cursor):
+            result.fetchall()
+        elapsed = (time.perf_counter() - started) * 1000
+        stats = self._maintenance
+        stats["max_step_ms"] = max(stats["max_step_ms"], elapsed)
+        return elapsed
+
+    def _incremental_vacuum_step(self, pages):
+        """Освободить до pages страниц и подстроить порцию под бюджет шага"""
+        conn = self.get_connection()
+        before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        # Каждый sqlite3_step освобождает одну страницу, а execute() делает
+        # для PRAGMA без результата лишь один шаг; executescript дошагивает
+        elapsed = self._timed_step(
+            lambda: conn.executescript(f"PRAGMA incremental_vacuum({pages});")
         )
+        stats = self._maintenance
+        stats["vacuum_steps"] += 1
+        stats["pages_freed"] += before - conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if elapsed > MAINTENANCE_STEP_BUDGET_MS:
+            self._vacuum_pages = max(8, self._vacuum_pages // 2)
+        elif elapsed < MAINTENANCE_STEP_BUDGET_MS / 2 and pages == self._vacuum_pages:
+            self._vacuum_pages = min(4096, self._vacuum_pages * 2)
+
+    def _analyze_needed(self):
+        """Статистики нет или с последнего ANALYZE сессии заметно изменились"""
+        cursor = self.get_connection().cursor()
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'"
+        )
+        if cursor.fetchone() is None:
+            return True
+        if cursor.execute("SELECT COUNT(*) FROM sqlite_stat1").fetchone()[0] == 0:
+            return True
+        last_seq = self._maintenance["analyze_seq"]
+        if last_seq is None:
+            # Статистика из прошлого запуска; обновит PRAGMA optimize по надобности
+            self._maintenance["analyze_seq"] = self.get_change_seq()
+            return False
+        return self.get_change_seq() - last_seq >= ANALYZE_CHANGE_THRESHOLD
+
+    def _user_tables(self):
+        cursor = self.get_connection().cursor()
+        cursor.execute(
+            """
+            SELECT name FROM sqlite_master
+            WHERE type = 'table' AND name NOT LIKE 'sqlite_%'
+            ORDER BY name
+            """
+        )
+        return [row["name"] for row in cursor.fetchall()]
+
+    # ============================================
+    # CRUD операции для work_types
+    # ============================================
+
+    def get_all_work_types(self):
+        """Получить все виды работ"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM work_types ORDER BY name")
+        return cursor.fetchall()
+
+    def get_work_type(self, work_type_id):
+        """Получить вид работы по ID"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM work_types WHERE id = ?", (work_type_id,))
+        return cursor.fetchone()
+
+    def update_work_type(self, work_type_id, name, description=""):
+        """Обновить вид работы"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(
+                "UPDATE work_types SET name = ?, description = ? WHERE id = ?",
+                (name, description, work_type_id),
+            )
+            conn.commit()
+            self._publish(WORK_TYPES_CHANGED)
+            return True
+        except sqlite3.IntegrityError:
+            return False
+
+    def delete_work_type(self, work_type_id):
+        """Удалить вид работы"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        # Проверяем, есть ли сессии с этим видом работы
+        cursor.execute(
+            "SELECT COUNT(*) as cnt FROM time_sessions WHERE work_type_id = ?",
+            (work_type_id,),
+        )
+        if cursor.fetchone()["cnt"] > 0:
+            return False  # Нельзя удалить, есть связанные сессии
+        cursor.execute("DELETE FROM work_types WHERE id = ?", (work_type_id,))
         conn.commit()
-        print(f"[DB] Schema version set to: {version}")
+        self._publish(WORK_TYPES_CHANGED)
+        return True
+
+    def rename_all_sessions_with_description(self, old_description, new_description):
+        """
+        Переименовать все сессии с определенным описанием.
+        Описание хранится в task_names, поэтому переименовывается одна строка.
+        Если новое название уже существует, сессии перепривязываются к нему.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT id FROM task_names WHERE name = ?", (old_description,))
+        old_row = cursor.fetchone()
+        if not old_row:
+            return False
+
+        cursor.execute("SELECT id FROM task_names WHERE name = ?", (new_description,))
+        existing = cursor.fetchone()
+        if existing is None:
+            cursor.execute(
+                "UPDATE task_names SET name = ? WHERE id = ?",
+                (new_description, old_row["id"]),
+            )
+        else:
+            # Слияние двух задач: перепривязываем сессии и удаляем старое название
+            cursor.execute(
+                "UPDATE time_sessions SET task_name_id = ? WHERE task_name_id = ?",
+                (existing["id"], old_row["id"]),
+            )
+            cursor.execute("DELETE FROM task_names WHERE id = ?", (old_row["id"],))
+            # Веса двух задач объединились - индекс перестроится при следующем обращении
+            self._task_index = None
+        conn.commit()
+        if self._task_index is not None:
+            self._task_index.rename(old_row["id"], new_description)
+        self._publish(TASK_NAMES_CHANGED)
+        return True
+
+    # ============================================
+    # Методы для работы с версионированием схемы БД
+    # ============================================
+
+    def get_schema_version(self):
+        """
+        Получить текущую версию схемы базы данных.
+        Возвращает 1 если таблица schema_version не существует (старая БД).
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            # Проверяем существование таблицы schema_version
+            cursor.execute("""
+                SELECT name FROM sqlite_master 
+                WHERE type='table' AND name='schema_version'
+            """)
+
+            if cursor.fetchone() is None:
+                # Таблицы нет - это старая версия БД (v1)
+                logger.warning("schema_version table not found - legacy database (v1)")
+                return SCHEMA_VERSION_LEGACY
+
+            # Таблица есть - читаем версию
+            cursor.execute("SELECT MAX(version) as version FROM schema_version")
+            result = cursor.fetchone()
+
+            if result and result["version"]:
+                version = result["version"]
+                logger.debug("Current schema version: %s", version)
+                return version
+            else:
+                # Таблица есть, но пустая - возвращаем v1
+                logger.debug("schema_version table is empty - assuming v1")
+                return SCHEMA_VERSION_LEGACY
+
+        except sqlite3.Error as e:
+            logger.error("Error checking schema version: %s", e)
+            # В случае ошибки считаем что это старая БД
+            return SCHEMA_VERSION_LEGACY
+
+    # ============================================
+    # Window Positions Management
+    # ============================================
+
+    def save_window_position(self, window_name, x, y, width, height, screen_index=0):
+        """
+        Save window position to database.
+        Called when window is closed (windowWillClose_).
+
+        Args:
+            window_name: Unique identifier for the window (e.g., 'main_window', 'settings_window')
+            x, y: Window position coordinates
+            width, height: Window dimensions
+            screen_index: Index of the screen (0 = primary)
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute(
+                """
+                INSERT OR REPLACE INTO window_positions 
+                (window_name, x, y, width, height, screen_index, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+                (
+                    window_name,
+                    x,
+                    y,
+                    width,
+                    height,
+                    screen_index,
+                    datetime.now().isoformat(),
+                ),
+            )
+
+            conn.commit()
+            logger.debug(
+                "Saved position for %s: x=%.0f, y=%.0f, size=%.0fx%.0f, screen=%s",
+                window_name,
+                x,
+                y,
+                width,
+                height,
+                screen_index,
+            )
+            return True
+        except Exception as e:
+            logger.error("Error saving window position for %s: %s", window_name, e)
+            return False
+
+    def get_window_position(self, window_name):
+        """
+        Get saved window position from database.
+
+        Args:
+            window_name: Unique identifier for the window
+
+        Returns:
+            Dictionary with keys: x, y, width, height, screen_index
+            or None if no saved position exists
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute(
+                """
+                SELECT x, y, width, height, screen_index 
+                FROM window_positions 
+                WHERE window_name = ?
+            """,
+                (window_name,),
+            )
+
+            result = cursor.fetchone()
+
+            if result:
+                pos = {
+                    "x": result["x"],
+                    "y": result["y"],
+                    "width": result["width"],
+                    "height": result["height"],
+                    "screen_index": result["screen_index"],
+                }
+                logger.debug(
+                    "Loaded position for %s: x=%.0f, y=%.0f, size=%.0fx%.0f, screen=%s",
+                    window_name,
+                    pos["x"],
+                    pos["y"],
+                    pos["width"],
+                    pos["height"],
+                    pos["screen_index"],
+                )
+                return pos
+            else:
+                logger.debug("No saved position found for %s", window_name)
+                return None
+
+        except Exception as e:
+            logger.error("Error loading window position for %s: %s", window_name, e)
+            return None
+
+    # ============================================
+    # Database Migration Methods
+    # ============================================
+
+    def set_schema_version(self, version):
+        """
+        Установить версию схемы базы данных.
+        Создаёт таблицу schema_version если её нет.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        # Создаём таблицу если её нет
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+
+        # Добавляем запись о новой версии
+        cursor.execute(
+            "INSERT OR REPLACE INTO schema_version (version, applied_at) VALUES (?, ?)",
+            (version, datetime.now().isoformat()),
+        )
+        conn.commit()
+        logger.info("Schema version set to: %s", version)
+
+    def create_automatic_backup(self):
+        """
+        Создаёт автоматический бэкап базы данных перед миграцией.
+        Возвращает путь к созданному бэкапу или None в случае ошибки.
+        """
+        try:
+            # Создаём директорию для бэкапов
+            backup_dir = os.path.expanduser(
+                "~/Library/Application Support/MTimer/backups"
+            )
+            os.makedirs(backup_dir, exist_ok=True)
+
+            # Генерируем имя файла с временной меткой
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            backup_filename = f"auto_backup_before_migration_{timestamp}.db"
+            backup_path = os.path.join(backup_dir, backup_filename)
+
+            # Копируем файл БД
+            logger.info("Creating automatic backup: %s", backup_path)
+            shutil.copy2(self.db_path, backup_path)
+
+            # Проверяем что файл создан
+            if os.path.exists(backup_path):
+                file_size = os.path.getsize(backup_path)
+                logger.info(
+                    "Backup created successfully: %s (%s bytes)", backup_path, file_size
+                )
+                return backup_path
+            else:
+                logger.error("Backup file not found after creation")
+                return None
+
+        except Exception as e:
+            logger.exception("Error creating automatic backup: %s", e)
+            return None
+
+    def migrate_to_v2(self):
+        """
+        Миграция базы данных с версии 1 на версию 2.
+
+        Изменения в v2:
+        - Создаётся таблица task_names для хранения уникальных названий задач
+        - В time_sessions добавляется столбец task_name_id (FK на task_names)
+        - Все существующие описания мигрируются в task_names
+        - Все сессии обновляются ссылками на соответствующие task_names
+
+        Возвращает True если миграция прошла успешно, False в случае ошибки.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            logger.info("Starting migration to v2...")
+
+            # Начинаем транзакцию
+            cursor.execute("BEGIN TRANSACTION")
+
+            # 1. Создаём таблицу task_names если её нет
+            logger.info("Step 1/5: Creating task_names table...")
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS task_names (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL UNIQUE,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+
+            # 2. Добавляем столбец task_name_id в time_sessions если его нет
+            logger.info("Step 2/5: Adding task_name_id column to time_sessions...")
+            try:
+                cursor.execute("""
+                    ALTER TABLE time_sessions 
+                    ADD COLUMN task_name_id INTEGER REFERENCES task_names(id)
+                """)
+            except sqlite3.OperationalError as e:
+                if "duplicate column name" in str(e).lower():
+                    logger.warning("Column task_name_id already exists, skipping...")
+                else:
+                    raise
+
+            # 3. Извлекаем все уникальные описания и вставляем в task_names
+            logger.info("Step 3/5: Migrating unique descriptions to task_names...")
+            if "description" in self._table_columns("time_sessions"):
+                cursor.execute("""
+                    SELECT DISTINCT description 
+                    FROM time_sessions 
+                    WHERE description IS NOT NULL AND description != ''
+                    ORDER BY description
+                """)
+                unique_descriptions = cursor.fetchall()
+            else:
+                # Новая БД создаётся сразу без колонки description
+                unique_descriptions = []
+            logger.info("Found %s unique task descriptions", len(unique_descriptions))
+
+            for row in unique_descriptions:
+                description = row["description"]
+                try:
+                    cursor.execute(
+                        "INSERT INTO task_names (name) VALUES (?)", (description,)
+                    )
+                except sqlite3.IntegrityError:
+                    # Название уже существует (на случай повторного запуска миграции)
+                    logger.warning(
+                        "Task name '%s' already exists, skipping...", description
+                    )
+
+            # 4. Обновляем все сессии, устанавливая task_name_id
+            logger.info("Step 4/5: Linking sessions to task_names...")
+            updated_count = 0
+            if unique_descriptions:
+                cursor.execute("""
+                    UPDATE time_sessions
+                    SET task_name_id = (
+                        SELECT id FROM task_names 
+                        WHERE task_names.name = time_sessions.description
+                    )
+                    WHERE description IS NOT NULL AND description != ''
+                """)
+                updated_count = cursor.rowcount
+            logger.info("Updated %s sessions with task_name_id", updated_count)
+
+            # 5. Устанавливаем версию схемы в 2
+            logger.info("Step 5/5: Setting schema version to 2...")
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INTEGER PRIMARY KEY,
+                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            cursor.execute(
+                "INSERT OR REPLACE INTO schema_version (version, applied_at) VALUES (?, ?)",
+                (SCHEMA_VERSION_V2, datetime.now().isoformat()),
+            )
+
+            # Коммитим транзакцию
+            conn.commit()
+            logger.info("Migration to v2 completed successfully!")
+            logger.info("Migrated %s unique task names", len(unique_descriptions))
+            logger.info("Updated %s time sessions", updated_count)
+
+            return True
+
+        except Exception as e:
+            # Откатываем все изменения
+            conn.rollback()
+            logger.exception("Error during migration: %s", e)
+            return False
+
+    def migrate_to_v3(self):
+        """
+        Migrate database from version 2 to version 3.
+
+        Changes in v3:
+        - Creates window_positions table for storing window positions
+
+        Returns True if migration successful, False on error.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            logger.info("Starting migration to v3...")
+
+            # Begin transaction
+            cursor.execute("BEGIN TRANSACTION")
+
+            # 1. Create window_positions table
+            logger.info("Step 1/2: Creating window_positions table...")
+            self.create_window_positions_table()
+
+            # 2. Set schema version to 3
+            logger.info("Step 2/2: Setting schema version to 3...")
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INTEGER PRIMARY KEY,
+                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            cursor.execute(
+                "INSERT OR REPLACE INTO schema_version (version, applied_at) VALUES (?, ?)",
+                (SCHEMA_VERSION_V3, datetime.now().isoformat()),
+            )
+
+            # Commit transaction
+            conn.commit()
+            logger.info("Migration to v3 completed successfully!")
+
+            return True
+
+        except Exception as e:
+            # Rollback all changes
+            conn.rollback()
+            logger.exception("Error during migration to v3: %s", e)
+            return False
+
+    def migrate_to_v4(self):
+        """
+        Migrate database from version 3 to version 4.
+
+        Changes in v4:
+        - The task text lives only in task_names; time_sessions.description is dropped
+          (sessions whose text drifted from their task_names row are relinked first)
+        - Index on time_sessions.task_name_id for the task_names join
+        - time_sessions_legacy view exposes the old description column for old readers
+
+        Returns True if migration successful, False on error.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            logger.info("Starting migration to v4...")
+
+            # Begin transaction
+            cursor.execute("BEGIN TRANSACTION")
+
+            columns = self._table_columns("time_sessions")
+            if "description" in columns:
+                # 1. Every non-empty description must have its own task_names row
+                logger.info("Step 1/5: Linking descriptions to task_names...")
+                cursor.execute("""
+                    INSERT OR IGNORE INTO task_names (name)
+                    SELECT DISTINCT description FROM time_sessions
+                    WHERE description IS NOT NULL AND description != ''
+                """)
+                cursor.execute("""
+                    UPDATE time_sessions
+                    SET task_name_id = (
+                        SELECT id FROM task_names
+                        WHERE task_names.name = time_sessions.description
+                    )
+                    WHERE description IS NOT NULL AND description != ''
+                      AND (
+                        task_name_id IS NULL
+                        OR task_name_id != (
+                            SELECT id FROM task_names
+                            WHERE task_names.name = time_sessions.description
+                        )
+                      )
+                """)
+                logger.info("Relinked %s sessions", cursor.rowcount)
+
+                # 2. Rebuild time_sessions without the description column
+                logger.info("Step 2/5: Dropping time_sessions.description...")
+                cursor.execute("""
+                    CREATE TABLE time_sessions_v4 (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        project_id INTEGER,
+                        work_type_id INTEGER,
+                        start_time TIMESTAMP NOT NULL,
+                        end_time TIMESTAMP,
+                        duration INTEGER DEFAULT 0,
+                        paid INTEGER DEFAULT 0,
+                        task_name_id INTEGER,
+                        FOREIGN KEY (project_id) REFERENCES projects (id),
+                        FOREIGN KEY (work_type_id) REFERENCES work_types (id),
+                        FOREIGN KEY (task_name_id) REFERENCES task_names (id)
+                    )
+                """)
+                new_columns = self._table_columns("time_sessions_v4")
+                column_list = ", ".join(c for c in columns if c in new_columns)
+                cursor.execute(
+                    f"INSERT INTO time_sessions_v4 ({column_list}) "
+                    f"SELECT {column_list} FROM time_sessions"
+                )
+                cursor.execute("DROP TABLE time_sessions")
+                cursor.execute("ALTER TABLE time_sessions_v4 RENAME TO time_sessions")
+            else:
+                logger.warning(
+                    "Steps 1-2/5: time_sessions has no description column, skipping..."
+                )
+
+            # 3. Index for the task_names join and usage counts
+            logger.info("Step 3/5: Creating task_name_id index...")
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_time_sessions_task_name_id "
+                "ON time_sessions (task_name_id)"
+            )
+
+            # 4. Compatibility view for old readers
+            logger.info("Step 4/5: Creating time_sessions_legacy view...")
+            self.create_compat_views()
+
+            # 5. Set schema version to 4
+            logger.info("Step 5/5: Setting schema version to 4...")
+            cursor.execute(
+                "INSERT OR REPLACE INTO schema_version (version, applied_at) VALUES (?, ?)",
+                (SCHEMA_VERSION_V4, datetime.now().isoformat()),
+            )
+
+            # Commit transaction
+            conn.commit()
+
+            # Return the pages of the dropped text to the file system
+            try:
+                cursor.execute("VACUUM")
+            except sqlite3.OperationalError as e:
+                logger.info("VACUUM after migration to v4 skipped: %s", e)
+            logger.info("Migration to v4 completed successfully!")
+
+            return True
+
+        except Exception as e:
+            # Rollback all changes
+            conn.rollback()
+            logger.exception("Error during migration to v4: %s", e)
+            return False
+
+    def migrate_to_v5(self):
+        """
+        Migrate database from version 4 to version 5.
+
+        Changes in v5:
+        - active_session singleton row (id = 1) pointing at the running session,
+          with heartbeat_at / released_at for crash recovery
+        - Partial unique index: at most one time_sessions row with end_time IS NULL
+        - The newest open session is adopted as active (as released, because the
+          old app restored it on restart), older open sessions are closed
+
+        Returns True if migration successful, False on error.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            logger.info("Starting migration to v5...")
+
+            # Begin transaction
+            cursor.execute("BEGIN TRANSACTION")
+
+            # 1. Create active_session table
+            logger.info("Step 1/4: Creating active_session table...")
+            self.create_active_session_table()
+
+            # 2. Adopt the newest open session, close the others
+            logger.info("Step 2/4: Adopting the running session...")
+            cursor.execute("""
+                SELECT id, start_time FROM time_sessions
+                WHERE end_time IS NULL
+                ORDER BY start_time DESC
+            """)
+            open_sessions = cursor.fetchall()
+            if open_sessions:
+                now = datetime.now().isoformat()
+                cursor.execute(
+                    """
+                    INSERT OR REPLACE INTO active_session
+                    (id, session_id, started_at, heartbeat_at, released_at)
+                    VALUES (1, ?, ?, ?, ?)
+                    """,
+                    (open_sessions[0]["id"], open_sessions[0]["start_time"], now, now),
+                )
+                cursor.executemany(
+                    """
+                    UPDATE time_sessions SET end_time = start_time, duration = 0
+                    WHERE id = ?
+                    """,
+                    [(row["id"],) for row in open_sessions[1:]],
+                )
+                logger.info(
+                    "Adopted session %s, closed %s stale ones",
+                    open_sessions[0]["id"],
+                    len(open_sessions) - 1,
+                )
+
+            # 3. At most one running session at the table level
+            logger.info("Step 3/4: Creating single open session index...")
+            cursor.execute("""
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_time_sessions_single_open
+                ON time_sessions ((end_time IS NULL)) WHERE end_time IS NULL
+            """)
+
+            # 4. Set schema version to 5
+            logger.info("Step 4/4: Setting schema version to 5...")
+            cursor.execute(
+                "INSERT OR REPLACE INTO schema_version (version, applied_at) VALUES (?, ?)",
+                (SCHEMA_VERSION_V5, datetime.now().isoformat()),
+            )
+
+            # Commit transaction
+            conn.commit()
+            logger.info("Migration to v5 completed successfully!")
+
+            return True
+
+        except Exception as e:
+            # Rollback all changes
+            conn.rollback()
+            logger.exception("Error during migration to v5: %s", e)
+            return False
+
+    def migrate_to_v6(self):
+        """
+        Migrate database from version 5 to version 6.
+
+        Changes in v6:
+        - Finished sessions that cross local midnight are split into one
+          session per day, so day-bucketed totals can group by start_time
+        - No table changes; new writes are split by stop_session(),
+          update_session_times() and import_session()
+
+        Returns True if migration successful, False on error.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            logger.info("Starting migration to v6...")
+
+            # Begin transaction
+            cursor.execute("BEGIN TRANSACTION")
+
+            # 1. Split sessions that span several days
+            logger.info("Step 1/2: Splitting sessions at day boundaries...")
+            cursor.execute("""
+                SELECT id, start_time, end_time FROM time_sessions
+                WHERE end_time IS NOT NULL
+                  AND substr(end_time, 1, 10) > substr(start_time, 1, 10)
+            """)
+            split_count = 0
+            for row in cursor.fetchall():
+                start_time = datetime.fromisoformat(row["start_time"])
+                end_time = datetime.fromisoformat(row["end_time"])
+                if len(split_by_local_days(start_time, end_time)) > 1:
+                    # cost появится в v9 (project_rates), там и посчитается
+                    self._write_session_interval(
+                        cursor, row["id"], start_time, end_time, materialize=False
+                    )
+                    split_count += 1
+            logger.info("Split %s sessions", split_count)
+
+            # 2. Set schema version to 6
+            logger.info("Step 2/2: Setting schema version to 6...")
+            cursor.execute(
+                "INSERT OR REPLACE INTO schema_version (version, applied_at) VALUES (?, ?)",
+                (SCHEMA_VERSION_V6, datetime.now().isoformat()),
+            )
+
+            # Commit transaction
+            conn.commit()
+            logger.info("Migration to v6 completed successfully!")
+
+            return True
+
+        except Exception as e:
+            # Rollback all changes
+            conn.rollback()
+            logger.exception("Error during migration to v6: %s", e)
+            return False
+
+    def migrate_to_v7(self):
+        """
+        Migrate database from version 6 to version 7.
+
+        Changes in v7:
+        - time_sessions.change_seq / modified_at, maintained by triggers from a
+          global counter in session_change_seq (id = 1)
+        - session_tombstones: deleted session ids with the seq of deletion
+        - Renaming a task name bumps change_seq of its sessions, because the
+          session rows carry the joined description (replaced in v13 by
+          task_names.change_seq)
+        - Existing rows keep change_seq = 0 (covered by any full load)
+
+        Returns True if migration successful, False on error.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            logger.info("Starting migration to v7...")
+
+            # Begin transaction
+            cursor.execute("BEGIN TRANSACTION")
+
+            # 1. Add change tracking columns
+            logger.info("Step 1/4: Adding change_seq and modified_at columns...")
+            columns = self._table_columns("time_sessions")
+            if "change_seq" not in columns:
+                cursor.execute(
+                    "ALTER TABLE time_sessions ADD COLUMN change_seq INTEGER NOT NULL DEFAULT 0"
+                )
+            if "modified_at" not in columns:
+                cursor.execute("ALTER TABLE time_sessions ADD COLUMN modified_at TIMESTAMP")
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_time_sessions_change_seq
+                ON time_sessions (change_seq)
+            """)
+
+            # 2. Counter and tombstones
+            logger.info(
+                "Step 2/4: Creating session_change_seq and session_tombstones..."
+            )
+            self.create_change_tracking_tables()
+
+            # 3. Triggers
+            logger.info("Step 3/4: Creating change tracking triggers...")
+            self.create_change_tracking_triggers()
+            # Представление time_sessions_legacy должно видеть новые колонки
+            self.create_compat_views()
+
+            # 4. Set schema version to 7
+            logger.info("Step 4/4: Setting schema version to 7...")
+            cursor.execute(
+                "INSERT OR REPLACE INTO schema_version (version, applied_at) VALUES (?, ?)",
+                (SCHEMA_VERSION_V7, datetime.now().isoformat()),
+            )
+
+            # Commit transaction
+            conn.commit()
+            logger.info("Migration to v7 completed successfully!")
+
+            return True
+
+        except Exception as e:
+            # Rollback all changes
+            conn.rollback()
+            logger.exception("Error during migration to v7: %s", e)
+            return False
+
+    def migrate_to_v8(self):
+        """
+        Migrate database from version 7 to version 8.
+
+        Changes in v8:
+        - Indexes for SessionQuery filters and sort columns: start_time,
+          (project_id, start_time), (work_type_id, start_time),
+          (paid, start_time), duration, projects.company_id
+        - ANALYZE, so the planner can choose between them
+
+        Returns True if migration successful, False on error.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            logger.info("Starting migration to v8...")
+
+            # Begin transaction
+            cursor.execute("BEGIN TRANSACTION")
+
+            # 1. Indexes
+            logger.info("Step 1/3: Creating query indexes...")
+            self.create_query_indexes()
+
+            # 2. Statistics for the planner
+            logger.info("Step 2/3: Analyzing tables...")
+            cursor.execute("ANALYZE")
+
+            # 3. Set schema version to 8
+            logger.info("Step 3/3: Setting schema version to 8...")
+            cursor.execute(
+                "INSERT OR REPLACE INTO schema_version (version, applied_at) VALUES (?, ?)",
+                (SCHEMA_VERSION_V8, datetime.now().isoformat()),
+            )
+
+            # Commit transaction
+            conn.commit()
+            logger.info("Migration to v8 completed successfully!")
+
+            return True
+
+        except Exception as e:
+            # Rollback all changes
+            conn.rollback()
+            logger.exception("Error during migration to v8: %s", e)
+            return False
 
-    def create_automatic_backup(self):
+    def migrate_to_v9(self):
         """
-        Создаёт автоматический бэкап базы данных перед миграцией.
-        Возвращает путь к созданному бэкапу или None в случае ошибки.
+        Migrate database from version 8 to version 9.
+
+        Changes in v9:
+        - project_rates: rate history with effective_from, seeded with each
+          project's current rate effective from RATE_EPOCH
+        - time_sessions.cost: cost materialized when a session is written,
+          using the rate in force at its start; backfilled for closed sessions
+        - idx_time_sessions_project_start replaced by a covering
+          (project_id, start_time, duration, cost) index, so per-project
+          time and cost totals are answered from the index alone
+
+        Returns True if migration successful, False on error.
         """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
         try:
-            # Создаём директорию для бэкапов
-            backup_dir = os.path.expanduser(
-                "~/Library/Application Support/MTimer/backups"
+            logger.info("Starting migration to v9...")
+
+            # Begin transaction
+            cursor.execute("BEGIN TRANSACTION")
+
+            # 1. Rate history
+            logger.info("Step 1/5: Creating project_rates...")
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS project_rates (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    project_id INTEGER NOT NULL,
+                    hourly_rate REAL NOT NULL DEFAULT 0,
+                    effective_from TIMESTAMP NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    UNIQUE (project_id, effective_from),
+                    FOREIGN KEY (project_id) REFERENCES projects (id)
+                )
+            """)
+            cursor.execute(
+                """
+                INSERT OR IGNORE INTO project_rates (project_id, hourly_rate, effective_from)
+                SELECT id, COALESCE(hourly_rate, 0), ? FROM projects
+                """,
+                (RATE_EPOCH,),
             )
-            os.makedirs(backup_dir, exist_ok=True)
 
-            # Генерируем имя файла с временной меткой
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_filename = f"auto_backup_before_migration_{timestamp}.db"
-            backup_path = os.path.join(backup_dir, backup_filename)
+            # 2. Cost column
+            logger.info("Step 2/5: Adding time_sessions.cost...")
+            if "cost" not in self._table_columns("time_sessions"):
+                cursor.execute("ALTER TABLE time_sessions ADD COLUMN cost REAL")
+            self.create_compat_views()
+
+            # 3. Backfill
+            logger.info("Step 3/5: Computing cost of closed sessions...")
+            # Счетов (invoice_id) до v10 ещё нет
+            count = self._recompute_costs(cursor, skip_invoiced=False)
+            logger.info("Computed cost of %s sessions", count)
+
+            # 4. Covering index for totals
+            logger.info("Step 4/5: Creating covering cost index...")
+            cursor.execute("DROP INDEX IF EXISTS idx_time_sessions_project_start")
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_time_sessions_project_start_cost
+                ON time_sessions (project_id, start_time, duration, cost)
+            """)
 
-            # Копируем файл БД
-            print(f"[DB] Creating automatic backup: {backup_path}")
-            shutil.copy2(self.db_path, backup_path)
+            # 5. Set schema version to 9
+            logger.info("Step 5/5: Setting schema version to 9...")
+            cursor.execute(
+                "INSERT OR REPLACE INTO schema_version (version, applied_at) VALUES (?, ?)",
+                (SCHEMA_VERSION_V9, datetime.now().isoformat()),
+            )
 
-            # Проверяем что файл создан
-            if os.path.exists(backup_path):
-                file_size = os.path.getsize(backup_path)
-                print(
-                    f"[DB] Backup created successfully: {backup_path} ({file_size} bytes)"
-                )
-                return backup_path
-            else:
-                print(f"[DB] ERROR: Backup file not found after creation")
-                return None
+            # Commit transaction
+            conn.commit()
+            logger.info("Migration to v9 completed successfully!")
 
-        except Exception as e:
-            print(f"[DB] ERROR creating automatic backup: {e}")
-            import traceback
+            return True
 
-            traceback.print_exc()
-            return None
+        except Exception as e:
+            # Rollback all changes
+            conn.rollback()
+            logger.exception("Error during migration to v9: %s", e)
+            return False
 
-    def migrate_to_v2(self):
+    def migrate_to_v10(self):
         """
-        Миграция базы данных с версии 1 на версию 2.
+        Migrate database from version 9 to version 10.
 
-        Изменения в v2:
-        - Создаётся таблица task_names для хранения уникальных названий задач
-        - В time_sessions добавляется столбец task_name_id (FK на task_names)
-        - Все существующие описания мигрируются в task_names
-        - Все сессии обновляются ссылками на соответствующие task_names
+        Changes in v10:
+        - invoices table and time_sessions.invoice_id: an invoice marks its
+          sessions paid in one set-based UPDATE
+        - unpaid_balances: per-project unpaid sessions/duration/amount,
+          kept current by triggers on time_sessions and rebuilt here
 
-        Возвращает True если миграция прошла успешно, False в случае ошибки.
+        Returns True if migration successful, False on error.
         """
         conn = self.get_connection()
         cursor = conn.cursor()
 
         try:
-            print("[DB] Starting migration to v2...")
+            logger.info("Starting migration to v10...")
 
-            # Начинаем транзакцию
+            # Begin transaction
             cursor.execute("BEGIN TRANSACTION")
 
-            # 1. Создаём таблицу task_names если её нет
-            print("[DB] Step 1/5: Creating task_names table...")
+            # 1. Invoices
+            logger.info("Step 1/4: Creating invoices...")
             cursor.execute("""
-                CREATE TABLE IF NOT EXISTS task_names (
+                CREATE TABLE IF NOT EXISTS invoices (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL UNIQUE,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    number TEXT UNIQUE,
+                    project_id INTEGER,
+                    company_id INTEGER,
+                    period_start TIMESTAMP,
+                    period_end TIMESTAMP,
+                    session_count INTEGER NOT NULL DEFAULT 0,
+                    total_duration INTEGER NOT NULL DEFAULT 0,
+                    total_amount REAL NOT NULL DEFAULT 0,
+                    notes TEXT,
+                    created_at TIMESTAMP NOT NULL
                 )
             """)
+            if "invoice_id" not in self._table_columns("time_sessions"):
+                cursor.execute("ALTER TABLE time_sessions ADD COLUMN invoice_id INTEGER")
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_time_sessions_invoice_id
+                ON time_sessions (invoice_id)
+            """)
+            self.create_compat_views()
 
-            # 2. Добавляем столбец task_name_id в time_sessions если его нет
-            print("[DB] Step 2/5: Adding task_name_id column to time_sessions...")
-            try:
-                cursor.execute("""
-                    ALTER TABLE time_sessions 
-                    ADD COLUMN task_name_id INTEGER REFERENCES task_names(id)
-                """)
-            except sqlite3.OperationalError as e:
-                if "duplicate column name" in str(e).lower():
-                    print("[DB] Column task_name_id already exists, skipping...")
-                else:
-                    raise
-
-            # 3. Извлекаем все уникальные описания и вставляем в task_names
-            print("[DB] Step 3/5: Migrating unique descriptions to task_names...")
+            # 2. Balances
+            logger.info("Step 2/4: Creating unpaid_balances...")
             cursor.execute("""
-                SELECT DISTINCT description 
-                FROM time_sessions 
-                WHERE description IS NOT NULL AND description != ''
-                ORDER BY description
+                CREATE TABLE IF NOT EXISTS unpaid_balances (
+                    project_id INTEGER PRIMARY KEY,
+                    sessions INTEGER NOT NULL DEFAULT 0,
+                    duration INTEGER NOT NULL DEFAULT 0,
+                    amount REAL NOT NULL DEFAULT 0
+                )
             """)
+            self.rebuild_unpaid_balances(commit=False)
 
-            unique_descriptions = cursor.fetchall()
-            print(f"[DB] Found {len(unique_descriptions)} unique task descriptions")
+            # 3. Triggers
+            logger.info("Step 3/4: Creating balance triggers...")
+            self.create_unpaid_balance_triggers()
 
-            for row in unique_descriptions:
-                description = row["description"]
-                try:
-                    cursor.execute(
-                        "INSERT INTO task_names (name) VALUES (?)", (description,)
-                    )
-                except sqlite3.IntegrityError:
-                    # Название уже существует (на случай повторного запуска миграции)
-                    print(f"[DB] Task name '{description}' already exists, skipping...")
+            # 4. Set schema version to 10
+            logger.info("Step 4/4: Setting schema version to 10...")
+            cursor.execute(
+                "INSERT OR REPLACE INTO schema_version (version, applied_at) VALUES (?, ?)",
+                (SCHEMA_VERSION_V10, datetime.now().isoformat()),
+            )
 
-            # 4. Обновляем все сессии, устанавливая task_name_id
-            print("[DB] Step 4/5: Linking sessions to task_names...")
+            # Commit transaction
+            conn.commit()
+            logger.info("Migration to v10 completed successfully!")
+
+            return True
+
+        except Exception as e:
+            # Rollback all changes
+            conn.rollback()
+            logger.exception("Error during migration to v10: %s", e)
+            return False
+
+    def migrate_to_v11(self):
+        """
+        Migrate database from version 10 to version 11.
+
+        Changes in v11:
+        - archives: catalog of yearly archive files (archive/mtimer-<year>.db)
+          holding closed sessions moved out of time_sessions
+        - archive_rollups: per-day, per-project, per-work-type totals of the
+          archived sessions, so rollups over old periods need no ATTACH
+
+        Returns True if migration successful, False on error.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            logger.info("Starting migration to v11...")
+
+            # Begin transaction
+            cursor.execute("BEGIN TRANSACTION")
+
+            # 1. Catalog
+            logger.info("Step 1/3: Creating archives...")
             cursor.execute("""
-                UPDATE time_sessions
-                SET task_name_id = (
-                    SELECT id FROM task_names 
-                    WHERE task_names.name = time_sessions.description
+                CREATE TABLE IF NOT EXISTS archives (
+                    year INTEGER PRIMARY KEY,
+                    path TEXT NOT NULL,
+                    sessions INTEGER NOT NULL DEFAULT 0,
+                    duration INTEGER NOT NULL DEFAULT 0,
+                    cost REAL NOT NULL DEFAULT 0,
+                    first_start TIMESTAMP,
+                    last_start TIMESTAMP,
+                    archived_at TIMESTAMP
                 )
-                WHERE description IS NOT NULL AND description != ''
             """)
 
-            updated_count = cursor.rowcount
-            print(f"[DB] Updated {updated_count} sessions with task_name_id")
-
-            # 5. Устанавливаем версию схемы в 2
-            print("[DB] Step 5/5: Setting schema version to 2...")
+            # 2. Rollups
+            logger.info("Step 2/3: Creating archive_rollups...")
             cursor.execute("""
-                CREATE TABLE IF NOT EXISTS schema_version (
-                    version INTEGER PRIMARY KEY,
-                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                CREATE TABLE IF NOT EXISTS archive_rollups (
+                    day TEXT NOT NULL,
+                    project_id INTEGER,
+                    work_type_id INTEGER,
+                    sessions INTEGER NOT NULL DEFAULT 0,
+                    duration INTEGER NOT NULL DEFAULT 0,
+                    cost REAL NOT NULL DEFAULT 0
                 )
             """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_archive_rollups_day
+                ON archive_rollups (day, project_id)
+            """)
+
+            # 3. Set schema version to 11
+            logger.info("Step 3/3: Setting schema version to 11...")
             cursor.execute(
                 "INSERT OR REPLACE INTO schema_version (version, applied_at) VALUES (?, ?)",
-                (SCHEMA_VERSION_V2, datetime.now().isoformat()),
+                (SCHEMA_VERSION_V11, datetime.now().isoformat()),
             )
 
-            # Коммитим транзакцию
+            # Commit transaction
             conn.commit()
-            print("[DB] Migration to v2 completed successfully!")
-            print(f"[DB] Migrated {len(unique_descriptions)} unique task names")
-            print(f"[DB] Updated {updated_count} time sessions")
+            logger.info("Migration to v11 completed successfully!")
 
             return True
 
         except Exception as e:
-            # Откатываем все изменения
+            # Rollback all changes
             conn.rollback()
-            print(f"[DB] ERROR during migration: {e}")
-            import traceback
+            logger.exception("Error during migration to v11: %s", e)
+            return False
+
+    def migrate_to_v12(self):
+        """
+        Migrate database from version 11 to version 12.
+
+        Changes in v12:
+        - auto_vacuum = INCREMENTAL, so pages freed by deletes and archiving
+          can be returned to the filesystem in small steps
+          (run_maintenance); switching modes requires one full VACUUM
+        - ANALYZE, so the planner has statistics for the v8-v11 indexes
+
+        VACUUM cannot run inside a transaction; it is atomic on its own.
+        Returns True if migration successful, False on error.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            logger.info("Starting migration to v12...")
+            conn.commit()
+
+            # 1. Incremental auto-vacuum
+            logger.info("Step 1/3: Switching to auto_vacuum = INCREMENTAL (VACUUM)...")
+            cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            cursor.execute("VACUUM")
 
-            traceback.print_exc()
+            # 2. Planner statistics
+            logger.info("Step 2/3: Running ANALYZE...")
+            cursor.execute(f"PRAGMA analysis_limit = {ANALYSIS_LIMIT}")
+            cursor.execute("ANALYZE")
+
+            # 3. Set schema version to 12
+            logger.info("Step 3/3: Setting schema version to 12...")
+            cursor.execute(
+                "INSERT OR REPLACE INTO schema_version (version, applied_at) VALUES (?, ?)",
+                (SCHEMA_VERSION_V12, datetime.now().isoformat()),
+            )
+
+            # Commit transaction
+            conn.commit()
+            logger.info("Migration to v12 completed successfully!")
+
+            return True
+
+        except Exception as e:
+            # Rollback all changes
+            conn.rollback()
+            logger.exception("Error during migration to v12: %s", e)
             return False
 
-    def migrate_to_v3(self):
+    def migrate_to_v13(self):
         """
-        Migrate database from version 2 to version 3.
+        Migrate database from version 12 to version 13.
 
-        Changes in v3:
-        - Creates window_positions table for storing window positions
+        Changes in v13:
+        - task_names.change_seq: renaming a task stamps the task name itself
+          from the global counter instead of bumping change_seq of every
+          session that uses it, so a rename is a single-row update again;
+          readers get new names from get_session_changes()["renamed"]
+        - session_change_seq.pruned_seq: highest change_seq of the tombstones
+          removed by prune_tombstones(); a reader behind it reloads fully
 
         Returns True if migration successful, False on error.
         """
@@ -1318,39 +4130,292 @@ class Database:
         cursor = conn.cursor()
 
         try:
-            print("[DB] Starting migration to v3...")
+            logger.info("Starting migration to v13...")
 
             # Begin transaction
             cursor.execute("BEGIN TRANSACTION")
 
-            # 1. Create window_positions table
-            print("[DB] Step 1/2: Creating window_positions table...")
-            self.create_window_positions_table()
-
-            # 2. Set schema version to 3
-            print("[DB] Step 2/2: Setting schema version to 3...")
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS schema_version (
-                    version INTEGER PRIMARY KEY,
-                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            # 1. Change seq of task names
+            logger.info("Step 1/4: Adding task_names.change_seq...")
+            if "change_seq" not in self._table_columns("task_names"):
+                cursor.execute(
+                    "ALTER TABLE task_names ADD COLUMN change_seq INTEGER NOT NULL DEFAULT 0"
                 )
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_task_names_change_seq
+                ON task_names (change_seq)
             """)
+
+            # 2. Tombstone pruning watermark
+            logger.info("Step 2/4: Adding session_change_seq.pruned_seq...")
+            if "pruned_seq" not in self._table_columns("session_change_seq"):
+                cursor.execute(
+                    "ALTER TABLE session_change_seq "
+                    "ADD COLUMN pruned_seq INTEGER NOT NULL DEFAULT 0"
+                )
+
+            # 3. Rename trigger stamps the task name
+            logger.info("Step 3/4: Recreating change tracking triggers...")
+            self.create_change_tracking_triggers()
+
+            # 4. Set schema version to 13
+            logger.info("Step 4/4: Setting schema version to 13...")
             cursor.execute(
                 "INSERT OR REPLACE INTO schema_version (version, applied_at) VALUES (?, ?)",
-                (SCHEMA_VERSION_CURRENT, datetime.now().isoformat()),
+                (SCHEMA_VERSION_V13, datetime.now().isoformat()),
             )
 
             # Commit transaction
             conn.commit()
-            print("[DB] Migration to v3 completed successfully!")
+            logger.info("Migration to v13 completed successfully!")
 
             return True
 
         except Exception as e:
             # Rollback all changes
             conn.rollback()
-            print(f"[DB] ERROR during migration to v3: {e}")
-            import traceback
+            logger.exception("Error during migration to v13: %s", e)
+            return False
+
+    def migrate_to_v14(self):
+        """
+        Migrate database from version 13 to version 14.
+
+        Changes in v14:
+        - active_session.heartbeat_interval: heartbeat interval of the
+          frontend that runs the session, written with every heartbeat, so
+          every instance judges a crash by the writer's interval instead of
+          its own setting (NULL = HEARTBEAT_INTERVAL)
+
+        Returns True if migration successful, False on error.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            logger.info("Starting migration to v14...")
+
+            # Begin transaction
+            cursor.execute("BEGIN TRANSACTION")
+
+            # 1. Writer's heartbeat interval
+            logger.info("Step 1/2: Adding active_session.heartbeat_interval...")
+            if "heartbeat_interval" not in self._table_columns("active_session"):
+                cursor.execute(
+                    "ALTER TABLE active_session ADD COLUMN heartbeat_interval INTEGER"
+                )
+
+            # 2. Set schema version to 14
+            logger.info("Step 2/2: Setting schema version to 14...")
+            cursor.execute(
+                "INSERT OR REPLACE INTO schema_version (version, applied_at) VALUES (?, ?)",
+                (SCHEMA_VERSION_V14, datetime.now().isoformat()),
+            )
+
+            # Commit transaction
+            conn.commit()
+            logger.info("Migration to v14 completed successfully!")
 
-            traceback.print_exc()
+            return True
+
+        except Exception as e:
+            # Rollback all changes
+            conn.rollback()
+            logger.exception("Error during migration to v14: %s", e)
             return False
+
+    def create_unpaid_balance_triggers(self):
+        """
+        (Re)create the triggers that keep unpaid_balances in step with
+        time_sessions. A session counts while it is closed and unpaid;
+        project_id 0 collects sessions without a project.
+        """
+        cursor = self.get_connection().cursor()
+        for name in (
+            "trg_unpaid_balance_insert",
+            "trg_unpaid_balance_update",
+            "trg_unpaid_balance_delete",
+        ):
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+        def apply(row, sign):
+            return f"""
+                INSERT OR IGNORE INTO unpaid_balances (project_id)
+                SELECT COALESCE({row}.project_id, 0)
+                WHERE {row}.paid = 0 AND {row}.end_time IS NOT NULL;
+                UPDATE unpaid_balances
+                SET sessions = sessions {sign} 1,
+                    duration = duration {sign} COALESCE({row}.duration, 0),
+                    amount = amount {sign} COALESCE({row}.cost, 0)
+                WHERE project_id = COALESCE({row}.project_id, 0)
+                  AND {row}.paid = 0 AND {row}.end_time IS NOT NULL;
+            """
+
+        cursor.execute(f"""
+            CREATE TRIGGER trg_unpaid_balance_insert
+            AFTER INSERT ON time_sessions
+            BEGIN {apply("NEW", "+")} END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER trg_unpaid_balance_update
+            AFTER UPDATE OF paid, end_time, duration, cost, project_id ON time_sessions
+            BEGIN {apply("OLD", "-")} {apply("NEW", "+")} END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER trg_unpaid_balance_delete
+            AFTER DELETE ON time_sessions
+            BEGIN {apply("OLD", "-")} END
+        """)
+
+    def create_query_indexes(self):
+        """
+        Create the indexes SessionQuery relies on. Composite indexes end with
+        start_time, so a filtered list in the default order needs no sort step.
+        Called during migration to v8.
+        """
+        cursor = self.get_connection().cursor()
+        indexes = (
+            ("idx_time_sessions_start_time", "time_sessions (start_time)"),
+            (
+                "idx_time_sessions_project_start",
+                "time_sessions (project_id, start_time)",
+            ),
+            (
+                "idx_time_sessions_work_type_start",
+                "time_sessions (work_type_id, start_time)",
+            ),
+            ("idx_time_sessions_paid_start", "time_sessions (paid, start_time)"),
+            ("idx_time_sessions_duration", "time_sessions (duration)"),
+            ("idx_projects_company_id", "projects (company_id)"),
+        )
+        for name, target in indexes:
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {target}")
+
+    def create_change_tracking_tables(self):
+        """
+        Create session_change_seq (global change counter) and session_tombstones.
+        Called during migration to v7.
+        """
+        cursor = self.get_connection().cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS session_change_seq (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                seq INTEGER NOT NULL
+            )
+        """)
+        cursor.execute("INSERT OR IGNORE INTO session_change_seq (id, seq) VALUES (1, 0)")
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS session_tombstones (
+                session_id INTEGER PRIMARY KEY,
+                change_seq INTEGER NOT NULL,
+                deleted_at TIMESTAMP NOT NULL
+            )
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_session_tombstones_change_seq
+            ON session_tombstones (change_seq)
+        """)
+
+    def create_change_tracking_triggers(self):
+        """
+        (Re)create the triggers that stamp change_seq / modified_at.
+        The update trigger only fires when change_seq itself was not changed,
+        so the trigger's own UPDATE does not fire it again.
+        """
+        cursor = self.get_connection().cursor()
+        now_sql = "strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime')"
+        stamp = f"""
+            UPDATE session_change_seq SET seq = seq + 1 WHERE id = 1;
+            UPDATE time_sessions
+            SET change_seq = (SELECT seq FROM session_change_seq WHERE id = 1),
+                modified_at = {now_sql}
+            WHERE id = NEW.id;
+        """
+        if "change_seq" in self._table_columns("task_names"):
+            # v13: номер получает сама задача, сессии не трогаются
+            rename = f"""
+                UPDATE session_change_seq SET seq = seq + 1 WHERE id = 1;
+                UPDATE task_names
+                SET change_seq = (SELECT seq FROM session_change_seq WHERE id = 1)
+                WHERE id = NEW.id;
+            """
+        else:
+            # v7-v12: строки сессий несут название задачи
+            rename = """
+                UPDATE time_sessions SET change_seq = change_seq
+                WHERE task_name_id = NEW.id;
+            """
+        for name in (
+            "trg_time_sessions_insert_seq",
+            "trg_time_sessions_update_seq",
+            "trg_time_sessions_delete_seq",
+            "trg_task_names_rename_seq",
+        ):
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+        cursor.execute(f"""
+            CREATE TRIGGER trg_time_sessions_insert_seq
+            AFTER INSERT ON time_sessions
+            BEGIN {stamp} END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER trg_time_sessions_update_seq
+            AFTER UPDATE ON time_sessions
+            WHEN NEW.change_seq IS OLD.change_seq
+            BEGIN {stamp} END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER trg_time_sessions_delete_seq
+            AFTER DELETE ON time_sessions
+            BEGIN
+                UPDATE session_change_seq SET seq = seq + 1 WHERE id = 1;
+                INSERT OR REPLACE INTO session_tombstones (session_id, change_seq, deleted_at)
+                VALUES (
+                    OLD.id,
+                    (SELECT seq FROM session_change_seq WHERE id = 1),
+                    {now_sql}
+                );
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER trg_task_names_rename_seq
+            AFTER UPDATE OF name ON task_names
+            WHEN NEW.name IS NOT OLD.name
+            BEGIN {rename} END
+        """)
+
+    def create_active_session_table(self):
+        """
+        Create the active_session singleton table.
+        Called during migration to v5.
+        """
+        cursor = self.get_connection().cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS active_session (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                session_id INTEGER NOT NULL UNIQUE REFERENCES time_sessions (id),
+                started_at TIMESTAMP NOT NULL,
+                heartbeat_at TIMESTAMP NOT NULL,
+                released_at TIMESTAMP
+            )
+        """)
+
+    def create_compat_views(self):
+        """
+        (Re)create the time_sessions_legacy view: time_sessions with the
+        description column that readers written before v4 expect.
+        Recreated whenever time_sessions gains columns.
+        """
+        cursor = self.get_connection().cursor()
+        cursor.execute("DROP VIEW IF EXISTS time_sessions_legacy")
+        cursor.execute("""
+            CREATE VIEW time_sessions_legacy AS
+            SELECT ts.*, tn.name AS description
+            FROM time_sessions ts
+            LEFT JOIN task_names tn ON ts.task_name_id = tn.id
+        """)
+
+    def _table_columns(self, table):
+        """Список колонок таблицы (пустой, если таблицы нет)"""
+        cursor = self.get_connection().cursor()
+        cursor.execute(f"PRAGMA table_info({table})")
+        return [row["name"] for row in cursor.fetchall()]
@@ -1,154 +1,434 @@
 # -*- coding: utf-8 -*-
 """
-Генератор тестовых данных для MacikTimer
-Создаёт проекты и сессии за сегодня и текущую неделю
+Генератор синтетических данных MacikTimer для бенчмарков и ручной проверки.
+
+Детерминированный: одинаковые параметры и seed дают одинаковую базу
+(последний день истории задаётся --end, по умолчанию сегодня). Создаёт
+компании, проекты с историей ставок, виды работ и названия задач, затем
+N сессий за несколько лет:
+
+- проекты и задачи выбираются по распределению Ципфа (немногие частые,
+  длинный хвост редких);
+- рабочие дни загружены сильнее выходных, время начала следует дневному
+  профилю (утро, обеденный спад, вечер), длительность - логнормальная;
+- часть вечерних сессий переходит через полночь и, как в приложении,
+  хранится кусками по суткам (split_by_local_days);
+- старые сессии чаще оплачены, последние недели - почти все нет.
+
+Загрузка идёт executemany пакетами в одной транзакции с отключёнными на
+время загрузки триггерами change_seq и unpaid_balances: change_seq
+проставляется сразу, стоимость считается одним UPDATE по истории ставок,
+остатки и триггеры восстанавливаются в конце.
+
+    python3 generate_test_data.py bench.db --sessions 1000000 --years 5
 """
 
-from database import Database
-from datetime import datetime, timedelta
+import argparse
+import bisect
+import math
+import os
 import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+from itertools import accumulate
+
+from database import RATE_EPOCH, Database, split_by_local_days
+
+# Основы названий проектов и задач (к ним добавляется номер)
+PROJECT_NAMES = [
+    "Разработка сайта",
+    "Мобильное приложение",
+    "Документация",
+    "Встречи с клиентами",
+    "Code Review",
+    "Рефакторинг",
+    "Тестирование",
+    "DevOps задачи",
+]
+TASK_NAMES = [
+    "Исправление бага в авторизации",
+    "Добавление новой функции",
+    "Оптимизация запросов к БД",
+    "Создание unit-тестов",
+    "Обновление документации API",
+    "Настройка CI/CD pipeline",
+    "Код-ревью PR",
+    "Встреча с командой",
+    "Планирование спринта",
+    "Исследование новой библиотеки",
+    "Багфиксинг",
+    "Разработка UI компонентов",
+    "Интеграция с внешним API",
+    "Рефакторинг legacy кода",
+    "Написание технической спецификации",
+]
+WORK_TYPES = [
+    "Разработка",
+    "Консультация",
+    "Дизайн",
+    "Тестирование",
+    "Поддержка",
+    "Администрирование",
+    "Аналитика",
+    "Обучение",
+]
+HOURLY_RATES = (0, 20, 25, 35, 40, 50, 60, 80)
+
+# Относительная загрузка дней недели (пн..вс) и часов начала сессий
+WEEKDAY_WEIGHTS = (1.0, 1.05, 1.05, 1.0, 0.85, 0.2, 0.08)
+HOUR_WEIGHTS = (
+    0.05, 0.02, 0.01, 0.01, 0.01, 0.02, 0.1, 0.4,  # 00-07
+    1.0, 1.6, 1.8, 1.6, 0.8, 0.9, 1.5, 1.6,  # 08-15
+    1.4, 1.1, 0.7, 0.5, 0.45, 0.4, 0.3, 0.15,  # 16-23
+)
+# Длительность: медиана ~35 минут, от минуты до 8 часов
+DURATION_MEDIAN = 35 * 60
+DURATION_SIGMA = 0.9
+DURATION_RANGE = (60, 8 * 3600)
+
+# Значения по умолчанию
+DEFAULT_SESSIONS = 100_000
+DEFAULT_YEARS = 3
+DEFAULT_PROJECTS = 40
+DEFAULT_COMPANIES = 8
+DEFAULT_TASK_NAMES = 5_000
+DEFAULT_PAID_RATIO = 0.8
+DEFAULT_MIDNIGHT_RATIO = 0.01
+DEFAULT_ZIPF = 1.1
+DEFAULT_SEED = 42
+BATCH_SIZE = 50_000
+
+# Доля проектов со сменой ставки посреди истории и недели до полной оплаты
+RATE_CHANGE_RATIO = 0.3
+PAID_AFTER_DAYS = 45
+
+# Триггеры time_sessions, отключаемые на время загрузки
+LOAD_TRIGGERS = (
+    "trg_time_sessions_insert_seq",
+    "trg_time_sessions_update_seq",
+    "trg_time_sessions_delete_seq",
+    "trg_unpaid_balance_insert",
+    "trg_unpaid_balance_update",
+    "trg_unpaid_balance_delete",
+)
+
+
+def zipf_cum_weights(count, exponent):
+    """Накопленные веса рангов 1..count для random.choices (закон Ципфа)"""
+    return list(accumulate(1.0 / rank ** exponent for rank in range(1, count + 1)))
+
+
+def _numbered(stems, count):
+    """count уникальных названий: основы, затем основы с номером"""
+    names = []
+    for i in range(count):
+        stem = stems[i % len(stems)]
+        names.append(stem if i < len(stems) else f"{stem} {i // len(stems) + 1}")
+    return names
+
+
+def _allocate_days(rng, sessions, days):
+    """Число сессий (до разбиения по полуночи) на каждый день истории"""
+    weights = [WEEKDAY_WEIGHTS[day.weekday()] for day in days]
+    scale = sessions / sum(weights)
+    counts = []
+    carry = 0.0
+    for weight in weights:
+        # Шум ±30% вокруг среднего, дробный остаток переносится на следующий день
+        expected = weight * scale * rng.uniform(0.7, 1.3) + carry
+        count = int(expected)
+        carry = expected - count
+        counts.append(count)
+    # Остаток из-за шума добирается/снимается с последних дней
+    difference = sessions - sum(counts)
+    index = len(counts) - 1
+    while difference:
+        if difference > 0:
+            counts[index] += 1
+            difference -= 1
+        elif counts[index]:
+            counts[index] -= 1
+            difference += 1
+        index = index - 1 if index else len(counts) - 1
+    return counts
+
 
-def generate_test_data():
-    db = Database()
-    
-    # Названия проектов
-    project_names = [
-        "Разработка сайта",
-        "Мобильное приложение",
-        "Документация",
-        "Встречи с клиентами",
-        "Code Review",
-        "Рефакторинг",
-        "Тестирование",
-        "DevOps задачи"
-    ]
-    
-    # Описания для задач
-    descriptions = [
-        "Исправление бага в авторизации",
-        "Добавление новой функции",
-        "Оптимизация запросов к БД",
-        "Создание unit-тестов",
-        "Обновление документации API",
-        "Настройка CI/CD pipeline",
-        "Код-ревью PR #123",
-        "Встреча с командой",
-        "Планирование спринта",
-        "Исследование новой библиотеки",
-        "Багфиксинг",
-        "Разработка UI компонентов",
-        "Интеграция с внешним API",
-        "Рефакторинг legacy кода",
-        "Написание технической спецификации"
-    ]
-    
-    print("Создаю проекты...")
-    # Создаём проекты
-    project_ids = []
-    for name in project_names:
-        pid = db.create_project(name)
-        if pid:
-            project_ids.append(pid)
-            print(f"  ✓ {name}")
-    
-    if not project_ids:
-        print("Не удалось создать проекты. Используем существующие.")
-        existing = db.get_all_projects()
-        project_ids = [p['id'] for p in existing]
-    
-    if not project_ids:
-        print("Нет проектов для генерации данных!")
+class _Dataset:
+    """Параметры и справочники одной генерации"""
+
+    def __init__(self, rng, args):
+        self.rng = rng
+        self.args = args
+        self.hour_cum = list(accumulate(HOUR_WEIGHTS))
+        self.project_cum = zipf_cum_weights(args["projects"], args["zipf"])
+        self.task_cum = zipf_cum_weights(args["task_names"], args["zipf"])
+        self.project_ids = list(range(1, args["projects"] + 1))
+        self.task_ids = list(range(1, args["task_names"] + 1))
+        self.mu = math.log(DURATION_MEDIAN)
+
+    def duration(self):
+        low, high = DURATION_RANGE
+        return min(high, max(low, int(self.rng.lognormvariate(self.mu, DURATION_SIGMA))))
+
+    def start(self, day):
+        rng = self.rng
+        if rng.random() < self.args["midnight_ratio"]:
+            # Поздний вечер: длительность ниже подобрана так, чтобы перейти полночь
+            return datetime.combine(day, datetime.min.time()) + timedelta(
+                hours=22, seconds=rng.randrange(2 * 3600)
+            ), True
+        hour = bisect.bisect_left(self.hour_cum, rng.random() * self.hour_cum[-1])
+        return datetime.combine(day, datetime.min.time()) + timedelta(
+            hours=hour, seconds=rng.randrange(3600)
+        ), False
+
+    def rows(self, days, counts, end):
+        """
+        Строки time_sessions в хронологическом порядке. Сессия через полночь
+        даёт две строки, поэтому строк немного больше, чем sessions.
+        """
+        rng = self.rng
+        args = self.args
+        seq = 0
+        for day, count in zip(days, counts):
+            if not count:
+                continue
+            starts = sorted(self.start(day) for _ in range(count))
+            projects = rng.choices(self.project_ids, cum_weights=self.project_cum, k=count)
+            tasks = rng.choices(self.task_ids, cum_weights=self.task_cum, k=count)
+            age = (end - day).days
+            paid_probability = args["paid_ratio"] * min(1.0, age / PAID_AFTER_DAYS)
+            for (start, crosses_midnight), project_id, task_id in zip(starts, projects, tasks):
+                if crosses_midnight:
+                    midnight = datetime.combine(day + timedelta(days=1), datetime.min.time())
+                    duration = int((midnight - start).total_seconds()) + self.duration()
+                else:
+                    duration = self.duration()
+                work_type_id = (
+                    rng.randint(1, args["work_types"]) if rng.random() < 0.8 else None
+                )
+                paid = int(rng.random() < paid_probability)
+                for piece_start, piece_end, piece_duration in split_by_local_days(
+                    start, start + timedelta(seconds=duration)
+                ):
+                    seq += 1
+                    yield (
+                        project_id,
+                        work_type_id,
+                        task_id,
+                        paid,
+                        piece_start.isoformat(),
+                        piece_end.isoformat(),
+                        piece_duration,
+                        seq,
+                        piece_end.isoformat(),
+                    )
+
+
+def generate_dataset(
+    path,
+    sessions=DEFAULT_SESSIONS,
+    years=DEFAULT_YEARS,
+    projects=DEFAULT_PROJECTS,
+    companies=DEFAULT_COMPANIES,
+    task_names=DEFAULT_TASK_NAMES,
+    work_types=len(WORK_TYPES),
+    paid_ratio=DEFAULT_PAID_RATIO,
+    midnight_ratio=DEFAULT_MIDNIGHT_RATIO,
+    zipf=DEFAULT_ZIPF,
+    hourly_rates=HOURLY_RATES,
+    rate_change_ratio=RATE_CHANGE_RATIO,
+    seed=DEFAULT_SEED,
+    end=None,
+    batch_size=BATCH_SIZE,
+    overwrite=False,
+):
+    """
+    Создать базу path с синтетической историей. end - последний день
+    истории (date, по умолчанию сегодня). Существующий файл заменяется
+    только при overwrite=True.
+
+    sessions - число сессий; строк time_sessions больше на число
+    переходов через полночь. hourly_rates - из чего выбираются ставки
+    проектов, rate_change_ratio - доля проектов со сменой ставки (0 -
+    ставки без истории). Возвращает dict со сводкой (rows, seconds,
+    rows_per_minute, ...) или None, если файл уже существует.
+    """
+    if os.path.exists(path):
+        if not overwrite:
+            print(f"[Generator] {path} already exists (use overwrite)")
+            return None
+        for suffix in ("", "-journal", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+    rng = random.Random(seed)
+    end = end or date.today()
+    first_day = end - timedelta(days=int(years * 365) - 1)
+    days = [first_day + timedelta(days=i) for i in range((end - first_day).days + 1)]
+    args = {
+        "sessions": sessions,
+        "projects": projects,
+        "task_names": task_names,
+        "work_types": min(work_types, len(WORK_TYPES)),
+        "paid_ratio": paid_ratio,
+        "midnight_ratio": midnight_ratio,
+        "zipf": zipf,
+    }
+
+    started = time.perf_counter()
+    db = Database(os.path.abspath(path))
+    conn = db.get_connection()
+    cursor = conn.cursor()
+    # Фикстура пересоздаётся целиком - надёжность записи на время загрузки не нужна
+    cursor.execute("PRAGMA synchronous = OFF")
+    cursor.execute("PRAGMA cache_size = -65536")
+    try:
+        cursor.execute("BEGIN")
+        for name in LOAD_TRIGGERS:
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+        cursor.executemany(
+            "INSERT INTO companies (code, name) VALUES (?, ?)",
+            [(f"C{i:03d}", f"Компания {i}") for i in range(1, companies + 1)],
+        )
+        cursor.executemany(
+            "INSERT INTO work_types (name) VALUES (?)",
+            [(name,) for name in WORK_TYPES[: args["work_types"]]],
+        )
+        cursor.executemany(
+            "INSERT INTO task_names (name, created_at) VALUES (?, ?)",
+            [
+                (name, f"{first_day.isoformat()} 00:00:00")
+                for name in _numbered(TASK_NAMES, task_names)
+            ],
+        )
+        _insert_projects(
+            cursor,
+            rng,
+            projects,
+            companies,
+            first_day,
+            end,
+            hourly_rates,
+            rate_change_ratio,
+        )
+
+        counts = _allocate_days(rng, sessions, days)
+        rows = _Dataset(rng, args).rows(days, counts, end)
+        inserted = 0
+        while True:
+            batch = [row for _, row in zip(range(batch_size), rows)]
+            if not batch:
+                break
+            cursor.executemany(
+                """
+                INSERT INTO time_sessions
+                    (project_id, work_type_id, task_name_id, paid,
+                     start_time, end_time, duration, change_seq, modified_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                batch,
+            )
+            inserted += len(batch)
+        db._recompute_costs(cursor)
+        cursor.execute("UPDATE session_change_seq SET seq = ? WHERE id = 1", (inserted,))
+        db.rebuild_unpaid_balances(commit=False)
+        db.create_change_tracking_triggers()
+        db.create_unpaid_balance_triggers()
+        conn.commit()
+    except Exception:
+        conn.rollback()
         db.close()
-        return
-    
-    print(f"\nГенерирую сессии...")
-    today = datetime.now()
-    
-    # Генерируем сессии за сегодня (15-25 записей)
-    num_today_sessions = random.randint(15, 25)
-    print(f"Создаю {num_today_sessions} сессий за сегодня...")
-    
-    for i in range(num_today_sessions):
-        project_id = random.choice(project_ids)
-        description = random.choice(descriptions)
-        
-        # Случайное время начала в течение дня
-        hour = random.randint(8, 19)
-        minute = random.randint(0, 59)
-        start_time = today.replace(hour=hour, minute=minute, second=0, microsecond=0)
-        
-        # Длительность от 2 до 45 минут
-        duration_minutes = random.randint(2, 45)
-        end_time = start_time + timedelta(minutes=duration_minutes)
-        
-        # Вставляем напрямую в БД
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO time_sessions (project_id, description, start_time, end_time, duration)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (
-            project_id,
-            description,
-            start_time.isoformat(),
-            end_time.isoformat(),
-            duration_minutes * 60
-        ))
-    
+        raise
+    load_seconds = time.perf_counter() - started
+    cursor.execute("ANALYZE")
     conn.commit()
-    print(f"  ✓ Создано {num_today_sessions} сессий за сегодня")
-    
-    # Генерируем сессии за прошлые дни недели (понедельник-вчера)
-    days_back = (today.weekday() + 1) % 7  # дни с понедельника
-    if days_back == 0:
-        days_back = 7
-    
-    print(f"\nСоздаю сессии за последние {days_back} дней...")
-    for day_offset in range(1, days_back + 1):
-        day = today - timedelta(days=day_offset)
-        num_sessions = random.randint(8, 15)
-        
-        for i in range(num_sessions):
-            project_id = random.choice(project_ids)
-            description = random.choice(descriptions)
-            
-            hour = random.randint(8, 19)
-            minute = random.randint(0, 59)
-            start_time = day.replace(hour=hour, minute=minute, second=0, microsecond=0)
-            
-            duration_minutes = random.randint(5, 60)
-            end_time = start_time + timedelta(minutes=duration_minutes)
-            
-            conn = db.get_connection()
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO time_sessions (project_id, description, start_time, end_time, duration)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (
-                project_id,
-                description,
-                start_time.isoformat(),
-                end_time.isoformat(),
-                duration_minutes * 60
-            ))
-        
-        conn.commit()
-        day_name = day.strftime('%d.%m (%A)')
-        print(f"  ✓ {day_name}: {num_sessions} сессий")
-    
-    # Статистика
-    total_today = len(list(db.get_today_sessions()))
-    week_total = db.get_week_total()
-    
-    print(f"\n{'='*50}")
-    print(f"Готово!")
-    print(f"{'='*50}")
-    print(f"Сессий сегодня: {total_today}")
-    print(f"Общее время за неделю: {week_total // 3600}ч {(week_total % 3600) // 60}м")
-    print(f"\nТеперь запустите приложение:")
-    print(f"  python mac_app.py")
-    
     db.close()
+    seconds = time.perf_counter() - started
+    summary = {
+        "path": os.path.abspath(path),
+        "seed": seed,
+        "first_day": first_day.isoformat(),
+        "end": end.isoformat(),
+        "sessions": sessions,
+        "rows": inserted,
+        "projects": projects,
+        "companies": companies,
+        "task_names": task_names,
+        "seconds": seconds,
+        "rows_per_minute": inserted / load_seconds * 60 if load_seconds else 0.0,
+    }
+    print(
+        f"[Generator] {sessions} sessions ({inserted} rows) {first_day} .. {end} in {seconds:.1f}s "
+        f"({summary['rows_per_minute']:,.0f} rows/min)"
+    )
+    return summary
+
+
+def _insert_projects(
+    cursor, rng, projects, companies, first_day, end, hourly_rates, rate_change_ratio
+):
+    """Проекты с компанией (часть без неё) и историей ставок"""
+    project_rows = []
+    rate_rows = []
+    span = (end - first_day).days
+    for project_id, name in enumerate(_numbered(PROJECT_NAMES, projects), start=1):
+        rate = rng.choice(hourly_rates)
+        company_id = rng.randint(1, companies) if companies and rng.random() < 0.85 else None
+        rate_rows.append((project_id, rate, RATE_EPOCH))
+        if rate and rng.random() < rate_change_ratio:
+            # Повышение ставки где-то во второй половине истории
+            changed = first_day + timedelta(days=rng.randint(span // 2, span))
+            rate = round(rate * rng.choice((1.1, 1.2, 1.25)), 2)
+            rate_rows.append((project_id, rate, f"{changed.isoformat()}T00:00:00"))
+        project_rows.append((name, rate, company_id))
+    cursor.executemany(
+        "INSERT INTO projects (name, hourly_rate, company_id) VALUES (?, ?, ?)",
+        project_rows,
+    )
+    cursor.executemany(
+        "INSERT INTO project_rates (project_id, hourly_rate, effective_from) VALUES (?, ?, ?)",
+        rate_rows,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Детерминированная синтетическая база MacikTimer для бенчмарков"
+    )
+    parser.add_argument("path", help="файл создаваемой базы")
+    parser.add_argument("--sessions", type=int, default=DEFAULT_SESSIONS)
+    parser.add_argument("--years", type=float, default=DEFAULT_YEARS)
+    parser.add_argument("--projects", type=int, default=DEFAULT_PROJECTS)
+    parser.add_argument("--companies", type=int, default=DEFAULT_COMPANIES)
+    parser.add_argument("--task-names", type=int, default=DEFAULT_TASK_NAMES)
+    parser.add_argument("--work-types", type=int, default=len(WORK_TYPES))
+    parser.add_argument("--paid-ratio", type=float, default=DEFAULT_PAID_RATIO)
+    parser.add_argument("--midnight-ratio", type=float, default=DEFAULT_MIDNIGHT_RATIO)
+    parser.add_argument("--zipf", type=float, default=DEFAULT_ZIPF, help="показатель Ципфа")
+    parser.add_argument("--rate-change-ratio", type=float, default=RATE_CHANGE_RATIO)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--end", type=date.fromisoformat, help="последний день (YYYY-MM-DD)")
+    parser.add_argument("--force", action="store_true", help="заменить существующий файл")
+    args = parser.parse_args(argv)
+    summary = generate_dataset(
+        args.path,
+        sessions=args.sessions,
+        years=args.years,
+        projects=args.projects,
+        companies=args.companies,
+        task_names=args.task_names,
+        work_types=args.work_types,
+        paid_ratio=args.paid_ratio,
+        midnight_ratio=args.midnight_ratio,
+        zipf=args.zipf,
+        rate_change_ratio=args.rate_change_ratio,
+        seed=args.seed,
+        end=args.end,
+        overwrite=args.force,
+    )
+    return 0 if summary else 1
+
 
-if __name__ == '__main__':
-    generate_test_data()
+if __name__ == "__main__":
+    sys.exit(main())
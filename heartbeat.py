@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+Heartbeat идущего таймера.
+
+Пока сессия идёт, фронтенд периодически отмечает в active_session момент,
+когда приложение точно было живо. Это одна UPDATE по первичному ключу
+singleton-строки, поэтому запись дешёвая. По отметке:
+- итоги (get_*_total(include_live=True)) и статистика учитывают время
+  идущей сессии до последнего heartbeat;
+- после краша recover_active_session() закрывает сессию на последнем heartbeat;
+  порог краша считается по интервалу, который фронтенд пишет вместе с
+  отметкой, поэтому экземпляры с разными настройками не спорят о нём.
+"""
+
+import time
+from datetime import datetime
+
+from database import HEARTBEAT_INTERVAL
+
+# Допустимые границы интервала из настроек (секунды)
+MIN_HEARTBEAT_INTERVAL = 5
+MAX_HEARTBEAT_INTERVAL = 15 * 60
+
+
+def normalize_interval(seconds):
+    """Интервал из настроек, приведённый к допустимым границам"""
+    try:
+        seconds = int(seconds)
+    except (TypeError, ValueError):
+        return HEARTBEAT_INTERVAL
+    if seconds <= 0:
+        return HEARTBEAT_INTERVAL
+    return max(MIN_HEARTBEAT_INTERVAL, min(MAX_HEARTBEAT_INTERVAL, seconds))
+
+
+class Heartbeat:
+    """
+    Периодическая запись heartbeat активной сессии.
+
+    beat() можно вызывать хоть на каждом тике UI: запись в базу происходит
+    не чаще одного раза за interval секунд, остальные вызовы - это
+    одно сравнение с монотонными часами.
+    """
+
+    def __init__(self, db, interval=HEARTBEAT_INTERVAL, clock=time.monotonic):
+        self.db = db
+        self.interval = normalize_interval(interval)
+        self._clock = clock
+        self._last_beat = None
+        self.writes = 0
+
+    def beat(self, now=None):
+        """Записать heartbeat, если с прошлой записи прошло interval секунд"""
+        tick = self._clock()
+        if self._last_beat is not None and tick - self._last_beat < self.interval:
+            return False
+        self._last_beat = tick
+        self.writes += 1
+        return self.db.heartbeat_active_session(now or datetime.now(), self.interval)
+
+    def force(self, now=None):
+        """Записать heartbeat немедленно (старт/восстановление сессии)"""
+        self._last_beat = None
+        return self.beat(now)
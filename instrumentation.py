@@ -0,0 +1,362 @@
+# -*- coding: utf-8 -*-
+"""
+Инструментирование Database: сколько раз вызывается каждый метод, сколько
+строк он возвращает и сколько времени занимает (гистограмма задержек,
+p50/p95/p99), плюс журнал медленных вызовов с SQL и EXPLAIN QUERY PLAN.
+
+    db.enable_instrumentation(slow_ms=20)
+    ...
+    print(db.instrumentation.report())
+
+Включается и переменной окружения MTIMER_INSTRUMENT=1 (порог -
+MTIMER_SLOW_MS). Обёртки ставятся на экземпляр Database только при
+включении и снимаются при выключении: выключенный слой ничего не стоит.
+SQL собирается подпиской Database.add_statement_listener только внутри
+вызова метода; план строится лишь для вызовов дольше порога.
+
+При закрытии базы снимок сохраняется в JSON; отчёт по нему печатает
+
+    python3 instrumentation.py [путь к instrumentation.json]
+"""
+
+import argparse
+import bisect
+import inspect
+import json
+import os
+import sys
+import time
+import types
+from collections import deque
+from datetime import datetime
+
+from log import get_logger
+
+logger = get_logger(__name__)
+
+# Вызов дольше порога (мс) попадает в журнал медленных
+SLOW_QUERY_MS = 50.0
+# Сколько последних медленных вызовов держать в памяти
+SLOW_LOG_SIZE = 200
+# Сколько SQL-операторов запоминать за один вызов
+MAX_STATEMENTS = 50
+# Файлы рядом с базой
+SNAPSHOT_FILE = "instrumentation.json"
+SLOW_LOG_FILE = "slow_queries.log"
+
+# Методы, которые не измеряются: служебные и вызываемые из всех остальных
+EXCLUDED_METHODS = frozenset(
+    {
+        "get_connection",
+        "add_statement_listener",
+        "remove_statement_listener",
+        "close",
+        "enable_instrumentation",
+        "disable_instrumentation",
+    }
+)
+
+# Операторы, для которых пишется SQL и строится план
+EXPLAINED_KEYWORDS = frozenset({"SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "REPLACE"})
+
+# Верхние границы корзин гистограммы, мс: от 10 мкс до ~5 минут, шаг 2^(1/4)
+BUCKET_BOUNDS = tuple(0.01 * 2 ** (i / 4) for i in range(100))
+
+
+class LatencyHistogram:
+    """Гистограмма задержек с логарифмическими корзинами (~19% ширины)"""
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, ms):
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    def percentile(self, fraction):
+        """Верхняя граница корзины, в которую попал перцентиль fraction"""
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                if index >= len(BUCKET_BOUNDS):
+                    return self.max
+                return min(BUCKET_BOUNDS[index], self.max)
+        return self.max
+
+
+class MethodStats:
+    """Счётчики одного метода Database"""
+
+    __slots__ = ("calls", "rows", "errors", "latency")
+
+    def __init__(self):
+        self.calls = 0
+        self.rows = 0
+        self.errors = 0
+        self.latency = LatencyHistogram()
+
+    def as_dict(self):
+        latency = self.latency
+        return {
+            "calls": self.calls,
+            "rows": self.rows,
+            "errors": self.errors,
+            "total_ms": latency.total,
+            "mean_ms": latency.total / latency.count if latency.count else 0.0,
+            "p50_ms": latency.percentile(0.50),
+            "p95_ms": latency.percentile(0.95),
+            "p99_ms": latency.percentile(0.99),
+            "max_ms": latency.max,
+        }
+
+
+def _keyword(sql):
+    parts = sql.split(None, 1)
+    return parts[0].upper() if parts else ""
+
+
+def count_rows(result):
+    """Сколько строк вернул метод: длина списка, 0 для None/bool, иначе 1"""
+    if result is None or isinstance(result, bool):
+        return 0
+    if isinstance(result, (list, tuple)):
+        return len(result)
+    return 1
+
+
+class Instrumentation:
+    """Измерения вызовов методов одного экземпляра Database"""
+
+    def __init__(self, slow_ms=SLOW_QUERY_MS, slow_log_path=None):
+        self.slow_ms = slow_ms
+        self.slow_log_path = slow_log_path
+        self.methods = {}  # имя -> MethodStats
+        self.slow_log = deque(maxlen=SLOW_LOG_SIZE)
+        self.started_at = datetime.now().isoformat()
+        self._db = None
+        self._wrapped = []
+        self._depth = 0
+        self._statements = []
+        self._explaining = False
+
+    @property
+    def enabled(self):
+        return self._db is not None
+
+    # ============================================
+    # Подключение к Database
+    # ============================================
+
+    def attach(self, db):
+        """Обернуть публичные методы экземпляра db"""
+        if self._db is not None:
+            self.detach()
+        self._db = db
+        for name, function in inspect.getmembers(type(db), inspect.isfunction):
+            if name.startswith("_") or name in EXCLUDED_METHODS:
+                continue
+            setattr(db, name, self._wrap(name, getattr(db, name)))
+            self._wrapped.append(name)
+        db.add_statement_listener(self._on_statement)
+
+    def detach(self):
+        """Снять обёртки и trace callback"""
+        db = self._db
+        if db is None:
+            return
+        for name in self._wrapped:
+            db.__dict__.pop(name, None)
+        self._wrapped = []
+        db.remove_statement_listener(self._on_statement)
+        self._db = None
+
+    def _wrap(self, name, method):
+        def wrapper(*args, **kwargs):
+            self._depth += 1
+            if self._depth == 1:
+                self._statements = []
+            started = time.perf_counter()
+            try:
+                result = method(*args, **kwargs)
+            except Exception:
+                self._depth -= 1
+                self._stats(name).errors += 1
+                raise
+            self._depth -= 1
+            if isinstance(result, types.GeneratorType):
+                # Строки генератора (iter_invoice_lines) считаются по мере чтения
+                return self._counting(name, result, started)
+            self._finish(name, started, count_rows(result))
+            return result
+
+        wrapper.__name__ = name
+        wrapper.__doc__ = method.__doc__
+        wrapper.__wrapped__ = method
+        return wrapper
+
+    def _counting(self, name, generator, started):
+        rows = 0
+        try:
+            for item in generator:
+                rows += 1
+                yield item
+        finally:
+            self._finish(name, started, rows, outermost=False)
+
+    def _finish(self, name, started, rows, outermost=None):
+        elapsed = (time.perf_counter() - started) * 1000
+        stats = self._stats(name)
+        stats.calls += 1
+        stats.rows += rows
+        stats.latency.add(elapsed)
+        if outermost is None:
+            outermost = self._depth == 0
+        if outermost and elapsed >= self.slow_ms:
+            self._log_slow(name, elapsed, rows)
+
+    def _stats(self, name):
+        stats = self.methods.get(name)
+        if stats is None:
+            stats = self.methods[name] = MethodStats()
+        return stats
+
+    def _on_statement(self, sql):
+        # Операторы триггеров приходят повторно - храним каждый SQL один раз
+        if (
+            self._depth
+            and not self._explaining
+            and len(self._statements) < MAX_STATEMENTS
+            and sql not in self._statements
+            and _keyword(sql) in EXPLAINED_KEYWORDS
+        ):
+            self._statements.append(sql)
+
+    # ============================================
+    # Журнал медленных вызовов
+    # ============================================
+
+    def _log_slow(self, name, elapsed, rows):
+        entry = {
+            "at": datetime.now().isoformat(),
+            "method": name,
+            "ms": round(elapsed, 3),
+            "rows": rows,
+            "statements": [
+                {"sql": sql[:2000], "plan": self._explain(sql)}
+                for sql in self._statements
+            ],
+        }
+        self.slow_log.append(entry)
+        if self.slow_log_path:
+            try:
+                with open(self.slow_log_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            except OSError as e:
+                logger.warning("Cannot write slow log: %s", e)
+
+    def _explain(self, sql):
+        """EXPLAIN QUERY PLAN оператора (строки detail)"""
+        self._explaining = True
+        try:
+            return [row[3] for row in self._db.get_connection().execute(f"EXPLAIN QUERY PLAN {sql}")]
+        except Exception as e:
+            return [f"(no plan: {e})"]
+        finally:
+            self._explaining = False
+
+    # ============================================
+    # Снимок и отчёт
+    # ============================================
+
+    def snapshot(self):
+        """Текущие счётчики: dict, пригодный для JSON"""
+        return {
+            "started_at": self.started_at,
+            "taken_at": datetime.now().isoformat(),
+            "slow_ms": self.slow_ms,
+            "methods": {
+                name: stats.as_dict() for name, stats in sorted(self.methods.items())
+            },
+            "slow_log": list(self.slow_log),
+        }
+
+    def reset(self):
+        self.methods = {}
+        self.slow_log.clear()
+        self.started_at = datetime.now().isoformat()
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False, indent=1)
+
+    def report(self, slow=5):
+        return format_report(self.snapshot(), slow)
+
+
+def format_report(snapshot, slow=5):
+    """Текстовый отчёт по снимку: методы по суммарному времени, затем медленные"""
+    lines = [
+        f"Database calls {snapshot['started_at']} .. {snapshot['taken_at']}",
+        f"  {'method':<32} {'calls':>7} {'rows':>9} {'total ms':>10} "
+        f"{'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}",
+    ]
+    methods = sorted(
+        snapshot["methods"].items(), key=lambda item: item[1]["total_ms"], reverse=True
+    )
+    for name, stats in methods:
+        lines.append(
+            f"  {name:<32} {stats['calls']:>7} {stats['rows']:>9} "
+            f"{stats['total_ms']:>10.1f} {stats['p50_ms']:>8.2f} "
+            f"{stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f} {stats['max_ms']:>8.2f}"
+        )
+    slow_log = snapshot["slow_log"]
+    if slow_log and slow:
+        lines.append(f"Slow calls (>= {snapshot['slow_ms']} ms), latest {slow}:")
+        for entry in slow_log[-slow:]:
+            lines.append(
+                f"  {entry['at']} {entry['method']} {entry['ms']:.1f} ms, "
+                f"{entry['rows']} rows"
+            )
+            for statement in entry["statements"]:
+                lines.append(f"    {' '.join(statement['sql'].split())[:160]}")
+                for detail in statement["plan"]:
+                    lines.append(f"      {detail}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Отчёт по сохранённому снимку инструментирования Database"
+    )
+    parser.add_argument(
+        "path",
+        nargs="?",
+        default=os.path.join(os.path.dirname(os.path.abspath(__file__)), SNAPSHOT_FILE),
+        help=f"{SNAPSHOT_FILE} рядом с базой",
+    )
+    parser.add_argument("--slow", type=int, default=5, help="сколько медленных вызовов показать")
+    args = parser.parse_args(argv)
+    try:
+        with open(args.path, encoding="utf-8") as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Cannot read {args.path}: {e}")
+        return 1
+    print(format_report(snapshot, args.slow))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
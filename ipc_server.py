@@ -0,0 +1,453 @@
+# -*- coding: utf-8 -*-
+"""
+Локальный IPC-сервер запущенного приложения: Unix domain socket и asyncio
+в отдельном потоке.
+
+Внешние инструменты (скрипты строки меню, плагины редакторов) узнают,
+идёт ли таймер и сколько, у работающего приложения, а не открывают
+SQLite-файл и не соперничают с соединением UI.
+
+Протокол - строки JSON: запрос {"cmd": "status"} (или просто слово
+status), ответ {"ok": true, ...} или {"ok": false, "error": "..."}.
+Одно соединение может отправлять запросы один за другим.
+
+- status - идёт ли таймер: project, task, start, elapsed
+- today - итог за сегодня, включая идущую сессию
+- recent - последние задачи (project, task); параметр limit
+- start - {"project": имя или id, "task": ...}
+- stop
+- switch - как start, но идущий таймер сначала останавливается
+
+Чтение отвечает из снимка IpcState: запросы не трогают ни базу, ни
+AppKit. Главный поток только помечает снимок устаревшим (перезагрузка
+сессий, старт, остановка); пересобирает его refresh фронтенда в главном
+потоке, когда снимок устарел и клиент о нём спросил, - без клиентов
+запросов к базе нет. Границу суток today считает при чтении. Команды
+выполняются в главном потоке (call_soon фронтенда) тем же путём, что
+кнопка Старт/Стоп; сервер ждёт результат, не блокируя цикл событий.
+
+    echo status | nc -U ~/Library/Application\\ Support/MacikTimer/mtimer.sock
+    python3 ipc_server.py status
+"""
+
+import asyncio
+import concurrent.futures
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+from datetime import datetime
+
+from log import get_logger
+
+logger = get_logger("ipc")
+
+# Переменные окружения: путь сокета и выключатель (MTIMER_IPC=0)
+IPC_ENV = "MTIMER_IPC"
+IPC_SOCKET_ENV = "MTIMER_IPC_SOCKET"
+# Сокет рядом с базой
+SOCKET_FILE = "mtimer.sock"
+# sun_path на macOS - 104 байта; длиннее - сокет во временной папке
+MAX_SOCKET_PATH = 100
+# Сколько ждать выполнения команды главным потоком, секунд
+COMMAND_TIMEOUT = 5.0
+# Последних задач в ответе recent по умолчанию
+RECENT_LIMIT = 5
+
+READ_COMMANDS = ("status", "today", "recent", "ping")
+# Команды главного потока и их параметры
+WRITE_COMMANDS = {
+    "start": ("project", "task"),
+    "stop": (),
+    "switch": ("project", "task"),
+}
+
+
+class IpcError(Exception):
+    """Ошибка команды: сообщение уходит клиенту в поле error"""
+
+
+def ipc_enabled(environ=None):
+    environ = os.environ if environ is None else environ
+    return environ.get(IPC_ENV, "1") != "0" and hasattr(socket, "AF_UNIX")
+
+
+def default_socket_path(db_path=None, environ=None):
+    """MTIMER_IPC_SOCKET, иначе mtimer.sock рядом с базой"""
+    environ = os.environ if environ is None else environ
+    if environ.get(IPC_SOCKET_ENV):
+        return environ[IPC_SOCKET_ENV]
+    if db_path is None:
+        from mtimer import default_db_path
+
+        db_path = default_db_path(environ)
+    path = os.path.join(os.path.dirname(os.path.abspath(db_path)), SOCKET_FILE)
+    if len(os.fsencode(path)) > MAX_SOCKET_PATH:
+        path = os.path.join(tempfile.gettempdir(), f"mtimer-{os.getuid()}.sock")
+    return path
+
+
+def elapsed_seconds(start, end):
+    return max(0, int(end.timestamp() - start.timestamp()))
+
+
+class IpcState:
+    """
+    Снимок состояния для ответов сервера. Пишет главный поток (publish -
+    весь снимок, invalidate - пометка об изменении), читают потоки
+    сервера; поля заменяются целиком под блокировкой.
+
+    running, session_id, project_id, project, task, start (datetime),
+    today_completed - секунды завершённых сессий за day (date),
+    recent - список dict (project_id, project, task, last_start).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._fields = {
+            "running": False,
+            "session_id": None,
+            "project_id": None,
+            "project": None,
+            "task": None,
+            "start": None,
+            "today_completed": 0,
+            "day": None,
+            "recent": [],
+            "published_at": None,
+        }
+        self._stale = True
+
+    def publish(self, **fields):
+        fields["published_at"] = datetime.now()
+        with self._lock:
+            self._fields.update(fields)
+            self._stale = False
+
+    def invalidate(self):
+        """Данные изменились: снимок пересоберётся при следующем запросе"""
+        with self._lock:
+            self._stale = True
+
+    def stale(self, now=None):
+        """Снимок помечен устаревшим или посчитан за другие сутки"""
+        now = now or datetime.now()
+        with self._lock:
+            return self._stale or self._fields["day"] != now.date()
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._fields)
+
+    def status(self, now=None):
+        now = now or datetime.now()
+        state = self.snapshot()
+        if not state["running"] or state["start"] is None:
+            return {"running": False}
+        return {
+            "running": True,
+            "session_id": state["session_id"],
+            "project_id": state["project_id"],
+            "project": state["project"],
+            "task": state["task"],
+            "start": state["start"].isoformat(),
+            "elapsed": elapsed_seconds(state["start"], now),
+        }
+
+    def today(self, now=None):
+        """Итог за сегодня: завершённые сессии плюс идущая с полуночи"""
+        now = now or datetime.now()
+        state = self.snapshot()
+        # Снимок за прошлые сутки (не успел пересобраться) - сегодня ещё
+        # ничего не завершено
+        total = state["today_completed"] if state["day"] == now.date() else 0
+        live = 0
+        if state["running"] and state["start"] is not None:
+            midnight = datetime.combine(now.date(), datetime.min.time())
+            live = elapsed_seconds(max(state["start"], midnight), now)
+        return {"total": total + live, "completed": total, "live": live}
+
+    def recent(self, limit=RECENT_LIMIT):
+        return [dict(task) for task in self.snapshot()["recent"][:limit]]
+
+
+class IpcServer:
+    """
+    Сервер на Unix-сокете path. commands - {"start": f, "stop": f,
+    "switch": f}: f(**params) -> dict, ошибки - IpcError. refresh()
+    пересобирает снимок (state.publish), когда он устарел. call_soon(f)
+    выполняет f в главном потоке фронтенда (AppHelper.callAfter); без
+    него команды и refresh выполняются в потоке сервера.
+    """
+
+    def __init__(
+        self,
+        path,
+        state,
+        commands=None,
+        call_soon=None,
+        timeout=COMMAND_TIMEOUT,
+        refresh=None,
+    ):
+        self.path = path
+        self.state = state
+        self.commands = dict(commands or {})
+        self.call_soon = call_soon
+        self.timeout = timeout
+        self.refresh = refresh
+        self.requests = 0
+        self.refreshes = 0
+        self._refreshing = None
+        self._loop = None
+        self._server = None
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Поднять сервер в фоновом потоке; False - сокет занят или недоступен"""
+        if self.running:
+            return True
+        if not hasattr(socket, "AF_UNIX"):
+            logger.warning("Unix domain sockets are not available, IPC disabled")
+            return False
+        if not self._claim_path():
+            return False
+        ready = threading.Event()
+        errors = []
+        self._thread = threading.Thread(
+            target=self._run, args=(ready, errors), name="mtimer-ipc", daemon=True
+        )
+        self._thread.start()
+        ready.wait()
+        if errors:
+            self._thread.join()
+            self._thread = None
+            logger.error("Cannot start IPC server on %s: %s", self.path, errors[0])
+            return False
+        logger.info("IPC server listening on %s", self.path)
+        return True
+
+    def stop(self):
+        """Закрыть сервер и удалить файл сокета"""
+        if not self.running:
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(self.timeout)
+        self._thread = None
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+    def _claim_path(self):
+        """Оставшийся от упавшего процесса сокет удаляется; живой - не трогаем"""
+        if not os.path.exists(self.path):
+            return True
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.path)
+        except OSError:
+            os.unlink(self.path)
+            return True
+        finally:
+            probe.close()
+        logger.warning("Another instance is serving %s, IPC disabled", self.path)
+        return False
+
+    def _run(self, ready, errors):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._loop = loop
+        try:
+            self._server = loop.run_until_complete(
+                asyncio.start_unix_server(self._handle, self.path)
+            )
+            os.chmod(self.path, 0o600)
+        except OSError as e:
+            errors.append(e)
+            loop.close()
+            ready.set()
+            return
+        ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            self._server.close()
+            # Обработчики открытых соединений сервер не ждёт - отменяем их
+            tasks = asyncio.all_tasks(loop)
+            for task in tasks:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            loop.run_until_complete(self._server.wait_closed())
+            loop.close()
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                response = await self.respond(line)
+                writer.write(json.dumps(response, ensure_ascii=False).encode() + b"\n")
+                await writer.drain()
+        except (ConnectionError, ValueError) as e:
+            logger.debug("IPC client dropped: %s", e)
+        except asyncio.CancelledError:
+            # Остановка сервера; отмену не пробрасываем - иначе asyncio
+            # пишет её в журнал как ошибку обработчика соединения
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, line):
+        """Ответ на одну строку запроса"""
+        self.requests += 1
+        try:
+            request = parse_request(line)
+            cmd = request.pop("cmd")
+            if cmd in READ_COMMANDS:
+                if cmd != "ping":
+                    await self.refresh_state()
+                result = self.read(cmd, request)
+            elif cmd in WRITE_COMMANDS and cmd in self.commands:
+                result = await self.execute(cmd, request)
+            else:
+                raise IpcError(f"unknown command {cmd!r}")
+        except IpcError as e:
+            return {"ok": False, "error": str(e)}
+        except Exception as e:
+            logger.exception("IPC request failed: %s", e)
+            return {"ok": False, "error": f"internal error: {e}"}
+        return dict(result, ok=True)
+
+    def read(self, cmd, params):
+        if cmd == "status":
+            return self.state.status()
+        if cmd == "today":
+            return self.state.today()
+        if cmd == "recent":
+            try:
+                limit = int(params.get("limit", RECENT_LIMIT))
+            except (TypeError, ValueError):
+                raise IpcError("limit must be an integer")
+            return {"tasks": self.state.recent(limit)}
+        return {}
+
+    async def refresh_state(self):
+        """Пересобрать устаревший снимок; одновременные запросы ждут одну пересборку"""
+        if self.refresh is None or not self.state.stale():
+            return
+        if self._refreshing is None or self._refreshing.done():
+            self._refreshing = asyncio.ensure_future(self._refresh_once())
+        await asyncio.shield(self._refreshing)
+
+    async def _refresh_once(self):
+        self.refreshes += 1
+        try:
+            await self.call_main("refresh", self.refresh)
+        except Exception as e:
+            # Ответим из прежнего снимка (today учтёт смену суток сам)
+            logger.warning("Cannot refresh IPC state: %s", e)
+
+    async def execute(self, cmd, params):
+        """Команда в главном потоке; ждём её, не блокируя остальных клиентов"""
+        unknown = set(params) - set(WRITE_COMMANDS[cmd])
+        if unknown:
+            names = ", ".join(sorted(unknown))
+            raise IpcError(f"unknown parameters for {cmd}: {names}")
+        result = await self.call_main(cmd, self.commands[cmd], **params)
+        return result or {}
+
+    async def call_main(self, name, func, **params):
+        """func(**params) в главном потоке (call_soon) с ожиданием до timeout"""
+        future = concurrent.futures.Future()
+
+        def run():
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(func(**params))
+            except BaseException as e:
+                future.set_exception(e)
+
+        if self.call_soon is None:
+            run()
+        else:
+            self.call_soon(run)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            raise IpcError(f"{name} timed out")
+
+
+def parse_request(line):
+    """b'status' или b'{"cmd": "status", ...}' -> dict с cmd"""
+    text = line.decode("utf-8").strip()
+    if not text.startswith("{"):
+        words = text.split(None, 1)
+        if not words:
+            raise IpcError("empty request")
+        return {"cmd": words[0]}
+    try:
+        request = json.loads(text)
+    except ValueError as e:
+        raise IpcError(f"bad JSON: {e}")
+    if not isinstance(request, dict) or not isinstance(request.get("cmd"), str):
+        raise IpcError('expected {"cmd": ...}')
+    return request
+
+
+def request(path, cmd, timeout=1.0, **params):
+    """Один запрос к запущенному приложению (клиент для скриптов)"""
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.settimeout(timeout)
+    try:
+        client.connect(path)
+        client.sendall(json.dumps(dict(params, cmd=cmd)).encode() + b"\n")
+        data = b""
+        while not data.endswith(b"\n"):
+            chunk = client.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+    finally:
+        client.close()
+    return json.loads(data)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Запрос к запущенному MTimer")
+    parser.add_argument("cmd", choices=READ_COMMANDS + tuple(WRITE_COMMANDS))
+    parser.add_argument("project", nargs="?")
+    parser.add_argument("task", nargs="?")
+    parser.add_argument("--socket", default=None)
+    parser.add_argument("--limit", type=int)
+    args = parser.parse_args(argv)
+    params = {
+        name: value
+        for name, value in (
+            ("project", args.project),
+            ("task", args.task),
+            ("limit", args.limit),
+        )
+        if value is not None
+    }
+    path = args.socket or default_socket_path()
+    try:
+        response = request(path, args.cmd, **params)
+    except OSError as e:
+        print(f"MTimer is not running ({path}: {e})")
+        return 1
+    print(json.dumps(response, ensure_ascii=False, indent=2))
+    return 0 if response.get("ok") else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
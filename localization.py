@@ -6,6 +6,10 @@
 import locale
 import os
 
+from log import get_logger
+
+logger = get_logger("localization")
+
 # Словари переводов
 TRANSLATIONS = {
     "en": {
@@ -47,6 +51,8 @@ TRANSLATIONS = {
         # Предупреждения
         "please_select_project": "Please select a project!",
         "stop_current_timer": "Stop current timer first",
+        "archived_session_read_only": "This session is archived and cannot be changed",
+        "session_update_failed": "Could not save the session changes",
         "ok": "Ok",
         # Итоги
         "total": "TOTAL",
@@ -67,6 +73,11 @@ TRANSLATIONS = {
         "mark_as_paid_title": "Mark as Paid",
         "mark_as_paid_message": "Mark this session as paid? It will be hidden from the main view.",
         "paid": "Paid",
+        "unpaid": "Unpaid",
+        "search_tasks": "Search tasks",
+        "create_invoice": "Create Invoice",
+        "create_invoice_message": "Mark {0} unpaid sessions ({1}, ${2:.2f}) as paid and create an invoice?",
+        "nothing_to_invoice": "There are no unpaid sessions for the selected project and period.",
         # Настройки проектов
         "settings": "Settings",
         "statistics": "Statistics",
@@ -226,6 +237,8 @@ TRANSLATIONS = {
         # Предупреждения
         "please_select_project": "Пожалуйста, выберите проект!",
         "stop_current_timer": "Сначала остановите текущий таймер",
+        "archived_session_read_only": "Эта запись в архиве, её нельзя изменить",
+        "session_update_failed": "Не удалось сохранить изменения записи",
         "ok": "Ок",
         # Итоги
         "total": "ВСЕГО",
@@ -246,6 +259,11 @@ TRANSLATIONS = {
         "mark_as_paid_title": "Отметить как оплаченное",
         "mark_as_paid_message": "Отметить эту задачу как оплаченную? Она будет скрыта из основного окна.",
         "paid": "Оплачено",
+        "unpaid": "Не оплачено",
+        "search_tasks": "Поиск задач",
+        "create_invoice": "Выставить счёт",
+        "create_invoice_message": "Отметить {0} неоплаченных сессий ({1}, ${2:.2f}) как оплаченные и выставить счёт?",
+        "nothing_to_invoice": "Нет неоплаченных сессий для выбранного проекта и периода.",
         # Настройки проектов
         "settings": "Настройки",
         "statistics": "Статистика",
@@ -405,6 +423,8 @@ TRANSLATIONS = {
         # Попередження
         "please_select_project": "Будь ласка, оберіть проект!",
         "stop_current_timer": "Спочатку зупиніть поточний таймер",
+        "archived_session_read_only": "Цей запис в архіві, його не можна змінити",
+        "session_update_failed": "Не вдалося зберегти зміни запису",
         "ok": "Гаразд",
         # Підсумки
         "total": "ВСЬОГО",
@@ -425,6 +445,11 @@ TRANSLATIONS = {
         "mark_as_paid_title": "Позначити як оплачене",
         "mark_as_paid_message": "Позначити це завдання як оплачене? Воно буде приховане з основного вікна.",
         "paid": "Оплачено",
+        "unpaid": "Не оплачено",
+        "search_tasks": "Пошук задач",
+        "create_invoice": "Виставити рахунок",
+        "create_invoice_message": "Позначити {0} неоплачених сесій ({1}, ${2:.2f}) як оплачені та виставити рахунок?",
+        "nothing_to_invoice": "Немає неоплачених сесій для вибраного проекту та періоду.",
         # Налаштування проектів
         "settings": "Налаштування",
         "statistics": "Статистика",
@@ -584,6 +609,8 @@ TRANSLATIONS = {
         # Figyelmeztetések
         "please_select_project": "Kérlek válassz projektet!",
         "stop_current_timer": "Először állítsd le a jelenlegi időmérőt",
+        "archived_session_read_only": "Ez a munkamenet archivált, nem módosítható",
+        "session_update_failed": "Nem sikerült menteni a munkamenet módosításait",
         "ok": "OK",
         # Összegzés
         "total": "ÖSSZESEN",
@@ -604,6 +631,11 @@ TRANSLATIONS = {
         "mark_as_paid_title": "Fizetettként megjelölés",
         "mark_as_paid_message": "Megjelöljük ezt a feladatot fizetettként? El lesz rejtve a fő nézetből.",
         "paid": "Fizetve",
+        "unpaid": "Fizetetlen",
+        "search_tasks": "Feladatok keresése",
+        "create_invoice": "Számla kiállítása",
+        "create_invoice_message": "Megjelöljük a(z) {0} fizetetlen munkamenetet ({1}, ${2:.2f}) fizetettként, és kiállítjuk a számlát?",
+        "nothing_to_invoice": "Nincs fizetetlen munkamenet a kiválasztott projekthez és időszakhoz.",
         # Projekt beállítások
         "settings": "Beállítások",
         "statistics": "Statisztika",
@@ -735,7 +767,7 @@ class Localization:
         saved_lang = self._load_saved_language()
         if saved_lang:
             self.current_language = saved_lang
-            print(f"[Localization] Loaded saved language: {saved_lang}")
+            logger.info("Loaded saved language: %s", saved_lang)
         else:
             self.current_language = self._detect_system_language()
 
@@ -749,7 +781,7 @@ class Localization:
             if saved_lang and saved_lang in TRANSLATIONS:
                 return str(saved_lang)
         except Exception as e:
-            print(f"[Localization] Failed to load saved language: {e}")
+            logger.debug("Failed to load saved language: %s", e)
         return None
 
     def _detect_system_language(self):
@@ -764,7 +796,7 @@ class Localization:
             preferred_languages = NSLocale.preferredLanguages()
             if preferred_languages and len(preferred_languages) > 0:
                 first_lang = str(preferred_languages[0]).lower()
-                print(f"[Localization] Preferred language: {first_lang}")
+                logger.debug("Preferred language: %s", first_lang)
 
                 # Извлекаем код языка (первые 2 символа)
                 if first_lang.startswith("uk") or first_lang.startswith("ua"):
@@ -780,7 +812,7 @@ class Localization:
             if not detected_lang:
                 current_locale = NSLocale.currentLocale()
                 lang_code = str(current_locale.languageCode()).lower()
-                print(f"[Localization] Current locale language: {lang_code}")
+                logger.debug("Current locale language: %s", lang_code)
 
                 if lang_code in ["uk", "ua"]:
                     detected_lang = "uk"
@@ -792,13 +824,13 @@ class Localization:
                     detected_lang = "hu"
 
         except Exception as e:
-            print(f"[Localization] NSLocale detection failed: {e}")
+            logger.debug("NSLocale detection failed: %s", e)
 
         # Метод 2: Если не получилось через Foundation, пробуем через locale
         if not detected_lang:
             try:
                 system_locale = locale.getdefaultlocale()[0]
-                print(f"[Localization] System locale: {system_locale}")
+                logger.debug("System locale: %s", system_locale)
                 if system_locale:
                     lang = system_locale.split("_")[0].lower()
                     if lang in ["uk", "ua"]:
@@ -810,13 +842,13 @@ class Localization:
                     elif lang == "hu":
                         detected_lang = "hu"
             except Exception as e:
-                print(f"[Localization] locale detection failed: {e}")
+                logger.debug("locale detection failed: %s", e)
 
         # По умолчанию русский (так как у вас система на украинском, но хотим русский)
         if not detected_lang:
             detected_lang = "ru"
 
-        print(f"[Localization] Final detected language: {detected_lang}")
+        logger.info("Final detected language: %s", detected_lang)
         return detected_lang
 
     def get(self, key, default=None):
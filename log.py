@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+"""
+Журнал MTimer поверх logging: уровни по модулям, ленивое %-форматирование,
+кольцевой буфер последних событий и файл с ротацией.
+
+    from log import get_logger
+    logger = get_logger("db")
+    logger.debug("Started session %s for project %s", session_id, project_id)
+
+Сообщение ниже уровня модуля стоит одного сравнения: запись не
+создаётся и строка не форматируется, поэтому горячие пути пишут
+debug() с аргументами, а не f-строки.
+
+Уровни - переменная MTIMER_LOG: общий уровень и уровни модулей через
+запятую, например "INFO,db=DEBUG,ui.window=WARNING". Модули: db, stats,
+localization, ui (и ui.window, ui.app), tk, ipc, scheduler, change_bus,
+instrumentation, metrics, profiling.
+Приёмники:
+- консоль (stdout, с префиксом [DB], [UI], ...) - не ниже MTIMER_LOG_CONSOLE
+  (по умолчанию INFO);
+- кольцевой буфер последних RING_SIZE событий прошедших уровень модуля
+  (recent_events()), включая debug включённых модулей;
+- файл mtimer.log с ротацией: ~/Library/Logs/MTimer на macOS,
+  ~/.local/state/mtimer иначе, MTIMER_LOG_DIR; MTIMER_LOG_FILE=0 выключает.
+"""
+
+import logging
+import logging.handlers
+import os
+import sys
+from collections import deque
+
+# Переменные окружения
+LOG_ENV = "MTIMER_LOG"
+LOG_CONSOLE_ENV = "MTIMER_LOG_CONSOLE"
+LOG_DIR_ENV = "MTIMER_LOG_DIR"
+LOG_FILE_ENV = "MTIMER_LOG_FILE"
+# Корневой логгер приложения и уровень по умолчанию
+ROOT_LOGGER = "mtimer"
+DEFAULT_LEVEL = logging.INFO
+# Файл журнала: имя, размер до ротации и сколько старых файлов хранить
+LOG_FILE = "mtimer.log"
+MAX_LOG_BYTES = 1024 * 1024
+LOG_BACKUPS = 3
+# Сколько последних событий держит кольцевой буфер
+RING_SIZE = 500
+# Префиксы консоли по модулям (как прежние print("[DB] ..."))
+TAGS = {
+    "db": "DB",
+    "stats": "Stats",
+    "localization": "Localization",
+    "ui": "UI",
+    "ui.window": "Window",
+    "ui.app": "App",
+    "tk": "App",
+    "ipc": "IPC",
+    "scheduler": "Scheduler",
+    "change_bus": "ChangeBus",
+    "instrumentation": "Instrumentation",
+    "metrics": "Metrics",
+    "profiling": "Profiling",
+}
+
+FILE_FORMAT = "%(asctime)s %(levelname)-7s %(tag)s: %(message)s"
+CONSOLE_FORMAT = "[%(tag)s] %(message)s"
+
+_configured = False
+
+
+class _TagFormatter(logging.Formatter):
+    """Добавляет к записи tag - короткое имя модуля для префикса"""
+
+    def format(self, record):
+        name = record.name[len(ROOT_LOGGER) + 1 :]
+        record.tag = TAGS.get(name) or name or ROOT_LOGGER
+        return super().format(record)
+
+
+class _ConsoleHandler(logging.StreamHandler):
+    """stdout на момент записи: redirect_stdout в бенчмарках продолжает работать"""
+
+    def __init__(self):
+        super().__init__(sys.stdout)
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+class RingBufferHandler(logging.Handler):
+    """Последние capacity записей; форматируются только при чтении"""
+
+    def __init__(self, capacity=RING_SIZE):
+        super().__init__()
+        self.records = deque(maxlen=capacity)
+        self.setFormatter(_TagFormatter(FILE_FORMAT))
+
+    def emit(self, record):
+        self.records.append(record)
+
+    def lines(self, limit=None):
+        records = list(self.records)
+        if limit is not None:
+            records = records[-limit:]
+        return [self.format(record) for record in records]
+
+
+RING = RingBufferHandler()
+
+
+def parse_levels(spec):
+    """
+    "INFO,db=DEBUG" -> (общий уровень, {модуль: уровень}).
+    Неизвестные уровни пропускаются с предупреждением.
+    """
+    default = DEFAULT_LEVEL
+    levels = {}
+    for part in (spec or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, level_name = part.rpartition("=")
+        level = logging.getLevelName(level_name.strip().upper())
+        if not isinstance(level, int):
+            print(f"[Log] Ignoring unknown level in {LOG_ENV}: {part!r}")
+            continue
+        if name:
+            levels[name.strip()] = level
+        else:
+            default = level
+    return default, levels
+
+
+def default_log_dir():
+    if sys.platform == "darwin":
+        return os.path.expanduser("~/Library/Logs/MTimer")
+    return os.path.join(
+        os.environ.get("XDG_STATE_HOME") or os.path.expanduser("~/.local/state"), "mtimer"
+    )
+
+
+def configure(spec=None, console_level=None, log_dir=None, log_file=True, environ=None):
+    """
+    Настроить уровни и приёмники. Без аргументов - из переменных окружения;
+    вызывается сам при первом get_logger(), повторный вызов перенастраивает.
+    """
+    global _configured
+    environ = os.environ if environ is None else environ
+    default, levels = parse_levels(environ.get(LOG_ENV) if spec is None else spec)
+    root = logging.getLogger(ROOT_LOGGER)
+    root.setLevel(default)
+    root.propagate = False
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        if handler is not RING:
+            handler.close()
+    for name in list(logging.root.manager.loggerDict):
+        if name.startswith(ROOT_LOGGER + "."):
+            logging.getLogger(name).setLevel(logging.NOTSET)
+    for name, level in levels.items():
+        logging.getLogger(f"{ROOT_LOGGER}.{name}").setLevel(level)
+
+    console = _ConsoleHandler()
+    console.setLevel(
+        console_level
+        or parse_levels(environ.get(LOG_CONSOLE_ENV) or "INFO")[0]
+    )
+    console.setFormatter(_TagFormatter(CONSOLE_FORMAT))
+    root.addHandler(console)
+    root.addHandler(RING)
+
+    if log_file and environ.get(LOG_FILE_ENV, "1") != "0":
+        directory = log_dir or environ.get(LOG_DIR_ENV) or default_log_dir()
+        try:
+            os.makedirs(directory, exist_ok=True)
+            sink = logging.handlers.RotatingFileHandler(
+                os.path.join(directory, LOG_FILE),
+                maxBytes=MAX_LOG_BYTES,
+                backupCount=LOG_BACKUPS,
+                encoding="utf-8",
+                delay=True,
+            )
+        except OSError as e:
+            print(f"[Log] Cannot open log file in {directory}: {e}")
+        else:
+            sink.setFormatter(_TagFormatter(FILE_FORMAT))
+            root.addHandler(sink)
+    _configured = True
+    return root
+
+
+def get_logger(name):
+    """Логгер модуля name (db, ui, ui.window, ...)"""
+    if not _configured:
+        configure()
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+def set_level(name, level):
+    """Уровень модуля во время работы (None - общий уровень)"""
+    logger = logging.getLogger(f"{ROOT_LOGGER}.{name}" if name else ROOT_LOGGER)
+    if isinstance(level, str):
+        level = logging.getLevelName(level.upper())
+    logger.setLevel(logging.NOTSET if level is None else level)
+
+
+def recent_events(limit=None):
+    """Последние события кольцевого буфера, отформатированные как в файле"""
+    return RING.lines(limit)
@@ -45,7 +45,6 @@ from Cocoa import (
     NSSound,
 )
 from Foundation import (
-    NSLog,
     NSDateFormatter,
     NSDateComponentsFormatter,
     NSBundle,
@@ -54,6 +53,7 @@ from Foundation import (
     NSThread,
     NSString,
     NSUserDefaults,
+    NSSortDescriptor,
 )
 import os
 import sys
@@ -61,8 +61,29 @@ from PyObjCTools import AppHelper
 from datetime import datetime
 import objc
 
-from database import Database
+from database import MAINTENANCE_INTERVAL, Database
+from change_bus import PROJECT_EVENTS, SESSION_EVENTS
+from heartbeat import Heartbeat
+from ipc_server import (
+    RECENT_LIMIT,
+    IpcError,
+    IpcServer,
+    IpcState,
+    default_socket_path,
+    ipc_enabled,
+)
+from metrics import METRICS, UI_SESSION_VIEWS, UI_VIEWS_REBUILT
+from profiling import PROFILER, profiled
+from scheduler import Scheduler
+from session_model import SessionListModel
+from session_query import SessionQuery
+from task_table_model import TaskTableModel, format_hms
 from localization import t, get_localization
+from log import get_logger
+
+logger = get_logger("ui")
+window_logger = get_logger("ui.window")
+app_logger = get_logger("ui.app")
 
 
 # DEV mode: упрощённый запуск из исходников (без статус-бара и уведомлений)
@@ -184,13 +205,15 @@ def _getPrimaryScreen():
     screens = NSScreen.screens()
     if screens and len(screens) > 0:
         primary = screens[0]
-        NSLog(
-            f"[Window] Primary screen: {primary.frame().size.width}x{primary.frame().size.height}"
+        window_logger.debug(
+            "Primary screen: %sx%s",
+            primary.frame().size.width,
+            primary.frame().size.height,
         )
         return primary
     else:
         # Fallback to mainScreen if screens() fails
-        NSLog("[Window] WARNING: NSScreen.screens() returned empty, using mainScreen()")
+        window_logger.warning("NSScreen.screens() returned empty, using mainScreen()")
         return NSScreen.mainScreen()
 
 
@@ -200,19 +223,27 @@ def _logAllScreens():
     Helps understand multi-monitor setups.
     """
     screens = NSScreen.screens()
-    NSLog(f"[Window] Total screens detected: {len(screens)}")
+    window_logger.debug("Total screens detected: %s", len(screens))
 
     for i, screen in enumerate(screens):
         frame = screen.frame()
         visible = screen.visibleFrame()
-        NSLog(f"[Window] Screen {i}:")
-        NSLog(
-            f"  - Frame: origin=({frame.origin.x:.0f}, {frame.origin.y:.0f}), size={frame.size.width:.0f}x{frame.size.height:.0f}"
+        window_logger.debug("Screen %s:", i)
+        window_logger.debug(
+            "  - Frame: origin=(%.0f, %.0f), size=%.0fx%.0f",
+            frame.origin.x,
+            frame.origin.y,
+            frame.size.width,
+            frame.size.height,
         )
-        NSLog(
-            f"  - Visible: origin=({visible.origin.x:.0f}, {visible.origin.y:.0f}), size={visible.size.width:.0f}x{visible.size.height:.0f}"
+        window_logger.debug(
+            "  - Visible: origin=(%.0f, %.0f), size=%.0fx%.0f",
+            visible.origin.x,
+            visible.origin.y,
+            visible.size.width,
+            visible.size.height,
         )
-        NSLog(f"  - Is main screen: {i == 0}")
+        window_logger.debug("  - Is main screen: %s", i == 0)
 
 
 def _isWindowFullyVisible(window):
@@ -243,13 +274,13 @@ def _isWindowFullyVisible(window):
             <= center_y
             <= screen_frame.origin.y + screen_frame.size.height
         ):
-            NSLog(
-                f"[Window] Window center ({center_x:.0f}, {center_y:.0f}) is visible on screen"
+            window_logger.debug(
+                "Window center (%.0f, %.0f) is visible on screen", center_x, center_y
             )
             return True
 
-    NSLog(
-        f"[Window] WARNING: Window center ({center_x:.0f}, {center_y:.0f}) is OFF-SCREEN"
+    window_logger.warning(
+        "Window center (%.0f, %.0f) is OFF-SCREEN", center_x, center_y
     )
     return False
 
@@ -264,16 +295,16 @@ def _logWindowState(window, name):
         name: Window name for logging (e.g., "main_window")
     """
     frame = window.frame()
-    NSLog(f"[Window] State for '{name}':")
-    NSLog(f"  - Position: ({frame.origin.x:.0f}, {frame.origin.y:.0f})")
-    NSLog(f"  - Size: {frame.size.width:.0f}x{frame.size.height:.0f}")
-    NSLog(f"  - isVisible: {window.isVisible()}")
-    NSLog(f"  - isKeyWindow: {window.isKeyWindow()}")
-    NSLog(f"  - isMainWindow: {window.isMainWindow()}")
-    NSLog(f"  - isMiniaturized: {window.isMiniaturized()}")
-    NSLog(f"  - level: {window.level()}")
-    NSLog(f"  - alphaValue: {window.alphaValue()}")
-    NSLog(f"  - screen: {window.screen()}")
+    window_logger.debug("State for '%s':", name)
+    window_logger.debug("  - Position: (%.0f, %.0f)", frame.origin.x, frame.origin.y)
+    window_logger.debug("  - Size: %.0fx%.0f", frame.size.width, frame.size.height)
+    window_logger.debug("  - isVisible: %s", window.isVisible())
+    window_logger.debug("  - isKeyWindow: %s", window.isKeyWindow())
+    window_logger.debug("  - isMainWindow: %s", window.isMainWindow())
+    window_logger.debug("  - isMiniaturized: %s", window.isMiniaturized())
+    window_logger.debug("  - level: %s", window.level())
+    window_logger.debug("  - alphaValue: %s", window.alphaValue())
+    window_logger.debug("  - screen: %s", window.screen())
 
 
 class DeletableTableView(NSTableView):
@@ -292,7 +323,7 @@ class DeletableTableView(NSTableView):
                     owner.deleteSession_(None)
                     return
                 except Exception as e:
-                    NSLog(f"Ошибка при удалении по клавише Delete: {e}")
+                    logger.error("Ошибка при удалении по клавише Delete: %s", e)
         # Передаём обработку дальше по стандартной цепочке
         objc.super(DeletableTableView, self).keyDown_(event)
 
@@ -307,9 +338,40 @@ class TimeTrackerWindowController(NSObject):
         self.current_session_id = None
         self.start_time = None
         self.elapsed_seconds = 0
-        self.update_timer_ref = None
-        self.auto_refresh_ref = None
-        self.hourly_reminder_ref = None  # Таймер для часовых напоминаний
+        # Вся периодическая работа (тик, автообновление, heartbeat, напоминания) -
+        # задачи одного планировщика с единственным NSTimer на ближайшее пробуждение
+        self.scheduler = Scheduler()
+        self.scheduler_timer_ref = None
+        # Что нужно перезагрузить при следующем autoRefresh_ (см. change_bus)
+        self._sessions_dirty = False
+        self._projects_dirty = False
+        self.db.changes.subscribe(self._onSessionsChanged, SESSION_EVENTS)
+        self.db.changes.subscribe(self._onProjectsChanged, PROJECT_EVENTS)
+        # Heartbeat сессии; интервал в секундах из NSUserDefaults (0 = по умолчанию)
+        self.heartbeat = Heartbeat(
+            self.db,
+            NSUserDefaults.standardUserDefaults().integerForKey_("heartbeatInterval"),
+        )
+        # Профилирование обновлений списка; profileRefreshes > 0 - сохранить
+        # cProfile этого числа следующих обновлений (как MTIMER_PROFILE)
+        PROFILER.bind_database(self.db)
+        profile_refreshes = NSUserDefaults.standardUserDefaults().integerForKey_(
+            "profileRefreshes"
+        )
+        if profile_refreshes > 0:
+            PROFILER.capture_next(profile_refreshes)
+        # Метрики для долгих запусков; metricsInterval > 0 - писать снимок
+        # metrics.prom каждые N секунд (как MTIMER_METRICS)
+        METRICS.bind_database(self.db)
+        metrics_interval = NSUserDefaults.standardUserDefaults().integerForKey_(
+            "metricsInterval"
+        )
+        if metrics_interval > 0:
+            METRICS.enable(metrics_interval)
+        # Локальный IPC-сервер (ipc_server.py) отвечает из этого снимка;
+        # поднимается в setupUI, MTIMER_IPC=0 - не поднимать
+        self.ipc_state = IpcState()
+        self.ipc_server = None
         self.projects_cache = []
         self.today_sessions = []  # Инициализируем пустой список для сессий
         self.current_filter = "week"  # По умолчанию показываем неделю
@@ -319,16 +381,16 @@ class TimeTrackerWindowController(NSObject):
         return self
 
     def setupUI(self):
-        print("[Window] === setupUI: Starting for main_window ===")
+        window_logger.debug("setupUI: Starting for main_window")
 
         # Log all screens for debugging
         _logAllScreens()
 
         # Get primary screen (always screens()[0], NOT mainScreen())
-        print("[Window] === setupUI: Getting primary screen ===")
+        window_logger.debug("setupUI: Getting primary screen")
         screen = _getPrimaryScreen().frame()
-        print(
-            f"[Window] Primary screen size: {screen.size.width} x {screen.size.height}"
+        window_logger.debug(
+            "Primary screen size: %s x %s", screen.size.width, screen.size.height
         )
 
         # Default window dimensions
@@ -339,15 +401,19 @@ class TimeTrackerWindowController(NSObject):
         saved_pos = self.db.get_window_position("main_window")
 
         if saved_pos:
-            print(
-                f"[Window] Found saved position: x={saved_pos['x']:.0f}, y={saved_pos['y']:.0f}, size={saved_pos['width']:.0f}x{saved_pos['height']:.0f}"
+            window_logger.debug(
+                "Found saved position: x=%.0f, y=%.0f, size=%.0fx%.0f",
+                saved_pos["x"],
+                saved_pos["y"],
+                saved_pos["width"],
+                saved_pos["height"],
             )
             x = saved_pos["x"]
             y = saved_pos["y"]
             width = saved_pos["width"]
             height = saved_pos["height"]
         else:
-            print("[Window] No saved position, using defaults")
+            window_logger.debug("No saved position, using defaults")
             width = default_width
             height = default_height
             x = None  # Will use center() later
@@ -355,30 +421,30 @@ class TimeTrackerWindowController(NSObject):
 
         # Create window
         style = NSTitledWindowMask | NSClosableWindowMask | NSResizableWindowMask
-        print("[Window] === setupUI: Creating window ===")
+        window_logger.debug("setupUI: Creating window")
 
         # Create window at origin first (we'll position it after)
         self.window = NSWindow.alloc().initWithContentRect_styleMask_backing_defer_(
             NSMakeRect(0, 0, width, height), style, 2, False
         )
-        print("[Window] Window created")
+        window_logger.debug("Window created")
         self.window.setTitle_(APP_NAME)
 
         # Position window
         if saved_pos:
             # Use saved position
             self.window.setFrameOrigin_((x, y))
-            print(f"[Window] Applied saved position: ({x:.0f}, {y:.0f})")
+            window_logger.debug("Applied saved position: (%.0f, %.0f)", x, y)
 
             # Check if window is visible on any screen
             if not _isWindowFullyVisible(self.window):
-                print(
-                    "[Window] Saved position is off-screen, centering on primary screen"
+                window_logger.debug(
+                    "Saved position is off-screen, centering on primary screen"
                 )
                 self.window.center()
         else:
             # Center on primary screen for first launch
-            print("[Window] Centering window on primary screen")
+            window_logger.debug("Centering window on primary screen")
             self.window.center()
 
         # Log window state before showing
@@ -453,7 +519,7 @@ class TimeTrackerWindowController(NSObject):
             self.timerCard.setCornerRadius_(12.0)
             self.timerCard.setContentViewMargins_((0, 0))
         except Exception as e:
-            NSLog(f"Не удалось создать NSBox, используем NSView: {e}")
+            logger.error("Не удалось создать NSBox, используем NSView: %s", e)
             self.timerCard = NSView.alloc().initWithFrame_(
                 NSMakeRect(5, cardY, width - 10, self.cardHeight)
             )
@@ -475,6 +541,9 @@ class TimeTrackerWindowController(NSObject):
             self.descriptionField.setTextColor_(NSColor.textColor())
         except Exception:
             pass
+        # Подсказки задач при наборе (см. controlTextDidChange_)
+        self.descriptionField.setDelegate_(self)
+        self._completing_description = False
         self.timerCard.addSubview_(self.descriptionField)
 
         self.projectPopup = NSPopUpButton.alloc().initWithFrame_pullsDown_(
@@ -496,14 +565,11 @@ class TimeTrackerWindowController(NSObject):
         try:
             # Спробуємо створити селектор
             selector = objc.selector(self.createProject_, signature=b"v@:")
-            NSLog(f"=== Selector created: {selector} ===")
+            logger.debug("Selector created: %s", selector)
             self.addProjectBtn.setAction_(selector)
-            NSLog("=== Action set successfully ===")
+            logger.debug("Action set successfully")
         except Exception as e:
-            NSLog(f"=== ERROR setting action: {e} ===")
-            import traceback
-
-            traceback.print_exc()
+            logger.exception("Error setting action: %s", e)
         self.timerCard.addSubview_(self.addProjectBtn)
 
         self.timerLabel = NSTextField.alloc().initWithFrame_(
@@ -831,32 +897,43 @@ class TimeTrackerWindowController(NSObject):
         self.reloadSessions()
 
         # ТЕСТ: Перевіримо чи існує метод createProject_
-        NSLog(
-            f"=== Testing createProject_ method exists: {hasattr(self, 'createProject_')} ==="
+        logger.debug(
+            "Testing createProject_ method exists: %s", hasattr(self, "createProject_")
         )
         if hasattr(self, "createProject_"):
-            NSLog("=== createProject_ method found ===")
+            logger.debug("createProject_ method found")
         else:
-            NSLog("=== ERROR: createProject_ method NOT FOUND ===")
+            logger.error("createProject_ method not found")
 
         # Проверяем незавершенные сессии и восстанавливаем таймер
         self._restoreActiveSession()
-
-        # Таймеры
-        self.update_timer_ref = (
-            NSTimer.scheduledTimerWithTimeInterval_target_selector_userInfo_repeats_(
-                1.0, self, objc.selector(self.tick_, signature=b"v@:"), None, True
-            )
+        self._startIpcServer()
+
+        # Периодические задачи
+        self.scheduler.every(
+            "auto_refresh",
+            5.0,
+            lambda now: self.autoRefresh_(None),
+            tolerance=1.0,
+            jitter=0.5,
         )
-        self.auto_refresh_ref = (
-            NSTimer.scheduledTimerWithTimeInterval_target_selector_userInfo_repeats_(
-                5.0,
-                self,
-                objc.selector(self.autoRefresh_, signature=b"v@:"),
-                None,
-                True,
-            )
+        # Обслуживание базы: сам метод пропускает заход, если база не простаивает
+        self.scheduler.every(
+            "db_maintenance",
+            MAINTENANCE_INTERVAL,
+            lambda now: self.db.run_maintenance(),
+            tolerance=30.0,
+            jitter=30.0,
         )
+        if METRICS.enabled:
+            self.scheduler.every(
+                "metrics",
+                METRICS.interval,
+                lambda now: METRICS.write(),
+                tolerance=METRICS.interval / 2,
+            )
+        self.scheduler.on_change = self._armScheduler
+        self._armScheduler()
 
         self.window.makeKeyAndOrderFront_(None)
 
@@ -874,11 +951,11 @@ class TimeTrackerWindowController(NSObject):
                 None,
             )
         except Exception as e:
-            NSLog(f"Не удалось подписаться на изменение темы: {e}")
+            logger.error("Не удалось подписаться на изменение темы: %s", e)
 
     def windowShouldClose_(self, sender):
         """Перехватываем закрытие окна - скрываем вместо закрытия"""
-        NSLog("[Window] windowShouldClose_ called - saving position before hiding")
+        window_logger.info("windowShouldClose_ called - saving position before hiding")
         # Save window position before hiding
         self._saveWindowPosition()
         self.window.orderOut_(None)
@@ -904,8 +981,13 @@ class TimeTrackerWindowController(NSObject):
                         screen_index = i
                         break
 
-            NSLog(
-                f"[Window] Saving main_window position: ({x:.0f}, {y:.0f}), size: {width:.0f}x{height:.0f}, screen: {screen_index}"
+            window_logger.debug(
+                "Saving main_window position: (%.0f, %.0f), size: %.0fx%.0f, screen: %s",
+                x,
+                y,
+                width,
+                height,
+                screen_index,
             )
 
             # Save to database
@@ -913,13 +995,44 @@ class TimeTrackerWindowController(NSObject):
                 "main_window", x, y, width, height, screen_index
             )
 
-            NSLog("[Window] Position saved successfully to database")
+            window_logger.debug("Position saved successfully to database")
 
         except Exception as e:
-            NSLog(f"[Window] ERROR saving window position: {e}")
-            import traceback
+            window_logger.exception("Error saving window position: %s", e)
 
-            traceback.print_exc()
+    def controlTextDidChange_(self, notification):
+        """Показывает подсказки задач при наборе описания"""
+        if notification.object() is not self.descriptionField:
+            return
+        if self._completing_description:
+            return
+        editor = notification.userInfo()["NSFieldEditor"]
+        self._completing_description = True
+        try:
+            editor.complete_(None)
+        finally:
+            self._completing_description = False
+
+    def control_textView_completions_forPartialWordRange_indexOfSelectedItem_(
+        self, control, textView, words, charRange, index
+    ):
+        """Подсказки из frecency-индекса задач для текущего проекта"""
+        text = str(textView.string())
+        if not text.strip():
+            return ([], -1)
+        project_id = None
+        idx = self.projectPopup.indexOfSelectedItem()
+        if idx > 0 and idx - 1 < len(self.projects_cache):
+            project_id = self.projects_cache[idx - 1]["id"]
+        # NSTextView дополняет только последнее слово, поэтому отдаём
+        # окончание названия, начиная с позиции этого слова
+        start = charRange.location
+        completions = [
+            name[start:]
+            for name in self.db.suggest_task_names(text, project_id)
+            if len(name) > len(text)
+        ]
+        return (completions, -1)
 
     def windowDidResize_(self, notification):
         """Обработчик изменения размера окна"""
@@ -1035,11 +1148,11 @@ class TimeTrackerWindowController(NSObject):
             #     col3.setWidth_(width*0.15)
 
         except Exception as e:
-            NSLog(f"Ошибка при изменении размера окна: {e}")
+            logger.error("Ошибка при изменении размера окна: %s", e)
 
     def themeChanged_(self, notification):
         """Обработчик изменения системной темы"""
-        NSLog("Обнаружено изменение темы, обновляем цвета...")
+        logger.debug("Обнаружено изменение темы, обновляем цвета...")
         try:
             # Обновляем цвет карточки - если это NSBox, используем setFillColor
             try:
@@ -1072,7 +1185,7 @@ class TimeTrackerWindowController(NSObject):
                 if selectedIdx >= 0:
                     self.projectPopup.selectItemAtIndex_(selectedIdx)
             except Exception as e:
-                NSLog(f"Ошибка обновления полей ввода: {e}")
+                logger.error("Ошибка обновления полей ввода: %s", e)
 
             # Обновляем цвета текстовых меток
             self.timerLabel.setTextColor_(NSColor.labelColor())
@@ -1104,7 +1217,7 @@ class TimeTrackerWindowController(NSObject):
                 try:
                     btn.display()
                 except Exception as e:
-                    NSLog(f"Ошибка обновления кнопки: {e}")
+                    logger.error("Ошибка обновления кнопки: %s", e)
 
             # Обновляем стоп/старт кнопку
             try:
@@ -1116,15 +1229,16 @@ class TimeTrackerWindowController(NSObject):
             self.window.contentView().setNeedsDisplay_(True)
             self.window.display()
 
-            NSLog("Тема успешно обновлена")
+            logger.debug("Тема успешно обновлена")
         except Exception as e:
-            NSLog(f"Ошибка при обновлении темы: {e}")
+            logger.error("Ошибка при обновлении темы: %s", e)
 
     # Табличные данные
 
     # Данные и действия
     def reloadProjects(self):
         """Перезагружает список проектов и сохраняет выбор по ID (а не по названию)."""
+        self._projects_dirty = False
         self.projects_cache = self.db.get_all_projects()
         prev_selected_id = getattr(self, "selected_project_id", None)
         self.projectPopup.removeAllItems()
@@ -1146,121 +1260,82 @@ class TimeTrackerWindowController(NSObject):
             self.projectPopup.selectItemAtIndex_(idx_to_select)
 
     def reloadSessions(self):
-        # Загружаем сессии в зависимости от выбранного фильтра и проекта
-        if self.selected_project_id is not None:
-            # Фильтр по проекту
-            if self.current_filter == "custom":
-                # Custom период - используем диапазон дат
-                from_date = getattr(self, "custom_from_date", None)
-                to_date = getattr(self, "custom_to_date", None)
-                if from_date and to_date:
-                    # Добавляем время в формате ISO для корректного сравнения
-                    from_datetime = from_date + "T00:00:00"
-                    to_datetime = to_date + "T23:59:59"
-
-                    self.today_sessions = [
-                        dict(row)
-                        for row in self.db.get_sessions_in_range(
-                            from_datetime, to_datetime
-                        )
-                    ]
-                    self.today_sessions = [
-                        s
-                        for s in self.today_sessions
-                        if s["project_id"] == self.selected_project_id
-                    ]
-                    period_total = sum(
-                        [(s["duration"] or 0) for s in self.today_sessions]
-                    )
-                    period_label = f"{from_date} - {to_date}"
-                else:
-                    self.today_sessions = []
-                    period_total = 0
-                    period_label = t("custom_period")
+        with PROFILER.refresh("reloadSessions"):
+            self._reloadSessions()
+
+    @objc.python_method
+    def _reloadSessions(self):
+        self._sessions_dirty = False
+        # Фильтры периода и проекта; сессии подгружаются дельтой по change_seq
+        project_id = self.selected_project_id
+        if self.current_filter == "custom":
+            # Custom период - используем диапазон дат
+            from_date = getattr(self, "custom_from_date", None)
+            to_date = getattr(self, "custom_to_date", None)
+            if from_date and to_date:
+                # Добавляем время в формате ISO для корректного сравнения
+                filters = {
+                    "project_id": project_id,
+                    "start_date": from_date + "T00:00:00",
+                    "end_date": to_date + "T23:59:59",
+                }
+                period_label = f"{from_date} - {to_date}"
             else:
-                # Получаем сессии через get_sessions_by_filter и фильтруем по project_id
-                self.today_sessions = [
-                    dict(row)
-                    for row in self.db.get_sessions_by_filter(
-                        self.current_filter, self.selected_project_id
-                    )
-                ]
-
-                # Получаем итог через соответствующий метод
-                if self.current_filter == "today":
-                    period_total = self.db.get_today_total(self.selected_project_id)
-                    period_label = t("today_label")
-                elif self.current_filter == "week":
-                    period_total = self.db.get_week_total(self.selected_project_id)
-                    period_label = t("week_label")
-                else:  # month
-                    period_total = self.db.get_month_total(self.selected_project_id)
-                    period_label = t("month_label")
+                filters = None
+                period_label = t("custom_period")
+        else:
+            filters = self.db.get_period_filters(self.current_filter, project_id)
+            period_label = {
+                "today": t("today_label"),
+                "week": t("week_label"),
+            }.get(self.current_filter, t("month_label"))
+
+        if filters is None:
+            self.session_model = SessionListModel(self.db)
+            self.today_sessions = []
+            period_total = 0
+            live_seconds = 0
+            changed = True
+        else:
+            if not hasattr(self, "session_model"):
+                self.session_model = SessionListModel(self.db)
+            changed = self.session_model.load(filters)
+            self.today_sessions = self.session_model.rows
+            # Идущая сессия ещё без duration - добавляем её время до heartbeat
+            live_seconds = self.db.get_live_seconds(
+                project_id, filters.get("start_date"), filters.get("end_date")
+            )
+            period_total = self.session_model.total_duration() + live_seconds
 
+        if project_id is not None:
             # Находим проект для отображения ставки
             project = next(
-                (p for p in self.projects_cache if p["id"] == self.selected_project_id),
+                (p for p in self.projects_cache if p["id"] == project_id),
                 None,
             )
 
-            # Добавляем стоимость если есть ставка
+            # Добавляем стоимость если есть ставка: завершённые сессии - по
+            # сохранённой стоимости, идущая - по ставке на момент её начала
             if project and project["hourly_rate"] > 0:
-                hours = period_total / 3600.0
-                cost = hours * project["hourly_rate"]
-                period_label += f" (${cost:.2f})"
-        else:
-            # Все проекты
-            if self.current_filter == "custom":
-                # Custom период
-                from_date = getattr(self, "custom_from_date", None)
-                to_date = getattr(self, "custom_to_date", None)
-                if from_date and to_date:
-                    # Добавляем время в формате ISO для корректного сравнения
-                    from_datetime = from_date + "T00:00:00"
-                    to_datetime = to_date + "T23:59:59"
-
-                    self.today_sessions = [
-                        dict(row)
-                        for row in self.db.get_sessions_in_range(
-                            from_datetime, to_datetime
-                        )
-                    ]
-                    period_total = sum(
-                        [(s["duration"] or 0) for s in self.today_sessions]
+                cost = sum(s.cost or 0 for s in self.today_sessions)
+                if live_seconds:
+                    cost += self.db.get_live_cost(
+                        project_id, filters.get("start_date"), filters.get("end_date")
                     )
-                    period_label = f"{from_date} - {to_date}"
-                else:
-                    self.today_sessions = []
-                    period_total = 0
-                    period_label = t("custom_period")
-            elif self.current_filter == "today":
-                self.today_sessions = [
-                    dict(row) for row in self.db.get_today_sessions()
-                ]
-                period_total = sum([(s["duration"] or 0) for s in self.today_sessions])
-                period_label = t("today_label")
-            elif self.current_filter == "week":
-                self.today_sessions = [dict(row) for row in self.db.get_week_sessions()]
-                period_total = self.db.get_week_total()
-                period_label = t("week_label")
-            else:  # month
-                self.today_sessions = [
-                    dict(row) for row in self.db.get_month_sessions()
-                ]
-                period_total = self.db.get_month_total()
-                period_label = t("month_label")
-
-        NSLog(
-            f"reloadSessions: загружено {len(self.today_sessions)} сессий ({self.current_filter})"
+                period_label += f" (${cost:.2f})"
+
+        logger.debug(
+            "reloadSessions: загружено %s сессий (%s)",
+            len(self.today_sessions),
+            self.current_filter,
         )
 
         # Обновляем метки
         today_total = sum(
             [
-                (s["duration"] or 0)
+                s.duration
                 for s in self.today_sessions
-                if datetime.fromisoformat(s["start_time"]).date()
-                == datetime.now().date()
+                if s.start.date() == datetime.now().date()
             ]
         )
         self.todayTotalField.setStringValue_(self.formatDuration(today_total))
@@ -1268,15 +1343,18 @@ class TimeTrackerWindowController(NSObject):
             f"{t('total')}: {self.formatDuration(period_total)}"
         )
 
-        # Оновлюємо StackView з сесіями
-        self.updateSessionsList()
+        # Оновлюємо StackView з сесіями лише якщо список змінився
+        if changed:
+            self.updateSessionsList()
         self.updateFilterButtons()
+        self.ipc_state.invalidate()
 
     @objc.python_method
+    @profiled("updateSessionsList")
     def updateSessionsList(self):
         """Оновлює список сесій в контейнері"""
         try:
-            NSLog(f"=== updateSessionsList: {len(self.today_sessions)} sessions ===")
+            logger.debug("updateSessionsList: %s sessions", len(self.today_sessions))
 
             # ПОЛНОСТЬЮ пересоздаём контейнер - это избежит проблем с кешированием
             # Удаляем старый контейнер из scroll view
@@ -1290,14 +1368,11 @@ class TimeTrackerWindowController(NSObject):
                 NSMakeRect(0, 0, scroll_width, new_height)
             )
 
-            NSLog(f"=== Container created, size: {scroll_width} x {new_height} ===")
+            logger.debug("Container created, size: %s x %s", scroll_width, new_height)
 
             # Додаємо нові сесії
             y_offset = 0
-            for i, session in enumerate(self.today_sessions):
-                NSLog(
-                    f"=== Creating view {i + 1}/{len(self.today_sessions)} for session: {session.get('description', 'no desc')} ==="
-                )
+            for session in self.today_sessions:
                 sessionView = self.createSessionView(session)
                 # Позиционируем от верхнего края
                 sessionView.setFrame_(NSMakeRect(10, y_offset, scroll_width - 20, 40))
@@ -1306,25 +1381,26 @@ class TimeTrackerWindowController(NSObject):
 
             # Устанавливаем новый контейнер в scroll view
             self.sessionsScroll.setDocumentView_(self.sessionsStack)
+            UI_SESSION_VIEWS.set(len(self.today_sessions))
 
             # Явно обновляем scroll view
             self.sessionsScroll.setNeedsDisplay_(True)
-            NSLog(
-                f"=== Container updated with {len(self.today_sessions)} items, height: {new_height} ==="
+            logger.debug(
+                "Container updated with %s items, height: %s",
+                len(self.today_sessions),
+                new_height,
             )
         except Exception as e:
-            NSLog(f"=== ERROR updating sessions list: {e} ===")
-            import traceback
-
-            traceback.print_exc()
+            logger.exception("Error updating sessions list: %s", e)
 
     @objc.python_method
+    @profiled("createSessionView")
     def createSessionView(self, session):
         """Створює візуальний елемент для однієї сесії"""
+        UI_VIEWS_REBUILT.value += 1
         try:
-            NSLog(f"=== createSessionView START ===")
+            logger.debug("createSessionView: session %s", session.get("id"))
             width = self.sessionsScroll.frame().size.width - 20
-            NSLog(f"=== width: {width} ===")
 
             # Контейнер для сесії
             container = NSView.alloc().initWithFrame_(NSMakeRect(0, 0, width, 40))
@@ -1342,11 +1418,9 @@ class TimeTrackerWindowController(NSObject):
                     container.layer().setBackgroundColor_(
                         NSColor.controlHighlightColor().CGColor()
                     )
-            NSLog(f"=== Container created ===")
 
             # Опис
             description = session.get("description", "") or t("no_description")
-            NSLog(f"=== Creating label ===")
             descLabel = (
                 DoubleClickableTextField.alloc().initWithFrame_target_sessionId_(
                     NSMakeRect(10, 20, width * 0.5, 18), self, session_id
@@ -1360,27 +1434,19 @@ class TimeTrackerWindowController(NSObject):
             descLabel.setFont_(NSFont.systemFontOfSize_(13))
             descLabel.setTextColor_(NSColor.labelColor())
             container.addSubview_(descLabel)
-            NSLog(f"=== Description label added ===")
 
             # Час
-            start_time = session.get("start_time", "")
-            if start_time:
-                try:
-                    start_dt = datetime.fromisoformat(str(start_time))
-                    end_time = session.get("end_time", "")
-                    if end_time:
-                        end_dt = datetime.fromisoformat(str(end_time))
-                        time_str = (
-                            f"{start_dt.strftime('%H:%M')} - {end_dt.strftime('%H:%M')}"
-                        )
-                    else:
-                        time_str = f"{start_dt.strftime('%H:%M')} - {t('running')}"
-                except:
-                    time_str = ""
+            # Час (start/end уже розібрані при завантаженні Session)
+            if session.start is not None:
+                if session.end is not None:
+                    time_str = (
+                        f"{session.start.strftime('%H:%M')} - {session.end.strftime('%H:%M')}"
+                    )
+                else:
+                    time_str = f"{session.start.strftime('%H:%M')} - {t('running')}"
             else:
                 time_str = ""
 
-            NSLog(f"=== Creating time label ===")
             timeLabel = NSTextField.alloc().initWithFrame_(
                 NSMakeRect(width * 0.5 + 10, 20, width * 0.25, 18)
             )
@@ -1392,13 +1458,10 @@ class TimeTrackerWindowController(NSObject):
             timeLabel.setFont_(NSFont.systemFontOfSize_(12))
             timeLabel.setTextColor_(NSColor.secondaryLabelColor())
             container.addSubview_(timeLabel)
-            NSLog(f"=== Time label added ===")
 
             # Тривалість
-            duration = session.get("duration", 0) or 0
-            duration_str = self.formatDuration(int(duration))
+            duration_str = self.formatDuration(session.duration)
 
-            NSLog(f"=== Creating duration label ===")
             durationLabel = NSTextField.alloc().initWithFrame_(
                 NSMakeRect(width * 0.75 + 10, 20, width * 0.2, 18)
             )
@@ -1410,7 +1473,6 @@ class TimeTrackerWindowController(NSObject):
             durationLabel.setFont_(NSFont.systemFontOfSize_(12))
             durationLabel.setTextColor_(NSColor.secondaryLabelColor())
             container.addSubview_(durationLabel)
-            NSLog(f"=== Duration label added ===")
 
             # Кнопка "Оплачено" (зеленая галочка)
             paidBtn = HoverDeleteButton.alloc().initWithFrame_(
@@ -1433,7 +1495,6 @@ class TimeTrackerWindowController(NSObject):
                 NSColor.colorWithWhite_alpha_(0.95, 0.7).CGColor()
             )
             container.addSubview_(paidBtn)
-            NSLog(f"=== Paid button added ===")
 
             # Кнопка редактирования (карандаш)
             editBtn = HoverDeleteButton.alloc().initWithFrame_(
@@ -1458,7 +1519,6 @@ class TimeTrackerWindowController(NSObject):
                 NSColor.colorWithWhite_alpha_(0.95, 0.7).CGColor()
             )
             container.addSubview_(editBtn)
-            NSLog(f"=== Edit button added ===")
 
             # Кнопка удаления в стиле macOS с hover эффектом
             deleteBtn = HoverDeleteButton.alloc().initWithFrame_(
@@ -1485,7 +1545,6 @@ class TimeTrackerWindowController(NSObject):
                 NSColor.colorWithWhite_alpha_(0.95, 0.7).CGColor()
             )
             container.addSubview_(deleteBtn)
-            NSLog(f"=== Delete button added ===")
 
             # Кнопка выбора (прозрачная, на весь ряд кроме области кнопок)
             # Добавляем последней, чтобы она была поверх всех текстовых полей
@@ -1498,15 +1557,10 @@ class TimeTrackerWindowController(NSObject):
             selectBtn.setAction_(objc.selector(self.selectSession_, signature=b"v@:"))
             selectBtn.setTag_(session_id)
             container.addSubview_(selectBtn)
-            NSLog(f"=== Select button added ===")
 
-            NSLog(f"=== createSessionView END - returning container ===")
             return container
         except Exception as e:
-            NSLog(f"=== ERROR in createSessionView: {e} ===")
-            import traceback
-
-            traceback.print_exc()
+            logger.exception("Error in createSessionView: %s", e)
             # Возвращаем пустой контейнер если ошибка
             return NSView.alloc().initWithFrame_(NSMakeRect(0, 0, 100, 40))
 
@@ -1543,11 +1597,11 @@ class TimeTrackerWindowController(NSObject):
         )
 
     def setFilterToday_(self, _):
-        NSLog(
-            f"=== setFilterToday called, current_filter was: {self.current_filter} ==="
+        logger.debug(
+            "setFilterToday called, current_filter was: %s", self.current_filter
         )
         self.current_filter = "today"
-        NSLog(f"=== setFilterToday new filter: {self.current_filter} ===")
+        logger.debug("setFilterToday new filter: %s", self.current_filter)
         # Скрываем поля custom периода
         self.fromDateLabel.setHidden_(True)
         self.fromDatePicker.setHidden_(True)
@@ -1562,7 +1616,7 @@ class TimeTrackerWindowController(NSObject):
             self.selected_session_id = session_id
             self.updateSessionsList()
         except Exception as e:
-            NSLog(f"selectSession_ error: {e}")
+            logger.error("selectSession_ error: %s", e)
 
     def deleteSessionButton_(self, sender):
         try:
@@ -1585,7 +1639,7 @@ class TimeTrackerWindowController(NSObject):
                     self.selected_session_id = None
                 self.reloadSessions()
         except Exception as e:
-            NSLog(f"deleteSessionButton_ error: {e}")
+            logger.error("deleteSessionButton_ error: %s", e)
 
     def markSessionAsPaid_(self, sender):
         """Отметить сессию как оплаченную"""
@@ -1593,6 +1647,10 @@ class TimeTrackerWindowController(NSObject):
             session_id = sender.tag()
             if session_id is None or session_id < 0:
                 return
+            # Сессии из архива только для чтения
+            if self.db.is_archived_session(session_id):
+                self.showWarning_(t("archived_session_read_only"))
+                return
 
             # Подтверждение
             alert = NSAlert.alloc().init()
@@ -1606,12 +1664,13 @@ class TimeTrackerWindowController(NSObject):
             # NSAlertFirstButtonReturn == 1000
             if response == 1000:
                 # Отмечаем как оплаченную
-                self.db.mark_session_as_paid(session_id)
+                if not self.db.mark_session_as_paid(session_id):
+                    self.showWarning_(t("session_update_failed"))
 
                 # Обновляем UI
                 self.reloadSessions()
         except Exception as e:
-            NSLog(f"markSessionAsPaid_ error: {e}")
+            logger.error("markSessionAsPaid_ error: %s", e)
 
     def editSessionButton_(self, sender):
         """Редактировать сессию через простой диалог"""
@@ -1621,10 +1680,7 @@ class TimeTrackerWindowController(NSObject):
                 return
             self.editSessionById_(session_id)
         except Exception as e:
-            NSLog(f"editSessionButton_ error: {e}")
-            import traceback
-
-            traceback.print_exc()
+            logger.exception("editSessionButton_ error: %s", e)
 
     def editSessionById_(self, session_id):
         """Редактировать сессию по ID (используется для кнопки и двойного клика)"""
@@ -1638,6 +1694,10 @@ class TimeTrackerWindowController(NSObject):
 
             if not session:
                 return
+            # Сессии из архива только для чтения
+            if self.db.is_archived_session(session_id):
+                self.showWarning_(t("archived_session_read_only"))
+                return
 
             # Создаем диалог редактирования
             alert = NSAlert.alloc().init()
@@ -1703,19 +1763,18 @@ class TimeTrackerWindowController(NSObject):
                 ):
                     # Перезагружаем список
                     self.reloadSessions()
+                else:
+                    self.showWarning_(t("session_update_failed"))
 
         except Exception as e:
-            NSLog(f"editSessionById_ error: {e}")
-            import traceback
-
-            traceback.print_exc()
+            logger.exception("editSessionById_ error: %s", e)
 
     def setFilterWeek_(self, _):
-        NSLog(
-            f"=== setFilterWeek called, current_filter was: {self.current_filter} ==="
+        logger.debug(
+            "setFilterWeek called, current_filter was: %s", self.current_filter
         )
         self.current_filter = "week"
-        NSLog(f"=== setFilterWeek new filter: {self.current_filter} ===")
+        logger.debug("setFilterWeek new filter: %s", self.current_filter)
         # Скрываем поля custom периода
         self.fromDateLabel.setHidden_(True)
         self.fromDatePicker.setHidden_(True)
@@ -1725,11 +1784,11 @@ class TimeTrackerWindowController(NSObject):
         self.reloadSessions()
 
     def setFilterMonth_(self, _):
-        NSLog(
-            f"=== setFilterMonth called, current_filter was: {self.current_filter} ==="
+        logger.debug(
+            "setFilterMonth called, current_filter was: %s", self.current_filter
         )
         self.current_filter = "month"
-        NSLog(f"=== setFilterMonth new filter: {self.current_filter} ===")
+        logger.debug("setFilterMonth new filter: %s", self.current_filter)
         # Скрываем поля custom периода
         self.fromDateLabel.setHidden_(True)
         self.fromDatePicker.setHidden_(True)
@@ -1739,8 +1798,8 @@ class TimeTrackerWindowController(NSObject):
         self.reloadSessions()
 
     def setFilterCustom_(self, _):
-        NSLog(
-            f"=== setFilterCustom called, current_filter was: {self.current_filter} ==="
+        logger.debug(
+            "setFilterCustom called, current_filter was: %s", self.current_filter
         )
         # Показываем/скрываем поля выбора дат
         is_hidden = self.fromDateField.isHidden()
@@ -1856,7 +1915,7 @@ class TimeTrackerWindowController(NSObject):
 
             # Валидация - проверяем что from_date <= to_date
             if from_date_obj.compare_(to_date_obj) == 1:  # NSOrderedDescending
-                NSLog("From date is after to date")
+                logger.info("From date is after to date")
                 alert = NSAlert.alloc().init()
                 alert.setMessageText_(t("error"))
                 alert.setInformativeText_("Начальная дата должна быть раньше конечной")
@@ -1869,11 +1928,11 @@ class TimeTrackerWindowController(NSObject):
             self.current_filter = "custom"
             self.custom_from_date = from_date
             self.custom_to_date = to_date
-            NSLog(f"=== setFilterCustom: from {from_date} to {to_date} ===")
+            logger.debug("setFilterCustom: from %s to %s", from_date, to_date)
             self.reloadSessions()
 
         except Exception as e:
-            NSLog(f"applyCustomFilter_ error: {e}")
+            logger.error("applyCustomFilter_ error: %s", e)
 
     def projectSelected_(self, sender):
         """Обработчик выбора проекта в dropdown"""
@@ -1886,7 +1945,7 @@ class TimeTrackerWindowController(NSObject):
         else:
             self.selected_project_id = None
 
-        NSLog(f"Выбран проект: {self.selected_project_id}")
+        logger.info("Выбран проект: %s", self.selected_project_id)
         self.reloadSessions()
 
     def deleteSession_(self, sender):
@@ -1914,13 +1973,14 @@ class TimeTrackerWindowController(NSObject):
         # NSAlertFirstButtonReturn = 1000 (Delete), NSAlertSecondButtonReturn = 1001 (Cancel)
         if response == 1000:  # Delete button
             if self.db.delete_session(session_id):
-                NSLog(f"Сессия {session_id} удалена")
+                logger.info("Сессия %s удалена", session_id)
                 # Если удалили активную сессию — сбросим состояние таймера
                 try:
                     if getattr(self, "current_session_id", None) == session_id:
                         self.timer_running = False
                         self.current_session_id = None
                         self.start_time = None
+                        self._stopTrackingJobs()
                         self._updateStartStopAppearance()
                         try:
                             NSApp.delegate().updateStatusItem()
@@ -1930,7 +1990,7 @@ class TimeTrackerWindowController(NSObject):
                     pass
                 self.reloadSessions()
             else:
-                NSLog(f"Не удалось удалить сессию {session_id}")
+                logger.error("Не удалось удалить сессию %s", session_id)
 
     @objc.python_method
     def formatDuration(self, seconds):
@@ -1939,9 +1999,9 @@ class TimeTrackerWindowController(NSObject):
         s = seconds % 60
         return f"{h:02d}:{m:02d}:{s:02d}"
 
-    def tick_(self, _):
+    @objc.python_method
+    def _tick(self, now):
         if self.timer_running and self.start_time is not None:
-            now = datetime.now()
             elapsed = (now - self.start_time).total_seconds()
             self.timerLabel.setStringValue_(self.formatDuration(int(elapsed)))
 
@@ -1951,78 +2011,77 @@ class TimeTrackerWindowController(NSObject):
             except Exception:
                 pass
 
-            # Проверяем переход через полночь
-            if self.start_time.date() != now.date():
-                NSLog(
-                    "Обнаружен переход через полночь! Автоматически останавливаем таймер."
-                )
-                # Останавливаем текущую сессию в 23:59:59 предыдущего дня
-                if self.current_session_id:
-                    end_of_day = self.start_time.replace(hour=23, minute=59, second=59)
-                    conn = self.db.get_connection()
-                    cursor = conn.cursor()
-                    duration = int((end_of_day - self.start_time).total_seconds())
-                    cursor.execute(
-                        """
-                        UPDATE time_sessions 
-                        SET end_time = ?, duration = ?
-                        WHERE id = ?
-                    """,
-                        (end_of_day.isoformat(), duration, self.current_session_id),
-                    )
-                    conn.commit()
-
-                    # Автоматически создаём новую сессию с началом в 00:00:00 нового дня
-                    idx = self.projectPopup.indexOfSelectedItem()
-                    project_id = None
-                    if idx > 0 and idx - 1 < len(self.projects_cache):
-                        project_id = self.projects_cache[idx - 1]["id"]
-
-                    if project_id:
-                        desc = self.descriptionField.stringValue().strip()
-                        # Если описание пустое, берем последнее для проекта
-                        if not desc:
-                            desc = self.db.get_last_description_for_project(project_id)
-                            self.descriptionField.setStringValue_(desc)
-
-                        start_of_new_day = now.replace(
-                            hour=0, minute=0, second=0, microsecond=0
-                        )
+    def autoRefresh_(self, _):
+        """
+        Перезагружает только то, что изменилось. В тихом приложении это одна
+        PRAGMA data_version (изменения других процессов и окон).
+        """
+        self.db.poll_external_changes()
+        if self._projects_dirty:
+            self.reloadProjects()
+        if self._sessions_dirty:
+            self.reloadSessions()
 
-                        # Получаем или создаём task_name_id
-                        task_name_id = (
-                            self.db.get_or_create_task_name(desc) if desc else None
-                        )
+    @objc.python_method
+    def _onSessionsChanged(self, event):
+        self._sessions_dirty = True
 
-                        cursor.execute(
-                            """
-                            INSERT INTO time_sessions (project_id, description, start_time, task_name_id)
-                            VALUES (?, ?, ?, ?)
-                        """,
-                            (
-                                project_id,
-                                desc,
-                                start_of_new_day.isoformat(),
-                                task_name_id,
-                            ),
-                        )
-                        conn.commit()
-                        self.current_session_id = cursor.lastrowid
-                        self.start_time = start_of_new_day
-                        NSLog(
-                            f"Создана новая сессия {self.current_session_id} с началом в {start_of_new_day}, task_name_id={task_name_id}"
-                        )
-                        self.reloadSessions()
+    @objc.python_method
+    def _onProjectsChanged(self, event):
+        self._projects_dirty = True
 
-    def autoRefresh_(self, _):
-        self.reloadSessions()
+    @objc.python_method
+    def _armScheduler(self):
+        """Перевзводит единственный NSTimer на ближайшее пробуждение планировщика"""
+        if self.scheduler_timer_ref is not None:
+            self.scheduler_timer_ref.invalidate()
+            self.scheduler_timer_ref = None
+        delay = self.scheduler.next_wakeup()
+        if delay is not None:
+            self.scheduler_timer_ref = NSTimer.scheduledTimerWithTimeInterval_target_selector_userInfo_repeats_(
+                delay,
+                self,
+                objc.selector(self.schedulerWakeup_, signature=b"v@:@"),
+                None,
+                False,
+            )
+
+    def schedulerWakeup_(self, timer):
+        """Выполняет задачи, которым пора, и планирует следующее пробуждение"""
+        self.scheduler_timer_ref = None
+        self.scheduler.run_due()
+        self._armScheduler()
+
+    @objc.python_method
+    def _scheduleTimerJobs(self):
+        """Тик метки таймера и heartbeat - только пока идёт сессия"""
+        self.scheduler.every("tick", 1.0, self._tick, tolerance=0.05)
+        # Heartbeat может подождать до ближайшего тика
+        self.scheduler.every(
+            "heartbeat",
+            self.heartbeat.interval,
+            lambda now: self.heartbeat.beat(now),
+            tolerance=1.0,
+        )
+
+    @objc.python_method
+    def _startTrackingJobs(self):
+        self._scheduleTimerJobs()
+        self._startHourlyReminder()
+
+    @objc.python_method
+    def _stopTrackingJobs(self):
+        """В простое планировщик не просыпается каждую секунду"""
+        self.scheduler.cancel("tick")
+        self.scheduler.cancel("heartbeat")
+        self._stopHourlyReminder()
 
     def createProject_(self, _):
-        NSLog("=== createProject_ CALLED ===")
-        print("[DEBUG] createProject_ function called")
+        logger.debug("createProject_ CALLED")
+        logger.debug("createProject_ function called")
         # Alert с тремя полями: название, компания и ставка
         alert = NSAlert.alloc().init()
-        NSLog("=== NSAlert created ===")
+        logger.debug("NSAlert created")
         alert.setMessageText_(t("new_project"))
         alert.setInformativeText_(
             f"{t('project_name')}\n{t('company')}\n{t('hourly_rate')}"
@@ -2106,14 +2165,17 @@ class TimeTrackerWindowController(NSObject):
 
             if name:
                 try:
-                    NSLog(
-                        f"Attempting to create project: {name}, rate: {hourly_rate}, company_id: {company_id}"
+                    logger.info(
+                        "Attempting to create project: %s, rate: %s, company_id: %s",
+                        name,
+                        hourly_rate,
+                        company_id,
                     )
-                    NSLog(f"Database path: {self.db.db_path}")
+                    logger.info("Database path: %s", self.db.db_path)
                     res = self.db.create_project(
                         name, hourly_rate=hourly_rate, company_id=company_id
                     )
-                    NSLog(f"Project creation result: {res}")
+                    logger.info("Project creation result: %s", res)
                     if res:
                         self.reloadProjects()
                         # Выбираем созданный проект (с учетом новой метки со ставкой)
@@ -2121,10 +2183,13 @@ class TimeTrackerWindowController(NSObject):
                             f" (${hourly_rate:.0f}/ч)" if hourly_rate > 0 else ""
                         )
                         self.projectPopup.selectItemWithTitle_(f"{name}{rate_display}")
-                        NSLog(f"Project '{name}' created successfully with ID: {res}")
+                        logger.info(
+                            "Project '%s' created successfully with ID: %s", name, res
+                        )
                     else:
-                        NSLog(
-                            f"Failed to create project '{name}' - project with this name may already exist"
+                        logger.error(
+                            "Failed to create project '%s' - project with this name may already exist",
+                            name,
                         )
                         error_alert = NSAlert.alloc().init()
                         error_alert.setMessageText_(t("error"))
@@ -2136,10 +2201,7 @@ class TimeTrackerWindowController(NSObject):
                         error_alert.addButtonWithTitle_("OK")
                         error_alert.runModal()
                 except Exception as e:
-                    NSLog(f"Error creating project: {e}")
-                    import traceback
-
-                    NSLog(f"Traceback: {traceback.format_exc()}")
+                    logger.exception("Error creating project: %s", e)
                     error_alert = NSAlert.alloc().init()
                     error_alert.setMessageText_(t("error"))
                     error_alert.setInformativeText_(
@@ -2148,7 +2210,7 @@ class TimeTrackerWindowController(NSObject):
                     error_alert.addButtonWithTitle_("OK")
                     error_alert.runModal()
             else:
-                NSLog("Project name is empty")
+                logger.info("Project name is empty")
 
     def toggleTimer_(self, _):
         if not self.timer_running:
@@ -2202,121 +2264,124 @@ class TimeTrackerWindowController(NSObject):
                 except Exception:
                     pass
 
-            # Получаем описание
-            desc = self.descriptionField.stringValue().strip()
-
-            # Если описание пустое, берем последнее для этого проекта или "Программирование"
-            if not desc:
-                desc = self.db.get_last_description_for_project(project_id)
-                self.descriptionField.setStringValue_(desc)
-                NSLog(f"Автоматически подставлено описание: {desc}")
+            self._startTimer(project_id, self.descriptionField.stringValue().strip())
+        else:
+            self._stopTimer()
 
-            self.current_session_id = self.db.start_session(project_id, desc)
-            self.start_time = datetime.now()
-            self.timer_running = True
-            self.startStopBtn.setTitle_("■")
-            self._updateStartStopAppearance()
+    @objc.python_method
+    def _startTimer(self, project_id, description):
+        """
+        Старт сессии ровно по project_id и description: общий путь кнопки и
+        IPC. Фильтр проектов не трогает и алертов не показывает - выбор
+        проекта из UI и предупреждения остаются в toggleTimer_.
+        """
+        desc = (description or "").strip()
+        # Если описание пустое, берем последнее для этого проекта или "Программирование"
+        if not desc:
+            desc = self.db.get_last_description_for_project(project_id)
+            logger.debug("Автоматически подставлено описание: %s", desc)
+
+        self.current_session_id = self.db.start_session(project_id, desc)
+        self.start_time = datetime.now()
+        self.timer_running = True
+
+        # Поля показывают идущую сессию (для IPC-старта - тоже)
+        for idx_popup, p in enumerate(self.projects_cache, start=1):
+            if p["id"] == project_id:
+                self.projectPopup.selectItemAtIndex_(idx_popup)
+                break
+        self.descriptionField.setStringValue_(desc)
+        self.startStopBtn.setTitle_("■")
+        self._updateStartStopAppearance()
 
-            NSLog("")
-            NSLog("*** ЗАПУСКАЕТСЯ ТАЙМЕР РАБОТЫ ***")
-            NSLog(
-                f"DEBUG: Проект: {project_name if 'project_name' in locals() else 'N/A'}"
-            )
-            NSLog(f"DEBUG: Начало работы: {self.start_time}")
-            NSLog("*** ЗАПУСКАЕМ ТАЙМЕР НАПОМИНАНИЙ ***")
+        logger.debug("Запускается таймер работы")
+        logger.debug("Проект: %s", project_id)
+        logger.debug("Начало работы: %s", self.start_time)
+        logger.debug("Запускаем таймер напоминаний")
 
-            # Запускаем таймер для часовых напоминаний (каждый час)
-            self._startHourlyReminder()
+        # Запускаем тик таймера и часовые напоминания
+        self._startTrackingJobs()
+        self.ipc_state.invalidate()
 
-            try:
-                NSApp.delegate().updateStatusItem()
-            except Exception:
-                pass
-        else:
-            # стоп
-            NSLog("=== НАЧАЛО ОСТАНОВКИ ТАЙМЕРА ===")
-            # Сохраняем информацию о задаче перед остановкой для уведомления
-            try:
-                idx = self.projectPopup.indexOfSelectedItem()
-                project_name = "Без названия"
-                if idx > 0 and idx - 1 < len(self.projects_cache):
-                    project_name = self.projects_cache[idx - 1]["name"]
-                task_description = self.descriptionField.stringValue().strip()
-
-                # Вычисляем время работы
-                elapsed_time = ""
-                if self.start_time:
-                    elapsed_seconds = int(
-                        (datetime.now() - self.start_time).total_seconds()
-                    )
-                    elapsed_time = self.formatDuration(elapsed_seconds)
-                NSLog(f"Информация о задаче собрана: {project_name}")
-            except Exception as e:
-                NSLog(f"Error preparing stop notification: {e}")
-                import traceback
-
-                traceback.print_exc()
-                project_name = "Без названия"
-                task_description = ""
-                elapsed_time = ""
-
-            # Останавливаем таймер напоминаний ПЕРВЫМ делом
-            try:
-                NSLog("Останавливаем таймер напоминаний...")
-                self._stopHourlyReminder()
-                NSLog("Таймер напоминаний остановлен")
-            except Exception as e:
-                NSLog(f"Ошибка остановки таймера напоминаний: {e}")
-                import traceback
+        try:
+            NSApp.delegate().updateStatusItem()
+        except Exception:
+            pass
 
-                traceback.print_exc()
+    @objc.python_method
+    def _stopTimer(self):
+        """Остановка идущей сессии: общий путь кнопки, напоминания и IPC"""
+        logger.debug("НАЧАЛО ОСТАНОВКИ ТАЙМЕРА")
+        # Сохраняем информацию о задаче перед остановкой для уведомления
+        try:
+            idx = self.projectPopup.indexOfSelectedItem()
+            project_name = "Без названия"
+            if idx > 0 and idx - 1 < len(self.projects_cache):
+                project_name = self.projects_cache[idx - 1]["name"]
+            task_description = self.descriptionField.stringValue().strip()
 
-            try:
-                NSLog(f"Останавливаем сессию {self.current_session_id}...")
-                if self.current_session_id:
-                    self.db.stop_session(self.current_session_id)
-                NSLog("Сессия остановлена")
-            except Exception as e:
-                NSLog(f"Ошибка остановки сессии: {e}")
-                import traceback
+            # Вычисляем время работы
+            elapsed_time = ""
+            if self.start_time:
+                elapsed_seconds = int(
+                    (datetime.now() - self.start_time).total_seconds()
+                )
+                elapsed_time = self.formatDuration(elapsed_seconds)
+            logger.debug("Информация о задаче собрана: %s", project_name)
+        except Exception as e:
+            logger.exception("Error preparing stop notification: %s", e)
+            project_name = "Без названия"
+            task_description = ""
+            elapsed_time = ""
 
-                traceback.print_exc()
+        # Останавливаем таймер напоминаний ПЕРВЫМ делом
+        try:
+            logger.debug("Останавливаем таймер напоминаний...")
+            self._stopTrackingJobs()
+            logger.debug("Таймер напоминаний остановлен")
+        except Exception as e:
+            logger.exception("Ошибка остановки таймера напоминаний: %s", e)
 
-            self.timer_running = False
-            self.start_time = None
-            self.startStopBtn.setTitle_("▶")
+        try:
+            logger.debug("Останавливаем сессию %s...", self.current_session_id)
+            if self.current_session_id:
+                self.db.stop_session(self.current_session_id)
+            logger.debug("Сессия остановлена")
+        except Exception as e:
+            logger.exception("Ошибка остановки сессии: %s", e)
 
-            try:
-                self._updateStartStopAppearance()
-            except Exception as e:
-                NSLog(f"Ошибка обновления внешнего вида кнопки: {e}")
+        self.timer_running = False
+        self.start_time = None
+        self.startStopBtn.setTitle_("▶")
 
-            self.descriptionField.setStringValue_("")
+        try:
+            self._updateStartStopAppearance()
+        except Exception as e:
+            logger.error("Ошибка обновления внешнего вида кнопки: %s", e)
 
-            try:
-                NSLog("Перезагружаем сессии...")
-                self.reloadSessions()
-                NSLog("Сессии перезагружены")
-            except Exception as e:
-                NSLog(f"Ошибка перезагрузки сессий: {e}")
-                import traceback
+        self.descriptionField.setStringValue_("")
 
-                traceback.print_exc()
+        try:
+            logger.debug("Перезагружаем сессии...")
+            self.reloadSessions()
+            logger.debug("Сессии перезагружены")
+        except Exception as e:
+            logger.exception("Ошибка перезагрузки сессий: %s", e)
 
-            try:
-                NSApp.delegate().updateStatusItem()
-            except Exception as e:
-                NSLog(f"Ошибка обновления статус-бара: {e}")
+        try:
+            NSApp.delegate().updateStatusItem()
+        except Exception as e:
+            logger.error("Ошибка обновления статус-бара: %s", e)
 
-            # Отправляем уведомление об остановке
-            try:
-                NSApp.delegate()._sendStopNotification(
-                    project_name, task_description, elapsed_time
-                )
-            except Exception as e:
-                NSLog(f"Error sending stop notification: {e}")
+        # Отправляем уведомление об остановке
+        try:
+            NSApp.delegate()._sendStopNotification(
+                project_name, task_description, elapsed_time
+            )
+        except Exception as e:
+            logger.error("Error sending stop notification: %s", e)
 
-            NSLog("=== ОСТАНОВКА ТАЙМЕРА ЗАВЕРШЕНА ===")
+        logger.debug("ОСТАНОВКА ТАЙМЕРА ЗАВЕРШЕНА")
 
     @objc.python_method
     def _updateStartStopAppearance(self):
@@ -2339,10 +2404,13 @@ class TimeTrackerWindowController(NSObject):
     @objc.python_method
     def _restoreActiveSession(self):
         """Восстанавливает активную сессию при запуске приложения"""
+        # Сессия, оставшаяся после краша, закрывается на последнем heartbeat
+        self.db.recover_active_session()
         active = self.db.get_active_session()
         if active:
-            NSLog(
-                f"Найдена незавершенная сессия {active['id']}, восстанавливаем таймер"
+            self.heartbeat.force()
+            logger.info(
+                "Найдена незавершенная сессия %s, восстанавливаем таймер", active["id"]
             )
             self.current_session_id = active["id"]
             self.start_time = datetime.fromisoformat(active["start_time"])
@@ -2388,18 +2456,122 @@ class TimeTrackerWindowController(NSObject):
             self.startStopBtn.setTitle_("■")
             self._updateStartStopAppearance()
 
-            NSLog(
-                f"Таймер восстановлен, прошло времени: {(datetime.now() - self.start_time).total_seconds():.0f} секунд"
+            logger.info(
+                "Таймер восстановлен, прошло времени: %.0f секунд",
+                (datetime.now() - self.start_time).total_seconds(),
             )
 
-            # Запускаем таймер напоминаний при восстановлении сессии
-            self._startHourlyReminder()
+            # Запускаем тик и таймер напоминаний при восстановлении сессии
+            self._startTrackingJobs()
 
             try:
                 NSApp.delegate().updateStatusItem()
             except Exception:
                 pass
 
+    # ============================================
+    # Локальный IPC-сервер (ipc_server.py)
+    # ============================================
+
+    @objc.python_method
+    def _startIpcServer(self):
+        if not ipc_enabled():
+            return
+        server = IpcServer(
+            default_socket_path(self.db.db_path),
+            self.ipc_state,
+            {"start": self._ipcStart, "stop": self._ipcStop, "switch": self._ipcSwitch},
+            call_soon=AppHelper.callAfter,
+            refresh=self._loadIpcState,
+        )
+        if server.start():
+            self.ipc_server = server
+
+    @objc.python_method
+    def _loadIpcState(self):
+        """
+        Снимок для IPC-сервера: идущая сессия, итог дня, последние задачи.
+        Вызывается сервером, когда клиент спросил, а снимок устарел.
+        """
+        try:
+            day = datetime.now().date()
+            active = self.db.get_active_session() if self.timer_running else None
+            project = None
+            if active is not None:
+                project = next(
+                    (
+                        p["name"]
+                        for p in self.projects_cache
+                        if p["id"] == active["project_id"]
+                    ),
+                    None,
+                )
+            self.ipc_state.publish(
+                running=active is not None,
+                session_id=active["id"] if active else None,
+                project_id=active["project_id"] if active else None,
+                project=project,
+                task=active["task_name"] if active else None,
+                start=datetime.fromisoformat(active["start_time"]) if active else None,
+                today_completed=self.db.get_today_total(),
+                day=day,
+                recent=[
+                    {
+                        "project_id": row["project_id"],
+                        "project": row["project_name"],
+                        "task": row["task_name"],
+                        "last_start": row["last_start"],
+                    }
+                    for row in self.db.get_recent_tasks(RECENT_LIMIT)
+                ],
+            )
+        except Exception as e:
+            logger.error("Error loading IPC state: %s", e)
+
+    @objc.python_method
+    def _ipcProject(self, project):
+        """Проект из projects_cache по имени (без учёта регистра) или id"""
+        if project is None:
+            raise IpcError("project is required")
+        key = str(project).casefold()
+        for p in self.projects_cache:
+            if p["name"].casefold() == key or str(p["id"]) == key:
+                return p
+        raise IpcError(f"unknown project {project!r}")
+
+    @objc.python_method
+    def _ipcStatus(self):
+        """Статус после команды: снимок пересобирается, если она его изменила"""
+        if self.ipc_state.stale():
+            self._loadIpcState()
+        return self.ipc_state.status()
+
+    @objc.python_method
+    def _ipcStart(self, project=None, task=None):
+        if self.timer_running:
+            raise IpcError("timer is already running, use switch")
+        # Пустая задача - _startTimer подставит последнюю задачу проекта
+        self._startTimer(self._ipcProject(project)["id"], task)
+        return self._ipcStatus()
+
+    @objc.python_method
+    def _ipcSwitch(self, project=None, task=None):
+        if project is None and self.timer_running:
+            project = self._ipcStatus()["project_id"]
+        project = self._ipcProject(project)
+        if self.timer_running:
+            self._stopTimer()
+        self._startTimer(project["id"], task)
+        return self._ipcStatus()
+
+    @objc.python_method
+    def _ipcStop(self):
+        if not self.timer_running:
+            raise IpcError("timer is not running")
+        stopped = self._ipcStatus()
+        self._stopTimer()
+        return {"stopped": stopped}
+
     @objc.python_method
     def _startHourlyReminder(self):
         """Запускает таймер для напоминаний каждый час"""
@@ -2409,79 +2581,70 @@ class TimeTrackerWindowController(NSObject):
         # Получаем интервал из настроек (в минутах), по умолчанию 60 минут
         defaults = NSUserDefaults.standardUserDefaults()
         interval_minutes = defaults.integerForKey_("reminderInterval")
-        NSLog(
-            f"DEBUG: Значение из NSUserDefaults reminderInterval = {interval_minutes}"
+        logger.debug(
+            "Значение из NSUserDefaults reminderInterval = %s", interval_minutes
         )
-        NSLog(f"DEBUG: DEV_MODE = {DEV_MODE}")
+        logger.debug("DEV_MODE = %s", DEV_MODE)
 
         if interval_minutes <= 0:
             # В DEV режиме - 1 минута для тестирования, в продакшене - 60 минут
             interval_minutes = 1 if DEV_MODE else 60
-            NSLog(
-                f"DEBUG: interval_minutes был <= 0, установлено значение по умолчанию: {interval_minutes}"
+            logger.debug(
+                "interval_minutes был <= 0, установлено значение по умолчанию: %s",
+                interval_minutes,
             )
 
         interval_seconds = interval_minutes * 60.0
 
         # Запускаем новый таймер
-        NSLog(
-            f"=== ЗАПУСК ТАЙМЕРА НАПОМИНАНИЙ (интервал: {interval_minutes} мин = {interval_seconds} сек) ==="
+        logger.debug(
+            "ЗАПУСК ТАЙМЕРА НАПОМИНАНИЙ (интервал: %s мин = %s сек)",
+            interval_minutes,
+            interval_seconds,
         )
-        self.hourly_reminder_ref = (
-            NSTimer.scheduledTimerWithTimeInterval_target_selector_userInfo_repeats_(
-                interval_seconds,
-                self,
-                objc.selector(self.showHourlyReminder_, signature=b"v@:@"),
-                None,
-                True,  # Повторять
-            )
-        )
-        NSLog(
-            f"Таймер создан: {self.hourly_reminder_ref}, валиден: {self.hourly_reminder_ref.isValid() if self.hourly_reminder_ref else 'None'}"
+        job = self.scheduler.every(
+            "hourly_reminder",
+            interval_seconds,
+            lambda now: self.showHourlyReminder_(None),
+            tolerance=1.0,
         )
+        logger.debug("Задача напоминаний создана: %s", job)
 
     @objc.python_method
     def _stopHourlyReminder(self):
         """Останавливает таймер напоминаний"""
-        if self.hourly_reminder_ref is not None:
-            NSLog("Остановка таймера напоминаний")
-            self.hourly_reminder_ref.invalidate()
-            self.hourly_reminder_ref = None
+        if self.scheduler.cancel("hourly_reminder"):
+            logger.debug("Остановка таймера напоминаний")
 
     def showHourlyReminder_(self, timer):
         """Показывает напоминание о текущей активности"""
-        NSLog("")
-        NSLog("########################################")
-        NSLog("### ВЫЗВАН showHourlyReminder_ !!! ###")
-        NSLog("########################################")
+        logger.debug("Вызван showHourlyReminder_")
 
         try:
-            NSLog(f"DEBUG: Timer running: {self.timer_running}")
-            NSLog(f"DEBUG: Current time: {datetime.now()}")
+            logger.debug("Timer running: %s", self.timer_running)
+            logger.debug("Current time: %s", datetime.now())
 
             if not self.timer_running:
                 # Если таймер уже остановлен, не показываем напоминание
-                NSLog("ВНИМАНИЕ: Таймер не запущен, пропускаем напоминание")
+                logger.debug("ВНИМАНИЕ: Таймер не запущен, пропускаем напоминание")
                 return
 
-            NSLog("DEBUG: Прошли проверку timer_running")
-            NSLog("ПОКАЗЫВАЕМ НАПОМИНАНИЕ ПОЛЬЗОВАТЕЛЮ!!!")
+            logger.debug("Прошли проверку timer_running")
+            logger.debug("ПОКАЗЫВАЕМ НАПОМИНАНИЕ ПОЛЬЗОВАТЕЛЮ!!!")
 
             # СНАЧАЛА ОСТАНАВЛИВАЕМ ТАЙМЕР перед показом сообщения
-            NSLog("Останавливаем таймер перед показом сообщения...")
+            logger.debug("Останавливаем таймер перед показом сообщения...")
             paused_session_id = self.current_session_id
             paused_start_time = self.start_time
 
-            NSLog(f"DEBUG: paused_session_id = {paused_session_id}")
-            NSLog(f"DEBUG: paused_start_time = {paused_start_time}")
+            logger.debug("paused_session_id = %s", paused_session_id)
+            logger.debug("paused_start_time = %s", paused_start_time)
 
             # Временно останавливаем только визуальный таймер, но не сессию
-            if self.update_timer_ref is not None:
-                NSLog("DEBUG: Останавливаем update_timer_ref")
-                self.update_timer_ref.invalidate()
-                self.update_timer_ref = None
+            logger.debug("Снимаем задачу тика таймера")
+            self.scheduler.cancel("tick")
 
-            NSLog("DEBUG: Получаем информацию о текущей задаче...")
+            logger.debug("Получаем информацию о текущей задаче...")
 
             # Получаем информацию о текущей задаче
             idx = self.projectPopup.indexOfSelectedItem()
@@ -2490,7 +2653,7 @@ class TimeTrackerWindowController(NSObject):
                 project_name = self.projects_cache[idx - 1]["name"]
             task_description = self.descriptionField.stringValue().strip()
 
-            NSLog(f"DEBUG: Проект: {project_name}, Описание: {task_description}")
+            logger.debug("Проект: %s, Описание: %s", project_name, task_description)
 
             # Вычисляем время работы
             elapsed_seconds = 0
@@ -2500,10 +2663,10 @@ class TimeTrackerWindowController(NSObject):
                 )
             elapsed_str = self.formatDuration(elapsed_seconds)
 
-            NSLog(f"DEBUG: Время работы: {elapsed_str}")
+            logger.debug("Время работы: %s", elapsed_str)
 
             # Воспроизводим звуковое уведомление
-            NSLog("DEBUG: Воспроизводим звуковой сигнал...")
+            logger.debug("Воспроизводим звуковой сигнал...")
             try:
                 # Получаем сохраненный звук из настроек
                 defaults = NSUserDefaults.standardUserDefaults()
@@ -2513,23 +2676,24 @@ class TimeTrackerWindowController(NSObject):
                 if not sound_name:
                     sound_name = "Glass"
 
-                NSLog(f"DEBUG: Используем звук: {sound_name}")
+                logger.debug("Используем звук: %s", sound_name)
 
                 # Используем системный звук
                 sound = NSSound.soundNamed_(sound_name)
                 if sound:
                     sound.play()
-                    NSLog(f"DEBUG: Звук {sound_name} воспроизведен успешно")
+                    logger.debug("Звук %s воспроизведен успешно", sound_name)
                 else:
-                    NSLog(
-                        f"WARNING: Не удалось загрузить системный звук {sound_name}, используем NSBeep"
+                    logger.warning(
+                        "Не удалось загрузить системный звук %s, используем NSBeep",
+                        sound_name,
                     )
                     # Если системный звук не доступен, используем простой beep
                     from AppKit import NSBeep
 
                     NSBeep()
             except Exception as e:
-                NSLog(f"ERROR: Ошибка воспроизведения звука: {e}")
+                logger.error("Ошибка воспроизведения звука: %s", e)
                 try:
                     from AppKit import NSBeep
 
@@ -2544,7 +2708,7 @@ class TimeTrackerWindowController(NSObject):
             message += f"\n\nВремя работы: {elapsed_str}"
             message += f"\n\nТаймер остановлен. Продолжить работу?"
 
-            NSLog("DEBUG: Создаем NSAlert...")
+            logger.debug("Создаем NSAlert...")
 
             # Создаем alert
             alert = NSAlert.alloc().init()
@@ -2555,18 +2719,18 @@ class TimeTrackerWindowController(NSObject):
             alert.setAlertStyle_(1)  # NSInformationalAlertStyle
 
             # Показываем alert и обрабатываем ответ
-            NSLog("DEBUG: Показываем alert...")
+            logger.debug("Показываем alert...")
             response = alert.runModal()
-            NSLog(f"DEBUG: Получен ответ: {response}")
+            logger.debug("Получен ответ: %s", response)
 
             # NSAlertFirstButtonReturn = 1000 (Да - продолжить)
             # NSAlertSecondButtonReturn = 1001 (Нет - завершить)
             if response == 1001:  # Нажата кнопка "Нет" - ЗАВЕРШИТЬ ЗАДАЧУ
-                NSLog("DEBUG: ПОЛЬЗОВАТЕЛЬ НАЖАЛ 'НЕТ' - ЗАВЕРШАЕМ ЗАДАЧУ")
+                logger.debug("ПОЛЬЗОВАТЕЛЬ НАЖАЛ 'НЕТ' - ЗАВЕРШАЕМ ЗАДАЧУ")
 
                 # Полностью останавливаем таймер и закрываем сессию
                 if paused_session_id and self.timer_running:
-                    NSLog(f"DEBUG: Завершаем сессию {paused_session_id}")
+                    logger.debug("Завершаем сессию %s", paused_session_id)
                     self.timer_running = False
                     self.db.stop_session(paused_session_id)
                     self.current_session_id = None
@@ -2574,8 +2738,8 @@ class TimeTrackerWindowController(NSObject):
                     self.timerLabel.setStringValue_("00:00:00")
                     self.toggleBtn.setTitle_(t("start"))
 
-                    # Останавливаем таймер напоминаний
-                    self._stopHourlyReminder()
+                    # Останавливаем тик, heartbeat и напоминания
+                    self._stopTrackingJobs()
 
                     # Обновляем UI
                     self.reloadSessions()
@@ -2586,45 +2750,35 @@ class TimeTrackerWindowController(NSObject):
                     except Exception:
                         pass
 
-                    NSLog("DEBUG: Задача успешно завершена!")
+                    logger.debug("Задача успешно завершена!")
             else:  # Нажата кнопка "Да" - ПРОДОЛЖИТЬ РАБОТУ
-                NSLog("DEBUG: Пользователь ответил 'Да', продолжаем работу")
+                logger.debug("Пользователь ответил 'Да', продолжаем работу")
 
                 # Возобновляем таймер
-                NSLog("DEBUG: Возобновляем таймер...")
+                logger.debug("Возобновляем таймер...")
                 if self.timer_running and paused_session_id:
                     # Перезапускаем визуальный таймер
-                    self.update_timer_ref = NSTimer.scheduledTimerWithTimeInterval_target_selector_userInfo_repeats_(
-                        1.0,
-                        self,
-                        objc.selector(self.tick_, signature=b"v@:@"),
-                        None,
-                        True,
-                    )
-                    NSLog("DEBUG: Таймер успешно возобновлен!")
+                    self._scheduleTimerJobs()
+                    logger.debug("Таймер успешно возобновлен!")
 
         except Exception as e:
-            NSLog(f"КРИТИЧЕСКАЯ ОШИБКА в showHourlyReminder_: {e}")
-            import traceback
-
-            traceback.print_exc()
+            logger.exception("КРИТИЧЕСКАЯ ОШИБКА в showHourlyReminder_: %s", e)
 
     def _stopTimerFromReminder_(self, sender):
         """Безопасная остановка таймера из напоминания"""
-        NSLog("=== _stopTimerFromReminder_ ВЫЗВАН ===")
+        logger.debug("_stopTimerFromReminder_ ВЫЗВАН")
         try:
             if not self.timer_running:
-                NSLog("Таймер уже остановлен, выходим")
+                logger.info("Таймер уже остановлен, выходим")
                 return
 
-            NSLog("Выполняем остановку таймера из напоминания...")
+            logger.info("Выполняем остановку таймера из напоминания...")
             self.toggleTimer_(None)
-            NSLog("Таймер успешно остановлен из напоминания")
+            logger.info("Таймер успешно остановлен из напоминания")
         except Exception as e:
-            NSLog(f"КРИТИЧЕСКАЯ ОШИБКА при остановке таймера из напоминания: {e}")
-            import traceback
-
-            traceback.print_exc()
+            logger.exception(
+                "КРИТИЧЕСКАЯ ОШИБКА при остановке таймера из напоминания: %s", e
+            )
             # Пытаемся принудительно остановить
             try:
                 self.timer_running = False
@@ -2686,7 +2840,7 @@ class TimeTrackerWindowController(NSObject):
                 False,
             )
         except Exception as e:
-            NSLog(f"Error opening statistics: {e}")
+            logger.error("Error opening statistics: %s", e)
 
     def resetStatisticsButton_(self, _):
         """Сбрасывает highlight кнопки статистики"""
@@ -2734,7 +2888,7 @@ class TimeTrackerWindowController(NSObject):
                             pass
                         break
         except Exception as e:
-            NSLog(f"Set window icon error: {e}")
+            logger.error("Set window icon error: %s", e)
 
 
 class ProjectSettingsWindowController(NSObject):
@@ -2780,7 +2934,7 @@ class ProjectSettingsWindowController(NSObject):
 
         # Center on primary screen
         self.window.center()
-        print("[Window] ProjectSettings window centered on primary screen")
+        window_logger.debug("ProjectSettings window centered on primary screen")
 
         content = self.window.contentView()
 
@@ -3218,7 +3372,7 @@ class ProjectSettingsWindowController(NSObject):
             if not os.path.exists(db_path):
                 raise FileNotFoundError(f"База данных не найдена: {db_path}")
 
-            NSLog(f"Database path: {db_path}")
+            logger.info("Database path: %s", db_path)
 
             # Создаем диалог выбора места сохранения
             panel = NSSavePanel.savePanel()
@@ -3244,13 +3398,10 @@ class ProjectSettingsWindowController(NSObject):
                 alert.addButtonWithTitle_("OK")
                 alert.runModal()
 
-                NSLog(f"Backup created: {backup_path}")
+                logger.info("Backup created: %s", backup_path)
 
         except Exception as e:
-            NSLog(f"Backup error: {e}")
-            import traceback
-
-            traceback.print_exc()
+            logger.exception("Backup error: %s", e)
 
             alert = NSAlert.alloc().init()
             alert.setMessageText_(t("backup_error"))
@@ -3277,7 +3428,7 @@ class ProjectSettingsWindowController(NSObject):
                 os.makedirs(app_support, exist_ok=True)
                 db_path = os.path.join(app_support, "timetracker.db")
 
-            NSLog(f"Target database path: {db_path}")
+            logger.info("Target database path: %s", db_path)
 
             # Предупреждение о замене текущей базы
             alert = NSAlert.alloc().init()
@@ -3289,7 +3440,7 @@ class ProjectSettingsWindowController(NSObject):
 
             # Первая кнопка возвращает 1000, вторая - 1001
             response = alert.runModal()
-            NSLog(f"Alert response: {response}")
+            logger.info("Alert response: %s", response)
             if response != 1000:  # 1000 = первая кнопка "Продолжить"
                 return
 
@@ -3340,7 +3491,7 @@ class ProjectSettingsWindowController(NSObject):
                     alert.addButtonWithTitle_("OK")
                     alert.runModal()
 
-                    NSLog(f"Database restored from: {backup_path}")
+                    logger.info("Database restored from: %s", backup_path)
 
                 except Exception as restore_error:
                     # Восстанавливаем из временного бекапа при ошибке
@@ -3350,10 +3501,7 @@ class ProjectSettingsWindowController(NSObject):
                     raise restore_error
 
         except Exception as e:
-            NSLog(f"Restore error: {e}")
-            import traceback
-
-            traceback.print_exc()
+            logger.exception("Restore error: %s", e)
 
             alert = NSAlert.alloc().init()
             alert.setMessageText_(t("restore_error"))
@@ -3411,8 +3559,11 @@ class ProjectSettingsWindowController(NSObject):
             defaults.setObject_forKey_(selected_sound, "notificationSound")
             defaults.synchronize()
 
-            NSLog(
-                f"Сохранены настройки: интервал={interval} мин, язык={lang_code}, звук={selected_sound}"
+            logger.info(
+                "Сохранены настройки: интервал=%s мин, язык=%s, звук=%s",
+                interval,
+                lang_code,
+                selected_sound,
             )
 
             # 4. Показываем сообщение о сохранении и перезапуске
@@ -3429,10 +3580,7 @@ class ProjectSettingsWindowController(NSObject):
             self.restartApplication()
 
         except Exception as e:
-            NSLog(f"Ошибка сохранения настроек: {e}")
-            import traceback
-
-            traceback.print_exc()
+            logger.exception("Ошибка сохранения настроек: %s", e)
 
             alert = NSAlert.alloc().init()
             alert.setMessageText_(t("error"))
@@ -3451,31 +3599,28 @@ class ProjectSettingsWindowController(NSObject):
             if sound_index < len(self.system_sounds):
                 sound_name = self.system_sounds[sound_index][0]
 
-                NSLog(f"Воспроизведение звука: {sound_name}")
+                logger.info("Воспроизведение звука: %s", sound_name)
 
                 # Воспроизводим звук
                 sound = NSSound.soundNamed_(sound_name)
                 if sound:
                     sound.play()
-                    NSLog(f"Звук {sound_name} воспроизведен успешно")
+                    logger.info("Звук %s воспроизведен успешно", sound_name)
                 else:
-                    NSLog(
-                        f"WARNING: Не удалось загрузить звук {sound_name}, используем NSBeep"
+                    logger.warning(
+                        "Не удалось загрузить звук %s, используем NSBeep", sound_name
                     )
                     from AppKit import NSBeep
 
                     NSBeep()
             else:
-                NSLog("ERROR: Некорректный индекс звука")
+                logger.error("Некорректный индекс звука")
                 from AppKit import NSBeep
 
                 NSBeep()
 
         except Exception as e:
-            NSLog(f"Ошибка воспроизведения звука: {e}")
-            import traceback
-
-            traceback.print_exc()
+            logger.exception("Ошибка воспроизведения звука: %s", e)
             try:
                 from AppKit import NSBeep
 
@@ -3493,7 +3638,7 @@ class ProjectSettingsWindowController(NSObject):
             # Получаем путь к исполняемому файлу
             executable = sys.executable
 
-            NSLog(f"Перезапуск приложения: {executable}")
+            logger.info("Перезапуск приложения: %s", executable)
 
             # Закрываем окно настроек
             if hasattr(self, "window") and self.window:
@@ -3508,10 +3653,7 @@ class ProjectSettingsWindowController(NSObject):
             NSApplication.sharedApplication().terminate_(None)
 
         except Exception as e:
-            NSLog(f"Ошибка перезапуска приложения: {e}")
-            import traceback
-
-            traceback.print_exc()
+            logger.exception("Ошибка перезапуска приложения: %s", e)
 
     def saveLanguage_(self, sender):
         """Сохраняет выбранный язык интерфейса"""
@@ -3542,7 +3684,7 @@ class ProjectSettingsWindowController(NSObject):
             defaults.setObject_forKey_(lang_code, "interfaceLanguage")
             defaults.synchronize()
 
-            NSLog(f"Сохранен язык интерфейса: {lang_code}")
+            logger.info("Сохранен язык интерфейса: %s", lang_code)
 
             # Показываем сообщение об успехе
             alert = NSAlert.alloc().init()
@@ -3553,10 +3695,7 @@ class ProjectSettingsWindowController(NSObject):
             alert.runModal()
 
         except Exception as e:
-            NSLog(f"Ошибка сохранения языка: {e}")
-            import traceback
-
-            traceback.print_exc()
+            logger.exception("Ошибка сохранения языка: %s", e)
 
             alert = NSAlert.alloc().init()
             alert.setMessageText_(t("error"))
@@ -3598,7 +3737,7 @@ class ProjectSettingsWindowController(NSObject):
             defaults.setInteger_forKey_(interval, "reminderInterval")
             defaults.synchronize()
 
-            NSLog(f"Сохранен интервал напоминаний: {interval} минут")
+            logger.info("Сохранен интервал напоминаний: %s минут", interval)
 
             # Показываем сообщение об успехе
             alert = NSAlert.alloc().init()
@@ -3609,10 +3748,7 @@ class ProjectSettingsWindowController(NSObject):
             alert.runModal()
 
         except Exception as e:
-            NSLog(f"Ошибка сохранения интервала напоминаний: {e}")
-            import traceback
-
-            traceback.print_exc()
+            logger.exception("Ошибка сохранения интервала напоминаний: %s", e)
 
             alert = NSAlert.alloc().init()
             alert.setMessageText_(t("error"))
@@ -3647,16 +3783,21 @@ class ProjectSettingsWindowController(NSObject):
 
         # Если проект не выбран - создаем новый
         if row < 0 or row >= len(self.projects):
-            NSLog(
-                f"Creating new project: {new_name}, rate: {new_rate}, company_id: {company_id}"
+            logger.info(
+                "Creating new project: %s, rate: %s, company_id: %s",
+                new_name,
+                new_rate,
+                company_id,
             )
             try:
                 project_id = self.db.create_project(
                     new_name, hourly_rate=new_rate, company_id=company_id
                 )
                 if project_id:
-                    NSLog(
-                        f"Project '{new_name}' created successfully with ID: {project_id}"
+                    logger.info(
+                        "Project '%s' created successfully with ID: %s",
+                        new_name,
+                        project_id,
                     )
 
                     # Оновлюємо таблицю
@@ -3683,7 +3824,7 @@ class ProjectSettingsWindowController(NSObject):
                             except Exception:
                                 pass
                     except Exception as e:
-                        NSLog(f"Error updating main window: {e}")
+                        logger.error("Error updating main window: %s", e)
                 else:
                     alert = NSAlert.alloc().init()
                     alert.setMessageText_(t("error"))
@@ -3691,7 +3832,7 @@ class ProjectSettingsWindowController(NSObject):
                     alert.addButtonWithTitle_(t("ok"))
                     alert.runModal()
             except Exception as e:
-                NSLog(f"Error creating project: {e}")
+                logger.error("Error creating project: %s", e)
                 alert = NSAlert.alloc().init()
                 alert.setMessageText_(t("error"))
                 alert.setInformativeText_(f"Помилка при створенні проекту: {str(e)}")
@@ -3701,13 +3842,17 @@ class ProjectSettingsWindowController(NSObject):
 
         # Если проект выбран - обновляем существующий
         project = self.projects[row]
-        NSLog(
-            f"Updating project {project['id']}: {new_name}, ${new_rate}/ч, company_id={company_id}"
+        logger.info(
+            "Updating project %s: %s, $%s/ч, company_id=%s",
+            project["id"],
+            new_name,
+            new_rate,
+            company_id,
         )
 
         # Обновляем в БД
         if self.db.update_project(project["id"], new_name, new_rate, company_id):
-            NSLog(f"Проект {project['id']} обновлён")
+            logger.info("Проект %s обновлён", project["id"])
             self.reloadProjects()
             self.tableView.reloadData()
             # Обновим основное окно и статус-бар
@@ -3741,8 +3886,8 @@ class ProjectSettingsWindowController(NSObject):
 
     def createNewProject_(self, sender):
         """Створення нового проекту"""
-        NSLog("=== createNewProject_ CALLED in ProjectSettings ===")
-        print("[DEBUG] createNewProject_ function called in ProjectSettings")
+        logger.debug("createNewProject_ CALLED in ProjectSettings")
+        logger.debug("createNewProject_ function called in ProjectSettings")
 
         # Очищаємо поля
         self.nameField.setStringValue_("")
@@ -3764,7 +3909,7 @@ class ProjectSettingsWindowController(NSObject):
 
     def createProjectAction_(self, sender):
         """Виконання створення нового проекту"""
-        NSLog("=== createProjectAction_ CALLED ===")
+        logger.debug("createProjectAction_ CALLED")
         new_name = self.nameField.stringValue().strip()
         try:
             new_rate = float(self.rateField.stringValue())
@@ -3787,20 +3932,25 @@ class ProjectSettingsWindowController(NSObject):
             return
 
         # Створюємо проект в БД
-        NSLog(
-            f"Attempting to create project: {new_name}, rate: {new_rate}, company_id: {company_id}"
+        logger.info(
+            "Attempting to create project: %s, rate: %s, company_id: %s",
+            new_name,
+            new_rate,
+            company_id,
         )
-        NSLog(f"Database path: {self.db.db_path}")
+        logger.info("Database path: %s", self.db.db_path)
 
         try:
             project_id = self.db.create_project(
                 new_name, hourly_rate=new_rate, company_id=company_id
             )
-            NSLog(f"Project creation result: {project_id}")
+            logger.info("Project creation result: %s", project_id)
 
             if project_id:
-                NSLog(
-                    f"Project '{new_name}' created successfully with ID: {project_id}"
+                logger.info(
+                    "Project '%s' created successfully with ID: %s",
+                    new_name,
+                    project_id,
                 )
 
                 # Оновлюємо таблицю
@@ -3829,10 +3979,11 @@ class ProjectSettingsWindowController(NSObject):
                     ):
                         app.controller.reloadProjects()
                 except Exception as e:
-                    NSLog(f"Error updating main window: {e}")
+                    logger.error("Error updating main window: %s", e)
             else:
-                NSLog(
-                    f"Failed to create project '{new_name}' - project with this name may already exist"
+                logger.error(
+                    "Failed to create project '%s' - project with this name may already exist",
+                    new_name,
                 )
                 alert = NSAlert.alloc().init()
                 alert.setMessageText_(t("error"))
@@ -3840,10 +3991,7 @@ class ProjectSettingsWindowController(NSObject):
                 alert.addButtonWithTitle_(t("ok"))
                 alert.runModal()
         except Exception as e:
-            NSLog(f"Error creating project: {e}")
-            import traceback
-
-            NSLog(f"Traceback: {traceback.format_exc()}")
+            logger.exception("Error creating project: %s", e)
             alert = NSAlert.alloc().init()
             alert.setMessageText_(t("error"))
             alert.setInformativeText_(f"Помилка при створенні проекту: {str(e)}")
@@ -3854,7 +4002,7 @@ class ProjectSettingsWindowController(NSObject):
         """Удаление выбранного проекта"""
         try:
             row = self.tableView.selectedRow()
-            NSLog(f"deleteProject_ called, selected row: {row}")
+            logger.info("deleteProject_ called, selected row: %s", row)
             if row < 0 or row >= len(self.projects):
                 alert = NSAlert.alloc().init()
                 alert.setMessageText_(t("error"))
@@ -3864,7 +4012,9 @@ class ProjectSettingsWindowController(NSObject):
                 return
 
             project = self.projects[row]
-            NSLog(f"Attempting to delete project: {project['id']} - {project['name']}")
+            logger.info(
+                "Attempting to delete project: %s - %s", project["id"], project["name"]
+            )
 
             # Проверяем, есть ли сессии у проекта
             has_sessions = self.db.has_sessions_for_project(project["id"])
@@ -3883,18 +4033,20 @@ class ProjectSettingsWindowController(NSObject):
             alert.setAlertStyle_(NSAlertStyleWarning)
 
             response = alert.runModal()
-            NSLog(f"User response: {response}")
+            logger.info("User response: %s", response)
             if response != 1000:  # 1000 = первая кнопка (Delete/Удалить)
-                NSLog("User cancelled deletion")
+                logger.info("User cancelled deletion")
                 return
 
             # Удаляем проект (с сессиями если они есть)
-            NSLog(f"Calling db.delete_project({project['id']}, force={has_sessions})")
+            logger.info(
+                "Calling db.delete_project(%s, force=%s)", project["id"], has_sessions
+            )
             result = self.db.delete_project(project["id"], force=has_sessions)
-            NSLog(f"delete_project returned: {result}")
+            logger.info("delete_project returned: %s", result)
 
             if result:
-                NSLog(f"Проект {project['id']} удалён")
+                logger.info("Проект %s удалён", project["id"])
                 self.reloadProjects()
                 self.tableView.reloadData()
 
@@ -3940,12 +4092,8 @@ class ProjectSettingsWindowController(NSObject):
                 alert.setAlertStyle_(NSAlertStyleCritical)
                 alert.runModal()
         except Exception as e:
-            NSLog(f"ERROR in deleteProject_: {e}")
-            import traceback
-
-            NSLog(f"Traceback: {traceback.format_exc()}")
-            print(f"ERROR in deleteProject_: {e}")
-            traceback.print_exc()
+            logger.exception("Error in deleteProject_: %s", e)
+            logger.exception("Error in deleteProject_: %s", e)
 
 
 class CompaniesWindowController(NSObject):
@@ -3977,7 +4125,7 @@ class CompaniesWindowController(NSObject):
 
         # Center on primary screen
         self.window.center()
-        print("[Window] Companies window centered on primary screen")
+        window_logger.debug("Companies window centered on primary screen")
 
         content = self.window.contentView()
 
@@ -4233,7 +4381,7 @@ class WorkTypesWindowController(NSObject):
 
         # Center on primary screen
         self.window.center()
-        print("[Window] WorkTypes window centered on primary screen")
+        window_logger.debug("WorkTypes window centered on primary screen")
 
         content = self.window.contentView()
 
@@ -4475,31 +4623,28 @@ class TaskNamesWindowController(NSObject):
 
     def showWindow(self):
         try:
-            NSLog("TaskNamesWindowController.showWindow called")
+            logger.debug("TaskNamesWindowController.showWindow called")
             if self.window is None:
-                NSLog("Window is None, calling setupUI")
+                logger.debug("Window is None, calling setupUI")
                 self.setupUI()
-                NSLog(f"setupUI completed, window = {self.window}")
-            NSLog("Calling reloadData")
+                logger.debug("setupUI completed, window = %s", self.window)
+            logger.debug("Calling reloadData")
             self.reloadData()
-            NSLog("Calling makeKeyAndOrderFront_")
+            logger.debug("Calling makeKeyAndOrderFront_")
             self.window.makeKeyAndOrderFront_(None)
-            NSLog("Window should be visible now")
+            logger.debug("Window should be visible now")
         except Exception as e:
-            NSLog(f"Error in TaskNamesWindowController.showWindow: {e}")
-            import traceback
-
-            traceback.print_exc()
+            logger.exception("Error in TaskNamesWindowController.showWindow: %s", e)
 
     def setupUI(self):
         # Створюємо вікно
-        print("[Window] TaskNamesWindowController.setupUI START")
+        window_logger.debug("TaskNamesWindowController.setupUI START")
         screen = _getPrimaryScreen()
         screen_frame = screen.frame()
         width = 700
         height = 500
 
-        print(f"[Window] Screen frame: {screen_frame}")
+        window_logger.debug("Screen frame: %s", screen_frame)
 
         try:
             from Cocoa import (
@@ -4518,16 +4663,16 @@ class TaskNamesWindowController(NSObject):
                 NSTitledWindowMask | NSClosableWindowMask | NSResizableWindowMask
             )
 
-        print("[Window] Creating window...")
+        window_logger.debug("Creating window...")
         self.window = NSWindow.alloc().initWithContentRect_styleMask_backing_defer_(
             NSMakeRect(0, 0, width, height), style_mask, 2, False
         )
-        print(f"[Window] Window created: {self.window}")
+        window_logger.debug("Window created: %s", self.window)
         self.window.setTitle_(t("task_names"))
 
         # Center on primary screen
         self.window.center()
-        print("[Window] TaskNames window centered on primary screen")
+        window_logger.debug("TaskNames window centered on primary screen")
         self.window.setReleasedWhenClosed_(False)
 
         from Cocoa import NSMakeSize
@@ -4597,17 +4742,17 @@ class TaskNamesWindowController(NSObject):
 
         self.scrollView = scrollView
         self.window.setDelegate_(self)
-        NSLog("TaskNamesWindowController.setupUI COMPLETED")
+        logger.debug("TaskNamesWindowController.setupUI COMPLETED")
 
     def reloadData(self):
         """Перезагрузить данные в таблице"""
-        NSLog("TaskNamesWindowController.reloadData called")
+        logger.debug("TaskNamesWindowController.reloadData called")
         # Convert sqlite3.Row objects to dictionaries for better compatibility with PyObjC
         task_names_raw = self.db.get_all_task_names()
         self.task_names = [dict(row) for row in task_names_raw]
-        NSLog(f"Loaded {len(self.task_names)} task names")
+        logger.debug("Loaded %s task names", len(self.task_names))
         self.tableView.reloadData()
-        NSLog("TaskNamesWindowController.reloadData COMPLETED")
+        logger.debug("TaskNamesWindowController.reloadData COMPLETED")
 
     # NSTableView DataSource методи
     def numberOfRowsInTableView_(self, tableView):
@@ -4668,17 +4813,19 @@ class TaskNamesWindowController(NSObject):
             new_name = input_field.stringValue().strip()
 
             if not new_name:
-                NSLog("New task name is empty, ignoring")
+                logger.warning("New task name is empty, ignoring")
                 return
 
             if new_name == old_name:
-                NSLog("Task name unchanged")
+                logger.info("Task name unchanged")
                 return
 
             # Обновляем название задачи в БД
             # Это автоматически обновит ВСЕ сессии с этим task_name_id
             if self.db.update_task_name(task_name_id, new_name):
-                NSLog(f"Successfully renamed task '{old_name}' to '{new_name}'")
+                logger.info(
+                    "Successfully renamed task '%s' to '%s'", old_name, new_name
+                )
 
                 # Обновляем отображение
                 self.reloadData()
@@ -4693,7 +4840,7 @@ class TaskNamesWindowController(NSObject):
                     ):
                         app.controller.reload_sessions()
                 except Exception as e:
-                    NSLog(f"Error refreshing main window: {e}")
+                    logger.error("Error refreshing main window: %s", e)
             else:
                 # Показываем ошибку
                 error_alert = NSAlert.alloc().init()
@@ -4728,6 +4875,9 @@ class AllTasksWindowController(NSObject):
             return None
         self.db = None
         self.all_sessions = []
+        self.table_model = TaskTableModel()
+        self.paid_color = None
+        self.unpaid_color = None
         self.window = None
         self.tableView = None
         self.filterPopup = None
@@ -4735,6 +4885,9 @@ class AllTasksWindowController(NSObject):
         self.projects_cache = []
         self.selected_project_id = None
         self.current_filter = "all"  # За замовчуванням - всі задачі
+        self.paid_filter = None  # None - всі, True - оплачені, False - неоплачені
+        self.task_search = ""
+        self.sort_order = ()  # [(колонка, за зростанням)]; порожньо - нові зверху
         return self
 
     def showWindow(self):
@@ -4776,7 +4929,7 @@ class AllTasksWindowController(NSObject):
 
         # Center on primary screen
         self.window.center()
-        print("[Window] AllTasks window centered on primary screen")
+        window_logger.debug("AllTasks window centered on primary screen")
         self.window.setTitle_(t("all_tasks"))
         self.window.setReleasedWhenClosed_(False)
 
@@ -4857,9 +5010,46 @@ class AllTasksWindowController(NSObject):
         )  # Прилипає до правого краю
         content.addSubview_(self.statsLabel)
 
+        # Другий рядок фільтрів: оплата та пошук за назвою задачі
+        filterY2 = filterY - 36
+
+        self.paidPopup = NSPopUpButton.alloc().initWithFrame_pullsDown_(
+            NSMakeRect(90, filterY2, 150, 28), False
+        )
+        self.paidPopup.addItemWithTitle_(t("all"))
+        self.paidPopup.addItemWithTitle_(t("paid"))
+        self.paidPopup.addItemWithTitle_(t("unpaid"))
+        self.paidPopup.setTarget_(self)
+        self.paidPopup.setAction_(objc.selector(self.paidChanged_, signature=b"v@:"))
+        content.addSubview_(self.paidPopup)
+
+        from Cocoa import NSSearchField
+
+        self.searchField = NSSearchField.alloc().initWithFrame_(
+            NSMakeRect(340, filterY2 + 3, 250, 22)
+        )
+        self.searchField.setPlaceholderString_(t("search_tasks"))
+        self.searchField.setTarget_(self)
+        self.searchField.setAction_(
+            objc.selector(self.searchChanged_, signature=b"v@:")
+        )
+        content.addSubview_(self.searchField)
+
+        # Рахунок на неоплачені сесії вибраного проекту за період
+        self.invoiceBtn = NSButton.alloc().initWithFrame_(
+            NSMakeRect(600, filterY2, 160, 28)
+        )
+        self.invoiceBtn.setTitle_(t("create_invoice"))
+        self.invoiceBtn.setBezelStyle_(NSBezelStyleRounded)
+        self.invoiceBtn.setTarget_(self)
+        self.invoiceBtn.setAction_(
+            objc.selector(self.createInvoice_, signature=b"v@:")
+        )
+        content.addSubview_(self.invoiceBtn)
+
         # Таблиця задач
         tableY = 20
-        tableHeight = height - 100
+        tableHeight = height - 136
         scrollView = NSScrollView.alloc().initWithFrame_(
             NSMakeRect(20, tableY, width - 40, tableHeight)
         )
@@ -4899,6 +5089,14 @@ class AllTasksWindowController(NSObject):
         col6.headerCell().setStringValue_("Вартість")
         self.tableView.addTableColumn_(col6)
 
+        # Сортування по кліку на заголовок виконує SQLite (SessionQuery)
+        for column in self.tableView.tableColumns():
+            column.setSortDescriptorPrototype_(
+                NSSortDescriptor.sortDescriptorWithKey_ascending_(
+                    column.identifier(), True
+                )
+            )
+
         self.tableView.setDelegate_(self)
         self.tableView.setDataSource_(self)
 
@@ -4918,9 +5116,10 @@ class AllTasksWindowController(NSObject):
     def loadProjects(self):
         """Завантажити список проектів"""
         if self.db is None:
-            NSLog("ERROR: AllTasksWindowController.loadProjects - db is None!")
+            logger.error("AllTasksWindowController.loadProjects - db is None!")
             return
         self.projects_cache = self.db.get_all_projects()
+        self.table_model.set_projects(self.projects_cache)
         self.projectPopup.removeAllItems()
         self.projectPopup.addItemWithTitle_(t("all_projects"))
         for p in self.projects_cache:
@@ -4939,6 +5138,76 @@ class AllTasksWindowController(NSObject):
             self.current_filter = "month"
         self.reloadData()
 
+    def paidChanged_(self, sender):
+        """Обробка зміни фільтра оплати"""
+        idx = self.paidPopup.indexOfSelectedItem()
+        self.paid_filter = {1: True, 2: False}.get(idx)
+        self.reloadData()
+
+    def searchChanged_(self, sender):
+        """Пошук за назвою задачі (підрядок)"""
+        self.task_search = str(self.searchField.stringValue()).strip()
+        self.reloadData()
+
+    def tableView_sortDescriptorsDidChange_(self, tableView, oldDescriptors):
+        """Клік на заголовок колонки - сортування передається в SQL"""
+        self.sort_order = [
+            (str(descriptor.key()), bool(descriptor.ascending()))
+            for descriptor in tableView.sortDescriptors()
+        ]
+        self.reloadData()
+
+    def createInvoice_(self, sender):
+        """Виставити рахунок: неоплачені сесії проекту за період - оплачені"""
+        try:
+            filters = self.db.get_period_filters(
+                self.current_filter, self.selected_project_id
+            )
+            unpaid = self.db.query_sessions(
+                SessionQuery.coerce(filters).paid(False)
+            )
+            closed = [s for s in unpaid if not s.is_running]
+
+            alert = NSAlert.alloc().init()
+            alert.setMessageText_(t("create_invoice"))
+            if not closed:
+                alert.setInformativeText_(t("nothing_to_invoice"))
+                alert.addButtonWithTitle_("OK")
+                alert.runModal()
+                return
+            duration = sum(s.duration for s in closed)
+            amount = sum(self.table_model.session_cost(s) for s in closed)
+            alert.setInformativeText_(
+                t("create_invoice_message").format(
+                    len(closed), format_hms(duration), amount
+                )
+            )
+            alert.addButtonWithTitle_(t("yes"))
+            alert.addButtonWithTitle_(t("cancel"))
+            alert.setAlertStyle_(NSAlertStyleInformational)
+            # NSAlertFirstButtonReturn == 1000
+            if alert.runModal() == 1000:
+                self.db.create_invoice(
+                    project_id=self.selected_project_id,
+                    start_date=filters.get("start_date"),
+                )
+                self.reloadData()
+        except Exception as e:
+            logger.error("createInvoice_ error: %s", e)
+
+    @objc.python_method
+    def buildQuery(self):
+        """SessionQuery з поточних фільтрів і сортування вікна"""
+        filters = self.db.get_period_filters(
+            self.current_filter, self.selected_project_id
+        )
+        return (
+            SessionQuery.coerce(filters)
+            .paid(self.paid_filter)
+            .task(name=self.task_search)
+            .order_by(*self.sort_order)
+        )
+
     def projectChanged_(self, sender):
         """Обробка зміни проекту"""
         idx = self.projectPopup.indexOfSelectedItem()
@@ -4951,139 +5220,67 @@ class AllTasksWindowController(NSObject):
 
     def reloadData(self):
         """Перезавантажити дані задач"""
+        with PROFILER.refresh("AllTasks.reloadData"):
+            self._reloadData()
+
+    @objc.python_method
+    def _reloadData(self):
         if self.db is None:
-            NSLog("ERROR: AllTasksWindowController db is None!")
+            logger.error("AllTasksWindowController db is None!")
             return
 
-        if self.current_filter == "all":
-            # Отримуємо всі задачі
-            if self.selected_project_id is not None:
-                self.all_sessions = [
-                    dict(row)
-                    for row in self.db.get_all_sessions_by_project(
-                        self.selected_project_id
-                    )
-                ]
-            else:
-                self.all_sessions = [dict(row) for row in self.db.get_all_sessions()]
-        else:
-            # Отримуємо задачі за фільтром
-            if self.selected_project_id is not None:
-                self.all_sessions = [
-                    dict(row)
-                    for row in self.db.get_sessions_by_project(
-                        self.selected_project_id, self.current_filter
-                    )
-                ]
-            else:
-                self.all_sessions = [
-                    dict(row)
-                    for row in self.db.get_sessions_by_filter(self.current_filter)
-                ]
-
-        # Оновлюємо статистику
-        total_duration = sum(s["duration"] for s in self.all_sessions)
-        hours = total_duration // 3600
-        minutes = (total_duration % 3600) // 60
-        seconds = total_duration % 60
-
-        # Рахуємо загальну вартість
-        total_cost = 0
-        for s in self.all_sessions:
-            duration_hours = s["duration"] / 3600.0
-            hourly_rate = s.get("hourly_rate", 0) or 0
-            total_cost += duration_hours * hourly_rate
+        # Фільтри та сортування виконує SQLite; "all" - без обмеження дат.
+        # Після першого завантаження підтягуються лише змінені сесії (change_seq)
+        if not hasattr(self, "session_model"):
+            self.session_model = SessionListModel(self.db)
+        changed = self.session_model.load(self.buildQuery())
+        self.all_sessions = self.session_model.rows
+
+        if changed:
+            self.table_model.set_sessions(self.all_sessions)
 
+        # Оновлюємо статистику (вартість - за ставкою проекту)
+        count, total_duration, total_cost = self.table_model.totals()
         self.statsLabel.setStringValue_(
-            f"Всього: {len(self.all_sessions)} задач, {hours:02d}:{minutes:02d}:{seconds:02d}, ${total_cost:.2f}"
+            f"Всього: {count} задач, {format_hms(total_duration)}, ${total_cost:.2f}"
         )
 
-        self.tableView.reloadData()
+        if changed:
+            self.tableView.reloadData()
 
     # NSTableView DataSource методи
     def numberOfRowsInTableView_(self, tableView):
-        return len(self.all_sessions)
+        return len(self.table_model)
 
     def tableView_objectValueForTableColumn_row_(self, tableView, tableColumn, row):
-        if row >= len(self.all_sessions):
-            return ""
-
-        session = self.all_sessions[row]
-        identifier = tableColumn.identifier()
-
-        if identifier == "description":
-            return session.get("description", "")
-        elif identifier == "project":
-            project_id = session.get("project_id")
-            if project_id:
-                project = next(
-                    (p for p in self.projects_cache if p["id"] == project_id), None
-                )
-                return project["name"] if project else ""
-            return ""
-        elif identifier == "date":
-            start_time = session.get("start_time", "")
-            if start_time:
-                try:
-                    dt = datetime.strptime(start_time, "%Y-%m-%d %H:%M:%S")
-                    return dt.strftime("%d.%m.%Y")
-                except:
-                    return start_time.split()[0] if " " in start_time else start_time
-            return ""
-        elif identifier == "time":
-            start_time = session.get("start_time", "")
-            end_time = session.get("end_time", "")
-            if start_time and end_time:
-                try:
-                    dt_start = datetime.strptime(start_time, "%Y-%m-%d %H:%M:%S")
-                    dt_end = datetime.strptime(end_time, "%Y-%m-%d %H:%M:%S")
-                    return f"{dt_start.strftime('%H:%M')} - {dt_end.strftime('%H:%M')}"
-                except:
-                    return (
-                        f"{start_time.split()[1] if ' ' in start_time else start_time}"
-                    )
-            return ""
-        elif identifier == "duration":
-            duration = session.get("duration", 0)
-            hours = duration // 3600
-            minutes = (duration % 3600) // 60
-            seconds = duration % 60
-            return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-        elif identifier == "cost":
-            duration = session.get("duration", 0)
-            hourly_rate = session.get("hourly_rate", 0) or 0
-            if hourly_rate > 0:
-                duration_hours = duration / 3600.0
-                cost = duration_hours * hourly_rate
-                return f"${cost:.2f}"
-            return "$0.00"
-
-        return ""
+        # Рядки відформатовані моделлю один раз на завантаження даних
+        return self.table_model.value(row, tableColumn.identifier())
 
     def tableView_willDisplayCell_forTableColumn_row_(
         self, tableView, cell, tableColumn, row
     ):
         """Устанавливаем цвет фона для оплаченных задач"""
-        if row >= len(self.all_sessions):
+        if row >= len(self.table_model):
             return
 
-        session = self.all_sessions[row]
-        is_paid = session.get("paid", 0) == 1
-
-        if is_paid:
+        if self.paid_color is None:
             # Салатовый фон для оплаченных задач (светло-зеленый)
             # RGB: (217, 242, 217) -> (0.85, 0.95, 0.85)
-            paid_color = NSColor.colorWithRed_green_blue_alpha_(0.85, 0.95, 0.85, 1.0)
-            cell.setBackgroundColor_(paid_color)
-            cell.setDrawsBackground_(True)
-        else:
-            # Обычный белый фон для неоплаченных
+            self.paid_color = NSColor.colorWithRed_green_blue_alpha_(
+                0.85, 0.95, 0.85, 1.0
+            )
             try:
                 # Пытаемся использовать системный цвет фона
-                cell.setBackgroundColor_(NSColor.controlBackgroundColor())
+                self.unpaid_color = NSColor.controlBackgroundColor()
             except:
-                cell.setBackgroundColor_(NSColor.whiteColor())
-            cell.setDrawsBackground_(True)
+                self.unpaid_color = NSColor.whiteColor()
+
+        if self.table_model.is_paid(row):
+            cell.setBackgroundColor_(self.paid_color)
+        else:
+            # Обычный фон для неоплаченных
+            cell.setBackgroundColor_(self.unpaid_color)
+        cell.setDrawsBackground_(True)
 
     def windowDidResize_(self, notification):
         """Обробка зміни розміру вікна - оновлюємо позиції та ширину елементів"""
@@ -5117,10 +5314,17 @@ class AllTasksWindowController(NSObject):
                 NSMakeRect(width - labelWidth - 20, filterY, labelWidth, 20)
             )
 
+        filterY2 = filterY - 36
+        if hasattr(self, "paidPopup"):
+            self.paidPopup.setFrame_(NSMakeRect(90, filterY2, 150, 28))
+
+        if hasattr(self, "searchField"):
+            self.searchField.setFrame_(NSMakeRect(340, filterY2 + 3, 250, 22))
+
         # Оновлюємо розмір та позицію scrollView
         if hasattr(self, "scrollView"):
             tableY = 20
-            tableHeight = height - 100
+            tableHeight = height - 136
             self.scrollView.setFrame_(NSMakeRect(20, tableY, width - 40, tableHeight))
 
         # Оновлюємо ширину колонок таблиці
@@ -5142,127 +5346,130 @@ class AllTasksWindowController(NSObject):
 
 class AppDelegate(NSObject):
     def applicationDidFinishLaunching_(self, notification):
-        NSLog("=== AppDelegate: applicationDidFinishLaunching started ===")
+        logger.debug("AppDelegate: applicationDidFinishLaunching started")
         try:
             # КРИТИЧЕСКИ ВАЖНО: Устанавливаем политику активации как обычное приложение
             # Без этого приложение работает как фоновый агент и окна не показываются
             NSApp.setActivationPolicy_(0)  # NSApplicationActivationPolicyRegular = 0
-            NSLog("=== Activation policy set to Regular ===")
+            logger.debug("Activation policy set to Regular")
 
-            NSLog("=== Creating TimeTrackerWindowController ===")
+            logger.debug("Creating TimeTrackerWindowController")
             self.controller = TimeTrackerWindowController.alloc().init()
-            NSLog("=== Controller created, calling setupUI ===")
+            logger.debug("Controller created, calling setupUI")
             # ВЫЗЫВАЕМ setupUI только после полного запуска приложения
             self.controller.setupUI()
-            NSLog("=== setupUI completed ===")
+            logger.debug("setupUI completed")
             # ВАЖНО: Сохраняем сильную ссылку на окно, чтобы оно не освобождалось при закрытии
             self.mainWindow = self.controller.window
-            print("[Window] === Window reference saved ===")
+            window_logger.debug("Window reference saved")
 
             # 7-step forced window display with extensive logging
-            print("[Window] === Starting 7-step forced window display ===")
+            window_logger.debug("Starting 7-step forced window display")
 
             # Log window state BEFORE forced display
             _logWindowState(self.mainWindow, "main_window (before forced display)")
 
             # Step 1: Activate app (ignore other apps)
-            print("[Window] Step 1/7: Activating app...")
+            window_logger.debug("Step 1/7: Activating app...")
             NSApp.activateIgnoringOtherApps_(True)
-            print("[Window] Step 1/7: DONE - App activated")
+            window_logger.debug("Step 1/7: DONE - App activated")
 
             # Step 2: Set window level
-            print("[Window] Step 2/7: Setting window level to Normal...")
+            window_logger.debug("Step 2/7: Setting window level to Normal...")
             from Cocoa import NSNormalWindowLevel
 
             self.mainWindow.setLevel_(NSNormalWindowLevel)
-            print(
-                f"[Window] Step 2/7: DONE - Window level set to {self.mainWindow.level()}"
+            window_logger.debug(
+                "Step 2/7: DONE - Window level set to %s", self.mainWindow.level()
             )
 
             # Step 3: Explicitly make visible
-            print("[Window] Step 3/7: Setting isVisible to True...")
+            window_logger.debug("Step 3/7: Setting isVisible to True...")
             self.mainWindow.setIsVisible_(True)
-            print(
-                f"[Window] Step 3/7: DONE - isVisible = {self.mainWindow.isVisible()}"
+            window_logger.debug(
+                "Step 3/7: DONE - isVisible = %s", self.mainWindow.isVisible()
             )
 
             # Step 4: Ensure not transparent
-            print("[Window] Step 4/7: Setting alphaValue to 1.0...")
+            window_logger.debug("Step 4/7: Setting alphaValue to 1.0...")
             self.mainWindow.setAlphaValue_(1.0)
-            print(
-                f"[Window] Step 4/7: DONE - alphaValue = {self.mainWindow.alphaValue()}"
+            window_logger.debug(
+                "Step 4/7: DONE - alphaValue = %s", self.mainWindow.alphaValue()
             )
 
             # Step 5: Order front regardless
-            print("[Window] Step 5/7: Calling orderFrontRegardless...")
+            window_logger.debug("Step 5/7: Calling orderFrontRegardless...")
             self.mainWindow.orderFrontRegardless()
-            print("[Window] Step 5/7: DONE - orderFrontRegardless called")
+            window_logger.debug("Step 5/7: DONE - orderFrontRegardless called")
 
             # Step 6: Make key and order front
-            print("[Window] Step 6/7: Calling makeKeyAndOrderFront...")
+            window_logger.debug("Step 6/7: Calling makeKeyAndOrderFront...")
             self.mainWindow.makeKeyAndOrderFront_(None)
-            print(
-                f"[Window] Step 6/7: DONE - isKeyWindow = {self.mainWindow.isKeyWindow()}"
+            window_logger.debug(
+                "Step 6/7: DONE - isKeyWindow = %s", self.mainWindow.isKeyWindow()
             )
 
             # Step 7: Re-activate app
-            print("[Window] Step 7/7: Re-activating app...")
+            window_logger.debug("Step 7/7: Re-activating app...")
             NSApp.activateIgnoringOtherApps_(True)
-            print("[Window] Step 7/7: DONE - App re-activated")
+            window_logger.debug("Step 7/7: DONE - App re-activated")
 
             # Log window state AFTER forced display
             _logWindowState(self.mainWindow, "main_window (AFTER forced display)")
-            print("[Window] === 7-step forced window display COMPLETED ===")
+            window_logger.debug("7-step forced window display COMPLETED")
 
             # Окно настроек проектов
             self.settingsController = None
             # Меню приложения с Cmd+Q
-            NSLog("=== Building menu ===")
+            logger.debug("Building menu")
             self.buildMenu()
-            NSLog("=== Menu built ===")
+            logger.debug("Menu built")
             # Устанавливаем иконку дока, если доступна
             if not DEV_MODE:
                 self._setDockIcon()
-                NSLog("=== Dock icon set ===")
+                logger.debug("Dock icon set")
             else:
-                NSLog("=== DEV_MODE active: dock icon skip ===")
+                logger.debug("DEV_MODE active: dock icon skip")
             if not DEV_MODE:
                 # Создаем статус-иконку в меню-баре (в dev-режиме не используем, чтобы избежать крашей)
                 self._createStatusItem()
-                NSLog("=== Status item created ===")
+                logger.debug("Status item created")
                 # Инициализируем её отображение
                 self.updateStatusItem()
-                NSLog("=== Status item updated ===")
+                logger.debug("Status item updated")
             else:
-                NSLog("=== DEV_MODE active: status bar disabled ===")
-            NSLog("=== AppDelegate: applicationDidFinishLaunching completed ===")
+                logger.debug("DEV_MODE active: status bar disabled")
+            logger.debug("AppDelegate: applicationDidFinishLaunching completed")
         except Exception as e:
-            NSLog(f"=== ERROR in applicationDidFinishLaunching: {e} ===")
-            import traceback
-
-            traceback.print_exc()
-
-    def applicationWillTerminate_(self, notification):
-        try:
-            self.controller.db.close()
-        except Exception:
-            pass
+            logger.exception("Error in applicationDidFinishLaunching: %s", e)
 
     def applicationWillTerminate_(self, notification):
         """Called when application is about to terminate (Cmd+Q or Quit menu)"""
-        NSLog("[App] applicationWillTerminate_ - saving window position")
+        app_logger.info("applicationWillTerminate_ - saving window position")
+        try:
+            # Таймер продолжает идти после выхода - это не краш
+            if getattr(self.controller, "timer_running", False):
+                self.controller.db.release_active_session()
+        except Exception as e:
+            app_logger.error("Error releasing active session on quit: %s", e)
         try:
             # Save main window position before quitting
             if hasattr(self, "controller") and self.controller is not None:
                 self.controller._saveWindowPosition()
-                NSLog("[App] Window position saved on quit")
+                app_logger.info("Window position saved on quit")
             else:
-                NSLog("[App] ERROR: controller not found or is None")
+                app_logger.error("Error controller not found or is None")
         except Exception as e:
-            NSLog(f"[App] ERROR saving window position on quit: {e}")
-            import traceback
-
-            traceback.print_exc()
+            app_logger.exception("Error saving window position on quit: %s", e)
+        if getattr(self.controller, "ipc_server", None) is not None:
+            self.controller.ipc_server.stop()
+        PROFILER.close()
+        METRICS.close()
+        try:
+            # Последним: снимок инструментирования и PRAGMA optimize при закрытии
+            self.controller.db.close()
+        except Exception as e:
+            app_logger.exception("Error closing database on quit: %s", e)
 
     def applicationShouldTerminateAfterLastWindowClosed_(self, app):
         # Закрытие окна не завершает приложение - оно остаётся в статус-баре
@@ -5288,7 +5495,7 @@ class AppDelegate(NSObject):
                     info["CFBundleDisplayName"] = APP_NAME
                     info["NSApplicationName"] = APP_NAME
             except Exception as e:
-                NSLog(f"Bundle rename error: {e}")
+                logger.error("Bundle rename error: %s", e)
 
             # Модификаторы
             try:
@@ -5499,7 +5706,7 @@ class AppDelegate(NSObject):
 
             NSApp.setMainMenu_((mainMenu))
         except Exception as e:
-            NSLog(f"Menu build error: {e}")
+            logger.error("Menu build error: %s", e)
 
     def openSettings_(self, sender):
         """Открывает окно настроек проектов"""
@@ -5547,8 +5754,11 @@ class AppDelegate(NSObject):
             # Передаємо параметри як аргументи
             args = [python_exec, stats_script, current_filter, str(selected_project_id)]
 
-            NSLog(
-                f"Launching statistics: script={stats_script}, python={python_exec}, cwd={script_dir}"
+            logger.info(
+                "Launching statistics: script=%s, python=%s, cwd=%s",
+                stats_script,
+                python_exec,
+                script_dir,
             )
 
             # Запускаємо в фоні (с выводом для отладки при запуске из .app)
@@ -5564,15 +5774,14 @@ class AppDelegate(NSObject):
                     stderr=subprocess.DEVNULL,
                 )
 
-            NSLog(
-                f"Statistics window launched: filter={current_filter}, project={selected_project_id}"
+            logger.info(
+                "Statistics window launched: filter=%s, project=%s",
+                current_filter,
+                selected_project_id,
             )
 
         except Exception as e:
-            NSLog(f"Statistics error: {e}")
-            import traceback
-
-            traceback.print_exc()
+            logger.exception("Statistics error: %s", e)
             from AppKit import NSAlert, NSAlertStyleWarning
 
             alert = NSAlert.alloc().init()
@@ -5603,23 +5812,22 @@ class AppDelegate(NSObject):
     def openTaskNames_(self, sender):
         """Відкрити вікно зі списком назв задач"""
         try:
-            NSLog("openTaskNames_ called")
+            logger.info("openTaskNames_ called")
             if (
                 not hasattr(self, "taskNamesController")
                 or self.taskNamesController is None
             ):
-                NSLog("Creating new TaskNamesWindowController")
+                logger.info("Creating new TaskNamesWindowController")
                 self.taskNamesController = TaskNamesWindowController.alloc().init()
                 self.taskNamesController.db = self.controller.db
-                NSLog(f"TaskNamesWindowController created: {self.taskNamesController}")
-            NSLog("Calling showWindow")
+                logger.info(
+                    "TaskNamesWindowController created: %s", self.taskNamesController
+                )
+            logger.info("Calling showWindow")
             self.taskNamesController.showWindow()
-            NSLog("showWindow completed")
+            logger.info("showWindow completed")
         except Exception as e:
-            NSLog(f"Error in openTaskNames_: {e}")
-            import traceback
-
-            traceback.print_exc()
+            logger.exception("Error in openTaskNames_: %s", e)
 
     @objc.python_method
     def _setDockIcon(self):
@@ -5636,7 +5844,7 @@ class AppDelegate(NSObject):
                         NSApp.setApplicationIconImage_(img)
                         break
         except Exception as e:
-            NSLog(f"Set dock icon error: {e}")
+            logger.error("Set dock icon error: %s", e)
 
     @objc.python_method
     def _setWindowIcon(self, window):
@@ -5658,7 +5866,7 @@ class AppDelegate(NSObject):
                         )  # 0 = Close button's document icon
                         break
         except Exception as e:
-            NSLog(f"Set window icon error: {e}")
+            logger.error("Set window icon error: %s", e)
 
     # ===== Статус-бар (меню-бар) =====
     @objc.python_method
@@ -5725,7 +5933,7 @@ class AppDelegate(NSObject):
             self._updateRecentTasksMenu()
 
         except Exception as e:
-            NSLog(f"Create status item error: {e}")
+            logger.error("Create status item error: %s", e)
 
     def showMainWindow_(self, _):
         try:
@@ -5735,7 +5943,7 @@ class AppDelegate(NSObject):
                 # Активируем приложение
                 NSApp.activateIgnoringOtherApps_(True)
         except Exception as e:
-            NSLog(f"Error showing main window: {e}")
+            logger.error("Error showing main window: %s", e)
 
     def toggleFromStatusBar_(self, _):
         try:
@@ -5746,7 +5954,7 @@ class AppDelegate(NSObject):
                 # Останавливаем текущий таймер
                 self.controller.toggleTimer_(None)
         except Exception as e:
-            NSLog(f"Toggle from status bar error: {e}")
+            logger.error("Toggle from status bar error: %s", e)
 
     @objc.python_method
     def _startLastTask(self):
@@ -5755,7 +5963,7 @@ class AppDelegate(NSObject):
             # Получаем последнюю сессию из БД
             sessions = list(self.controller.db.get_week_sessions())
             if not sessions:
-                NSLog("Нет предыдущих задач для продолжения")
+                logger.info("Нет предыдущих задач для продолжения")
                 return
 
             last_session = sessions[0]
@@ -5782,14 +5990,14 @@ class AppDelegate(NSObject):
             self._sendNotification(project_name, work_type_name)
 
         except Exception as e:
-            NSLog(f"Error starting last task: {e}")
+            logger.error("Error starting last task: %s", e)
 
     @objc.python_method
     def _sendNotification(self, project_name, task_description):
         """Отправляет системное уведомление о запуске таймера"""
         try:
             if DEV_MODE:
-                NSLog("DEV_MODE: skip notification")
+                logger.info("DEV_MODE: skip notification")
                 return
             notification = NSUserNotification.alloc().init()
             notification.setTitle_(f"⏱ {APP_NAME} - {t('timer_started')}")
@@ -5802,14 +6010,14 @@ class AppDelegate(NSObject):
                 if appIcon:
                     notification.setContentImage_(appIcon)
             except Exception as e:
-                NSLog(f"Could not set notification icon: {e}")
+                logger.error("Could not set notification icon: %s", e)
 
             # Отправляем уведомление
             center = NSUserNotificationCenter.defaultUserNotificationCenter()
             center.deliverNotification_(notification)
 
         except Exception as e:
-            NSLog(f"Error sending notification: {e}")
+            logger.error("Error sending notification: %s", e)
 
     @objc.python_method
     def _sendStopNotification(self, project_name, task_description, elapsed_time):
@@ -5826,14 +6034,14 @@ class AppDelegate(NSObject):
                 if appIcon:
                     notification.setContentImage_(appIcon)
             except Exception as e:
-                NSLog(f"Could not set notification icon: {e}")
+                logger.error("Could not set notification icon: %s", e)
 
             # Отправляем уведомление
             center = NSUserNotificationCenter.defaultUserNotificationCenter()
             center.deliverNotification_(notification)
 
         except Exception as e:
-            NSLog(f"Error sending stop notification: {e}")
+            logger.error("Error sending stop notification: %s", e)
 
     def switchToTask_(self, sender):
         """Переключает таймер на выбранную задачу из последних 3"""
@@ -5842,7 +6050,7 @@ class AppDelegate(NSObject):
             sessions = list(self.controller.db.get_week_sessions())
 
             if task_index >= len(sessions):
-                NSLog(f"Task index {task_index} out of range")
+                logger.info("Task index %s out of range", task_index)
                 return
 
             selected_session = sessions[task_index]
@@ -5879,10 +6087,10 @@ class AppDelegate(NSObject):
                 # Отправляем уведомление о переключении
                 self._sendNotification(project_name, work_type_name)
 
-            NSLog(f"Switched to task: {project_name} - {work_type_name}")
+            logger.info("Switched to task: %s - %s", project_name, work_type_name)
 
         except Exception as e:
-            NSLog(f"Error switching task: {e}")
+            logger.error("Error switching task: %s", e)
 
     @objc.python_method
     def _updateRecentTasksMenu(self):
@@ -5911,7 +6119,7 @@ class AppDelegate(NSObject):
                     item.setEnabled_(False)
 
         except Exception as e:
-            NSLog(f"Error updating recent tasks menu: {e}")
+            logger.error("Error updating recent tasks menu: %s", e)
 
     @objc.python_method
     def updateStatusItem(self):
@@ -5942,7 +6150,7 @@ class AppDelegate(NSObject):
                 pass
 
         except Exception as e:
-            NSLog(f"Update status item error: {e}")
+            logger.error("Update status item error: %s", e)
 
 
 def main():
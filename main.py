@@ -4,7 +4,15 @@ from datetime import datetime, timedelta
 import threading
 import json
 import os
-from database import Database
+from database import Database, HEARTBEAT_INTERVAL, MAINTENANCE_INTERVAL
+from change_bus import PROJECT_EVENTS, SESSION_EVENTS
+from heartbeat import Heartbeat
+from metrics import METRICS, UI_SESSION_VIEWS, UI_VIEWS_REBUILT
+from profiling import PROFILER, profiled
+from scheduler import Scheduler
+from log import get_logger
+
+logger = get_logger("tk")
 
 class TimeTrackerApp:
     def __init__(self, root):
@@ -18,12 +26,29 @@ class TimeTrackerApp:
         self.current_session_id = None
         self.start_time = None
         self.elapsed_seconds = 0
-        self.auto_refresh_id = None
+        # Вся периодическая работа - задачи одного планировщика
+        self.scheduler = Scheduler()
+        self.scheduler_after_id = None
+        # Что нужно перезагрузить при следующем автообновлении (см. change_bus)
+        self.sessions_dirty = False
+        self.projects_dirty = False
+        self.db.changes.subscribe(self.on_sessions_changed, SESSION_EVENTS)
+        self.db.changes.subscribe(self.on_projects_changed, PROJECT_EVENTS)
         self.first_run = True
-        self.last_activity_check = None
         
         # Загружаем настройки (включая интервал напоминаний)
         self.load_settings()
+        self.heartbeat = Heartbeat(self.db, self.heartbeat_interval)
+        # Профилирование обновлений; profile_refreshes > 0 - сохранить cProfile
+        # этого числа следующих обновлений (как MTIMER_PROFILE)
+        PROFILER.bind_database(self.db)
+        if self.profile_refreshes > 0:
+            PROFILER.capture_next(self.profile_refreshes)
+        # Метрики для долгих запусков; metrics_interval > 0 - писать снимок
+        # metrics.prom каждые N секунд (как MTIMER_METRICS)
+        METRICS.bind_database(self.db)
+        if self.metrics_interval > 0:
+            METRICS.enable(self.metrics_interval)
         
         # Проверяем активную сессию при запуске
         self.check_active_session()
@@ -33,16 +58,31 @@ class TimeTrackerApp:
         self.refresh_sessions()
         
         if self.timer_running:
-            self.update_timer()
+            self.start_tracking_jobs()
         
         # Запускаем автообновление
-        self.auto_refresh_data()
+        self.scheduler.every("auto_refresh", 5.0, self.auto_refresh_data, tolerance=1.0, jitter=0.5)
+        # Обслуживание базы: сам метод пропускает заход, если база не простаивает
+        self.scheduler.every(
+            "db_maintenance", MAINTENANCE_INTERVAL,
+            lambda now: self.db.run_maintenance(), tolerance=30.0, jitter=30.0,
+        )
+        if METRICS.enabled:
+            self.scheduler.every(
+                "metrics", METRICS.interval,
+                lambda now: METRICS.write(), tolerance=METRICS.interval / 2,
+            )
+        self.scheduler.on_change = self.arm_scheduler
+        self.arm_scheduler()
     
     def load_settings(self):
         """Загружает настройки приложения из JSON файла"""
         settings_file = 'settings.json'
         default_settings = {
-            'reminder_interval': 60  # По умолчанию 60 минут
+            'reminder_interval': 60,  # По умолчанию 60 минут
+            'heartbeat_interval': HEARTBEAT_INTERVAL,  # Секунды между heartbeat сессии
+            'profile_refreshes': 0,  # Сколько следующих обновлений профилировать
+            'metrics_interval': 0  # Секунды между снимками метрик (0 - не писать)
         }
         
         try:
@@ -50,40 +90,54 @@ class TimeTrackerApp:
                 with open(settings_file, 'r', encoding='utf-8') as f:
                     settings = json.load(f)
                     self.reminder_interval = settings.get('reminder_interval', 60)
-                    print(f"✓ Настройки загружены: интервал напоминаний = {self.reminder_interval} минут")
+                    self.heartbeat_interval = settings.get('heartbeat_interval', HEARTBEAT_INTERVAL)
+                    self.profile_refreshes = settings.get('profile_refreshes', 0)
+                    self.metrics_interval = settings.get('metrics_interval', 0)
+                    logger.info("Настройки загружены: интервал напоминаний = %s минут", self.reminder_interval)
             else:
                 self.reminder_interval = 60
+                self.heartbeat_interval = HEARTBEAT_INTERVAL
+                self.profile_refreshes = 0
+                self.metrics_interval = 0
                 # Создаем файл настроек с значениями по умолчанию
                 self.save_settings()
-                print(f"✓ Создан файл настроек с интервалом по умолчанию: {self.reminder_interval} минут")
+                logger.info("Создан файл настроек с интервалом по умолчанию: %s минут", self.reminder_interval)
         except Exception as e:
-            print(f"Ошибка загрузки настроек: {e}")
+            logger.error("Ошибка загрузки настроек: %s", e)
             self.reminder_interval = 60
+            self.heartbeat_interval = HEARTBEAT_INTERVAL
+            self.profile_refreshes = 0
+            self.metrics_interval = 0
     
     def save_settings(self):
         """Сохраняет настройки приложения в JSON файл"""
         settings_file = 'settings.json'
         settings = {
-            'reminder_interval': self.reminder_interval
+            'reminder_interval': self.reminder_interval,
+            'heartbeat_interval': self.heartbeat_interval,
+            'profile_refreshes': self.profile_refreshes,
+            'metrics_interval': self.metrics_interval
         }
         
         try:
             with open(settings_file, 'w', encoding='utf-8') as f:
                 json.dump(settings, f, indent=2, ensure_ascii=False)
         except Exception as e:
-            print(f"Ошибка сохранения настроек: {e}")
+            logger.error("Ошибка сохранения настроек: %s", e)
     
     def check_active_session(self):
         """Проверяет есть ли активная сессия при запуске"""
+        # Сессия, оставшаяся после краша, закрывается на последнем heartbeat
+        self.db.recover_active_session()
         active = self.db.get_active_session()
         if active:
+            self.heartbeat.force()
             self.timer_running = True
             self.current_session_id = active['id']
             start_time_str = active['start_time']
             self.start_time = datetime.fromisoformat(start_time_str)
             elapsed = datetime.now() - self.start_time
             self.elapsed_seconds = int(elapsed.total_seconds())
-            self.last_activity_check = datetime.now()  # Инициализируем время последней проверки
     
     def create_widgets(self):
         # Верхняя панель с таймером
@@ -114,6 +168,17 @@ class TimeTrackerApp:
         self.description_entry.config(fg='#999')
         self.description_entry.bind('<FocusIn>', self.on_description_focus_in)
         self.description_entry.bind('<FocusOut>', self.on_description_focus_out)
+        self.description_entry.bind('<KeyRelease>', self.on_description_key)
+        self.description_entry.bind('<Down>', self.focus_suggestions)
+        self.description_entry.bind('<Escape>', lambda e: self.hide_suggestions())
+        
+        # Подсказки задач (frecency-индекс из базы)
+        self.suggestions_box = tk.Listbox(self.root, font=('Arial', 11), height=0,
+                                          relief=tk.FLAT, bd=1, highlightthickness=1,
+                                          highlightbackground='#ddd', activestyle='none')
+        self.suggestions_box.bind('<ButtonRelease-1>', self.apply_suggestion)
+        self.suggestions_box.bind('<Return>', self.apply_suggestion)
+        self.suggestions_box.bind('<Escape>', lambda e: self.hide_suggestions())
         
         # Вторая строка: проект, таймер и кнопка
         bottom_row = tk.Frame(timer_container, bg='white')
@@ -247,9 +312,54 @@ class TimeTrackerApp:
             self.description_entry.insert(0, "Введите описание...")
             self.description_entry.config(fg='#999')
     
+    def on_description_key(self, event):
+        """Обновляет подсказки задач при наборе описания"""
+        if event.keysym in ('Down', 'Up', 'Return', 'Escape'):
+            return
+        text = self.description_entry.get()
+        if not text.strip() or text == "Введите описание...":
+            self.hide_suggestions()
+            return
+        project_id = self.projects_by_name.get(self.project_var.get())
+        suggestions = [s for s in self.db.suggest_task_names(text, project_id) if s != text]
+        if not suggestions:
+            self.hide_suggestions()
+            return
+        self.suggestions_box.delete(0, tk.END)
+        for suggestion in suggestions:
+            self.suggestions_box.insert(tk.END, suggestion)
+        self.suggestions_box.config(height=len(suggestions))
+        self.suggestions_box.place(in_=self.description_entry, x=0, rely=1.0, relwidth=1.0)
+        self.suggestions_box.lift()
+    
+    def focus_suggestions(self, event):
+        """Переход стрелкой вниз из поля описания в список подсказок"""
+        if self.suggestions_box.winfo_ismapped():
+            self.suggestions_box.focus_set()
+            self.suggestions_box.selection_clear(0, tk.END)
+            self.suggestions_box.selection_set(0)
+            self.suggestions_box.activate(0)
+    
+    def apply_suggestion(self, event):
+        """Подставляет выбранную подсказку в поле описания"""
+        selection = self.suggestions_box.curselection()
+        if selection:
+            self.description_entry.delete(0, tk.END)
+            self.description_entry.insert(0, self.suggestions_box.get(selection[0]))
+            self.description_entry.config(fg='#333')
+        self.hide_suggestions()
+        self.description_entry.focus_set()
+        self.description_entry.icursor(tk.END)
+    
+    def hide_suggestions(self):
+        """Скрывает список подсказок"""
+        self.suggestions_box.place_forget()
+    
     def load_projects(self):
         """Загружает список проектов"""
+        self.projects_dirty = False
         projects = self.db.get_all_projects()
+        self.projects_by_name = {p['name']: p['id'] for p in projects}
         project_names = ["Без проекта"] + [p['name'] for p in projects]
         self.project_combo['values'] = project_names
         if project_names:
@@ -282,9 +392,9 @@ class TimeTrackerApp:
             self.start_time = datetime.now()
             self.elapsed_seconds = 0
             self.timer_running = True
-            self.last_activity_check = datetime.now()  # Сброс времени последней проверки
             self.start_stop_btn.config(text="STOP")
             self.update_timer()
+            self.start_tracking_jobs()
         else:
             # Стоп
             if self.current_session_id:
@@ -297,12 +407,12 @@ class TimeTrackerApp:
                 self.description_entry.config(fg='#999')
                 self.refresh_sessions()
                 self.current_session_id = None
-                self.last_activity_check = None  # Сброс времени проверки при остановке
+                self.stop_tracking_jobs()
     
-    def update_timer(self):
+    def update_timer(self, now=None):
         """Обновляет отображение таймера"""
         if self.timer_running:
-            elapsed = datetime.now() - self.start_time
+            elapsed = (now or datetime.now()) - self.start_time
             self.elapsed_seconds = int(elapsed.total_seconds())
             
             hours = self.elapsed_seconds // 3600
@@ -310,11 +420,42 @@ class TimeTrackerApp:
             seconds = self.elapsed_seconds % 60
             
             self.timer_label.config(text=f"{hours:02d}:{minutes:02d}:{seconds:02d}")
-            
-            # Проверяем активность каждую минуту
-            self.check_activity_reminder()
-            
-            self.root.after(1000, self.update_timer)
+    
+    def start_tracking_jobs(self):
+        """Регистрирует задачи, нужные только пока идёт таймер"""
+        self.scheduler.every("tick", 1.0, self.update_timer, tolerance=0.05)
+        # Heartbeat может подождать до ближайшего тика
+        self.scheduler.every(
+            "heartbeat", self.heartbeat.interval,
+            lambda now: self.heartbeat.beat(now), tolerance=1.0,
+        )
+        # Напоминание отсчитывается заново от старта/продолжения работы
+        self.scheduler.every(
+            "activity_reminder", self.reminder_interval * 60,
+            self.show_activity_dialog, tolerance=1.0,
+        )
+    
+    def stop_tracking_jobs(self):
+        """Снимает задачи таймера: в простое планировщик не просыпается каждую секунду"""
+        for name in ("tick", "heartbeat", "activity_reminder"):
+            self.scheduler.cancel(name)
+    
+    def arm_scheduler(self):
+        """Перевзводит единственный after() на ближайшее пробуждение планировщика"""
+        if self.scheduler_after_id:
+            self.root.after_cancel(self.scheduler_after_id)
+            self.scheduler_after_id = None
+        delay = self.scheduler.next_wakeup()
+        if delay is not None:
+            self.scheduler_after_id = self.root.after(
+                max(1, int(delay * 1000)), self.on_scheduler_wakeup
+            )
+    
+    def on_scheduler_wakeup(self):
+        """Выполняет задачи, которым пора, и планирует следующее пробуждение"""
+        self.scheduler_after_id = None
+        self.scheduler.run_due()
+        self.arm_scheduler()
     
     def format_duration(self, seconds):
         """Форматирует длительность в ЧЧ:ММ:СС"""
@@ -344,27 +485,7 @@ class TimeTrackerApp:
         # Запускаем таймер
         self.toggle_timer()
     
-    def check_activity_reminder(self):
-        """Проверяет, нужно ли показать напоминание о активности"""
-        if not self.timer_running or not self.start_time:
-            return
-        
-        # Если это первая проверка, инициализируем
-        if self.last_activity_check is None:
-            self.last_activity_check = datetime.now()
-            return
-        
-        # Проверяем, прошло ли достаточно времени с последней проверки
-        time_since_check = datetime.now() - self.last_activity_check
-        minutes_elapsed = time_since_check.total_seconds() / 60
-        
-        if minutes_elapsed >= self.reminder_interval:
-            # Обновляем время последней проверки
-            self.last_activity_check = datetime.now()
-            # Показываем диалог
-            self.show_activity_dialog()
-    
-    def show_activity_dialog(self):
+    def show_activity_dialog(self, now=None):
         """Показывает диалог с вопросом о продолжении работы"""
         if not self.timer_running:
             return
@@ -422,19 +543,21 @@ class TimeTrackerApp:
                 self.description_entry.insert(0, "Введите описание...")
                 self.description_entry.config(fg='#999')
                 self.refresh_sessions()
-                self.last_activity_check = None
+                self.stop_tracking_jobs()
         else:  # Если нажали "Да" - ПРОДОЛЖИТЬ РАБОТУ
             # Возобновляем таймер
             if paused_session_id and paused_start_time:
                 self.timer_running = True
                 self.current_session_id = paused_session_id
                 self.start_time = paused_start_time
-                self.last_activity_check = datetime.now()
-                # Перезапускаем update_timer
+                # Возобновляем задачи таймера, напоминание - через полный интервал
                 self.update_timer()
+                self.start_tracking_jobs()
     
+    @profiled("refresh_sessions")
     def refresh_sessions(self):
         """Обновляет список сессий"""
+        self.sessions_dirty = False
         # Очищаем текущий список
         for widget in self.sessions_frame.winfo_children():
             widget.destroy()
@@ -493,11 +616,13 @@ class TimeTrackerApp:
                     bg='white', fg='#666').pack()
             tk.Label(time_frame, text=self.format_duration(duration), 
                     font=('Arial', 11, 'bold'), bg='white', fg='#333').pack()
+        UI_VIEWS_REBUILT.value += len(sessions)
+        UI_SESSION_VIEWS.set(len(sessions))
         
         self.today_total_label.config(text=self.format_duration(total_today))
         
         # Обновляем недельную статистику
-        week_total = self.db.get_week_total()
+        week_total = self.db.get_week_total(include_live=True)
         self.week_total_label.config(text=self.format_duration(week_total))
     
     def create_new_project(self):
@@ -553,17 +678,38 @@ class TimeTrackerApp:
         self.load_projects()
         self.refresh_sessions()
     
-    def auto_refresh_data(self):
-        """Автоматическое обновление данных каждые 5 секунд"""
-        self.refresh_sessions()
-        # Планируем следующее обновление через 5 секунд
-        self.auto_refresh_id = self.root.after(5000, self.auto_refresh_data)
+    def auto_refresh_data(self, now=None):
+        """
+        Автоматическое обновление (задача планировщика, каждые 5 секунд).
+        Перезагружается только изменившееся; в тихом приложении это одна
+        PRAGMA data_version для изменений из других процессов.
+        """
+        self.db.poll_external_changes()
+        if self.projects_dirty:
+            selected = self.project_var.get()
+            self.load_projects()
+            if selected in self.projects_by_name:
+                self.project_var.set(selected)
+        if self.sessions_dirty:
+            self.refresh_sessions()
+    
+    def on_sessions_changed(self, event):
+        self.sessions_dirty = True
+    
+    def on_projects_changed(self, event):
+        self.projects_dirty = True
     
     def on_closing(self):
         """Обработка закрытия приложения"""
-        # Отменяем автообновление
-        if self.auto_refresh_id:
-            self.root.after_cancel(self.auto_refresh_id)
+        # Останавливаем планировщик
+        self.scheduler.on_change = None
+        if self.scheduler_after_id:
+            self.root.after_cancel(self.scheduler_after_id)
+        # Таймер продолжает идти после выхода - это не краш
+        if self.timer_running:
+            self.db.release_active_session()
+        PROFILER.close()
+        METRICS.close()
         self.db.close()
         self.root.destroy()
 
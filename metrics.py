@@ -0,0 +1,492 @@
+# -*- coding: utf-8 -*-
+"""
+Метрики долгоживущего процесса: счётчики, gauge и гистограммы, которые
+пополняют база (SQL-операторы, события изменений, кэш сводок) и UI
+(обновления списков, пересозданные виды сессий). Снимок периодически
+пишется в файл в текстовом формате Prometheus или в JSON.
+
+    METRICS.bind_database(db)
+    scheduler.every("metrics", METRICS.interval, lambda now: METRICS.write())
+
+Набор метрик фиксирован и описан в METRIC_SET. Запись включается
+переменной MTIMER_METRICS=<интервал, с> (или настройкой во фронтенде);
+файл - metrics.prom рядом с базой или MTIMER_METRICS_FILE (.json - JSON).
+Выключенный экспорт не подписывается на SQL-операторы базы; остальные
+счётчики - одно сложение. Прочитать записанный снимок:
+
+    python3 metrics.py [путь к metrics.prom | metrics.json]
+"""
+
+import argparse
+import bisect
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from log import get_logger
+
+logger = get_logger(__name__)
+
+# Переменные окружения
+METRICS_ENV = "MTIMER_METRICS"
+METRICS_FILE_ENV = "MTIMER_METRICS_FILE"
+# Интервал записи по умолчанию (секунд) и файл рядом с базой
+METRICS_INTERVAL = 60
+METRICS_FILE = "metrics.prom"
+# Границы корзин гистограмм длительности, секунды (как у клиентов Prometheus)
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Документированный набор: имя -> (тип, описание)
+METRIC_SET = {
+    "mtimer_uptime_seconds": ("gauge", "Seconds since the process started"),
+    "mtimer_process_resident_bytes": (
+        "gauge",
+        "Resident set size (current on Linux, peak elsewhere)",
+    ),
+    "mtimer_process_peak_resident_bytes": ("gauge", "Peak resident set size"),
+    "mtimer_db_queries_total": ("counter", "SQL statements executed by bound databases"),
+    "mtimer_db_queries_per_minute": (
+        "gauge",
+        "SQL statements per minute since the previous snapshot",
+    ),
+    "mtimer_db_changes_total": ("counter", "Data change events published by bound databases"),
+    "mtimer_db_size_bytes": ("gauge", "Database file size"),
+    "mtimer_db_wal_size_bytes": ("gauge", "Write-ahead log size (0 without WAL)"),
+    "mtimer_rollup_cache_hits_total": ("counter", "Rollup queries answered from the cache"),
+    "mtimer_rollup_cache_misses_total": ("counter", "Rollup queries that ran SQL"),
+    "mtimer_rollup_cache_hit_ratio": ("gauge", "Rollup cache hits / lookups since start"),
+    "mtimer_ui_refreshes_total": ("counter", "Outermost UI refreshes"),
+    "mtimer_ui_refresh_duration_seconds": ("histogram", "Outermost UI refresh duration"),
+    "mtimer_ui_session_views": ("gauge", "Session row views currently in the list"),
+    "mtimer_ui_views_rebuilt_total": ("counter", "Session row views created"),
+    "mtimer_ui_views_rebuilt_per_hour": (
+        "gauge",
+        "Session row views created per hour since the previous snapshot",
+    ),
+}
+
+
+class Counter:
+    """Монотонно растущий счётчик"""
+
+    __slots__ = ("name", "help", "value")
+    kind = "counter"
+
+    def __init__(self, name, help):
+        self.name = name
+        self.help = help
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def collect(self):
+        return self.value
+
+
+class Gauge:
+    """Текущее значение: задаётся set() или вычисляется function() при снимке"""
+
+    __slots__ = ("name", "help", "value", "function", "failing")
+    kind = "gauge"
+
+    def __init__(self, name, help, function=None):
+        self.name = name
+        self.help = help
+        self.value = 0
+        self.function = function
+        self.failing = False  # ошибку пишем один раз, а не в каждом снимке
+
+    def set(self, value):
+        self.value = value
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def collect(self):
+        if self.function is not None:
+            try:
+                self.value = self.function()
+                self.failing = False
+            except Exception as e:
+                emit = logger.debug if self.failing else logger.warning
+                emit("Cannot collect %s: %s", self.name, e)
+                self.failing = True
+        return self.value
+
+
+class Histogram:
+    """Распределение наблюдений по корзинам (накопительные при экспорте)"""
+
+    __slots__ = ("name", "help", "buckets", "counts", "sum", "count")
+    kind = "histogram"
+
+    def __init__(self, name, help, buckets=DURATION_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def collect(self):
+        cumulative = {}
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            cumulative[_format_number(bound)] = seen
+        cumulative["+Inf"] = self.count
+        return {"buckets": cumulative, "sum": self.sum, "count": self.count}
+
+
+class Rate:
+    """Скорость роста счётчика между соседними снимками, в единицах за period"""
+
+    def __init__(self, counter, period, clock=time.monotonic):
+        self.counter = counter
+        self.period = period
+        self._clock = clock
+        self._last = (clock(), counter.value)
+
+    def __call__(self):
+        now, value = self._clock(), self.counter.value
+        last_time, last_value = self._last
+        self._last = (now, value)
+        if now <= last_time:
+            return 0.0
+        return (value - last_value) / (now - last_time) * self.period
+
+
+class Registry:
+    """Метрики по именам в порядке регистрации"""
+
+    def __init__(self):
+        self.metrics = {}
+
+    def _register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help):
+        return self._register(Counter(name, help))
+
+    def gauge(self, name, help, function=None):
+        return self._register(Gauge(name, help, function))
+
+    def histogram(self, name, help, buckets=DURATION_BUCKETS):
+        return self._register(Histogram(name, help, buckets))
+
+    def get(self, name):
+        return self.metrics[name]
+
+    def snapshot(self):
+        """Текущие значения: dict, пригодный для JSON"""
+        return {
+            "taken_at": datetime.now().isoformat(),
+            "metrics": {
+                name: {"type": metric.kind, "help": metric.help, "value": metric.collect()}
+                for name, metric in self.metrics.items()
+            },
+        }
+
+    def to_prometheus(self, snapshot=None):
+        """Снимок в текстовом формате Prometheus (exposition format 0.0.4)"""
+        snapshot = snapshot or self.snapshot()
+        lines = []
+        for name, metric in snapshot["metrics"].items():
+            lines.append(f"# HELP {name} {metric['help']}")
+            lines.append(f"# TYPE {name} {metric['type']}")
+            value = metric["value"]
+            if metric["type"] == "histogram":
+                for bound, count in value["buckets"].items():
+                    lines.append(f'{name}_bucket{{le="{bound}"}} {count}')
+                lines.append(f"{name}_sum {_format_number(value['sum'])}")
+                lines.append(f"{name}_count {value['count']}")
+            else:
+                lines.append(f"{name} {_format_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_number(value):
+    if isinstance(value, float):
+        return repr(round(value, 6)) if value == value else "NaN"
+    return str(value)
+
+
+# ============================================
+# Процесс
+# ============================================
+
+_STARTED = time.monotonic()
+
+
+def resident_bytes():
+    """Текущий RSS на Linux (/proc/self/statm), иначе пиковый"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return peak_resident_bytes()
+
+
+def peak_resident_bytes():
+    if resource is None:
+        return 0
+    # ru_maxrss: килобайты на Linux, байты на macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+# ============================================
+# Стандартный набор
+# ============================================
+
+REGISTRY = Registry()
+
+UPTIME = REGISTRY.gauge(
+    "mtimer_uptime_seconds",
+    METRIC_SET["mtimer_uptime_seconds"][1],
+    lambda: round(time.monotonic() - _STARTED, 3),
+)
+RESIDENT_BYTES = REGISTRY.gauge(
+    "mtimer_process_resident_bytes",
+    METRIC_SET["mtimer_process_resident_bytes"][1],
+    resident_bytes,
+)
+PEAK_RESIDENT_BYTES = REGISTRY.gauge(
+    "mtimer_process_peak_resident_bytes",
+    METRIC_SET["mtimer_process_peak_resident_bytes"][1],
+    peak_resident_bytes,
+)
+DB_QUERIES = REGISTRY.counter("mtimer_db_queries_total", METRIC_SET["mtimer_db_queries_total"][1])
+DB_QUERIES_PER_MINUTE = REGISTRY.gauge(
+    "mtimer_db_queries_per_minute",
+    METRIC_SET["mtimer_db_queries_per_minute"][1],
+    Rate(DB_QUERIES, 60),
+)
+DB_CHANGES = REGISTRY.counter("mtimer_db_changes_total", METRIC_SET["mtimer_db_changes_total"][1])
+DB_SIZE = REGISTRY.gauge("mtimer_db_size_bytes", METRIC_SET["mtimer_db_size_bytes"][1])
+DB_WAL_SIZE = REGISTRY.gauge("mtimer_db_wal_size_bytes", METRIC_SET["mtimer_db_wal_size_bytes"][1])
+ROLLUP_CACHE_HITS = REGISTRY.counter(
+    "mtimer_rollup_cache_hits_total", METRIC_SET["mtimer_rollup_cache_hits_total"][1]
+)
+ROLLUP_CACHE_MISSES = REGISTRY.counter(
+    "mtimer_rollup_cache_misses_total", METRIC_SET["mtimer_rollup_cache_misses_total"][1]
+)
+ROLLUP_CACHE_HIT_RATIO = REGISTRY.gauge(
+    "mtimer_rollup_cache_hit_ratio",
+    METRIC_SET["mtimer_rollup_cache_hit_ratio"][1],
+    lambda: round(
+        ROLLUP_CACHE_HITS.value / max(1, ROLLUP_CACHE_HITS.value + ROLLUP_CACHE_MISSES.value), 4
+    ),
+)
+UI_REFRESHES = REGISTRY.counter("mtimer_ui_refreshes_total", METRIC_SET["mtimer_ui_refreshes_total"][1])
+UI_REFRESH_SECONDS = REGISTRY.histogram(
+    "mtimer_ui_refresh_duration_seconds", METRIC_SET["mtimer_ui_refresh_duration_seconds"][1]
+)
+UI_SESSION_VIEWS = REGISTRY.gauge("mtimer_ui_session_views", METRIC_SET["mtimer_ui_session_views"][1])
+UI_VIEWS_REBUILT = REGISTRY.counter(
+    "mtimer_ui_views_rebuilt_total", METRIC_SET["mtimer_ui_views_rebuilt_total"][1]
+)
+UI_VIEWS_REBUILT_PER_HOUR = REGISTRY.gauge(
+    "mtimer_ui_views_rebuilt_per_hour",
+    METRIC_SET["mtimer_ui_views_rebuilt_per_hour"][1],
+    Rate(UI_VIEWS_REBUILT, 3600),
+)
+
+
+# ============================================
+# Экспорт в файл
+# ============================================
+
+
+class MetricsExporter:
+    """Подписка на базы и периодическая запись снимка REGISTRY в файл"""
+
+    def __init__(self, interval=0, path=None, registry=REGISTRY):
+        self.interval = max(0, interval)
+        self.path = path
+        self.registry = registry
+        self.writes = 0
+        self._databases = []
+        self._tokens = {}  # id(db) -> токен подписки на шину
+
+    @classmethod
+    def from_environment(cls, environ=None):
+        environ = os.environ if environ is None else environ
+        try:
+            interval = int(environ.get(METRICS_ENV) or 0)
+        except ValueError:
+            logger.warning("Ignoring %s=%r", METRICS_ENV, environ.get(METRICS_ENV))
+            interval = 0
+        return cls(interval, environ.get(METRICS_FILE_ENV) or None)
+
+    @property
+    def enabled(self):
+        return self.interval > 0
+
+    def enable(self, interval=METRICS_INTERVAL, path=None):
+        """Включить запись (настройка фронтенда); подписаться на уже привязанные базы"""
+        was_enabled = self.enabled
+        self.interval = max(0, int(interval or 0))
+        if path:
+            self.path = path
+        if self.enabled and not was_enabled:
+            for db in self._databases:
+                self._subscribe(db)
+
+    def bind_database(self, db):
+        """Считать операторы и события db, размер её файла и WAL"""
+        if db in self._databases:
+            return
+        self._databases.append(db)
+        if len(self._databases) == 1:
+            DB_SIZE.function = lambda: _file_size(db.db_path)
+            DB_WAL_SIZE.function = lambda: _file_size(db.db_path + "-wal")
+        if self.enabled:
+            self._subscribe(db)
+
+    def unbind_database(self, db):
+        if db not in self._databases:
+            return
+        self._databases.remove(db)
+        db.remove_statement_listener(self._on_statement)
+        token = self._tokens.pop(id(db), None)
+        if token is not None:
+            db.changes.unsubscribe(token)
+
+    def _subscribe(self, db):
+        db.add_statement_listener(self._on_statement)
+        self._tokens[id(db)] = db.changes.subscribe(self._on_change)
+
+    def _on_statement(self, sql):
+        # Операторы триггеров приходят строками "-- TRIGGER ..." - не считаем
+        if not sql.startswith("--"):
+            DB_QUERIES.value += 1
+
+    def _on_change(self, event):
+        DB_CHANGES.value += 1
+
+    def get_path(self):
+        """Файл снимка: заданный, рядом с первой базой или во временном каталоге"""
+        if self.path:
+            return self.path
+        if self._databases:
+            base_dir = os.path.dirname(self._databases[0].db_path)
+        else:
+            base_dir = os.path.join(tempfile.gettempdir(), "mtimer")
+        return os.path.join(base_dir, METRICS_FILE)
+
+    def write(self, path=None):
+        """Записать снимок атомарно (через временный файл); возвращает путь"""
+        path = path or self.get_path()
+        snapshot = self.registry.snapshot()
+        if path.endswith(".json"):
+            text = json.dumps(snapshot, ensure_ascii=False, indent=1)
+        else:
+            text = self.registry.to_prometheus(snapshot)
+        partial = path + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(partial, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(partial, path)
+        except OSError as e:
+            logger.warning("Cannot write %s: %s", path, e)
+            return None
+        self.writes += 1
+        return path
+
+    def close(self):
+        """При выходе фронтенда: последний снимок и отписка от баз"""
+        if self.enabled and self.writes:
+            self.write()
+        for db in list(self._databases):
+            self.unbind_database(db)
+
+
+METRICS = MetricsExporter.from_environment()
+
+
+# ============================================
+# Чтение снимка
+# ============================================
+
+
+def read_snapshot(path):
+    """
+    Прочитать записанный снимок (JSON или текст Prometheus) в
+    {имя: значение}; у гистограммы значение - {"buckets", "sum", "count"}.
+    """
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    if text.lstrip().startswith("{"):
+        return {name: metric["value"] for name, metric in json.loads(text)["metrics"].items()}
+    values = {}
+    for line in text.splitlines():
+        if not line or line.startswith("#"):
+            continue
+        sample, value = line.rsplit(" ", 1)
+        value = float(value)
+        if value.is_integer():
+            value = int(value)
+        if "{" in sample:
+            name, labels = sample[:-1].split("{", 1)
+            bound = labels.split("=", 1)[1].strip('"')
+            histogram = values.setdefault(name[: -len("_bucket")], {"buckets": {}})
+            histogram["buckets"][bound] = value
+        elif sample.endswith(("_sum", "_count")) and sample.rsplit("_", 1)[0] in values:
+            base, field = sample.rsplit("_", 1)
+            values[base][field] = value
+        else:
+            values[sample] = value
+    return values
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Значения из записанного снимка метрик")
+    parser.add_argument(
+        "path",
+        nargs="?",
+        default=os.path.join(os.path.dirname(os.path.abspath(__file__)), METRICS_FILE),
+        help=f"{METRICS_FILE} или .json рядом с базой",
+    )
+    args = parser.parse_args(argv)
+    try:
+        values = read_snapshot(args.path)
+    except (OSError, ValueError) as e:
+        print(f"Cannot read {args.path}: {e}")
+        return 1
+    for name, value in values.items():
+        if isinstance(value, dict):
+            mean = value["sum"] / value["count"] if value.get("count") else 0.0
+            print(f"  {name:<40} count={value.get('count', 0)} mean={mean:.4f}")
+        else:
+            print(f"  {name:<40} {value}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
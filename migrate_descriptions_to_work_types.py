@@ -14,12 +14,12 @@ def migrate_descriptions():
     
     # Получаем все уникальные описания из сессий, где нет work_type_id
     cursor.execute('''
-        SELECT DISTINCT description 
-        FROM time_sessions 
-        WHERE description IS NOT NULL 
-          AND description != '' 
-          AND work_type_id IS NULL
-        ORDER BY description
+        SELECT DISTINCT tn.name as description
+        FROM time_sessions ts
+        JOIN task_names tn ON ts.task_name_id = tn.id
+        WHERE tn.name != ''
+          AND ts.work_type_id IS NULL
+        ORDER BY tn.name
     ''')
     
     descriptions = [row['description'] for row in cursor.fetchall()]
@@ -54,7 +54,8 @@ def migrate_descriptions():
         cursor.execute('''
             UPDATE time_sessions 
             SET work_type_id = ? 
-            WHERE description = ? AND work_type_id IS NULL
+            WHERE task_name_id = (SELECT id FROM task_names WHERE name = ?)
+              AND work_type_id IS NULL
         ''', (work_type_id, desc))
         
         updated = cursor.rowcount
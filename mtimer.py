@@ -0,0 +1,555 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+mtimer - консольный клиент MTimer для скриптов, приглашения оболочки
+и интеграций с редакторами.
+
+    mtimer status                     # ▶ Project · Task 00:42:10
+    mtimer start Project "Task"
+    mtimer switch Project "Other task"
+    mtimer stop
+    mtimer today | week | month       # итоги по проектам
+    mtimer export --from 2026-10-01 --to 2026-10-31 --format csv
+
+Чтение (status, итоги, export) идёт через соединение только для чтения
+(file:...?mode=ro) и не импортирует database.py: ни DDL, ни проверок
+миграций, ни localization с опросом Foundation. Если PRAGMA user_version
+базы не текущая (новая база или старая схема), один раз выполняется
+обычная инициализация Database.
+
+Запись (start, stop, switch) импортирует database.py лениво и идёт через
+те же методы, что и приложение (start_session / stop_session): разбиение
+по суткам, стоимость, строка active_session. Сессию, запущенную из
+консоли, никто не держит heartbeat'ом, поэтому она сразу отпускается
+(release_active_session) и при запуске приложения не считается упавшей.
+
+База - та же, что у Database(): рядом с модулем или в Application Support
+(MTIMER_USE_APP_SUPPORT=1, MTIMER_DEV=1), либо --db / MTIMER_DB.
+"""
+
+import os
+import sqlite3
+import sys
+from types import SimpleNamespace
+from datetime import date, datetime, timedelta
+
+# Совпадают с database.SCHEMA_VERSION_CURRENT, database.HEARTBEAT_INTERVAL
+# и database.STALE_HEARTBEAT_SECONDS (database.py не импортируется ради
+# времени запуска; benchmarks/bench_cli.py сверяет значения)
+SCHEMA_VERSION = 14
+HEARTBEAT_INTERVAL = 60
+STALE_HEARTBEAT_SECONDS = 180
+
+DB_NAME = "timetracker.db"
+DB_ENV = "MTIMER_DB"
+APP_SUPPORT_DIR = "~/Library/Application Support/MacikTimer"
+
+PERIODS = ("today", "week", "month")
+EXPORT_COLUMNS = (
+    "id",
+    "start_time",
+    "end_time",
+    "duration",
+    "project",
+    "task",
+    "paid",
+    "cost",
+)
+
+ACTIVE_SQL = """
+    SELECT a.session_id, a.heartbeat_at, a.heartbeat_interval, a.released_at,
+           ts.start_time, ts.project_id, p.name AS project, tn.name AS task
+    FROM active_session a
+    JOIN time_sessions ts ON ts.id = a.session_id
+    LEFT JOIN projects p ON p.id = ts.project_id
+    LEFT JOIN task_names tn ON tn.id = ts.task_name_id
+    WHERE a.id = 1 AND ts.end_time IS NULL
+"""
+
+
+class CliError(Exception):
+    """Ошибка команды: сообщение для stderr, код выхода 1"""
+
+
+def default_db_path(environ=None):
+    """Путь базы так же, как в Database.__init__"""
+    environ = os.environ if environ is None else environ
+    if environ.get(DB_ENV):
+        return os.path.abspath(environ[DB_ENV])
+    use_app_support = (
+        getattr(sys, "frozen", False)
+        or environ.get("MTIMER_USE_APP_SUPPORT") == "1"
+        or environ.get("MTIMER_DEV") == "1"
+    )
+    if use_app_support:
+        base_dir = os.path.expanduser(APP_SUPPORT_DIR)
+    else:
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(base_dir, DB_NAME)
+
+
+def connect_readonly(path):
+    escaped = path.replace("%", "%25").replace("?", "%3f").replace("#", "%23")
+    conn = sqlite3.connect(f"file:{escaped}?mode=ro", uri=True)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def open_database(path):
+    """
+    Соединение только для чтения. Инициализация Database (создание схемы,
+    миграции) - только если файла нет или user_version не текущая.
+    """
+    if os.path.exists(path):
+        conn = connect_readonly(path)
+        if conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION:
+            return conn
+        conn.close()
+    open_writable(path).close()
+    return connect_readonly(path)
+
+
+def open_writable(path):
+    """Database для записи; в консоль журнала - только ошибки, stdout - для вывода"""
+    os.environ.setdefault("MTIMER_LOG_CONSOLE", "ERROR")
+    from database import Database
+
+    return Database(path)
+
+
+def format_hms(seconds):
+    """Секунды в ЧЧ:ММ:СС (как task_table_model.format_hms)"""
+    seconds = int(seconds or 0)
+    return f"{seconds // 3600:02d}:{(seconds % 3600) // 60:02d}:{seconds % 60:02d}"
+
+
+def elapsed_seconds(start, end):
+    """Как database.elapsed_seconds: через timestamp(), с учётом перевода часов"""
+    return max(0, int(end.timestamp() - start.timestamp()))
+
+
+def period_start(period, today=None):
+    """Начало периода - те же границы, что у Database.get_period_filters"""
+    today = today or date.today()
+    if period == "week":
+        today = today - timedelta(days=today.weekday())
+    elif period == "month":
+        today = today.replace(day=1)
+    return datetime.combine(today, datetime.min.time())
+
+
+def get_active(conn):
+    return conn.execute(ACTIVE_SQL).fetchone()
+
+
+def live_end(active, now):
+    """
+    До какого момента считать идущую сессию: до сейчас, если её держит
+    живое приложение или она отпущена, иначе - до последнего heartbeat
+    (приложение упало; так же её закроет recover_active_session).
+    """
+    heartbeat_at = datetime.fromisoformat(active["heartbeat_at"])
+    if active["released_at"]:
+        return now
+    # Порог - по интервалу фронтенда сессии, как database.stale_after_seconds
+    interval = active["heartbeat_interval"] or HEARTBEAT_INTERVAL
+    stale_after = max(STALE_HEARTBEAT_SECONDS, 3 * interval)
+    if (now - heartbeat_at).total_seconds() <= stale_after:
+        return now
+    return heartbeat_at
+
+
+def status(conn, now=None):
+    """Состояние таймера: dict (running, session_id, project, task, start, elapsed)"""
+    now = now or datetime.now()
+    active = get_active(conn)
+    if active is None:
+        return {"running": False}
+    start = datetime.fromisoformat(active["start_time"])
+    return {
+        "running": True,
+        "session_id": active["session_id"],
+        "project": active["project"],
+        "task": active["task"],
+        "start": active["start_time"],
+        "elapsed": elapsed_seconds(start, live_end(active, now)),
+    }
+
+
+def totals(conn, period, project=None, now=None):
+    """
+    Итоги периода по проектам, включая идущую сессию с начала периода.
+    Возвращает список dict (project, duration, cost, sessions) по убыванию
+    времени. Периоды today/week/month моложе ARCHIVE_AFTER_MONTHS, поэтому
+    архивы не нужны.
+    """
+    now = now or datetime.now()
+    since = period_start(period, now.date())
+    sql = """
+        SELECT ts.project_id, p.name AS project, COUNT(*) AS sessions,
+               COALESCE(SUM(ts.duration), 0) AS duration,
+               COALESCE(SUM(ts.cost), 0) AS cost
+        FROM time_sessions ts
+        LEFT JOIN projects p ON p.id = ts.project_id
+        WHERE ts.start_time >= ?
+    """
+    params = [since.isoformat()]
+    if project is not None:
+        sql += " AND ts.project_id = ?"
+        params.append(project["id"])
+    sql += " GROUP BY ts.project_id"
+    rows = {
+        row["project_id"]: {
+            "project": row["project"],
+            "duration": row["duration"],
+            "cost": row["cost"],
+            "sessions": row["sessions"],
+        }
+        for row in conn.execute(sql, params)
+    }
+
+    active = get_active(conn)
+    if active is not None and (
+        project is None or active["project_id"] == project["id"]
+    ):
+        start = max(datetime.fromisoformat(active["start_time"]), since)
+        live = elapsed_seconds(start, live_end(active, now))
+        row = rows.setdefault(
+            active["project_id"],
+            {"project": active["project"], "duration": 0, "cost": 0, "sessions": 1},
+        )
+        row["duration"] += live
+    return sorted(
+        rows.values(), key=lambda row: (-row["duration"], row["project"] or "")
+    )
+
+
+def find_project(conn, name):
+    """Проект по имени (без учёта регистра) или id"""
+    row = conn.execute(
+        """
+        SELECT id, name FROM projects
+        WHERE name = ? COLLATE NOCASE
+        ORDER BY name = ? DESC
+        """,
+        (name, name),
+    ).fetchone()
+    if row is None and name.isdigit():
+        row = conn.execute(
+            "SELECT id, name FROM projects WHERE id = ?", (int(name),)
+        ).fetchone()
+    if row is None:
+        names = [r[0] for r in conn.execute("SELECT name FROM projects ORDER BY name")]
+        raise CliError(
+            f"Unknown project {name!r}. Projects: {', '.join(names) or 'none'}"
+        )
+    return row
+
+
+def export_sessions(conn, path, start, end, project=None):
+    """
+    Сессии с началом в [start, end] по возрастанию. Если период задевает
+    годовые архивы, читаем через Database.get_sessions_in_range (ATTACH).
+    """
+    start_iso = start.isoformat()
+    end_iso = end.isoformat()
+    archived = conn.execute(
+        "SELECT 1 FROM archives WHERE first_start <= ? AND last_start >= ? LIMIT 1",
+        (end_iso, start_iso),
+    ).fetchone()
+    project_id = project["id"] if project is not None else None
+    if archived:
+        db = open_writable(path)
+        try:
+            rows = db.get_sessions_in_range(start_iso, end_iso, project_id)
+        finally:
+            db.close()
+        rows = reversed(rows)
+    else:
+        sql = """
+            SELECT ts.*, tn.name AS task_name, p.name AS project_name
+            FROM time_sessions ts
+            LEFT JOIN task_names tn ON tn.id = ts.task_name_id
+            LEFT JOIN projects p ON p.id = ts.project_id
+            WHERE ts.start_time >= ? AND ts.start_time <= ?
+        """
+        params = [start_iso, end_iso]
+        if project_id is not None:
+            sql += " AND ts.project_id = ?"
+            params.append(project_id)
+        rows = conn.execute(sql + " ORDER BY ts.start_time", params)
+    return [
+        {
+            "id": row["id"],
+            "start_time": row["start_time"],
+            "end_time": row["end_time"],
+            "duration": row["duration"],
+            "project": row["project_name"],
+            "task": row["task_name"],
+            "paid": row["paid"],
+            "cost": row["cost"],
+        }
+        for row in rows
+    ]
+
+
+# ============================================
+# Вывод
+# ============================================
+
+
+def format_status(state, template=None):
+    """Строка состояния; template - формат для идущего таймера (пусто, если стоит)"""
+    if template is not None:
+        if not state["running"]:
+            return ""
+        return template.format(
+            **dict(
+                state,
+                project=state["project"] or "",
+                task=state["task"] or "",
+                elapsed=format_hms(state["elapsed"]),
+            )
+        )
+    if not state["running"]:
+        return "■ stopped"
+    label = " · ".join(part for part in (state["project"], state["task"]) if part)
+    return f"▶ {label} {format_hms(state['elapsed'])}"
+
+
+def format_totals(rows, period, since):
+    lines = [f"{period.capitalize()} since {since:%Y-%m-%d}"]
+    if not rows:
+        lines.append("  no sessions")
+        return "\n".join(lines)
+    width = max(len(row["project"] or "-") for row in rows)
+    width = max(width, len("Total"))
+    for row in rows:
+        cost = f"  {row['cost']:.2f}" if row["cost"] else ""
+        name = row["project"] or "-"
+        lines.append(f"  {name:<{width}}  {format_hms(row['duration'])}{cost}")
+    total = sum(row["duration"] for row in rows)
+    total_cost = sum(row["cost"] for row in rows)
+    cost = f"  {total_cost:.2f}" if total_cost else ""
+    lines.append(f"  {'Total':<{width}}  {format_hms(total)}{cost}")
+    return "\n".join(lines)
+
+
+def print_json(value, out):
+    import json
+
+    json.dump(value, out, ensure_ascii=False, indent=2)
+    out.write("\n")
+
+
+def parse_date(value):
+    import argparse
+
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected YYYY-MM-DD, got {value!r}")
+
+
+# ============================================
+# Команды
+# ============================================
+
+
+def cmd_status(args, out):
+    conn = open_database(args.db)
+    state = status(conn)
+    conn.close()
+    if args.json:
+        print_json(state, out)
+    else:
+        text = format_status(state, args.format)
+        if text:
+            out.write(text + "\n")
+    return 0
+
+
+def cmd_totals(args, out):
+    conn = open_database(args.db)
+    project = find_project(conn, args.project) if args.project else None
+    now = datetime.now()
+    rows = totals(conn, args.command, project, now)
+    conn.close()
+    if args.json:
+        print_json(rows, out)
+    else:
+        since = period_start(args.command, now.date())
+        out.write(format_totals(rows, args.command, since) + "\n")
+    return 0
+
+
+def cmd_export(args, out):
+    conn = open_database(args.db)
+    project = find_project(conn, args.project) if args.project else None
+    start = period_start("month")
+    if args.date_from:
+        start = datetime.combine(args.date_from, datetime.min.time())
+    end = datetime.combine(args.date_to or date.today(), datetime.max.time())
+    rows = export_sessions(conn, args.db, start, end, project)
+    conn.close()
+    target = out
+    if args.output:
+        target = open(args.output, "w", encoding="utf-8", newline="")
+    try:
+        if args.format == "json":
+            print_json(rows, target)
+        else:
+            import csv
+
+            writer = csv.DictWriter(target, EXPORT_COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
+    finally:
+        if args.output:
+            target.close()
+    return 0
+
+
+def cmd_start(args, out):
+    db = open_writable(args.db)
+    try:
+        active = db.get_active_session()
+        if active is not None and args.command == "start":
+            raise CliError(
+                f"Timer is already running (session {active['id']}), "
+                "use 'mtimer switch'"
+            )
+        project = find_project(db.get_connection(), args.project)
+        session_id = db.start_session(project["id"], args.task or "")
+        if session_id is None:
+            raise CliError("Could not start the session, another one is running")
+        db.release_active_session()
+        state = status(db.get_connection())
+    finally:
+        db.close()
+    out.write(format_status(state) + "\n")
+    return 0
+
+
+def cmd_stop(args, out):
+    db = open_writable(args.db)
+    try:
+        state = status(db.get_connection())
+        if not state["running"]:
+            raise CliError("Timer is not running")
+        db.stop_session(state["session_id"])
+    finally:
+        db.close()
+    label = " · ".join(part for part in (state["project"], state["task"]) if part)
+    out.write(f"■ {label} {format_hms(state['elapsed'])}\n")
+    return 0
+
+
+# Команды для parse_fast: функция и опции со значением (кроме --json)
+FAST_COMMANDS = {"status": (cmd_status, ("format",))}
+FAST_COMMANDS.update((period, (cmd_totals, ("project",))) for period in PERIODS)
+
+
+def build_parser():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog="mtimer", description="MTimer command-line client"
+    )
+    parser.add_argument(
+        "--db", help=f"database file (default: the app's database or ${DB_ENV})"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    status_parser = commands.add_parser("status", help="running timer")
+    status_parser.add_argument("--json", action="store_true")
+    status_parser.add_argument(
+        "--format",
+        help="template for a running timer, e.g. '{project} {elapsed}'; "
+        "prints nothing when stopped",
+    )
+    status_parser.set_defaults(func=cmd_status)
+
+    for name in ("start", "switch"):
+        start_parser = commands.add_parser(
+            name,
+            help="start a timer"
+            if name == "start"
+            else "stop the running timer and start another",
+        )
+        start_parser.add_argument("project", help="project name or id")
+        start_parser.add_argument("task", nargs="?", help="task name")
+        start_parser.set_defaults(func=cmd_start)
+
+    stop_parser = commands.add_parser("stop", help="stop the running timer")
+    stop_parser.set_defaults(func=cmd_stop)
+
+    for period in PERIODS:
+        totals_parser = commands.add_parser(
+            period, help=f"totals for the {period} by project"
+        )
+        totals_parser.add_argument("--project", help="project name or id")
+        totals_parser.add_argument("--json", action="store_true")
+        totals_parser.set_defaults(func=cmd_totals)
+
+    export_parser = commands.add_parser("export", help="sessions as CSV or JSON")
+    export_parser.add_argument(
+        "--from",
+        dest="date_from",
+        type=parse_date,
+        help="first day (default: month start)",
+    )
+    export_parser.add_argument(
+        "--to", dest="date_to", type=parse_date, help="last day (default: today)"
+    )
+    export_parser.add_argument("--project", help="project name or id")
+    export_parser.add_argument("--format", choices=("csv", "json"), default="csv")
+    export_parser.add_argument("-o", "--output", help="file (default: stdout)")
+    export_parser.set_defaults(func=cmd_export)
+    return parser
+
+
+def parse_fast(argv):
+    """
+    Разбор частых вызовов (status, итоги) без argparse: его импорт и
+    построение парсера - около половины времени запуска. None - всё
+    остальное (справка, ошибки, export, запись) разбирает build_parser().
+    """
+    argv = list(argv)
+    db = None
+    if argv[:1] == ["--db"] and len(argv) > 1:
+        db, argv = argv[1], argv[2:]
+    if not argv or argv[0] not in FAST_COMMANDS:
+        return None
+    command, options = argv[0], argv[1:]
+    func, allowed = FAST_COMMANDS[command]
+    args = SimpleNamespace(command=command, func=func, db=db, json=False)
+    args.__dict__.update(dict.fromkeys(allowed, None))
+    while options:
+        option = options.pop(0)
+        if option == "--json":
+            args.json = True
+        elif option[2:] in allowed and options:
+            setattr(args, option[2:], options.pop(0))
+        else:
+            return None
+    return args
+
+
+def main(argv=None, out=None):
+    out = out or sys.stdout
+    argv = sys.argv[1:] if argv is None else argv
+    args = parse_fast(argv) or build_parser().parse_args(argv)
+    args.db = os.path.abspath(args.db) if args.db else default_db_path()
+    try:
+        return args.func(args, out)
+    except CliError as e:
+        sys.stderr.write(f"mtimer: {e}\n")
+        return 1
+    except sqlite3.Error as e:
+        sys.stderr.write(f"mtimer: database error: {e}\n")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,403 @@
+# -*- coding: utf-8 -*-
+"""
+Профилирование обновлений UI: сколько длится каждое обновление списка
+(reloadSessions, refresh_sessions, create_dashboard, ...) и сколько
+SQL-операторов оно выполняет.
+
+    @profiled("refresh_sessions")
+    def refresh_sessions(self):
+        ...
+
+    with PROFILER.refresh("reloadData"):
+        ...
+
+    PROFILER.bind_database(db)   # считать операторы этой базы
+    print(PROFILER.report())
+
+Ядро не зависит от AppKit и tkinter. Вложенные обновления измеряются
+каждое отдельно (время и операторы включают вложенные).
+
+MTIMER_PROFILE=N (или capture_next(N), настройка профиля во фронтенде)
+сохраняет cProfile следующих N внешних обновлений в .prof, с
+MTIMER_PROFILE_MEMORY=1 - ещё и снимок tracemalloc. Каталог - profiles/
+рядом с базой или MTIMER_PROFILE_DIR. Отчёт по сохранённому снимку:
+
+    python3 profiling.py [путь к profiling.json] [--prof файл.prof]
+"""
+
+import argparse
+import cProfile
+import functools
+import json
+import os
+import pstats
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import deque
+from datetime import datetime
+
+from instrumentation import LatencyHistogram
+from log import get_logger
+from metrics import UI_REFRESH_SECONDS, UI_REFRESHES
+
+logger = get_logger(__name__)
+
+# Переменные окружения
+PROFILE_ENV = "MTIMER_PROFILE"
+PROFILE_MEMORY_ENV = "MTIMER_PROFILE_MEMORY"
+PROFILE_DIR_ENV = "MTIMER_PROFILE_DIR"
+# Каталог профилей рядом с базой и файл снимка счётчиков
+PROFILE_DIR_NAME = "profiles"
+SNAPSHOT_FILE = "profiling.json"
+# Сколько последних обновлений держать в памяти
+RECENT_SIZE = 100
+# Сколько кадров стека хранит tracemalloc
+TRACEMALLOC_FRAMES = 10
+
+
+class RefreshStats:
+    """Счётчики одного вида обновления"""
+
+    __slots__ = ("calls", "queries", "max_queries", "errors", "latency")
+
+    def __init__(self):
+        self.calls = 0
+        self.queries = 0
+        self.max_queries = 0
+        self.errors = 0
+        self.latency = LatencyHistogram()
+
+    def as_dict(self):
+        latency = self.latency
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "queries": self.queries,
+            "mean_queries": self.queries / self.calls if self.calls else 0.0,
+            "max_queries": self.max_queries,
+            "total_ms": latency.total,
+            "mean_ms": latency.total / latency.count if latency.count else 0.0,
+            "p50_ms": latency.percentile(0.50),
+            "p95_ms": latency.percentile(0.95),
+            "max_ms": latency.max,
+        }
+
+
+class _Refresh:
+    """Контекст одного обновления (Profiler.refresh)"""
+
+    __slots__ = ("profiler", "name", "started", "statements")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.profiler._enter(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.profiler._exit(self, exc_type is not None)
+        return False
+
+
+class Profiler:
+    """Время и число SQL-операторов обновлений UI, захват cProfile/tracemalloc"""
+
+    def __init__(self, capture=0, memory=False, output_dir=None):
+        self.output_dir = output_dir
+        self.refreshes = {}  # имя -> RefreshStats
+        self.recent = deque(maxlen=RECENT_SIZE)
+        self.started_at = datetime.now().isoformat()
+        self._databases = []
+        self._depth = 0
+        self._statements = 0
+        self._capture_remaining = 0
+        self._capture_memory = False
+        self._persist = False  # сохранить снимок при close (был запрошен захват)
+        self._cprofile = None
+        self._started_tracemalloc = False
+        self.capture_next(capture, memory)
+
+    @classmethod
+    def from_environment(cls, environ=None):
+        environ = os.environ if environ is None else environ
+        try:
+            capture = int(environ.get(PROFILE_ENV) or 0)
+        except ValueError:
+            logger.warning("Ignoring %s=%r", PROFILE_ENV, environ.get(PROFILE_ENV))
+            capture = 0
+        return cls(
+            capture,
+            environ.get(PROFILE_MEMORY_ENV) == "1",
+            environ.get(PROFILE_DIR_ENV) or None,
+        )
+
+    # ============================================
+    # Настройка
+    # ============================================
+
+    def bind_database(self, db):
+        """Считать SQL-операторы db во время обновлений"""
+        if db not in self._databases:
+            self._databases.append(db)
+            if self._depth:
+                db.add_statement_listener(self._on_statement)
+
+    def unbind_database(self, db):
+        if db in self._databases:
+            self._databases.remove(db)
+            db.remove_statement_listener(self._on_statement)
+
+    def capture_next(self, count, memory=False, output_dir=None):
+        """Сохранить cProfile (и tracemalloc при memory) следующих count обновлений"""
+        self._capture_remaining = max(0, int(count or 0))
+        self._capture_memory = bool(memory)
+        if output_dir:
+            self.output_dir = output_dir
+        if self._capture_remaining:
+            self._persist = True
+            logger.info(
+                "Capturing next %s refreshes%s",
+                self._capture_remaining,
+                " with tracemalloc" if self._capture_memory else "",
+            )
+
+    @property
+    def capturing(self):
+        return self._capture_remaining > 0 or self._cprofile is not None
+
+    def get_output_dir(self):
+        """Каталог профилей: заданный, рядом с первой базой или во временном"""
+        if self.output_dir:
+            return self.output_dir
+        if self._databases:
+            base_dir = os.path.dirname(self._databases[0].db_path)
+        else:
+            base_dir = os.path.join(tempfile.gettempdir(), "mtimer")
+        return os.path.join(base_dir, PROFILE_DIR_NAME)
+
+    # ============================================
+    # Измерение
+    # ============================================
+
+    def refresh(self, name):
+        """Контекстный менеджер вокруг одного обновления"""
+        return _Refresh(self, name)
+
+    def _enter(self, frame):
+        if self._depth == 0:
+            for db in self._databases:
+                db.add_statement_listener(self._on_statement)
+            if self._capture_remaining:
+                self._start_capture()
+        self._depth += 1
+        frame.statements = self._statements
+        frame.started = time.perf_counter()
+
+    def _exit(self, frame, failed):
+        elapsed = (time.perf_counter() - frame.started) * 1000
+        queries = self._statements - frame.statements
+        self._depth -= 1
+        stats = self.refreshes.get(frame.name)
+        if stats is None:
+            stats = self.refreshes[frame.name] = RefreshStats()
+        stats.calls += 1
+        stats.queries += queries
+        stats.max_queries = max(stats.max_queries, queries)
+        stats.errors += failed
+        stats.latency.add(elapsed)
+        if self._depth == 0:
+            for db in self._databases:
+                db.remove_statement_listener(self._on_statement)
+            UI_REFRESHES.value += 1
+            UI_REFRESH_SECONDS.observe(elapsed / 1000)
+            self.recent.append(
+                {
+                    "at": datetime.now().isoformat(),
+                    "name": frame.name,
+                    "ms": round(elapsed, 3),
+                    "queries": queries,
+                }
+            )
+            if self._cprofile is not None:
+                self._finish_capture(frame.name)
+
+    def _on_statement(self, sql):
+        # Операторы триггеров приходят строками "-- TRIGGER ..." - не считаем
+        if not sql.startswith("--"):
+            self._statements += 1
+
+    # ============================================
+    # Захват cProfile и tracemalloc
+    # ============================================
+
+    def _start_capture(self):
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError as e:
+            # Уже работает другой профилировщик (python -m cProfile)
+            logger.warning("Cannot start cProfile: %s", e)
+            self._capture_remaining = 0
+            return
+        self._cprofile = profile
+        if self._capture_memory and not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+            self._started_tracemalloc = True
+
+    def _finish_capture(self, name):
+        profile, self._cprofile = self._cprofile, None
+        profile.disable()
+        self._capture_remaining = max(0, self._capture_remaining - 1)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        stem = f"{stamp}-{re.sub(r'[^A-Za-z0-9_]', '_', name)}"
+        directory = self.get_output_dir()
+        try:
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"{stem}.prof")
+            profile.dump_stats(path)
+            logger.info("%s: cProfile saved to %s", name, path)
+            if tracemalloc.is_tracing() and self._capture_memory:
+                path = os.path.join(directory, f"{stem}.tracemalloc")
+                tracemalloc.take_snapshot().dump(path)
+                logger.info("%s: tracemalloc snapshot saved to %s", name, path)
+        except OSError as e:
+            logger.warning("Cannot save profile: %s", e)
+        if self._started_tracemalloc and not self._capture_remaining:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    # ============================================
+    # Снимок и отчёт
+    # ============================================
+
+    def snapshot(self):
+        """Текущие счётчики: dict, пригодный для JSON"""
+        return {
+            "started_at": self.started_at,
+            "taken_at": datetime.now().isoformat(),
+            "refreshes": {
+                name: stats.as_dict() for name, stats in sorted(self.refreshes.items())
+            },
+            "recent": list(self.recent),
+        }
+
+    def reset(self):
+        self.refreshes = {}
+        self.recent.clear()
+        self.started_at = datetime.now().isoformat()
+
+    def save(self, path=None):
+        """Сохранить снимок (по умолчанию profiling.json в каталоге профилей)"""
+        if path is None:
+            directory = self.get_output_dir()
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, SNAPSHOT_FILE)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False, indent=1)
+        return path
+
+    def report(self, recent=10):
+        return format_report(self.snapshot(), recent)
+
+    def close(self):
+        """При выходе фронтенда: отвязать базы; если был захват - сохранить снимок"""
+        if self._persist and self.refreshes:
+            try:
+                logger.info("Snapshot saved to %s", self.save())
+            except OSError as e:
+                logger.warning("Cannot save snapshot: %s", e)
+        for db in list(self._databases):
+            self.unbind_database(db)
+
+
+def profiled(name=None, profiler=None):
+    """
+    Декоратор: вызов функции - одно обновление name (по умолчанию имя
+    функции) в profiler (по умолчанию общий PROFILER).
+    """
+
+    def decorator(function):
+        label = name or function.__name__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with (profiler or PROFILER).refresh(label):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def format_report(snapshot, recent=10):
+    """Текстовый отчёт: обновления по суммарному времени, затем последние"""
+    lines = [
+        f"UI refreshes {snapshot['started_at']} .. {snapshot['taken_at']}",
+        f"  {'refresh':<28} {'calls':>7} {'total ms':>10} {'mean':>8} "
+        f"{'p95':>8} {'max':>8} {'queries':>8} {'max q':>6}",
+    ]
+    refreshes = sorted(
+        snapshot["refreshes"].items(), key=lambda item: item[1]["total_ms"], reverse=True
+    )
+    for name, stats in refreshes:
+        lines.append(
+            f"  {name:<28} {stats['calls']:>7} {stats['total_ms']:>10.1f} "
+            f"{stats['mean_ms']:>8.2f} {stats['p95_ms']:>8.2f} {stats['max_ms']:>8.2f} "
+            f"{stats['mean_queries']:>8.1f} {stats['max_queries']:>6}"
+        )
+    entries = snapshot["recent"][-recent:] if recent else []
+    if entries:
+        lines.append(f"Latest {len(entries)} refreshes:")
+        for entry in entries:
+            lines.append(
+                f"  {entry['at']} {entry['name']} {entry['ms']:.1f} ms, "
+                f"{entry['queries']} queries"
+            )
+    return "\n".join(lines)
+
+
+# Общий профилировщик фронтендов
+PROFILER = Profiler.from_environment()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Отчёт по сохранённому снимку профилирования обновлений UI"
+    )
+    parser.add_argument(
+        "path",
+        nargs="?",
+        default=os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), PROFILE_DIR_NAME, SNAPSHOT_FILE
+        ),
+        help=f"{SNAPSHOT_FILE} из каталога {PROFILE_DIR_NAME}/",
+    )
+    parser.add_argument("--recent", type=int, default=10, help="сколько последних обновлений показать")
+    parser.add_argument("--prof", help="вместо снимка показать самые дорогие функции .prof")
+    parser.add_argument("--limit", type=int, default=25, help="строк для --prof")
+    args = parser.parse_args(argv)
+    if args.prof:
+        try:
+            stats = pstats.Stats(args.prof)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"Cannot read {args.prof}: {e}")
+            return 1
+        stats.sort_stats("cumulative").print_stats(args.limit)
+        return 0
+    try:
+        with open(args.path, encoding="utf-8") as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Cannot read {args.path}: {e}")
+        return 1
+    print(format_report(snapshot, args.recent))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
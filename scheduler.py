@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+"""
+Общий планировщик периодической работы фронтендов.
+
+Вместо набора независимых таймеров (тик таймера, автообновление списка,
+heartbeat, напоминания) фронтенд регистрирует задачи в Scheduler и держит
+ровно один системный таймер (NSTimer / Tk after) на ближайшее пробуждение.
+
+- Задачи хранятся в куче по времени срабатывания: задача, которой ещё
+  не пора, ничего не стоит.
+- tolerance: насколько задачу можно отложить. Пробуждение назначается на
+  самый поздний момент, устраивающий все задачи, и за одно пробуждение
+  выполняются все задачи, которым уже пора (coalescing).
+- jitter: случайная добавка к интервалу, чтобы тяжёлые задачи не
+  выстраивались в одну секунду.
+- Пропущенные срабатывания (сон ноутбука, модальный диалог) не
+  догоняются пачкой: задача выполняется один раз и планируется дальше.
+
+Модуль не зависит от UI-фреймворка; часы подменяются для тестов и бенчмарков.
+"""
+
+import heapq
+import itertools
+import random
+import time
+from datetime import datetime
+
+from log import get_logger
+
+logger = get_logger(__name__)
+
+
+class Job:
+    """Зарегистрированная задача планировщика"""
+
+    __slots__ = (
+        "name",
+        "callback",
+        "interval",
+        "tolerance",
+        "jitter",
+        "base",
+        "due",
+        "repeat",
+        "cancelled",
+        "runs",
+    )
+
+    def __init__(self, name, callback, interval, tolerance, jitter, base, repeat):
+        self.name = name
+        self.callback = callback
+        self.interval = interval
+        self.tolerance = tolerance
+        self.jitter = jitter
+        self.base = base  # момент по сетке interval, без jitter
+        self.due = base
+        self.repeat = repeat
+        self.cancelled = False
+        self.runs = 0
+
+    @property
+    def deadline(self):
+        """Самый поздний допустимый момент выполнения"""
+        return self.due + self.tolerance
+
+    def __repr__(self):
+        return f"<Job {self.name} every={self.interval} due={self.due:.3f}>"
+
+
+class Scheduler:
+    """
+    Планировщик на куче с объединением пробуждений.
+
+    Фронтенд вызывает run_due() по своему таймеру и после каждого вызова
+    перевзводит таймер на next_wakeup() секунд. on_change вызывается, когда
+    набор задач изменился вне run_due() и таймер нужно перевзвести.
+    """
+
+    def __init__(self, clock=time.monotonic, wall_clock=datetime.now, rng=None):
+        self._clock = clock
+        self._wall_clock = wall_clock
+        self._rng = rng or random.Random()
+        self._heap = []  # (due, seq, job)
+        self._jobs = {}  # name -> Job
+        self._seq = itertools.count()
+        self._running = False
+        self.on_change = None
+        self.wakeups = 0
+
+    # ============================================
+    # Регистрация задач
+    # ============================================
+
+    def every(self, name, interval, callback, tolerance=0.0, jitter=0.0, delay=None):
+        """
+        Повторять callback(now) каждые interval секунд.
+        Задача с тем же именем заменяется. Первый запуск - через delay
+        секунд (по умолчанию через interval).
+        """
+        return self._add(
+            name, callback, interval, tolerance, jitter,
+            interval if delay is None else delay, repeat=True,
+        )
+
+    def once(self, name, delay, callback, tolerance=0.0):
+        """Выполнить callback(now) один раз через delay секунд"""
+        return self._add(name, callback, delay, tolerance, 0.0, delay, repeat=False)
+
+    def cancel(self, name):
+        """Снять задачу; возвращает True, если она была"""
+        job = self._jobs.pop(name, None)
+        if job is None:
+            return False
+        job.cancelled = True
+        self._changed()
+        return True
+
+    def has_job(self, name):
+        return name in self._jobs
+
+    def __len__(self):
+        return len(self._jobs)
+
+    # ============================================
+    # Выполнение
+    # ============================================
+
+    def next_wakeup(self):
+        """
+        Через сколько секунд нужно пробуждение (None - задач нет).
+        Это минимальный deadline: раньше просыпаться незачем, позже - нельзя.
+        """
+        self._drop_cancelled()
+        if not self._jobs:
+            return None
+        deadline = min(job.due + job.tolerance for job in self._jobs.values())
+        return max(0.0, deadline - self._clock())
+
+    def run_due(self):
+        """
+        Выполнить все задачи, которым пора. Все они получают один и тот же
+        now (datetime), чтобы не считать время в каждой задаче заново.
+        Возвращает число выполненных задач.
+        """
+        if self._running:
+            # Повторный вход из модального диалога внутри задачи
+            return 0
+        self._running = True
+        self.wakeups += 1
+        ran = 0
+        try:
+            tick = self._clock()
+            now = self._wall_clock()
+            while self._heap and self._heap[0][0] <= tick:
+                _, _, job = heapq.heappop(self._heap)
+                if job.cancelled:
+                    continue
+                job.runs += 1
+                ran += 1
+                try:
+                    job.callback(now)
+                except Exception as e:
+                    logger.exception("Job %s failed: %s", job.name, e)
+                if job.cancelled:
+                    continue
+                if job.repeat:
+                    self._reschedule(job, tick)
+                else:
+                    self._jobs.pop(job.name, None)
+        finally:
+            self._running = False
+        return ran
+
+    # ============================================
+    # Внутренние методы
+    # ============================================
+
+    def _add(self, name, callback, interval, tolerance, jitter, delay, repeat):
+        old = self._jobs.get(name)
+        if old is not None:
+            old.cancelled = True
+        job = Job(
+            name, callback, interval, tolerance, jitter, self._clock() + delay, repeat
+        )
+        job.due += self._jitter(jitter)
+        self._jobs[name] = job
+        heapq.heappush(self._heap, (job.due, next(self._seq), job))
+        self._changed()
+        return job
+
+    def _reschedule(self, job, tick):
+        # Следующее срабатывание по сетке interval; пропущенные не догоняем
+        base = job.base + job.interval
+        if base <= tick:
+            missed = int((tick - job.base) // job.interval)
+            base = job.base + (missed + 1) * job.interval
+        job.base = base
+        job.due = base + self._jitter(job.jitter)
+        heapq.heappush(self._heap, (job.due, next(self._seq), job))
+
+    def _jitter(self, jitter):
+        return self._rng.uniform(0.0, jitter) if jitter else 0.0
+
+    def _drop_cancelled(self):
+        while self._heap and self._heap[0][2].cancelled:
+            heapq.heappop(self._heap)
+        # Отменённые задачи глубже в куче копятся только при частых заменах
+        if len(self._heap) > 2 * len(self._jobs) + 16:
+            self._heap = [entry for entry in self._heap if not entry[2].cancelled]
+            heapq.heapify(self._heap)
+
+    def _changed(self):
+        if not self._running and self.on_change is not None:
+            self.on_change()
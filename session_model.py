@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+Список сессий окна с инкрементальным обновлением.
+
+Полная выборка делается только при смене фильтра. Дальше refresh()
+забирает у Database.get_session_changes() лишь сессии, изменённые после
+запомненного change_seq, и вливает их в уже загруженный список:
+существующие записи Session обновляются на месте, удалённые и вышедшие
+из фильтра убираются, новые вставляются с пересортировкой по start_time.
+Переименованные задачи (renamed) меняют description загруженных сессий
+без повторного чтения строк.
+
+Фильтры и сортировка задаются SessionQuery (или dict фильтров). При
+нестандартной сортировке или постраничной выборке новые и сдвинутые
+сессии не сортируются в Python - список заново читается из SQLite.
+"""
+
+from session_query import SessionQuery
+
+
+class SessionListModel:
+    """Сессии по SessionQuery, в порядке сортировки запроса"""
+
+    def __init__(self, db):
+        self.db = db
+        self.rows = []  # list[Session], ORDER BY start_time DESC
+        self._by_id = {}  # id -> Session из rows
+        self.seq = None
+        self.query = SessionQuery()
+        # Database не удаляет надгробия, которые модель ещё может запросить
+        db.add_change_reader(self)
+
+    @property
+    def loaded(self):
+        return self.seq is not None
+
+    def reload(self, query=None):
+        """Полная загрузка по запросу (SessionQuery или dict фильтров)"""
+        query = SessionQuery.coerce(query)
+        # seq берём ДО выборки: изменение между ними придёт повторно в refresh()
+        seq = self.db.get_change_seq()
+        self.rows = self.db.query_sessions(query)
+        self._by_id = {row.id: row for row in self.rows}
+        self.seq = seq
+        self.query = query
+        return True
+
+    def load(self, query=None):
+        """
+        Привести список к запросу: полная загрузка при его смене,
+        иначе дельта. Возвращает True, если список изменился.
+        """
+        query = SessionQuery.coerce(query)
+        if not self.loaded or query != self.query:
+            return self.reload(query)
+        return self.refresh()
+
+    def refresh(self):
+        """Влить изменения после seq. Возвращает True, если список изменился."""
+        if not self.loaded:
+            return self.reload(self.query)
+        changes = self.db.get_session_changes(self.seq, self.query)
+        if changes["seq"] < self.seq or changes.get("reset"):
+            # База подменена (восстановление из бэкапа) или нужные надгробия
+            # уже удалены - дельте верить нельзя
+            return self.reload(self.query)
+        if changes["seq"] == self.seq:
+            return False
+        renamed = changes["renamed"]
+        if renamed:
+            # Только задачи, которые есть в загруженном списке
+            loaded = {row.task_name_id for row in self.rows}
+            renamed = {key: name for key, name in renamed.items() if key in loaded}
+        if renamed and "task_name" in self.query.filters:
+            # Новое название может войти в фильтр по подстроке или выйти из него
+            return self.reload(self.query)
+        if not self.query.is_default_order or self.query.limit is not None:
+            # Порядок и границы страницы знает только SQLite
+            if (
+                changes["upserted"]
+                or renamed
+                or any(session_id in self._by_id for session_id in changes["removed"])
+            ):
+                return self.reload(self.query)
+            self.seq = changes["seq"]
+            return False
+        self.seq = changes["seq"]
+
+        changed = False
+        resort = False
+        if renamed:
+            for row in self.rows:
+                name = renamed.get(row.task_name_id)
+                if name is not None:
+                    row.description = name
+                    changed = True
+        removed = False
+        for session_id in changes["removed"]:
+            if self._by_id.pop(session_id, None) is not None:
+                removed = True
+        if removed:
+            self.rows = [row for row in self.rows if row.id in self._by_id]
+            changed = True
+
+        for row in changes["upserted"]:
+            current = self._by_id.get(row.id)
+            if current is None:
+                self._by_id[row.id] = row
+                self.rows.append(row)
+                resort = True
+            else:
+                if current.start_time != row.start_time:
+                    resort = True
+                current.update_from(row)
+            changed = True
+
+        if resort:
+            self.rows.sort(key=lambda row: row.start_time, reverse=True)
+        return changed
+
+    def total_duration(self):
+        """Сумма duration загруженных сессий (без идущей)"""
+        return sum(row.duration for row in self.rows)
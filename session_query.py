@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+"""
+Составной запрос сессий с сортировкой и фильтрами на стороне SQLite.
+
+    query = (
+        SessionQuery()
+        .company(company_id)
+        .paid(False)
+        .period("2026-01-01T00:00:00", None)
+        .order_by(("duration", False))
+    )
+    sessions = db.query_sessions(query)
+
+Каждый метод возвращает новый запрос, исходный не меняется, поэтому
+общую часть можно переиспользовать. None снимает фильтр - удобно
+передавать значения прямо из UI. compile() собирает параметризованный
+SQL: условия пишутся так, чтобы планировщик мог взять индексы схемы v8
+(start_time, project/work_type/paid + start_time, duration, task_name_id).
+"""
+
+# Колонки сортировки: идентификатор (колонка таблицы UI) -> выражение SQL
+SORT_COLUMNS = {
+    "start_time": "ts.start_time",
+    "date": "ts.start_time",
+    "time": "ts.start_time",
+    "end_time": "ts.end_time",
+    "duration": "ts.duration",
+    "paid": "ts.paid",
+    "project": "p.name COLLATE NOCASE",
+    "description": "tn.name COLLATE NOCASE",
+    "work_type": "wt.name COLLATE NOCASE",
+    "cost": "ts.cost",
+}
+
+# Колонки сортировки, которые фильтр равенства делает постоянными
+_PINNED_BY = {
+    "paid": "paid",
+    "project": "project_id",
+    "work_type": "work_type_id",
+    "description": "task_name_id",
+}
+
+# Порядок по умолчанию - новые сессии сверху, как во всех списках
+DEFAULT_ORDER = (("start_time", False),)
+
+# Условия фильтров в фиксированном порядке: имя -> фрагмент WHERE
+# (фрагмент без "?" - флаг без параметра)
+_CONDITIONS = (
+    ("project_id", "ts.project_id = ?"),
+    (
+        "company_id",
+        "ts.project_id IN (SELECT id FROM projects WHERE company_id = ?)",
+    ),
+    ("task_name_id", "ts.task_name_id = ?"),
+    (
+        "task_name",
+        "ts.task_name_id IN (SELECT id FROM task_names "
+        "WHERE name LIKE ? ESCAPE '\\')",
+    ),
+    ("work_type_id", "ts.work_type_id = ?"),
+    ("paid", "ts.paid = ?"),
+    ("completed", "ts.end_time IS NOT NULL"),
+    ("min_duration", "ts.duration >= ?"),
+    ("max_duration", "ts.duration <= ?"),
+    ("start_date", "ts.start_time >= ?"),
+    ("end_date", "ts.start_time <= ?"),
+    ("changed_since", "ts.change_seq > ?"),
+)
+FILTERS = tuple(name for name, _ in _CONDITIONS)
+
+SELECT_SQL = """
+    SELECT ts.*, tn.name as task_name, tn.name as description,
+           p.name as project_name, p.hourly_rate as hourly_rate,
+           wt.name as work_type_name
+    FROM {source} ts
+    LEFT JOIN task_names tn ON ts.task_name_id = tn.id
+    LEFT JOIN projects p ON ts.project_id = p.id
+    LEFT JOIN work_types wt ON ts.work_type_id = wt.id
+"""
+
+
+def _like_pattern(text):
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+class SessionQuery:
+    """Неизменяемое описание выборки сессий: фильтры, сортировка, страница"""
+
+    __slots__ = ("filters", "order", "limit", "offset")
+
+    def __init__(self, filters=None, order=DEFAULT_ORDER, limit=None, offset=0):
+        self.filters = dict(filters or {})
+        self.order = tuple(order)
+        self.limit = limit
+        self.offset = offset
+
+    @classmethod
+    def coerce(cls, value):
+        """SessionQuery из запроса, dict фильтров (start_date, project_id, ...) или None"""
+        if isinstance(value, cls):
+            return value
+        return cls().where(**(value or {}))
+
+    # ============================================
+    # Фильтры
+    # ============================================
+
+    def where(self, **filters):
+        """Задать фильтры по именам из FILTERS; None снимает фильтр"""
+        unknown = set(filters) - set(FILTERS)
+        if unknown:
+            raise ValueError(f"Unknown session filter: {', '.join(sorted(unknown))}")
+        merged = dict(self.filters)
+        for name, value in filters.items():
+            if value is None or value == "":
+                merged.pop(name, None)
+            else:
+                merged[name] = value
+        return SessionQuery(merged, self.order, self.limit, self.offset)
+
+    def project(self, project_id):
+        return self.where(project_id=project_id)
+
+    def company(self, company_id):
+        return self.where(company_id=company_id)
+
+    def task(self, name=None, task_name_id=None):
+        """Задача по ID или по подстроке названия"""
+        return self.where(task_name=name, task_name_id=task_name_id)
+
+    def work_type(self, work_type_id):
+        return self.where(work_type_id=work_type_id)
+
+    def paid(self, paid):
+        """True - только оплаченные, False - только неоплаченные, None - все"""
+        return self.where(paid=None if paid is None else int(bool(paid)))
+
+    def completed(self, completed=True):
+        """True - только завершённые сессии (без идущей), False/None - все"""
+        return self.where(completed=True if completed else None)
+
+    def duration(self, min_seconds=None, max_seconds=None):
+        return self.where(min_duration=min_seconds, max_duration=max_seconds)
+
+    def period(self, start=None, end=None):
+        """Диапазон по start_time (ISO-строки, включительно)"""
+        return self.where(start_date=start, end_date=end)
+
+    def changed_since(self, seq):
+        """Только сессии, изменённые после change_seq = seq"""
+        return self.where(changed_since=seq)
+
+    # ============================================
+    # Сортировка и страницы
+    # ============================================
+
+    def order_by(self, *descriptors):
+        """
+        Сортировка по колонкам SORT_COLUMNS. Дескриптор - (колонка, по
+        возрастанию) или строка ("duration", "-start_time"). Без аргументов -
+        порядок по умолчанию.
+        """
+        order = []
+        for descriptor in descriptors:
+            if isinstance(descriptor, str):
+                column = descriptor.lstrip("-")
+                ascending = not descriptor.startswith("-")
+            else:
+                column, ascending = descriptor
+            if column not in SORT_COLUMNS:
+                raise ValueError(f"Unknown sort column: {column}")
+            order.append((column, bool(ascending)))
+        return SessionQuery(
+            self.filters, order or DEFAULT_ORDER, self.limit, self.offset
+        )
+
+    def page(self, limit, offset=0):
+        return SessionQuery(self.filters, self.order, limit, offset)
+
+    @property
+    def is_default_order(self):
+        return self.order == DEFAULT_ORDER
+
+    # ============================================
+    # Компиляция в SQL
+    # ============================================
+
+    def where_sql(self):
+        """(фрагмент "WHERE ..." или "", параметры)"""
+        clauses = []
+        params = []
+        for name, clause in _CONDITIONS:
+            if name not in self.filters:
+                continue
+            value = self.filters[name]
+            if name == "task_name":
+                value = _like_pattern(value)
+            clauses.append(clause)
+            if "?" in clause:
+                params.append(value)
+        if not clauses:
+            return "", params
+        return "WHERE " + " AND ".join(clauses), params
+
+    def order_sql(self):
+        terms = []
+        columns = set()
+        for column, ascending in self.order:
+            # Колонка, закреплённая фильтром равенства, не влияет на порядок,
+            # а лишний ключ мешает планировщику взять составной индекс
+            if _PINNED_BY.get(column) in self.filters:
+                continue
+            terms.append(f"{SORT_COLUMNS[column]} {'ASC' if ascending else 'DESC'}")
+            columns.add(SORT_COLUMNS[column])
+        # Равные значения - по времени начала, затем по id (стабильные страницы)
+        last_ascending = self.order[-1][1]
+        direction = "ASC" if last_ascending else "DESC"
+        if "ts.start_time" not in columns:
+            terms.append(f"ts.start_time {direction}")
+        terms.append(f"ts.id {direction}")
+        return "ORDER BY " + ", ".join(terms)
+
+    def compile(self, source="time_sessions"):
+        """
+        (sql, params) для выборки строк. source - таблица или подзапрос
+        сессий (Database подставляет UNION с подключёнными архивами).
+        """
+        where, params = self.where_sql()
+        sql = f"{SELECT_SQL.format(source=source)} {where} {self.order_sql()}"
+        if self.limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params = params + [self.limit, self.offset]
+        return sql, params
+
+    def compile_ids(self):
+        """(sql, params) для ID подходящих сессий без JOIN и сортировки"""
+        where, params = self.where_sql()
+        return f"SELECT ts.id FROM time_sessions ts {where}", params
+
+    def __eq__(self, other):
+        if not isinstance(other, SessionQuery):
+            return NotImplemented
+        return (
+            self.filters == other.filters
+            and self.order == other.order
+            and self.limit == other.limit
+            and self.offset == other.offset
+        )
+
+    __hash__ = None
+
+    def __repr__(self):
+        return (
+            f"<SessionQuery filters={self.filters} order={list(self.order)} "
+            f"limit={self.limit} offset={self.offset}>"
+        )
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+Компактная запись сессии вместо dict(sqlite3.Row).
+
+Session хранит поля в __slots__ (без словаря атрибутов на каждую строку),
+а время начала/конца разбирается один раз при загрузке: start / end -
+datetime, start_time / end_time - исходные ISO-строки из базы.
+
+session_row_factory строит Session прямо из курсора:
+
+    cursor = conn.cursor()
+    cursor.row_factory = session_row_factory
+    cursor.execute("SELECT ts.*, tn.name as description ...")
+
+Для старого кода, который работает со строками как со словарями,
+Session поддерживает session["duration"], session.get("description")
+и dict(session).
+"""
+
+from datetime import datetime
+from operator import itemgetter
+
+# Колонки запроса, которые попадают в Session (остальные игнорируются)
+SESSION_FIELDS = (
+    "id",
+    "project_id",
+    "task_name_id",
+    "work_type_id",
+    "start_time",
+    "end_time",
+    "duration",
+    "paid",
+    "change_seq",
+    "modified_at",
+    "description",
+    "cost",
+)
+
+# Синонимы колонок: запросы отдают tn.name и как task_name, и как description
+_ALIASES = {"task_name": "description"}
+
+
+def _parse_time(value):
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value)
+
+
+class Session:
+    """Сессия учёта времени (одна строка time_sessions + название задачи)"""
+
+    __slots__ = SESSION_FIELDS + ("start", "end")
+
+    def __init__(
+        self,
+        id=None,
+        project_id=None,
+        task_name_id=None,
+        work_type_id=None,
+        start_time=None,
+        end_time=None,
+        duration=0,
+        paid=0,
+        change_seq=0,
+        modified_at=None,
+        description=None,
+        cost=None,
+    ):
+        self.id = id
+        self.project_id = project_id
+        self.task_name_id = task_name_id
+        self.work_type_id = work_type_id
+        self.start_time = start_time
+        self.end_time = end_time
+        self.duration = duration or 0
+        self.paid = paid or 0
+        self.change_seq = change_seq or 0
+        self.modified_at = modified_at
+        self.description = description
+        self.cost = cost  # сохранённая стоимость (schema v9); None у активной
+        self.start = _parse_time(start_time)
+        self.end = _parse_time(end_time)
+
+    @property
+    def is_running(self):
+        return self.end_time is None
+
+    @property
+    def task_name(self):
+        return self.description
+
+    def update_from(self, other):
+        """Скопировать все поля из другой записи той же сессии"""
+        for name in Session.__slots__:
+            setattr(self, name, getattr(other, name))
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in SESSION_FIELDS}
+
+    # --- Совместимость со строками-словарями ---
+
+    def __getitem__(self, key):
+        key = _ALIASES.get(key, key)
+        if key not in Session.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        key = _ALIASES.get(key, key)
+        if key not in Session.__slots__:
+            return default
+        return getattr(self, key)
+
+    def keys(self):
+        return SESSION_FIELDS
+
+    def __eq__(self, other):
+        if not isinstance(other, Session):
+            return NotImplemented
+        return all(getattr(self, f) == getattr(other, f) for f in SESSION_FIELDS)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return (
+            f"<Session {self.id} project={self.project_id} "
+            f"{self.start_time}..{self.end_time} {self.description!r}>"
+        )
+
+
+# Последний разобранный cursor.description и соответствующий ему itemgetter.
+# description - один и тот же объект для всех строк одного execute(),
+# поэтому сопоставление колонок считается один раз на запрос.
+_plan_cache = (None, None)
+
+
+def _build_plan(description):
+    global _plan_cache
+    columns = {}
+    for index, column in enumerate(description):
+        name = _ALIASES.get(column[0], column[0])
+        columns.setdefault(name, index)
+    # Отсутствующие колонки берём из добавленного в конец None
+    missing = len(description)
+    getter = itemgetter(*(columns.get(name, missing) for name in SESSION_FIELDS))
+    _plan_cache = (description, getter)
+    return getter
+
+
+def session_row_factory(cursor, row):
+    """row_factory для sqlite3: строит Session из строки курсора"""
+    description, getter = _plan_cache
+    if description is not cursor.description:
+        getter = _build_plan(cursor.description)
+    return Session(*getter(row + (None,)))
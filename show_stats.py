@@ -7,6 +7,8 @@ if __name__ == '__main__':
     import sys
     from statistics import StatisticsGenerator
     from database import Database
+    from profiling import PROFILER
+    from log import get_logger
     
     try:
         # Отримуємо параметри з аргументів командного рядка
@@ -22,14 +24,14 @@ if __name__ == '__main__':
         period_days = period_days_map.get(period_filter, 30)
         
         db = Database()
+        PROFILER.bind_database(db)
         stats = StatisticsGenerator(db)
         stats.show_statistics(period_days=period_days, project_id=project_id)
         
         # Тримаємо вікно відкритим
         import matplotlib.pyplot as plt
         plt.show(block=True)  # Блокуємо тільки цей процес, не основний застосунок
+        PROFILER.close()
         
     except Exception as e:
-        print(f"Error showing statistics: {e}")
-        import traceback
-        traceback.print_exc()
+        get_logger("stats").exception("Error showing statistics: %s", e)
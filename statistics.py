@@ -3,8 +3,12 @@
 Візуалізація даних про відстеження часу з красивими графіками
 """
 
+import os
+
 import matplotlib
-matplotlib.use('MacOSX')  # Використовуємо нативний macOS backend
+# Нативний macOS backend; MPLBACKEND (наприклад, Agg у бенчмарках) має пріоритет
+if not os.environ.get('MPLBACKEND'):
+    matplotlib.use('MacOSX')
 
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
@@ -12,6 +16,8 @@ from datetime import datetime, timedelta
 from collections import defaultdict
 import numpy as np
 
+from profiling import profiled
+
 class StatisticsGenerator:
     """Генератор статистики та графіків для відстеження часу"""
     
@@ -27,6 +33,12 @@ class StatisticsGenerator:
             # Якщо не вийшло - без мікросекунд
             return datetime.strptime(datetime_str, '%Y-%m-%dT%H:%M:%S')
         
+    def _duration(self, session, live):
+        """Тривалість сесії; для сесії, що йде, - час до останнього heartbeat"""
+        if live is not None and session['id'] == live['session_id']:
+            return live['live_duration']
+        return session['duration'] or 0
+
     def get_daily_stats(self, days=30, project_id=None):
         """Отримати статистику по днях"""
         end_date = datetime.now()
@@ -41,11 +53,12 @@ class StatisticsGenerator:
         if project_id is not None:
             sessions = [s for s in sessions if s['project_id'] == project_id]
         
+        live = self.db.get_live_session()
         daily_data = defaultdict(lambda: {'duration': 0, 'cost': 0, 'sessions': 0})
         
         for session in sessions:
             date = self._parse_datetime(session['start_time']).date()
-            daily_data[date]['duration'] += session['duration']
+            daily_data[date]['duration'] += self._duration(session, live)
             daily_data[date]['cost'] += (session['cost'] if session['cost'] else 0)
             daily_data[date]['sessions'] += 1
             
@@ -65,11 +78,12 @@ class StatisticsGenerator:
         if project_id is not None:
             sessions = [s for s in sessions if s['project_id'] == project_id]
         
+        live = self.db.get_live_session()
         project_data = defaultdict(lambda: {'duration': 0, 'cost': 0})
         
         for session in sessions:
             project = session['project_name'] if session['project_name'] else 'Без проєкту'
-            project_data[project]['duration'] += session['duration']
+            project_data[project]['duration'] += self._duration(session, live)
             project_data[project]['cost'] += (session['cost'] if session['cost'] else 0)
             
         return project_data
@@ -88,12 +102,13 @@ class StatisticsGenerator:
         if project_id is not None:
             sessions = [s for s in sessions if s['project_id'] == project_id]
         
+        live = self.db.get_live_session()
         hourly_data = defaultdict(float)
         
         for session in sessions:
             start = self._parse_datetime(session['start_time'])
             hour = start.hour
-            hourly_data[hour] += session['duration'] / 3600  # В годинах
+            hourly_data[hour] += self._duration(session, live) / 3600  # В годинах
             
         return hourly_data
     
@@ -124,25 +139,54 @@ class StatisticsGenerator:
             current_week = [s for s in current_week if s['project_id'] == project_id]
             previous_week = [s for s in previous_week if s['project_id'] == project_id]
         
+        live = self.db.get_live_session()
         current_data = defaultdict(float)
         previous_data = defaultdict(float)
         
         for session in current_week:
             day = self._parse_datetime(session['start_time']).weekday()
-            current_data[day] += session['duration'] / 3600
+            current_data[day] += self._duration(session, live) / 3600
             
         for session in previous_week:
             day = self._parse_datetime(session['start_time']).weekday()
-            previous_data[day] += session['duration'] / 3600
+            previous_data[day] += self._duration(session, live) / 3600
             
         return current_data, previous_data
     
+    def _period_bounds(self, days):
+        """Межі періоду для зведень у форматі start_time (ISO)"""
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=days)
+        return (
+            start_date.strftime('%Y-%m-%dT00:00:00'),
+            end_date.strftime('%Y-%m-%dT23:59:59')
+        )
+    
+    def get_company_distribution(self, days=30, project_id=None):
+        """Час і вартість по компаніях (групування та вартість рахує SQL)"""
+        start, end = self._period_bounds(days)
+        rows = self.db.get_company_rollup(start, end, project_id, include_live=True)
+        return {
+            (row['name'] or 'Без компанії'): {'duration': row['duration'], 'cost': row['cost']}
+            for row in rows
+        }
+    
+    def get_work_type_distribution(self, days=30, project_id=None):
+        """Час і вартість по видах робіт (групування та вартість рахує SQL)"""
+        start, end = self._period_bounds(days)
+        rows = self.db.get_work_type_rollup(start, end, project_id, include_live=True)
+        return {
+            (row['name'] or 'Без виду робіт'): {'duration': row['duration'], 'cost': row['cost']}
+            for row in rows
+        }
+    
     def format_duration(self, seconds):
         """Форматування тривалості"""
         hours = int(seconds // 3600)
         minutes = int((seconds % 3600) // 60)
         return f"{hours}г {minutes}хв"
     
+    @profiled("create_dashboard")
     def create_dashboard(self, period_days=30, project_id=None):
         """Створити дашборд з усіма графіками"""
         # Налаштування стилю
@@ -158,7 +202,7 @@ class StatisticsGenerator:
                     break
         
         # Створюємо фігуру з підграфіками
-        fig = plt.figure(figsize=(16, 10))
+        fig = plt.figure(figsize=(16, 14))
         title = f'Статистика відстеження часу (останні {period_days} днів)'
         if project_name:
             title += f' - {project_name}'
@@ -168,29 +212,43 @@ class StatisticsGenerator:
         plt.rcParams['font.sans-serif'] = ['Arial', 'Helvetica', 'DejaVu Sans']
         
         # 1. Графік по днях (лінійний)
-        ax1 = plt.subplot(2, 3, 1)
+        ax1 = plt.subplot(3, 3, 1)
         self._plot_daily_trend(ax1, period_days, project_id)
         
         # 2. Розподіл по проєктах (кругова діаграма)
-        ax2 = plt.subplot(2, 3, 2)
+        ax2 = plt.subplot(3, 3, 2)
         self._plot_project_pie(ax2, period_days, project_id)
         
         # 3. Розподіл по годинах (стовпчикова)
-        ax3 = plt.subplot(2, 3, 3)
+        ax3 = plt.subplot(3, 3, 3)
         self._plot_hourly_distribution(ax3, period_days, project_id)
         
         # 4. Порівняння тижнів (групова стовпчикова)
-        ax4 = plt.subplot(2, 3, 4)
+        ax4 = plt.subplot(3, 3, 4)
         self._plot_weekly_comparison(ax4, project_id)
         
         # 5. Кумулятивна статистика (площа)
-        ax5 = plt.subplot(2, 3, 5)
+        ax5 = plt.subplot(3, 3, 5)
         self._plot_cumulative(ax5, period_days, project_id)
         
         # 6. Топ проєкти по вартості (горизонтальна стовпчикова)
-        ax6 = plt.subplot(2, 3, 6)
+        ax6 = plt.subplot(3, 3, 6)
         self._plot_top_projects(ax6, period_days, project_id)
         
+        # 7. Час і вартість по компаніях (горизонтальна стовпчикова)
+        ax7 = plt.subplot(3, 3, 7)
+        self._plot_rollup(ax7, self.get_company_distribution(period_days, project_id),
+                          'Компанії: час і вартість', '#F18F01')
+        
+        # 8. Час і вартість по видах робіт (горизонтальна стовпчикова)
+        ax8 = plt.subplot(3, 3, 8)
+        self._plot_rollup(ax8, self.get_work_type_distribution(period_days, project_id),
+                          'Види робіт: час і вартість', '#6A994E')
+        
+        # 9. Частка вартості по компаніях (кругова діаграма)
+        ax9 = plt.subplot(3, 3, 9)
+        self._plot_company_cost_share(ax9, period_days, project_id)
+        
         plt.tight_layout()
         return fig
     
@@ -363,6 +421,46 @@ class StatisticsGenerator:
         for i, cost in enumerate(costs):
             ax.text(cost, i, f' ₴{cost:.0f}', va='center', fontsize=9)
     
+    def _plot_rollup(self, ax, data, title, color):
+        """Години по групах зведення з підписом вартості"""
+        if not data:
+            ax.text(0.5, 0.5, 'Немає даних', ha='center', va='center')
+            ax.set_title(title)
+            return
+        
+        # Топ-8 груп за часом (зведення вже відсортоване SQL)
+        items = list(data.items())[:8]
+        names = [name for name, _ in items][::-1]
+        hours = [values['duration'] / 3600 for _, values in items][::-1]
+        costs = [values['cost'] for _, values in items][::-1]
+        
+        ax.barh(names, hours, color=color, alpha=0.8)
+        
+        ax.set_title(title, fontweight='bold')
+        ax.set_xlabel('Години')
+        ax.grid(True, alpha=0.3, axis='x')
+        
+        for i, (value, cost) in enumerate(zip(hours, costs)):
+            label = f' {value:.1f}г'
+            if cost > 0:
+                label += f' · ₴{cost:.0f}'
+            ax.text(value, i, label, va='center', fontsize=8)
+    
+    def _plot_company_cost_share(self, ax, days, project_id=None):
+        """Частка вартості по компаніях"""
+        company_data = self.get_company_distribution(days, project_id)
+        costs = [(name, data['cost']) for name, data in company_data.items() if data['cost'] > 0]
+        
+        if not costs:
+            ax.text(0.5, 0.5, 'Немає даних про вартість', ha='center', va='center')
+            ax.set_title('Вартість по компаніях')
+            return
+        
+        colors = ['#2E86AB', '#F18F01', '#A23B72', '#C73E1D', '#6A994E', '#BC4B51']
+        ax.pie([c for _, c in costs], labels=[n for n, _ in costs], autopct='%1.1f%%',
+               colors=colors, startangle=90, textprops={'fontsize': 9})
+        ax.set_title('Вартість по компаніях', fontweight='bold')
+    
     def show_statistics(self, period_days=30, project_id=None):
         """Показати вікно статистики"""
         fig = self.create_dashboard(period_days, project_id)
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+Индекс автодополнения задач с ранжированием по frecency
+(частота использования, взвешенная по давности).
+
+Индекс строится один раз из task_names и истории сессий, затем
+обновляется инкрементально при старте сессий. Все запросы
+(поиск по префиксу, последняя задача проекта) обслуживаются из памяти.
+"""
+
+from bisect import bisect_left, insort
+from datetime import datetime
+import heapq
+
+# Вес использования удваивается каждые HALF_LIFE_DAYS дней "вперёд":
+# использование двухнедельной давности весит вдвое меньше сегодняшнего.
+HALF_LIFE_DAYS = 14.0
+
+# Префикс, который сортируется после любого реального продолжения строки
+_PREFIX_END = "\U0010ffff"
+
+
+class TaskFrecencyIndex:
+    """
+    Frecency-индекс названий задач, глобально и по проектам.
+
+    Чтобы не пересчитывать затухание всех записей при каждом использовании,
+    вес хранится относительно фиксированной эпохи: w = 2 ** ((t - epoch) / half_life).
+    Новое использование просто прибавляет свой вес, а порядок сумм совпадает
+    с порядком "настоящих" затухающих оценок.
+    """
+
+    def __init__(self, half_life_days=HALF_LIFE_DAYS, epoch=None):
+        self.half_life_seconds = half_life_days * 86400.0
+        self.epoch = (epoch or datetime.now()).timestamp()
+        self._names = {}  # task_name_id -> название
+        self._keys = []  # отсортированные (casefold-название, task_name_id)
+        self._global = {}  # task_name_id -> вес
+        self._by_project = {}  # project_id -> {task_name_id: вес}
+        self._last = {}  # project_id -> (start_time ISO, task_name_id)
+        self._global_top = None  # кеш топа для пустого префикса
+
+    @classmethod
+    def from_database(cls, db, half_life_days=HALF_LIFE_DAYS):
+        """Построить индекс из task_names и агрегированной истории сессий"""
+        index = cls(half_life_days)
+        for row in db.get_task_name_ids():
+            index._add_name(row["id"], row["name"])
+
+        day_weights = {}
+        for row in db.get_task_usage_by_day():
+            day = row["day"]
+            weight = day_weights.get(day)
+            if weight is None:
+                try:
+                    weight = index._weight(datetime.fromisoformat(day).timestamp())
+                except ValueError:
+                    weight = 0.0
+                day_weights[day] = weight
+            index._add_weight(row["project_id"], row["task_name_id"], row["uses"] * weight)
+            index._update_last(row["project_id"], row["task_name_id"], row["last_start"])
+        return index
+
+    # ============================================
+    # Обновление
+    # ============================================
+
+    def record_use(self, project_id, task_name_id, name, when=None):
+        """Учесть новое использование задачи (вызывается при старте сессии)"""
+        if task_name_id is None:
+            return
+        when = when or datetime.now()
+        if task_name_id not in self._names:
+            self._add_name(task_name_id, name)
+        self._add_weight(project_id, task_name_id, self._weight(when.timestamp()))
+        self._update_last(project_id, task_name_id, when.isoformat())
+
+    def rename(self, task_name_id, new_name):
+        """Переименование задачи: меняется только ключ поиска"""
+        old_name = self._names.get(task_name_id)
+        if old_name is None:
+            self._add_name(task_name_id, new_name)
+            return
+        self._keys.pop(bisect_left(self._keys, (old_name.casefold(), task_name_id)))
+        self._names[task_name_id] = new_name
+        insort(self._keys, (new_name.casefold(), task_name_id))
+
+    def forget(self, task_name_id):
+        """Удалить задачу из индекса (после удаления из task_names)"""
+        name = self._names.pop(task_name_id, None)
+        if name is None:
+            return
+        self._keys.pop(bisect_left(self._keys, (name.casefold(), task_name_id)))
+        self._global.pop(task_name_id, None)
+        for scores in self._by_project.values():
+            scores.pop(task_name_id, None)
+        for project_id, (_, last_id) in list(self._last.items()):
+            if last_id == task_name_id:
+                del self._last[project_id]
+        self._global_top = None
+
+    # ============================================
+    # Запросы
+    # ============================================
+
+    def suggest(self, prefix, project_id=None, limit=8):
+        """
+        Названия задач, начинающиеся с prefix (без учёта регистра).
+        Сначала идут задачи проекта по их frecency в проекте, затем остальные
+        по глобальной frecency.
+        """
+        project_scores = self._by_project.get(project_id, {}) if project_id else {}
+        global_scores = self._global
+
+        if not prefix:
+            ranked = heapq.nlargest(
+                limit, project_scores, key=project_scores.__getitem__
+            )
+            if len(ranked) < limit:
+                seen = set(ranked)
+                for task_name_id in self._top_global(limit + len(ranked)):
+                    if task_name_id not in seen:
+                        ranked.append(task_name_id)
+                        if len(ranked) == limit:
+                            break
+            return [self._names[i] for i in ranked]
+
+        key = prefix.casefold()
+        lo = bisect_left(self._keys, (key,))
+        hi = bisect_left(self._keys, (key + _PREFIX_END,), lo)
+        if lo == hi:
+            return []
+        candidates = (task_name_id for _, task_name_id in self._keys[lo:hi])
+        ranked = heapq.nlargest(
+            limit,
+            candidates,
+            key=lambda i: (project_scores.get(i, 0.0), global_scores.get(i, 0.0)),
+        )
+        return [self._names[i] for i in ranked]
+
+    def last_task_for_project(self, project_id):
+        """Название последней задачи проекта или None"""
+        last = self._last.get(project_id)
+        if last is None:
+            return None
+        return self._names.get(last[1])
+
+    def __len__(self):
+        return len(self._names)
+
+    # ============================================
+    # Внутренние методы
+    # ============================================
+
+    def _weight(self, timestamp):
+        return 2.0 ** ((timestamp - self.epoch) / self.half_life_seconds)
+
+    def _add_name(self, task_name_id, name):
+        self._names[task_name_id] = name
+        insort(self._keys, (name.casefold(), task_name_id))
+
+    def _add_weight(self, project_id, task_name_id, weight):
+        if task_name_id not in self._names:
+            return
+        self._global[task_name_id] = self._global.get(task_name_id, 0.0) + weight
+        if project_id is not None:
+            scores = self._by_project.setdefault(project_id, {})
+            scores[task_name_id] = scores.get(task_name_id, 0.0) + weight
+        self._global_top = None
+
+    def _update_last(self, project_id, task_name_id, start_time):
+        if project_id is None or not start_time:
+            return
+        last = self._last.get(project_id)
+        if last is None or start_time >= last[0]:
+            self._last[project_id] = (start_time, task_name_id)
+
+    def _top_global(self, limit):
+        if self._global_top is None or len(self._global_top) < limit:
+            self._global_top = heapq.nlargest(
+                max(limit, 16), self._global, key=self._global.__getitem__
+            )
+        return self._global_top
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+Модель отображения таблицы «Все задачи».
+
+NSTableView запрашивает значение каждой ячейки при каждой перерисовке
+(прокрутка, ресайз окна). Раньше каждый такой запрос искал проект
+перебором projects_cache, разбирал время через strptime и заново
+форматировал длительность и стоимость.
+
+TaskTableModel готовит строки отображения (TaskRow) один раз на загрузку
+данных: лениво при первом показе строки, дальше - из кэша. Проекты
+проиндексированы по id. Колбэки таблицы сводятся к обращению по индексу.
+Стоимость берётся из сохранённой Session.cost (ставка на момент сессии);
+по текущей ставке проекта считается только то, у чего её ещё нет.
+Модуль не зависит от AppKit.
+"""
+
+from localization import t
+
+# Идентификаторы колонок таблицы (совпадают с NSTableColumn.identifier)
+COLUMNS = ("description", "project", "date", "time", "duration", "cost")
+
+
+def format_hms(seconds):
+    """Секунды в ЧЧ:ММ:СС"""
+    seconds = int(seconds or 0)
+    return f"{seconds // 3600:02d}:{(seconds % 3600) // 60:02d}:{seconds % 60:02d}"
+
+
+class TaskRow:
+    """Готовые строки одной строки таблицы"""
+
+    __slots__ = COLUMNS + ("paid",)
+
+    def __init__(self, description, project, date, time, duration, cost, paid):
+        self.description = description
+        self.project = project
+        self.date = date
+        self.time = time
+        self.duration = duration
+        self.cost = cost
+        self.paid = paid
+
+
+class TaskTableModel:
+    """Сессии (Session) + проекты -> строки отображения с мемоизацией"""
+
+    def __init__(self):
+        self.sessions = []
+        self._rows = []  # TaskRow или None (ещё не форматировалась)
+        self._projects = {}  # id -> (name, hourly_rate)
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def set_projects(self, projects):
+        """Проиндексировать проекты по id; сбрасывает готовые строки"""
+        self._projects = {
+            p["id"]: (p["name"], p["hourly_rate"] or 0) for p in projects
+        }
+        self._rows = [None] * len(self.sessions)
+
+    def set_sessions(self, sessions):
+        """Новые данные: строки будут отформатированы заново при показе"""
+        self.sessions = sessions
+        self._rows = [None] * len(sessions)
+
+    def row(self, index):
+        """TaskRow для строки index (форматируется при первом обращении)"""
+        cached = self._rows[index]
+        if cached is None:
+            cached = self._rows[index] = self._format(self.sessions[index])
+        return cached
+
+    def value(self, index, column):
+        """Строка для ячейки; пустая для неизвестной колонки или строки"""
+        if index < 0 or index >= len(self.sessions):
+            return ""
+        return getattr(self.row(index), column, "")
+
+    def is_paid(self, index):
+        return 0 <= index < len(self.sessions) and self.sessions[index].paid == 1
+
+    def hourly_rate(self, project_id):
+        return self._projects.get(project_id, ("", 0))[1]
+
+    def session_cost(self, session):
+        """Сохранённая стоимость сессии, иначе - по текущей ставке проекта"""
+        if session.cost is not None:
+            return session.cost
+        return session.duration / 3600.0 * self.hourly_rate(session.project_id)
+
+    def totals(self):
+        """(число задач, секунды, стоимость) по всем сессиям модели"""
+        duration = 0
+        cost = 0.0
+        for session in self.sessions:
+            duration += session.duration
+            cost += self.session_cost(session)
+        return len(self.sessions), duration, cost
+
+    def _format(self, session):
+        name = self._projects.get(session.project_id, ("", 0))[0]
+        start = session.start
+        end = session.end
+        if start is None:
+            date = time = ""
+        else:
+            date = start.strftime("%d.%m.%Y")
+            if end is None:
+                time = f"{start.strftime('%H:%M')} - {t('running')}"
+            else:
+                time = f"{start.strftime('%H:%M')} - {end.strftime('%H:%M')}"
+        return TaskRow(
+            session.description or "",
+            name,
+            date,
+            time,
+            format_hms(session.duration),
+            f"${self.session_cost(session):.2f}",
+            session.paid == 1,
+        )
@@ -2,6 +2,9 @@
 # -*- coding: utf-8 -*-
 """
 Скрипт для обновления ставок для существующих проектов
+
+Новая ставка действует с момента запуска: стоимость уже завершённых
+сессий не меняется (см. Database.update_project_rate).
 """
 
 from database import Database